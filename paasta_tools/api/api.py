@@ -19,7 +19,6 @@ import argparse
 import logging
 import os
 
-import requests_cache
 import service_configuration_lib
 from gevent import monkey
 from gevent.wsgi import WSGIServer
@@ -29,6 +28,8 @@ from wsgicors import CORS
 import paasta_tools.api
 from paasta_tools import marathon_tools
 from paasta_tools.api import settings
+from paasta_tools.api.state_cache import ClusterStateCache
+from paasta_tools.mesos_tools import get_mesos_master
 from paasta_tools.utils import load_system_paasta_config
 
 
@@ -95,10 +96,12 @@ def setup_paasta_api():
         marathon_config.get_password(),
     )
 
-    # Set up transparent cache for http API calls. With expire_after, responses
-    # are removed only when the same request is made. Expired storage is not a
-    # concern here. Thus remove_expired_responses is not needed.
-    requests_cache.install_cache("paasta-api", backend="memory", expire_after=5)
+    # Marathon and Mesos state shared by all views, refreshed in the background
+    settings.state_cache = ClusterStateCache(
+        marathon_client=settings.marathon_client,
+        mesos_master=get_mesos_master(),
+    )
+    settings.state_cache.start()
 
 
 def main(argv=None):
@@ -19,3 +19,4 @@ from paasta_tools.utils import DEFAULT_SOA_DIR
 soa_dir = DEFAULT_SOA_DIR
 cluster = None
 marathon_client = None
+state_cache = None
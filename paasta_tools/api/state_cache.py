@@ -0,0 +1,173 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Shared cluster state for the paasta-api server.
+
+Instead of every view asking Marathon and Mesos for the bits it needs, a single
+ClusterStateCache fetches the Marathon app list, launch queue and deployments
+plus the Mesos master state once per refresh interval. All views read from the
+same immutable ClusterStateSnapshot, which lazily builds whatever per-app
+indexes the views ask for.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from paasta_tools import marathon_tools
+
+log = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 5
+
+
+class ClusterStateSnapshot(object):
+    """A point-in-time view of the Marathon and Mesos state.
+
+    App ids are stored without their leading '/', the same form that
+    format_marathon_app_dict returns.
+    """
+
+    def __init__(self, apps, queue, deployments, mesos_state, fetch_time):
+        self.apps = apps
+        self.mesos_state = mesos_state
+        self.fetch_time = fetch_time
+        self.apps_by_id = {app.id.lstrip('/'): app for app in apps}
+        self.queue_by_app_id = {item.app.id.lstrip('/'): item for item in queue}
+        self.deployments_by_app_id = defaultdict(list)
+        for deployment in deployments:
+            for affected_app in deployment.affected_apps:
+                self.deployments_by_app_id[affected_app.lstrip('/')].append(deployment)
+        self._slave_hostnames_by_app_id = None
+        self._lock = threading.Lock()
+
+    def age(self):
+        return time.time() - self.fetch_time
+
+    def get_app(self, app_id):
+        return self.apps_by_id.get(app_id.lstrip('/'))
+
+    def get_app_queue(self, app_id):
+        return self.queue_by_app_id.get(app_id.lstrip('/'))
+
+    def get_matching_appids(self, service, instance):
+        return [
+            app.id for app in marathon_tools.get_matching_apps(service, instance, self.apps)
+        ]
+
+    def get_deploy_status(self, app_id):
+        app = self.get_app(app_id)
+        if app is None:
+            return marathon_tools.MarathonDeployStatus.NotRunning
+        is_overdue, backoff_seconds = marathon_tools.get_app_queue_status_from_queue(
+            self.get_app_queue(app_id),
+        )
+        return marathon_tools.get_marathon_app_deploy_status_from_app_and_queue_status(
+            app=app,
+            is_overdue=is_overdue,
+            backoff_seconds=backoff_seconds,
+            is_deploying=len(self.deployments_by_app_id.get(app_id.lstrip('/'), [])) > 0,
+        )
+
+    def get_slave_hostnames_for_app(self, app_id):
+        """Returns the hostnames of the agents running tasks of app_id.
+
+        The index is built the first time any view asks for it and is then
+        shared by every request served from this snapshot.
+        """
+        with self._lock:
+            if self._slave_hostnames_by_app_id is None:
+                self._slave_hostnames_by_app_id = self._index_slave_hostnames_by_app_id()
+        return self._slave_hostnames_by_app_id.get(app_id.lstrip('/'), set())
+
+    def _index_slave_hostnames_by_app_id(self):
+        hostnames_by_slave_id = {
+            slave['id']: slave['hostname'] for slave in self.mesos_state.get('slaves', [])
+        }
+        index = defaultdict(set)
+        for framework in self.mesos_state.get('frameworks', []):
+            for task in framework.get('tasks', []):
+                if task.get('state') != 'TASK_RUNNING':
+                    continue
+                # Marathon task ids are the app id followed by a task uuid
+                task_app_id = task['id'].rsplit('.', 1)[0]
+                hostname = hostnames_by_slave_id.get(task.get('slave_id'))
+                if hostname is not None:
+                    index[task_app_id].add(hostname)
+        return index
+
+
+class ClusterStateCache(object):
+    """Keeps a ClusterStateSnapshot fresh for all paasta-api views.
+
+    Call start() to refresh in a background thread. Until the first refresh
+    completes, or if the background thread stops refreshing, get_snapshot()
+    falls back to fetching the state on the caller's thread.
+    """
+
+    def __init__(self, marathon_client, mesos_master, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.marathon_client = marathon_client
+        self.mesos_master = mesos_master
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    def fetch_snapshot(self):
+        fetch_time = time.time()
+        apps = marathon_tools.get_all_marathon_apps(self.marathon_client)
+        queue = self.marathon_client.list_queue(embed_last_unused_offers=True)
+        deployments = self.marathon_client.list_deployments()
+        mesos_state = self.mesos_master.fetch("/master/state.json", cached=True).json()
+        return ClusterStateSnapshot(
+            apps=apps,
+            queue=queue,
+            deployments=deployments,
+            mesos_state=mesos_state,
+            fetch_time=fetch_time,
+        )
+
+    def refresh(self):
+        with self._refresh_lock:
+            self._snapshot = self.fetch_snapshot()
+        return self._snapshot
+
+    def is_stale(self, snapshot):
+        # Allow a whole extra interval for the background refresh to land
+        return snapshot is None or snapshot.age() > 2 * self.refresh_interval
+
+    def get_snapshot(self):
+        snapshot = self._snapshot
+        if self.is_stale(snapshot):
+            with self._refresh_lock:
+                # Another request may have refreshed while we waited for the lock
+                snapshot = self._snapshot
+                if self.is_stale(snapshot):
+                    snapshot = self._snapshot = self.fetch_snapshot()
+        return snapshot
+
+    def _refresh_forever(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("Failed to refresh the paasta-api cluster state cache")
+            time.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._refresh_forever, name='ClusterStateCache')
+        self._thread.daemon = True
+        self._thread.start()
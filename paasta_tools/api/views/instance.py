@@ -26,7 +26,6 @@ from paasta_tools.api import settings
 from paasta_tools.api.views.exception import ApiFailure
 from paasta_tools.cli.cmds.status import get_actual_deployments
 from paasta_tools.mesos_tools import get_cached_list_of_running_tasks_from_frameworks
-from paasta_tools.mesos_tools import get_running_tasks_from_frameworks
 from paasta_tools.mesos_tools import get_task
 from paasta_tools.mesos_tools import get_tasks_from_app_id
 from paasta_tools.mesos_tools import select_tasks_by_id
@@ -98,7 +97,7 @@ def adhoc_instance_status(instance_status, service, instance, verbose):
     return cstatus
 
 
-def marathon_job_status(mstatus, client, job_config, verbose):
+def marathon_job_status(mstatus, state, job_config, verbose):
     try:
         app_id = job_config.format_marathon_app_dict()['id']
     except NoDockerImageError:
@@ -108,10 +107,10 @@ def marathon_job_status(mstatus, client, job_config, verbose):
 
     mstatus['app_id'] = app_id
     if verbose is True:
-        mstatus['slaves'] = list({task.slave['hostname'] for task in get_running_tasks_from_frameworks(app_id)})
+        mstatus['slaves'] = list(state.get_slave_hostnames_for_app(app_id))
     mstatus['expected_instance_count'] = job_config.get_instances()
 
-    deploy_status = marathon_tools.get_marathon_app_deploy_status(client, app_id)
+    deploy_status = state.get_deploy_status(app_id)
     mstatus['deploy_status'] = marathon_tools.MarathonDeployStatus.tostring(deploy_status)
 
     # by comparing running count with expected count, callers can figure
@@ -119,16 +118,17 @@ def marathon_job_status(mstatus, client, job_config, verbose):
     if deploy_status == marathon_tools.MarathonDeployStatus.NotRunning:
         mstatus['running_instance_count'] = 0
     else:
-        mstatus['running_instance_count'] = client.get_app(app_id).tasks_running
+        mstatus['running_instance_count'] = state.get_app(app_id).tasks_running
 
     if deploy_status == marathon_tools.MarathonDeployStatus.Delayed:
-        _, backoff_seconds = marathon_tools.get_app_queue_status(client, app_id)
+        _, backoff_seconds = marathon_tools.get_app_queue_status_from_queue(state.get_app_queue(app_id))
         mstatus['backoff_seconds'] = backoff_seconds
 
 
 def marathon_instance_status(instance_status, service, instance, verbose):
     mstatus = {}
-    apps = marathon_tools.get_matching_appids(service, instance, settings.marathon_client)
+    state = settings.state_cache.get_snapshot()
+    apps = state.get_matching_appids(service, instance)
     job_config = marathon_tools.load_marathon_service_config(
         service, instance, settings.cluster, soa_dir=settings.soa_dir,
     )
@@ -137,7 +137,8 @@ def marathon_instance_status(instance_status, service, instance, verbose):
     mstatus['app_count'] = len(apps)
     mstatus['desired_state'] = job_config.get_desired_state()
     mstatus['bounce_method'] = job_config.get_bounce_method()
-    marathon_job_status(mstatus, settings.marathon_client, job_config, verbose)
+    mstatus['cache_age_seconds'] = state.age()
+    marathon_job_status(mstatus, state, job_config, verbose)
     return mstatus
 
 
@@ -225,12 +226,11 @@ def instance_tasks(request):
 def instance_delay(request):
     service = request.swagger_data.get('service')
     instance = request.swagger_data.get('instance')
-    client = settings.marathon_client
     job_config = marathon_tools.load_marathon_service_config(
         service, instance, settings.cluster, soa_dir=settings.soa_dir,
     )
     app_id = job_config.format_marathon_app_dict()['id']
-    app_queue = marathon_tools.get_app_queue(client, app_id)
+    app_queue = settings.state_cache.get_snapshot().get_app_queue(app_id)
     unused_offers_summary = marathon_tools.summarize_unused_offers(app_queue)
 
     if len(unused_offers_summary) != 0:
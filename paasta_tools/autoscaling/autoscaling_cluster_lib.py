@@ -35,7 +35,7 @@ from paasta_tools.mesos_tools import get_mesos_master
 from paasta_tools.mesos_tools import get_mesos_task_count_by_slave
 from paasta_tools.mesos_tools import slave_pid_to_ip
 from paasta_tools.metrics.metastatus_lib import get_resource_utilization_by_grouping
-from paasta_tools.paasta_maintenance import is_safe_to_kill
+from paasta_tools.paasta_maintenance import get_hosts_safe_to_kill
 from paasta_tools.utils import load_system_paasta_config
 from paasta_tools.utils import Timeout
 from paasta_tools.utils import TimeoutError
@@ -57,6 +57,7 @@ AutoscalingInfo = namedtuple(
 CLUSTER_METRICS_PROVIDER_KEY = 'cluster_metrics_provider'
 DEFAULT_TARGET_UTILIZATION = 0.8  # decimal fraction
 DEFAULT_DRAIN_TIMEOUT = 600  # seconds
+DRAIN_POLL_INTERVAL = 5  # seconds
 
 AWS_SPOT_MODIFY_TIMEOUT = 30
 MISSING_SLAVE_PANIC_THRESHOLD = .3
@@ -81,6 +82,107 @@ class Timer(object):
         return self.last_start + self.timeout - datetime.now()
 
 
+class DrainPoller(object):
+    """Checks which draining slaves are safe to kill, for all of them at once.
+
+    Every coroutine waiting for a slave to drain watches its hostname and then
+    awaits wait_for_next_poll(). However many slaves are draining, each poll
+    makes a single round of maintenance and mesos state requests.
+    """
+
+    def __init__(self, interval=DRAIN_POLL_INTERVAL):
+        self.interval = interval
+        self.hostnames = set()
+        self.safe_to_kill = set()
+        self.last_poll = None
+        self._next_poll = None
+
+    def watch(self, hostname):
+        self.hostnames.add(hostname)
+
+    def unwatch(self, hostname):
+        self.hostnames.discard(hostname)
+        self.safe_to_kill.discard(hostname)
+
+    def is_safe_to_kill(self, hostname):
+        return hostname in self.safe_to_kill
+
+    def poll(self):
+        self.last_poll = time.time()
+        if self.hostnames:
+            # Pollers of other autoscalers in this process share the maintenance state
+            self.safe_to_kill = get_hosts_safe_to_kill(set(self.hostnames), max_age=self.interval)
+        else:
+            self.safe_to_kill = set()
+
+    async def _poll_when_due(self):
+        if self.last_poll is not None:
+            delay = self.last_poll + self.interval - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self.poll()
+
+    async def wait_for_next_poll(self):
+        """Waits for the next poll, starting it if no other coroutine has yet."""
+        if self._next_poll is None or self._next_poll.done():
+            self._next_poll = asyncio.ensure_future(self._poll_when_due())
+        await asyncio.shield(self._next_poll)
+
+
+class AutoscalingIndex(object):
+    """Lookups over the mesos state and EC2 instances of one autoscaler run.
+
+    A single index is shared by every scaler in a run, so the slaves are
+    grouped once rather than once per scaler, and each EC2 instance is only
+    described once however many times the scalers ask for it.
+    """
+
+    def __init__(self, mesos_state=None):
+        self.mesos_state = None
+        self.slaves_by_id = {}
+        self.slaves_by_pool = {}
+        self._slaves_by_ip = None
+        self.instances_by_id = {}
+        self._utilization_by_pool_region = None
+        if mesos_state is not None:
+            self.index_mesos_state(mesos_state)
+
+    def index_mesos_state(self, mesos_state):
+        if mesos_state is self.mesos_state:
+            return
+        self.mesos_state = mesos_state
+        self.slaves_by_id = {}
+        self.slaves_by_pool = defaultdict(dict)
+        self._slaves_by_ip = None
+        self._utilization_by_pool_region = None
+        for slave in mesos_state.get('slaves', []):
+            self.slaves_by_id[slave['id']] = slave
+            self.slaves_by_pool[slave['attributes'].get('pool', 'default')][slave['id']] = slave
+
+    def get_slave_by_ip(self, ip):
+        if self._slaves_by_ip is None:
+            self._slaves_by_ip = {
+                slave_pid_to_ip(slave['pid']): slave for slave in self.slaves_by_id.values()
+            }
+        return self._slaves_by_ip.get(ip)
+
+    def get_pool_slaves(self, pool):
+        """Returns a dict of slave id to slave for the slaves in pool"""
+        return dict(self.slaves_by_pool.get(pool, {}))
+
+    def add_instance_descriptions(self, instance_descriptions):
+        for instance in instance_descriptions:
+            self.instances_by_id[instance['InstanceId']] = instance
+
+    def get_utilization_by_pool_region(self):
+        if self._utilization_by_pool_region is None:
+            self._utilization_by_pool_region = get_resource_utilization_by_grouping(
+                lambda slave: (slave['attributes']['pool'], slave['attributes']['datacenter'],),
+                self.mesos_state,
+            )
+        return self._utilization_by_pool_region
+
+
 class ResourceLogMixin(object):
 
     @property
@@ -101,6 +203,8 @@ class ClusterAutoscaler(ResourceLogMixin):
         utilization_error,
         log_level=None,
         draining_enabled=True,
+        drain_poller=None,
+        index=None,
     ):
         self.resource = resource
         self.pool_settings = pool_settings
@@ -108,6 +212,8 @@ class ClusterAutoscaler(ResourceLogMixin):
         self.dry_run = dry_run
         self.utilization_error = utilization_error
         self.draining_enabled = draining_enabled
+        self.drain_poller = drain_poller if drain_poller is not None else DrainPoller()
+        self.index = index if index is not None else AutoscalingIndex()
         if log_level is not None:
             self.log.setLevel(log_level)
 
@@ -169,7 +275,7 @@ class ClusterAutoscaler(ResourceLogMixin):
         return instance_descriptions
 
     def get_instance_ips(self, instances, region=None):
-        instance_descriptions = self.describe_instances(
+        instance_descriptions = self.instance_descriptions_for_instance_ids(
             [instance['InstanceId'] for instance in instances],
             region=region,
         )
@@ -194,20 +300,19 @@ class ClusterAutoscaler(ResourceLogMixin):
         self.log.info("Deleted Resource config {}".format(configs_to_delete[0]))
 
     def get_aws_slaves(self, mesos_state):
+        self.index.index_mesos_state(mesos_state)
         instance_ips = self.get_instance_ips(self.instances, region=self.resource['region'])
-        slaves = {
-            slave['id']: slave for slave in mesos_state.get('slaves', [])
-            if slave_pid_to_ip(slave['pid']) in instance_ips and
-            slave['attributes'].get('pool', 'default') == self.resource['pool']
-        }
+        pool_slaves = self.index.slaves_by_pool.get(self.resource['pool'], {})
+        slaves = {}
+        for ip in instance_ips:
+            slave = self.index.get_slave_by_ip(ip)
+            if slave is not None and slave['id'] in pool_slaves:
+                slaves[slave['id']] = slave
         return slaves
 
     def get_pool_slaves(self, mesos_state):
-        slaves = {
-            slave['id']: slave for slave in mesos_state.get('slaves', [])
-            if slave['attributes'].get('pool', 'default') == self.resource['pool']
-        }
-        return slaves
+        self.index.index_mesos_state(mesos_state)
+        return self.index.get_pool_slaves(self.resource['pool'])
 
     def check_expected_slaves(self, slaves, expected_instances):
         current_instances = len(slaves)
@@ -241,7 +346,7 @@ class ClusterAutoscaler(ResourceLogMixin):
         if not should_drain:
             self.log.info("Not draining, waiting %s longer before killing" % timer.left())
             return False
-        if is_safe_to_kill(hostname):
+        if self.drain_poller.is_safe_to_kill(hostname):
             self.log.info("Slave %s is ready to kill, with %s left on timer" % (hostname, timer.left()))
             timer.start()
             return True
@@ -264,6 +369,8 @@ class ClusterAutoscaler(ResourceLogMixin):
             slave.hostname,
             slave.ip,
         ))
+        if should_drain and not dry_run:
+            self.drain_poller.watch(slave.hostname)
         try:
             # This loop should always finish because the maintenance window should trigger is_ready_to_kill
             # being true. Just in case though we set a timeout (from timer) and terminate anyway
@@ -291,8 +398,8 @@ class ClusterAutoscaler(ResourceLogMixin):
                     break
                 else:
                     self.log.info("Instance {}: NOT ready to kill".format(instance_id))
-                self.log.debug("Waiting 5 seconds and then checking again")
-                await asyncio.sleep(5)
+                self.log.debug("Waiting for the next drain poll and then checking again")
+                await self.drain_poller.wait_for_next_poll()
         except TimeoutError:
             self.log.error("Timed out after {} waiting to drain {}, now terminating anyway".format(
                 timer.timeout,
@@ -305,8 +412,10 @@ class ClusterAutoscaler(ResourceLogMixin):
                     pass
                 else:
                     raise
+        finally:
+            self.drain_poller.unwatch(slave.hostname)
 
-    async def scale_resource(self, current_capacity, target_capacity):
+    async def scale_resource(self, current_capacity, target_capacity, mesos_state=None):
         """Scales an AWS resource based on current and target capacity
         If scaling up we just set target capacity and let AWS take care of the rest
         If scaling down we pick the slaves we'd prefer to kill, put them in maintenance
@@ -315,6 +424,7 @@ class ClusterAutoscaler(ResourceLogMixin):
 
         :param current_capacity: integer current resource capacity
         :param target_capacity: target resource capacity
+        :param mesos_state: full mesos master state to count tasks per slave from (fetched if None)
         """
         target_capacity = int(target_capacity)
         delta = target_capacity - current_capacity
@@ -326,7 +436,8 @@ class ClusterAutoscaler(ResourceLogMixin):
             self.set_capacity(target_capacity)
             return
         elif delta < 0:
-            mesos_state = get_mesos_master().state_summary()
+            if mesos_state is None:
+                mesos_state = get_mesos_master().state
             slaves_list = get_mesos_task_count_by_slave(mesos_state, pool=self.resource['pool'])
             filtered_slaves = self.filter_aws_slaves(slaves_list)
             killable_capacity = round(sum([slave.instance_weight for slave in filtered_slaves]), 2)
@@ -408,52 +519,78 @@ class ClusterAutoscaler(ResourceLogMixin):
                 undrain([drain_host_string])
 
     def filter_aws_slaves(self, slaves_list):
-        ips = self.get_instance_ips(self.instances, region=self.resource['region'])
-        self.log.debug("IPs in AWS resources: {}".format(ips))
+        instance_descriptions = self.instance_descriptions_for_instance_ids(
+            [instance['InstanceId'] for instance in self.instances],
+        )
+        descriptions_by_ip = {}
+        for description in instance_descriptions:
+            try:
+                ip = description['PrivateIpAddress']
+            except KeyError:
+                self.log.warning("Instance {} does not have an IP. This normally means it has been"
+                                 " terminated".format(description['InstanceId']))
+                continue
+            assert ip not in descriptions_by_ip, (
+                "There should be only one instance with the same IP. "
+                "Found instances %s with the same ip %s"
+                % (
+                    ",".join([descriptions_by_ip[ip]['InstanceId'], description['InstanceId']]),
+                    ip,
+                )
+            )
+            descriptions_by_ip[ip] = description
+        self.log.debug("IPs in AWS resources: {}".format(list(descriptions_by_ip.keys())))
         slaves = [
             slave for slave in slaves_list
-            if slave_pid_to_ip(slave['task_counts'].slave['pid']) in ips
+            if slave_pid_to_ip(slave['task_counts'].slave['pid']) in descriptions_by_ip
         ]
-        slave_ips = [slave_pid_to_ip(slave['task_counts'].slave['pid']) for slave in slaves]
         instance_type_weights = self.get_instance_type_weights()
         instance_statuses = self.instance_status_for_instance_ids(
-            instance_ids=[instance['InstanceId'] for instance in self.instances],
+            instance_ids=[
+                descriptions_by_ip[slave_pid_to_ip(slave['task_counts'].slave['pid'])]['InstanceId']
+                for slave in slaves
+            ],
         )
-        instance_descriptions = self.instance_descriptions_for_ips(slave_ips)
+        statuses_by_instance_id = {
+            status['InstanceId']: status for status in instance_statuses['InstanceStatuses']
+        }
 
         paasta_aws_slaves = []
         for slave in slaves:
-            slave_ip = slave_pid_to_ip(slave['task_counts'].slave['pid'])
-            matching_descriptions = self.filter_instance_description_for_ip(slave_ip, instance_descriptions)
-            if matching_descriptions:
-                assert len(matching_descriptions) == 1, (
-                    "There should be only one instance with the same IP."
-                    "Found instances %s with the same ip %d"
-                    % (
-                        ",".join(
-                            [x['InstanceId'] for x in matching_descriptions],
-                        ),
-                        slave_ip,
-                    )
-                )
-                description = matching_descriptions[0]
-                matching_status = self.filter_instance_status_for_instance_id(
-                    instance_id=description['InstanceId'],
-                    instance_statuses=instance_statuses,
-                )
-                assert len(matching_status) == 1, "There should be only one InstanceStatus per instance"
-            else:
-                description = None
-
+            description = descriptions_by_ip[slave_pid_to_ip(slave['task_counts'].slave['pid'])]
+            assert description['InstanceId'] in statuses_by_instance_id, (
+                "There should be only one InstanceStatus per instance"
+            )
             paasta_aws_slaves.append(PaastaAwsSlave(
                 slave=slave,
-                instance_status=matching_status[0],
+                instance_status=statuses_by_instance_id[description['InstanceId']],
                 instance_description=description,
                 instance_type_weights=instance_type_weights,
             ))
 
         return paasta_aws_slaves
 
+    def instance_descriptions_for_instance_ids(self, instance_ids, region=None):
+        """
+        Return a list of instance descriptions. Instances already described
+        during this run are served from the shared index, the rest are
+        described in batches of 199.
+        """
+        region = region or self.resource['region']
+        undescribed = [
+            instance_id for instance_id in instance_ids
+            if instance_id not in self.index.instances_by_id
+        ]
+        for start in range(0, len(undescribed), 199):
+            self.index.add_instance_descriptions(self.describe_instances(
+                instance_ids=undescribed[start:start + 199],
+                region=region,
+            ) or [])
+        return [
+            self.index.instances_by_id[instance_id] for instance_id in instance_ids
+            if instance_id in self.index.instances_by_id
+        ]
+
     def instance_status_for_instance_ids(self, instance_ids):
         """
         Return a list of instance statuses. Batch the API calls into
@@ -474,33 +611,6 @@ class ClusterAutoscaler(ResourceLogMixin):
 
         return accumulated
 
-    def instance_descriptions_for_ips(self, ips):
-        all_instances = []
-        for start, stop in zip(range(0, len(ips), 199), range(199, len(ips) + 199, 199)):
-            all_instances += self.describe_instances(
-                instance_ids=[],
-                region=self.resource['region'],
-                instance_filters=[
-                    {
-                        'Name': 'private-ip-address',
-                        'Values': ips[start:stop],
-                    },
-                ],
-            )
-        return all_instances
-
-    def filter_instance_description_for_ip(self, ip, instance_descriptions):
-        return [
-            i for i in instance_descriptions
-            if ip == i['PrivateIpAddress']
-        ]
-
-    def filter_instance_status_for_instance_id(self, instance_id, instance_statuses):
-        return [
-            status for status in instance_statuses['InstanceStatuses']
-            if status['InstanceId'] == instance_id
-        ]
-
     async def downscale_aws_resource(self, filtered_slaves, current_capacity, target_capacity):
         self.log.info("downscale_aws_resource for %s" % filtered_slaves)
         killed_slaves = 0
@@ -903,7 +1013,7 @@ class PaastaAwsSlave(object):
             return 1
 
 
-def get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_state):
+def get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_state, index=None):
     errors = {}
     for identifier, resource in autoscaling_resources.items():
         pool = resource['pool']
@@ -921,6 +1031,7 @@ def get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_s
             region=region,
             pool=pool,
             target_utilization=target_utilization,
+            index=index,
         )
 
     return errors
@@ -936,8 +1047,11 @@ def autoscale_local_cluster(config_folder, dry_run=False, log_level=None):
     autoscaling_draining_enabled = system_config.get_cluster_autoscaling_draining_enabled()
     all_pool_settings = system_config.get_resource_pool_settings()
     mesos_state = get_mesos_master().state
-    utilization_errors = get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_state)
+    index = AutoscalingIndex()
+    utilization_errors = get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_state, index)
     autoscaling_scalers = defaultdict(list)
+    # shared by all scalers so that slaves draining in any resource are checked together
+    drain_poller = DrainPoller()
     for identifier, resource in autoscaling_resources.items():
         pool_settings = all_pool_settings.get(resource['pool'], {})
         try:
@@ -949,6 +1063,8 @@ def autoscale_local_cluster(config_folder, dry_run=False, log_level=None):
                 log_level=log_level,
                 utilization_error=utilization_errors[(resource['region'], resource['pool'])],
                 draining_enabled=autoscaling_draining_enabled,
+                drain_poller=drain_poller,
+                index=index,
             )
             autoscaling_scalers[(resource['region'], resource['pool'])].append(scaler)
         except KeyError:
@@ -1015,7 +1131,7 @@ async def autoscale_cluster_resource(scaler, mesos_state):
     try:
         current, target = scaler.metrics_provider(mesos_state)
         log.info("Target capacity: {}, Capacity current: {}".format(target, current))
-        await scaler.scale_resource(current, target)
+        await scaler.scale_resource(current, target, mesos_state=mesos_state)
     except ClusterAutoscalingError as e:
         log.error('%s: %s' % (scaler.resource['id'], e))
 
@@ -1036,15 +1152,16 @@ def get_autoscaling_info_for_all_resources(mesos_state):
     pool_settings = system_config.get_resource_pool_settings()
     system_config = load_system_paasta_config()
     all_pool_settings = system_config.get_resource_pool_settings()
-    utilization_errors = get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_state)
+    index = AutoscalingIndex()
+    utilization_errors = get_all_utilization_errors(autoscaling_resources, all_pool_settings, mesos_state, index)
     vals = [
-        autoscaling_info_for_resource(resource, pool_settings, mesos_state, utilization_errors)
+        autoscaling_info_for_resource(resource, pool_settings, mesos_state, utilization_errors, index=index)
         for resource in autoscaling_resources.values()
     ]
     return [x for x in vals if x is not None]
 
 
-def autoscaling_info_for_resource(resource, pool_settings, mesos_state, utilization_errors):
+def autoscaling_info_for_resource(resource, pool_settings, mesos_state, utilization_errors, index=None):
     pool_settings.get(resource['pool'], {})
     scaler_ref = get_scaler(resource['type'])
     scaler = scaler_ref(
@@ -1053,6 +1170,7 @@ def autoscaling_info_for_resource(resource, pool_settings, mesos_state, utilizat
         config_folder=None,
         dry_run=True,
         utilization_error=utilization_errors[(resource['region'], resource['pool'])],
+        index=index,
     )
     if not scaler.exists:
         log.info("no scaler for resource {}. ignoring".format(resource['id']))
@@ -1078,12 +1196,18 @@ def get_mesos_utilization_error(
     region,
     pool,
     target_utilization,
+    index=None,
 ):
     try:
-        region_pool_utilization_dict = get_resource_utilization_by_grouping(
-            lambda slave: (slave['attributes']['pool'], slave['attributes']['datacenter'],),
-            mesos_state,
-        )[(pool, region,)]
+        if index is not None:
+            index.index_mesos_state(mesos_state)
+            utilization_by_pool_region = index.get_utilization_by_pool_region()
+        else:
+            utilization_by_pool_region = get_resource_utilization_by_grouping(
+                lambda slave: (slave['attributes']['pool'], slave['attributes']['datacenter'],),
+                mesos_state,
+            )
+        region_pool_utilization_dict = utilization_by_pool_region[(pool, region,)]
     except KeyError:
         log.info("Failed to find utilization for region %s, pool %s, returning 0 error")
         return 0
@@ -12,9 +12,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import array
+import itertools
 import logging
 import struct
 import time
+import zlib
 from collections import namedtuple
 from contextlib import contextmanager
 from datetime import datetime
@@ -43,6 +46,7 @@ from paasta_tools.marathon_tools import is_task_healthy
 from paasta_tools.marathon_tools import load_marathon_config
 from paasta_tools.marathon_tools import load_marathon_service_config
 from paasta_tools.marathon_tools import MESOS_TASK_SPACER
+from paasta_tools.mesos.cluster import get_stats_for_tasks
 from paasta_tools.mesos_tools import get_all_running_tasks
 from paasta_tools.utils import _log
 from paasta_tools.utils import compose_job_id
@@ -78,6 +82,8 @@ DECISION_POLICY_KEY = 'decision_policy'
 
 AUTOSCALING_DELAY = 300
 MAX_TASK_DELTA = 0.3
+# How many mesos agents to fetch task statistics from at once
+MESOS_STATS_WORKERS = 20
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -239,23 +245,37 @@ def proportional_decision_policy(
 
 HISTORICAL_LOAD_SERIALIZATION_FORMAT = 'dd'
 SIZE_PER_HISTORICAL_LOAD_RECORD = struct.calcsize(HISTORICAL_LOAD_SERIALIZATION_FORMAT)
+MAX_HISTORICAL_LOAD_RECORDS = 1000000 // SIZE_PER_HISTORICAL_LOAD_RECORD
+# Starts a compressed historical load. Read as the first timestamp of an uncompressed one, it is a NaN, which
+# time.time() never returns, so the two formats can't be mistaken for each other.
+COMPRESSED_HISTORICAL_LOAD_MAGIC = b'PHLz\x01\x00\xf8\x7f'
 
 
 def zk_historical_load_path(zk_path_prefix):
     return "%s/historical_load" % zk_path_prefix
 
 
-def save_historical_load(historical_load, zk_path_prefix):
+def save_historical_load(historical_load, zk_path_prefix, compress=False):
     with ZookeeperPool() as zk:
-        historical_load_bytes = serialize_historical_load(historical_load)
+        historical_load_bytes = serialize_historical_load(historical_load, compress=compress)
         zk.ensure_path(zk_historical_load_path(zk_path_prefix))
         zk.set(zk_historical_load_path(zk_path_prefix), historical_load_bytes)
 
 
-def serialize_historical_load(historical_load):
-    max_records = 1000000 // SIZE_PER_HISTORICAL_LOAD_RECORD
-    historical_load = historical_load[-max_records:]
-    return b''.join([struct.pack(HISTORICAL_LOAD_SERIALIZATION_FORMAT, *x) for x in historical_load])
+def serialize_historical_load(historical_load, compress=False):
+    """Packs the last MAX_HISTORICAL_LOAD_RECORDS (timestamp, load) pairs of historical_load as doubles.
+
+    With compress, the timestamps are stored before the loads and the bytes of the doubles are grouped by
+    significance before being zlib compressed: neighbouring timestamps and loads share most of their high bytes.
+    deserialize_historical_load reads both formats, so every reader must be upgraded before writing compressed data.
+    """
+    historical_load = historical_load[-MAX_HISTORICAL_LOAD_RECORDS:]
+    values = array.array('d', itertools.chain.from_iterable(historical_load))
+    if not compress:
+        return values.tobytes()
+    columns = values[0::2].tobytes() + values[1::2].tobytes()
+    shuffled = b''.join(columns[i::values.itemsize] for i in range(values.itemsize))
+    return COMPRESSED_HISTORICAL_LOAD_MAGIC + zlib.compress(shuffled, 1)
 
 
 def fetch_historical_load(zk_path_prefix):
@@ -268,18 +288,19 @@ def fetch_historical_load(zk_path_prefix):
 
 
 def deserialize_historical_load(historical_load_bytes):
-    historical_load = []
-
-    for pos in range(0, len(historical_load_bytes), SIZE_PER_HISTORICAL_LOAD_RECORD):
-        historical_load.append(
-            struct.unpack(
-                # unfortunately struct.unpack doesn't like kwargs.
-                HISTORICAL_LOAD_SERIALIZATION_FORMAT,
-                historical_load_bytes[pos:pos + SIZE_PER_HISTORICAL_LOAD_RECORD],
-            ),
-        )
+    values = array.array('d')
+    if not historical_load_bytes.startswith(COMPRESSED_HISTORICAL_LOAD_MAGIC):
+        values.frombytes(historical_load_bytes)
+        return list(zip(values[0::2], values[1::2]))
 
-    return historical_load
+    shuffled = zlib.decompress(historical_load_bytes[len(COMPRESSED_HISTORICAL_LOAD_MAGIC):])
+    columns = bytearray(len(shuffled))
+    column_size = len(shuffled) // values.itemsize
+    for i in range(values.itemsize):
+        columns[i::values.itemsize] = shuffled[i * column_size:(i + 1) * column_size]
+    values.frombytes(columns)
+    records = len(values) // 2
+    return list(zip(values[:records], values[records:]))
 
 
 def get_json_body_from_service(host, port, endpoint, timeout=2):
@@ -428,24 +449,20 @@ def mesos_cpu_metrics_provider(
             last_time = 0.0
             last_cpu_data = []
 
-    monkey.patch_socket()
-    jobs = [gevent.spawn(task.stats_callable) for task in mesos_tasks]
-    gevent.joinall(jobs, timeout=60)
-    mesos_tasks = dict(zip([task['id'] for task in mesos_tasks], [job.value for job in jobs]))
+    mesos_tasks_stats = get_stats_for_tasks(mesos_tasks, max_workers=MESOS_STATS_WORKERS)
 
     current_time = int(datetime.now().strftime('%s'))
     time_delta = current_time - last_time
 
     mesos_cpu_data = {}
-    for task_id, stats in mesos_tasks.items():
-        if stats is not None:
-            try:
-                utime = float(stats['cpus_user_time_secs'])
-                stime = float(stats['cpus_system_time_secs'])
-                limit = float(stats['cpus_limit']) - .1
-                mesos_cpu_data[task_id] = (stime + utime) / limit
-            except KeyError:
-                pass
+    for task_id, stats in mesos_tasks_stats.items():
+        try:
+            utime = float(stats['cpus_user_time_secs'])
+            stime = float(stats['cpus_system_time_secs'])
+            limit = float(stats['cpus_limit']) - .1
+            mesos_cpu_data[task_id] = (stime + utime) / limit
+        except KeyError:
+            pass
 
     if not mesos_cpu_data:
         raise MetricsProviderNoDataError("Couldn't get any cpu data from Mesos")
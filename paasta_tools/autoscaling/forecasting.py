@@ -1,3 +1,5 @@
+import bisect
+
 from paasta_tools.autoscaling.utils import get_autoscaling_component
 from paasta_tools.autoscaling.utils import register_autoscaling_component
 
@@ -32,9 +34,15 @@ def window_historical_load(historical_load, window_begin, window_end):
 
 
 def trailing_window_historical_load(historical_load, window_size):
+    """Returns the datapoints of the last window_size seconds of historical_load.
+
+    historical_load must be in chronological order, as fetch_historical_load returns it, so that the start of the
+    window can be found with a binary search instead of looking at every datapoint.
+    """
     window_end, _ = historical_load[-1]
     window_begin = window_end - window_size
-    return window_historical_load(historical_load, window_begin, window_end)
+    # (window_begin,) sorts before any (window_begin, value) tuple
+    return historical_load[bisect.bisect_left(historical_load, (window_begin,)):]
 
 
 @register_autoscaling_component('moving_average', FORECAST_POLICY_KEY)
@@ -5,10 +5,13 @@ Check the status of chronos jobs. If the last run of the job was a failure, then
 a CRITICAL event to sensu.
 
 - -d <SOA_DIR>, --soa-dir <SOA_DIR>: Specify a SOA config dir to read from
+- -w <WORKERS>, --workers <WORKERS>: How many requests to make to chronos, or events to send to sensu, at once
 """
 import argparse
 import logging
 import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timedelta
 
@@ -27,6 +30,8 @@ from paasta_tools.chronos_tools import load_chronos_job_config
 
 log = logging.getLogger(__name__)
 
+DEFAULT_WORKERS = 10
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description=(
@@ -38,6 +43,11 @@ def parse_args():
         default=DEFAULT_SOA_DIR,
         help="define a different soa config directory",
     )
+    parser.add_argument(
+        '-w', '--workers', dest="workers", type=int,
+        default=DEFAULT_WORKERS,
+        help="number of requests to chronos, or events to sensu, to make at once (default %(default)s)",
+    )
     args = parser.parse_args()
     return args
 
@@ -137,6 +147,23 @@ def sensu_event_for_last_run_state(state):
         raise ValueError('Expected valid LastRunState. Found %s' % state)
 
 
+def index_chronos_jobs(jobs):
+    """Groups chronos jobs, including disabled and temporary ones, by the
+    (service, instance) they run, in one pass over all of them
+
+    :param jobs: a list of jobs, as returned by the chronos client
+    :returns: a dict of {(service, instance): [chronos_job, ...]}
+    """
+    jobs_by_service_instance = defaultdict(list)
+    for job in jobs:
+        try:
+            service_instance = chronos_tools.decompose_job_id(job['name'])
+        except chronos_tools.InvalidJobNameError:
+            continue
+        jobs_by_service_instance[service_instance].append(job)
+    return jobs_by_service_instance
+
+
 def build_service_job_mapping(client, configured_jobs):
     """
     :param client: A Chronos client used for getting the list of running jobs
@@ -147,17 +174,9 @@ def build_service_job_mapping(client, configured_jobs):
         or None if there is no such job
     """
     service_job_mapping = {}
-    all_chronos_jobs = client.list()
+    jobs_by_service_instance = index_chronos_jobs(client.list())
     for job in configured_jobs:
-        # find all the jobs belonging to each service
-        matching_jobs = chronos_tools.filter_chronos_jobs(
-            jobs=all_chronos_jobs,
-            service=job[0],
-            instance=job[1],
-            include_disabled=True,
-            include_temporary=True,
-        )
-        matching_jobs = chronos_tools.sort_jobs(matching_jobs)
+        matching_jobs = chronos_tools.sort_jobs(jobs_by_service_instance.get(tuple(job), []))
         # Only consider the most recent one
         service_job_mapping[job] = matching_jobs[0] if len(matching_jobs) > 0 else None
     return service_job_mapping
@@ -202,6 +221,20 @@ def message_for_status(status, chronos_job_config):
         raise ValueError('unknown sensu status: %s' % status)
 
 
+def get_overdue_next_run(last_run_iso_time, interval_in_seconds):
+    """Returns when the job should have run next, if that is in the past, or None
+
+    :param last_run_iso_time: ISO date and time of the last job run as a string
+    :param interval_in_seconds: the job interval in seconds
+    """
+    if last_run_iso_time is None or interval_in_seconds is None:
+        return None
+    dt_next_run = isodate.parse_datetime(last_run_iso_time) + timedelta(seconds=interval_in_seconds)
+    if dt_next_run >= datetime.now(pytz.utc):
+        return None
+    return dt_next_run
+
+
 def job_is_stuck(last_run_iso_time, interval_in_seconds, client, job_name):
     """Considers that the job is stuck when it hasn't run on time
 
@@ -211,12 +244,10 @@ def job_is_stuck(last_run_iso_time, interval_in_seconds, client, job_name):
     :param job_name: Chronos job name
     :returns: True or False
     """
-    if last_run_iso_time is None or interval_in_seconds is None:
+    dt_next_run = get_overdue_next_run(last_run_iso_time, interval_in_seconds)
+    if dt_next_run is None:
         return False
-    dt_next_run = isodate.parse_datetime(last_run_iso_time) + timedelta(seconds=interval_in_seconds)
     dt_now_utc = datetime.now(pytz.utc)
-    if dt_next_run >= dt_now_utc:
-        return False
     try:
         expected_runtime = int(client.job_stat(job_name)['histogram']['99thPercentile'])
     except KeyError:
@@ -257,6 +288,34 @@ def message_for_stuck_job(
     }
 
 
+def is_ignored_as_disabled(chronos_job):
+    return chronos_job.get('disabled') and not chronos_tools.is_temporary_job(chronos_job)
+
+
+def job_needs_stats(chronos_job_config, chronos_job):
+    """Whether sensu_message_status_for_jobs asks chronos for the stats of the
+    job, which it does to tell whether a job that is late is stuck"""
+    if not chronos_job or is_ignored_as_disabled(chronos_job):
+        return False
+    last_run_time, _ = chronos_tools.get_status_last_run(chronos_job)
+    return get_overdue_next_run(last_run_time, chronos_job_config.get_schedule_interval_in_seconds()) is not None
+
+
+class PrefetchedJobStats(object):
+    """Answers job_stat like a chronos client, from the stats of many jobs
+    fetched concurrently beforehand"""
+
+    def __init__(self, client, job_names, workers=DEFAULT_WORKERS):
+        self.client = client
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            self.job_stats = dict(zip(job_names, executor.map(client.job_stat, job_names)))
+
+    def job_stat(self, name):
+        if name not in self.job_stats:
+            self.job_stats[name] = self.client.job_stat(name)
+        return self.job_stats[name]
+
+
 def sensu_message_status_for_jobs(chronos_job_config, chronos_job, client):
     """
     :param chronos_job_config: an instance of ChronosJobConfig
@@ -273,7 +332,7 @@ def sensu_message_status_for_jobs(chronos_job_config, chronos_job, client):
                       "which means it may not be deployed yet"
                       % (chronos_job_config.service, utils.SPACER, chronos_job_config.instance))
     else:
-        if chronos_job.get('disabled') and not chronos_tools.is_temporary_job(chronos_job):
+        if is_ignored_as_disabled(chronos_job):
             sensu_status = pysensu_yelp.Status.OK
             output = ("Job %s%s%s is disabled - ignoring status." %
                       (chronos_job_config.service, utils.SPACER, chronos_job_config.instance))
@@ -297,6 +356,68 @@ def sensu_message_status_for_jobs(chronos_job_config, chronos_job, client):
     return output, sensu_status
 
 
+def load_chronos_job_configs(service_job_mapping, cluster, soa_dir):
+    """
+    :returns: a list of (chronos_job_config, chronos_job) for the jobs of
+        service_job_mapping whose config could be loaded
+    """
+    checks = []
+    for (service, instance), chronos_job in service_job_mapping.items():
+        try:
+            chronos_job_config = load_chronos_job_config(
+                service=service,
+                instance=instance,
+                cluster=cluster,
+                soa_dir=soa_dir,
+            )
+        except utils.NoDeploymentsAvailable:
+            log.info("Skipping %s because no deployments are available" % service)
+            continue
+        checks.append((chronos_job_config, chronos_job))
+    return checks
+
+
+def check_chronos_jobs(client, checks, workers=DEFAULT_WORKERS):
+    """Evaluates the status of all the jobs at once, fetching the stats of
+    those that might be stuck concurrently
+
+    :param checks: a list of (chronos_job_config, chronos_job)
+    :returns: a list of (chronos_job_config, sensu_output, sensu_status)
+    """
+    job_stats = PrefetchedJobStats(
+        client,
+        [chronos_job['name'] for chronos_job_config, chronos_job in checks if job_needs_stats(
+            chronos_job_config, chronos_job,
+        )],
+        workers=workers,
+    )
+    results = []
+    for chronos_job_config, chronos_job in checks:
+        sensu_output, sensu_status = sensu_message_status_for_jobs(
+            chronos_job_config=chronos_job_config,
+            chronos_job=chronos_job,
+            client=job_stats,
+        )
+        results.append((chronos_job_config, sensu_output, sensu_status))
+    return results
+
+
+def send_events(results, workers=DEFAULT_WORKERS):
+    """Sends the sensu event of each result that has one, a few at a time
+
+    :param results: a list of (chronos_job_config, sensu_output, sensu_status)
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(send_event, chronos_job_config, sensu_status, sensu_output)
+            for chronos_job_config, sensu_output, sensu_status in results
+            if sensu_status is not None
+        ]
+    for future in futures:
+        future.result()
+
+
+@monitoring_tools.use_monitoring_config_cache
 def main():
     args = parse_args()
     soa_dir = args.soa_dir
@@ -309,29 +430,12 @@ def main():
 
     try:
         service_job_mapping = build_service_job_mapping(client, configured_jobs)
-
-        for service_instance, chronos_job in service_job_mapping.items():
-            service, instance = service_instance[0], service_instance[1]
-            try:
-                chronos_job_config = load_chronos_job_config(
-                    service=service,
-                    instance=instance,
-                    cluster=cluster,
-                    soa_dir=soa_dir,
-                )
-            except utils.NoDeploymentsAvailable:
-                log.info("Skipping %s because no deployments are available" % service)
-                continue
-            sensu_output, sensu_status = sensu_message_status_for_jobs(
-                chronos_job_config=chronos_job_config,
-                chronos_job=chronos_job,
-                client=client,
-            )
-            if sensu_status is not None:
-                send_event(chronos_job_config, sensu_status, sensu_output)
+        checks = load_chronos_job_configs(service_job_mapping, cluster, soa_dir)
+        results = check_chronos_jobs(client, checks, workers=args.workers)
     except (chronos.ChronosAPIError) as e:
         log.error("CRITICAL: Unable to contact Chronos! Error: %s" % e)
         sys.exit(2)
+    send_events(results, workers=args.workers)
 
 
 if __name__ == '__main__':
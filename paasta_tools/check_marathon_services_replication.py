@@ -357,6 +357,7 @@ def check_service_replication(
         )
 
 
+@monitoring_tools.use_monitoring_config_cache
 def main():
     args = parse_args()
 
@@ -374,7 +375,7 @@ def main():
     config = marathon_tools.load_marathon_config()
     client = marathon_tools.get_marathon_client(config.get_url(), config.get_username(), config.get_password())
     all_tasks = client.list_tasks()
-    mesos_slaves = get_slaves()
+    mesos_slaves = get_slaves(use_mesos_cache=True)
     smartstack_replication_checker = SmartstackReplicationChecker(mesos_slaves, system_paasta_config)
     for service, instance in service_instances:
 
@@ -16,6 +16,8 @@ import csv
 import datetime
 import logging
 import re
+import threading
+import time
 from collections import defaultdict
 from time import sleep
 from urllib.parse import urlsplit
@@ -36,6 +38,7 @@ from paasta_tools.utils import deep_merge_dictionaries
 from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import get_config_hash
 from paasta_tools.utils import get_paasta_branch
+from paasta_tools.utils import get_service_config_mtime
 from paasta_tools.utils import get_service_instance_list
 from paasta_tools.utils import get_services_for_cluster
 from paasta_tools.utils import InstanceConfig
@@ -1057,97 +1060,157 @@ def dfs(node, neighbours_mapping, ignore_cycles=False, node_status=None):
     return visited_nodes
 
 
-@time_cache(ttl=30)
-def _get_related_jobs_and_configs(cluster, soa_dir=DEFAULT_SOA_DIR):
-    """
-    For all the Chronos jobs defined in cluster, extract the list of topologically sorted related Chronos.
-    Two individual jobs are considered related each other if exists a dependency relationship between them.
+class ChronosJobGraph(object):
+    """The dependency graph between the Chronos jobs defined in a cluster.
+
+    Jobs are identified by (service, instance) tuples. update() only reloads the
+    jobs of the services whose soa_dir directory changed since the previous
+    update, according to get_service_config_mtime, so a graph can be kept around
+    and updated before every query. Checking every service directory is skipped
+    if the previous update was less than update_interval seconds ago. Queries
+    only walk the connected component of the job they are about.
 
-    :param cluster: cluster from which extracting the jobs
-    :return: tuple(related jobs mapping, jobs configuration)
+    The graph may be shared between threads: updates and queries take its lock.
     """
-    chronos_configs = {
-        (service, instance): load_chronos_job_config(
-            service=service,
-            instance=instance,
-            cluster=cluster,
-            soa_dir=soa_dir,
-        )
-        for service in service_configuration_lib.read_services_configuration(soa_dir=soa_dir)
-        for instance in read_chronos_jobs_for_service(service=service, cluster=cluster, soa_dir=soa_dir)
-    }
-
-    adjacency_list = defaultdict(set)  # List of adjacency used by dfs algorithm
-    for instance, config in chronos_configs.items():
-        for parent in config.get_parents():
-            parent = decompose_job_id(paasta_to_chronos_job_name(parent))
-            # Map the graph a undirected graph to simplify identification of connected components
-            adjacency_list[parent].add(instance)
-            adjacency_list[instance].add(parent)
-
-    def cached_dfs(known_dfs_results, node, neighbours_mapping, ignore_cycles=False):
-        """
-        Cached version of DFS algorithm (tuned for extraction of connected components).
-
-        :param known_dfs_results: previous results of DFS
-        :type known_dfs_results: list
-        :param node: starting node for DFS execution
-        :param neighbours_mapping: graph adjacency list
-        :type neighbours_mapping: dict
-        :param ignore_cycles: raise an exception if a cycle is identified in the graph
-        :type ignore_cycles: bool
-
-        :return: set of nodes part of the same connected component of `node`
-        :type: set
+
+    def __init__(self, cluster, soa_dir=DEFAULT_SOA_DIR, update_interval=30):
+        self.cluster = cluster
+        self.soa_dir = soa_dir
+        self.update_interval = update_interval
+        self.configs = {}
+        self.parents = {}
+        self.children = defaultdict(set)
+        self._service_jobs = {}
+        self._service_mtimes = {}
+        self._last_update = None
+        self._lock = threading.RLock()
+
+    def update(self, force=False):
+        """Reloads the jobs of the services that changed, or of every service if force is set.
+        Does nothing if the previous update was less than update_interval seconds ago, unless force is set."""
+        with self._lock:
+            now = time.time()
+            if not force and self._last_update is not None and now - self._last_update < self.update_interval:
+                return
+            services = set(service_configuration_lib.list_services(soa_dir=self.soa_dir))
+            for service in set(self._service_jobs) - services:
+                self._remove_service(service)
+            for service in services:
+                mtime = get_service_config_mtime(service, self.soa_dir)
+                if force or service not in self._service_jobs or self._service_mtimes[service] != mtime:
+                    self._load_service(service)
+                    self._service_mtimes[service] = mtime
+            self._last_update = now
+
+    def _remove_service(self, service):
+        for job in self._service_jobs.pop(service, set()):
+            del self.configs[job]
+            for parent in self.parents.pop(job):
+                self.children[parent].discard(job)
+                if not self.children[parent]:
+                    del self.children[parent]
+        self._service_mtimes.pop(service, None)
+
+    def _load_service(self, service):
+        self._remove_service(service)
+        # Bypass the time_cache, which load_chronos_job_config shares, so that changes are seen right away
+        instances = read_chronos_jobs_for_service(service, self.cluster, soa_dir=self.soa_dir, ttl=-1)
+        self._service_jobs[service] = set()
+        for instance in instances:
+            job = (service, instance)
+            config = load_chronos_job_config(
+                service=service,
+                instance=instance,
+                cluster=self.cluster,
+                soa_dir=self.soa_dir,
+            )
+            self.configs[job] = config
+            self.parents[job] = [
+                decompose_job_id(paasta_to_chronos_job_name(parent))
+                for parent in config.get_parents() or []
+            ]
+            for parent in self.parents[job]:
+                self.children[parent].add(job)
+            self._service_jobs[service].add(job)
+
+    def get_related_jobs(self, job):
+        """Returns the set of jobs that depend on job, or that job depends on,
+        directly or not, including job itself"""
+        with self._lock:
+            if job not in self.configs and job not in self.children:
+                raise KeyError(job)
+            related_jobs = {job}
+            to_visit = [job]
+            while to_visit:
+                node = to_visit.pop()
+                for neighbour in self.parents.get(node, []) + list(self.children.get(node, [])):
+                    if neighbour not in related_jobs:
+                        related_jobs.add(neighbour)
+                        to_visit.append(neighbour)
+            return related_jobs
+
+    def get_related_jobs_configs(self, job):
+        with self._lock:
+            return {
+                related_job: self.configs[related_job]
+                for related_job in self.get_related_jobs(job)
+                if related_job in self.configs
+            }
+
+    def topological_sort(self, job):
+        """Returns the jobs related to job, ordered such that each job comes after its parents.
+
+        :raises ValueError: if the related jobs depend on each other in a cycle
         """
-        for known_dfs_result in known_dfs_results:
-            if node in known_dfs_result:
-                return known_dfs_result
-
-        visited_nodes = set(dfs(
-            node=node,
-            neighbours_mapping=neighbours_mapping,
-            ignore_cycles=ignore_cycles,
-        ))
-        known_dfs_results.append(visited_nodes)
-
-        return visited_nodes
-
-    # Build connected components
-    known_connected_components = []
-    for instance in chronos_configs:
-        cached_dfs(  # Using cached version of DFS to avoid all algorithm execution if the result it already know
-            known_dfs_results=known_connected_components,
-            node=instance,
-            ignore_cycles=True,  # Operating on an undirected graph to simplify identification of connected components
-            neighbours_mapping=adjacency_list,
-        )
+        with self._lock:
+            related_jobs = self.get_related_jobs(job)
+            adjacency_list = {node: self.parents.get(node, []) for node in related_jobs}
+        order, node_status = [], {}
+        for node in related_jobs:
+            order.extend(
+                dfs(
+                    node=node,
+                    neighbours_mapping=adjacency_list,
+                    node_status=node_status,
+                    ignore_cycles=False,
+                ),
+            )
+        return order
 
-    connected_components = {}
-    for connected_component in known_connected_components:
-        for node in connected_component:
-            connected_components[node] = connected_component
+    def has_cycle(self, job):
+        """Returns whether the jobs related to job depend on each other in a cycle"""
+        try:
+            self.topological_sort(job)
+        except ValueError:
+            return True
+        return False
+
+
+_chronos_job_graphs = {}
+_chronos_job_graphs_lock = threading.Lock()
 
-    return connected_components, chronos_configs
+
+def get_chronos_job_graph(cluster, soa_dir=DEFAULT_SOA_DIR, force=False):
+    """Returns the up to date ChronosJobGraph of cluster, reusing the one built
+    by a previous call in this process if there is one"""
+    key = (cluster, soa_dir)
+    with _chronos_job_graphs_lock:
+        if key not in _chronos_job_graphs:
+            _chronos_job_graphs[key] = ChronosJobGraph(cluster=cluster, soa_dir=soa_dir)
+        graph = _chronos_job_graphs[key]
+    graph.update(force=force)
+    return graph
 
 
 def get_related_jobs_configs(cluster, service, instance, soa_dir=DEFAULT_SOA_DIR, use_cache=True):
     """
     Extract chronos configurations of all Chronos jobs related to the (cluster, service, instance)
 
+    :param use_cache: if False, reload the configuration of every job instead of only those that changed
     :return: job-config mapping. Job identifier is a tuple (service, instance)
     """
-    kwargs = {}
-    if not use_cache:
-        kwargs['ttl'] = -1  # Disable usage of time_cached value
-
-    connected_components, chronos_configs = _get_related_jobs_and_configs(cluster, soa_dir=soa_dir, **kwargs)
-    related_jobs = connected_components[(service, instance)]
-    return {
-        job: config
-        for job, config in chronos_configs.items()
-        if job in related_jobs
-    }
+    graph = get_chronos_job_graph(cluster, soa_dir=soa_dir, force=not use_cache)
+    return graph.get_related_jobs_configs((service, instance))
 
 
 def topological_sort_related_jobs(cluster, service, instance, soa_dir=DEFAULT_SOA_DIR):
@@ -1157,32 +1220,4 @@ def topological_sort_related_jobs(cluster, service, instance, soa_dir=DEFAULT_SO
             The list is ordered such that job with index `i` could be executed in respect of its dependencies
             if all jobs with index smaller than `i` have terminated.
     """
-    def _sort(nodes):
-        adjacency_list = {
-            node: [
-                decompose_job_id(paasta_to_chronos_job_name(parent_job))
-                for parent_job in chronos_configs[node].get_parents()
-            ]
-            for node in related_jobs
-        }
-
-        order, enter, node_status = list(), {n for n in nodes}, {}
-
-        while enter:
-            order.extend(
-                dfs(
-                    node=enter.pop(),
-                    neighbours_mapping=adjacency_list,
-                    node_status=node_status,
-                    ignore_cycles=False,
-                ),
-            )
-
-        return order
-
-    connected_components, chronos_configs = _get_related_jobs_and_configs(cluster, soa_dir=soa_dir)
-    related_jobs = connected_components[(service, instance)]
-
-    return _sort(
-        nodes=related_jobs,
-    )
+    return get_chronos_job_graph(cluster, soa_dir=soa_dir).topological_sort((service, instance))
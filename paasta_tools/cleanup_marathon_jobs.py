@@ -27,6 +27,7 @@ Command line options:
 
 - -d <SOA_DIR>, --soa-dir <SOA_DIR>: Specify a SOA config dir to read from
 - -v, --verbose: Verbose output
+- -w <WORKERS>, --workers <WORKERS>: How many service instances to clean up at once
 - -t <KILL_THRESHOLD>, --kill-threshold: The decimal fraction of apps we think
     is sane to kill when this job runs
 - -f, --force: Force the killing of apps if we breach the threshold
@@ -34,7 +35,12 @@ Command line options:
 import argparse
 import logging
 import sys
+import time
 import traceback
+from collections import Counter
+from collections import namedtuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import pysensu_yelp
 
@@ -50,6 +56,11 @@ from paasta_tools.utils import load_system_paasta_config
 
 log = logging.getLogger(__name__)
 
+DEFAULT_WORKERS = 5
+
+# status is one of 'deleted', 'skipped' (the app is being bounced) or 'failed'
+CleanupResult = namedtuple('CleanupResult', ['app_id', 'status', 'seconds'])
+
 
 class DontKillEverythingError(Exception):
     pass
@@ -78,15 +89,23 @@ def parse_args(argv):
         help="Force the cleanup if we are above the "
              "kill_threshold",
     )
+    parser.add_argument(
+        '-w', '--workers', dest="workers", type=int, default=DEFAULT_WORKERS,
+        help="how many service instances to clean up at once (default %(default)s)",
+    )
     return parser.parse_args(argv)
 
 
-def delete_app(app_id, client, soa_dir):
+def delete_app(app_id, client, soa_dir, cluster=None):
     """Deletes a marathon app safely and logs to notify the user that it
-    happened"""
+    happened
+
+    :returns: True if the app was deleted, False if it was skipped because
+        it is being bounced"""
     log.warn("%s appears to be old; attempting to delete" % app_id)
     service, instance, _, __ = marathon_tools.deformat_job_id(app_id)
-    cluster = load_system_paasta_config().get_cluster()
+    if cluster is None:
+        cluster = load_system_paasta_config().get_cluster()
     try:
         short_app_id = marathon_tools.compose_job_id(service, instance)
         with bounce_lib.bounce_lock_zookeeper(short_app_id):
@@ -116,8 +135,10 @@ def delete_app(app_id, client, soa_dir):
             instance=instance,
             line=log_line,
         )
-    except IOError:
+        return True
+    except (IOError, bounce_lib.LockHeldException):
         log.debug("%s is being bounced, skipping" % app_id)
+        return False
     except Exception:
         loglines = ['Exception raised during cleanup of service %s:' % service]
         loglines.extend(traceback.format_exc().rstrip().split("\n"))
@@ -126,14 +147,53 @@ def delete_app(app_id, client, soa_dir):
                 service=service,
                 component='deploy',
                 level='debug',
-                cluster=load_system_paasta_config().get_cluster(),
+                cluster=cluster,
                 instance=instance,
                 line=logline,
             )
         raise
 
 
-def cleanup_apps(soa_dir, kill_threshold=0.5, force=False):
+def delete_apps(apps_to_delete, soa_dir, cluster, workers=DEFAULT_WORKERS):
+    """Deletes apps with delete_app, at most workers service instances at a
+    time.
+
+    The apps of one service instance share a bounce lock, so they are deleted
+    one after the other by the same worker. An exception from delete_app is
+    logged and counts as a failed delete, so that one broken app doesn't stop
+    the others from being cleaned up.
+
+    :param apps_to_delete: A list of (app_id, client) tuples
+    :returns: A CleanupResult per app, grouped by service instance"""
+    apps_by_instance = OrderedDict()
+    for app_id, client in apps_to_delete:
+        service, instance, _, __ = marathon_tools.deformat_job_id(app_id)
+        apps_by_instance.setdefault((service, instance), []).append((app_id, client))
+
+    def timed_delete(app_id, client):
+        start = time.time()
+        try:
+            deleted = delete_app(app_id=app_id, client=client, soa_dir=soa_dir, cluster=cluster)
+            status = 'deleted' if deleted else 'skipped'
+        except Exception:
+            log.error("Unexpected error deleting %s:\n%s" % (app_id, traceback.format_exc()))
+            status = 'failed'
+        result = CleanupResult(app_id, status, time.time() - start)
+        log.info("Cleaned up %s in %.2fs (%s)" % (app_id, result.seconds, result.status))
+        return result
+
+    def delete_instance_apps(apps):
+        return [timed_delete(app_id, client) for app_id, client in apps]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return [
+            result
+            for instance_results in executor.map(delete_instance_apps, apps_by_instance.values())
+            for result in instance_results
+        ]
+
+
+def cleanup_apps(soa_dir, kill_threshold=0.5, force=False, workers=DEFAULT_WORKERS):
     """Clean up old or invalid jobs/apps from marathon. Retrieves
     both a list of apps currently in marathon and a list of valid
     app ids in order to determine what to kill.
@@ -141,7 +201,9 @@ def cleanup_apps(soa_dir, kill_threshold=0.5, force=False):
     :param soa_dir: The SOA config directory to read from
     :param kill_threshold: The decimal fraction of apps we think is
         sane to kill when this job runs.
-    :param force: Force the cleanup if we are above the kill_threshold"""
+    :param force: Force the cleanup if we are above the kill_threshold
+    :param workers: How many service instances to clean up at once
+    :returns: A CleanupResult per app that was deleted, skipped or failed to delete"""
     log.info("Loading marathon configuration")
     system_paasta_config = load_system_paasta_config()
     log.info("Connecting to marathon")
@@ -176,13 +238,19 @@ def cleanup_apps(soa_dir, kill_threshold=0.5, force=False):
                 "really need to destroy everything" % kill_threshold,
             )
             raise DontKillEverythingError
-    for id_tuple, client in apps_to_kill:
-        app_id = marathon_tools.format_job_id(*id_tuple)
-        delete_app(
-            app_id=app_id,
-            client=client,
-            soa_dir=soa_dir,
-        )
+    start = time.time()
+    results = delete_apps(
+        apps_to_delete=[(marathon_tools.format_job_id(*id_tuple), client) for id_tuple, client in apps_to_kill],
+        soa_dir=soa_dir,
+        cluster=system_paasta_config.get_cluster(),
+        workers=workers,
+    )
+    if results:
+        statuses = Counter(result.status for result in results)
+        log.warn("Cleaned up %d apps in %.2fs: %d deleted, %d skipped, %d failed" % (
+            len(results), time.time() - start, statuses['deleted'], statuses['skipped'], statuses['failed'],
+        ))
+    return results
 
 
 def main(argv=None):
@@ -195,9 +263,11 @@ def main(argv=None):
     else:
         logging.basicConfig(level=logging.WARNING)
     try:
-        cleanup_apps(soa_dir, kill_threshold=kill_threshold, force=force)
+        results = cleanup_apps(soa_dir, kill_threshold=kill_threshold, force=force, workers=args.workers)
     except DontKillEverythingError:
         sys.exit(1)
+    if any(result.status == 'failed' for result in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
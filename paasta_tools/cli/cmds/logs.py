@@ -15,6 +15,7 @@
 """PaaSTA log reader for humans"""
 import argparse
 import datetime
+import heapq
 import logging
 import re
 import sys
@@ -22,10 +23,9 @@ from collections import namedtuple
 from contextlib import contextmanager
 from multiprocessing import Process
 from multiprocessing import Queue
+from operator import itemgetter
 from queue import Empty
 from time import sleep
-from typing import Any  # noqa
-from typing import Dict  # noqa
 from typing import List  # noqa
 from typing import Set  # noqa
 
@@ -203,6 +203,82 @@ def check_timestamp_in_range(timestamp, start_time, end_time):
         return True
 
 
+# The timestamps paasta writes in its logs, e.g. 2016-06-08T06:31:52.706609135Z
+LOG_TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?(?:Z|\+00:00)?$')
+# Finds the timestamp of a JSON log line without decoding the whole line.
+# Quotes inside the message are escaped, so they can't match.
+RAW_TIMESTAMP_RE = re.compile(r'"timestamp"\s*:\s*"([^"\\]*)"')
+RAW_TIMESTAMP_BYTES_RE = re.compile(RAW_TIMESTAMP_RE.pattern.encode('ascii'))
+# Values that JSON encoders never escape, except for '/' which some of them write as '\/'
+UNESCAPED_JSON_VALUE_RE = re.compile(r'[A-Za-z0-9_./-]+$')
+
+
+def parse_log_timestamp(timestamp):
+    """Parses a log line timestamp into an aware datetime, treating timestamps without a timezone as UTC.
+
+    The fixed format paasta writes is parsed directly, which is much faster than isodate.parse_datetime;
+    anything else is left to isodate. Like isodate, fractions of a second are truncated to microseconds.
+    """
+    match = LOG_TIMESTAMP_RE.match(timestamp)
+    if match is None:
+        dt = isodate.parse_datetime(timestamp)
+        return dt if dt.tzinfo else pytz.utc.localize(dt)
+    year, month, day, hour, minute, second, fraction = match.groups()
+    return datetime.datetime(
+        int(year), int(month), int(day), int(hour), int(minute), int(second),
+        int(fraction[:6].ljust(6, '0')) if fraction else 0,
+        tzinfo=pytz.utc,
+    )
+
+
+def get_log_line_sort_key(line):
+    """Returns the timestamp of a JSON log line, to order the lines of several streams.
+    Lines without a valid timestamp sort first."""
+    match = (RAW_TIMESTAMP_BYTES_RE if isinstance(line, bytes) else RAW_TIMESTAMP_RE).search(line)
+    try:
+        if match is not None:
+            timestamp = match.group(1)
+            return parse_log_timestamp(timestamp.decode('utf-8') if isinstance(timestamp, bytes) else timestamp)
+        return parse_log_timestamp(json.loads(line).get('timestamp'))
+    except (ValueError, TypeError, AttributeError):
+        return pytz.utc.localize(datetime.datetime.min)
+
+
+def make_raw_log_line_prefilter(components, clusters, instances):
+    """Returns a function that cheaply rejects the raw JSON log lines that can't have one of the given
+    components, one of the given clusters (or ANY_CLUSTER) and one of the given instances, without decoding them.
+
+    It only looks for the quoted values anywhere in the line, so the lines it accepts still have to go through
+    the real filter. Values that a JSON encoder might escape aren't looked for at all.
+    """
+    value_groups = [components, list(clusters) + [ANY_CLUSTER]]
+    if instances is not None:
+        value_groups.append(instances)
+    str_patterns = [
+        re.compile('|'.join(
+            ['"%s"' % re.escape(value) for value in values] +
+            ['"%s"' % re.escape(value.replace('/', '\\/')) for value in values if '/' in value],
+        ))
+        for values in value_groups
+        if all(UNESCAPED_JSON_VALUE_RE.match(value) for value in values)
+    ]
+    bytes_patterns = [re.compile(pattern.pattern.encode('ascii')) for pattern in str_patterns]
+
+    def prefilter(line):
+        for pattern in (bytes_patterns if isinstance(line, bytes) else str_patterns):
+            if pattern.search(line) is None:
+                return False
+        return True
+    return prefilter
+
+
+def log_line_in_time_range(parsed_line, start_time, end_time):
+    """Only parses the timestamp of the line when filtering by time"""
+    if start_time is None or end_time is None:
+        return True
+    return check_timestamp_in_range(parse_log_timestamp(parsed_line.get('timestamp')), start_time, end_time)
+
+
 def paasta_log_line_passes_filter(
     line,
     levels,
@@ -223,8 +299,7 @@ def paasta_log_line_passes_filter(
         log.debug('Trouble parsing line as json. Skipping. Line: %r' % line)
         return False
 
-    timestamp = isodate.parse_datetime(parsed_line.get('timestamp'))
-    if not check_timestamp_in_range(timestamp, start_time, end_time):
+    if not log_line_in_time_range(parsed_line, start_time, end_time):
         return False
     return (
         parsed_line.get('level') in levels and
@@ -252,8 +327,7 @@ def paasta_app_output_passes_filter(
         log.debug('Trouble parsing line as json. Skipping. Line: %r' % line)
         return False
 
-    timestamp = isodate.parse_datetime(parsed_line.get('timestamp'))
-    if not check_timestamp_in_range(timestamp, start_time, end_time):
+    if not log_line_in_time_range(parsed_line, start_time, end_time):
         return False
     return (
         parsed_line.get('component') in components and (
@@ -338,8 +412,7 @@ def marathon_log_line_passes_filter(
         log.debug('Trouble parsing line as json. Skipping. Line: %r' % line)
         return False
 
-    timestamp = isodate.parse_datetime(parsed_line.get('timestamp'))
-    if not check_timestamp_in_range(timestamp, start_time, end_time):
+    if not log_line_in_time_range(parsed_line, start_time, end_time):
         return False
     return format_job_id(service, '') in parsed_line.get('message', '')
 
@@ -363,8 +436,7 @@ def chronos_log_line_passes_filter(
         log.debug('Trouble parsing line as json. Skipping. Line: %r' % line)
         return False
 
-    timestamp = isodate.parse_datetime(parsed_line.get('timestamp'))
-    if not check_timestamp_in_range(timestamp, start_time, end_time):
+    if not log_line_in_time_range(parsed_line, start_time, end_time):
         return False
     return chronos_tools.compose_job_id(service, '') in parsed_line.get('message', '')
 
@@ -700,7 +772,7 @@ class ScribeLogReader(LogReader):
                 break
 
     def print_logs_by_time(self, service, start_time, end_time, levels, components, clusters, instances, raw_mode):
-        aggregated_logs: List[Dict[str, Any]] = []
+        streams = []
 
         if 'marathon' in components or 'chronos' in components:
             paasta_print(
@@ -719,7 +791,7 @@ class ScribeLogReader(LogReader):
                 stream_name = stream_info.stream_name_fn(service)
 
             ctx = self.scribe_get_from_time(scribe_env, stream_name, start_time, end_time)
-            self.filter_and_aggregate_scribe_logs(
+            streams.append(self.filter_scribe_logs(
                 scribe_reader_ctx=ctx,
                 scribe_env=scribe_env,
                 stream_name=stream_name,
@@ -728,25 +800,21 @@ class ScribeLogReader(LogReader):
                 components=components,
                 clusters=clusters,
                 instances=instances,
-                aggregated_logs=aggregated_logs,
                 filter_fn=stream_info.filter_fn,
                 parser_fn=stream_info.parse_fn,
                 start_time=start_time,
                 end_time=end_time,
-            )
+            ))
 
         self.run_code_over_scribe_envs(
             clusters=clusters,
             components=components,
             callback=callback,
         )
-
-        aggregated_logs.sort(key=lambda log_line: log_line['sort_key'])
-        for line in aggregated_logs:
-            print_log(line['raw_line'], levels, raw_mode)
+        self.print_merged_logs(streams, levels, raw_mode)
 
     def print_last_n_logs(self, service, line_count, levels, components, clusters, instances, raw_mode):
-        aggregated_logs: List[Dict[str, Any]] = []
+        streams = []
 
         def callback(component, stream_info, scribe_env, cluster):
             stream_info = self.get_stream_info(component)
@@ -757,7 +825,7 @@ class ScribeLogReader(LogReader):
                 stream_name = stream_info.stream_name_fn(service)
 
             ctx = self.scribe_get_last_n_lines(scribe_env, stream_name, line_count)
-            self.filter_and_aggregate_scribe_logs(
+            streams.append(self.filter_scribe_logs(
                 scribe_reader_ctx=ctx,
                 scribe_env=scribe_env,
                 stream_name=stream_name,
@@ -766,42 +834,46 @@ class ScribeLogReader(LogReader):
                 components=components,
                 clusters=clusters,
                 instances=instances,
-                aggregated_logs=aggregated_logs,
                 filter_fn=stream_info.filter_fn,
                 parser_fn=stream_info.parse_fn,
-            )
+            ))
 
         self.run_code_over_scribe_envs(clusters=clusters, components=components, callback=callback)
-        aggregated_logs.sort(key=lambda log_line: log_line['sort_key'])
-        for line in aggregated_logs:
-            print_log(line['raw_line'], levels, raw_mode)
+        self.print_merged_logs(streams, levels, raw_mode)
+
+    def print_merged_logs(self, streams, levels, raw_mode):
+        """Prints the lines of all the streams ordered by timestamp, as they are read.
+
+        This is a k-way merge: each stream only needs to be in order by itself, and only the next line of
+        each stream is held in memory, so output starts right away however many lines there are.
+        """
+        for _, line in heapq.merge(*streams, key=itemgetter(0)):
+            print_log(line, levels, raw_mode)
 
-    def filter_and_aggregate_scribe_logs(
+    def filter_scribe_logs(
         self, scribe_reader_ctx, scribe_env, stream_name,
         levels, service, components, clusters, instances,
-        aggregated_logs, parser_fn=None, filter_fn=None,
+        parser_fn=None, filter_fn=None,
         start_time=None, end_time=None,
     ):
+        """Yields (timestamp, line) for the lines of a scribe stream that pass filter_fn, in stream order.
+
+        The stream is only read as the lines are consumed. JSON lines that can't match the components,
+        clusters and instances are dropped before filter_fn decodes them.
+        """
+        prefilter = None if parser_fn else make_raw_log_line_prefilter(components, clusters, instances)
         with scribe_reader_ctx as scribe_reader:
             try:
                 for line in scribe_reader:
                     if parser_fn:
                         line = parser_fn(line, clusters, service)
-                    if filter_fn:
-                        if filter_fn(
-                            line, levels, service, components, clusters,
-                            instances, start_time=start_time, end_time=end_time,
-                        ):
-                            try:
-                                parsed_line = json.loads(line)
-                                timestamp = isodate.parse_datetime(parsed_line.get('timestamp'))
-                                if not timestamp.tzinfo:
-                                    timestamp = pytz.utc.localize(timestamp)
-                            except ValueError:
-                                timestamp = pytz.utc.localize(datetime.datetime.min)
-
-                            line = {'raw_line': line, 'sort_key': timestamp}
-                            aggregated_logs.append(line)
+                    elif not prefilter(line):
+                        continue
+                    if filter_fn and filter_fn(
+                        line, levels, service, components, clusters,
+                        instances, start_time=start_time, end_time=end_time,
+                    ):
+                        yield get_log_line_sort_key(line), line
             except StreamTailerSetupError as e:
                 if 'No data in stream' in str(e):
                     log.warning("Scribe stream %s is empty on %s" % (stream_name, scribe_env))
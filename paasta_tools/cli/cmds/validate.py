@@ -15,16 +15,24 @@
 import json
 import os
 import pkgutil
+import re
+import time
+from collections import defaultdict
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from functools import partial
 from glob import glob
 
+import service_configuration_lib
 import yaml
 from jsonschema import Draft4Validator
 from jsonschema import exceptions
 from jsonschema import FormatChecker
-from jsonschema import ValidationError
 
 import paasta_tools.chronos_tools
 from paasta_tools.chronos_tools import check_parent_format
+from paasta_tools.chronos_tools import ChronosJobConfig
 from paasta_tools.chronos_tools import load_chronos_job_config
 from paasta_tools.chronos_tools import TMP_JOB_IDENTIFIER
 from paasta_tools.cli.utils import failure
@@ -33,6 +41,7 @@ from paasta_tools.cli.utils import lazy_choices_completer
 from paasta_tools.cli.utils import list_services
 from paasta_tools.cli.utils import PaastaColors
 from paasta_tools.cli.utils import success
+from paasta_tools.utils import deep_merge_dictionaries
 from paasta_tools.utils import get_services_for_cluster
 from paasta_tools.utils import list_all_instances_for_service
 from paasta_tools.utils import list_clusters
@@ -56,6 +65,18 @@ FAILED_READING_FILE = failure(
     "http://paasta.readthedocs.io/en/latest/yelpsoa_configs.html",
 )
 
+FILE_TYPES = ('chronos', 'marathon', 'adhoc')
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# libyaml parses several times faster than the pure python loader
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+CHRONOS_FILE_RE = re.compile(r'^chronos-([0-9a-z-_]*)\.yaml$')
+
+ValidationResult = namedtuple('ValidationResult', ['service', 'path', 'cluster', 'instance', 'valid', 'messages'])
+ChronosJob = namedtuple('ChronosJob', ['service', 'path', 'cluster', 'instance', 'parents', 'messages'])
+
 UNKNOWN_SERVICE = "Unable to determine service to validate.\n" \
                   "Please supply the %s name you wish to " \
                   "validate with the %s option." \
@@ -87,37 +108,67 @@ def get_schema(file_type):
     return json.loads(schema)
 
 
+@lru_cache()
+def get_validator(file_type):
+    """Get a validator for the file_type's schema, compiled once per process
+
+    :param file_type: what schema type should we validate against
+    """
+    schema = get_schema(file_type)
+    if schema is None:
+        return None
+    return Draft4Validator(schema, format_checker=FormatChecker())
+
+
+def get_file_type(file_path):
+    """Returns which schema the config file at file_path is validated against, or None"""
+    basename = os.path.basename(file_path)
+    for file_type in FILE_TYPES:
+        if basename.startswith(file_type):
+            return file_type
+    return None
+
+
+def parse_config_file(file_path, config_file):
+    extension = os.path.splitext(file_path)[1]
+    if extension == '.yaml':
+        return yaml.load(config_file, Loader=YAML_LOADER)
+    elif extension == '.json':
+        return json.loads(config_file)
+    else:
+        return config_file
+
+
+def get_schema_error(config_file_object, validator):
+    """Returns the message of the error that best explains why config_file_object
+    doesn't match the validator's schema, or None if it does"""
+    error = exceptions.best_match(validator.iter_errors(config_file_object))
+    if error is None:
+        return None
+    return error.message
+
+
 def validate_schema(file_path, file_type):
     """Check if the specified config file has a valid schema
 
     :param file_path: path to file to validate
     :param file_type: what schema type should we validate against
     """
-    schema = get_schema(file_type)
-    if (schema is None):
+    validator = get_validator(file_type)
+    if (validator is None):
         paasta_print('%s: %s' % (SCHEMA_NOT_FOUND, file_path))
         return
-    validator = Draft4Validator(schema, format_checker=FormatChecker())
     basename = os.path.basename(file_path)
-    extension = os.path.splitext(basename)[1]
     try:
         config_file = get_file_contents(file_path)
     except IOError:
         paasta_print('%s: %s' % (FAILED_READING_FILE, file_path))
         return False
-    if extension == '.yaml':
-        config_file_object = yaml.safe_load(config_file)
-    elif extension == '.json':
-        config_file_object = json.loads(config_file)
-    else:
-        config_file_object = config_file
-    try:
-        validator.validate(config_file_object)
-    except ValidationError:
+    config_file_object = parse_config_file(file_path, config_file)
+    error_message = get_schema_error(config_file_object, validator)
+    if error_message is not None:
         paasta_print('%s: %s' % (SCHEMA_INVALID, file_path))
-
-        errors = validator.iter_errors(config_file_object)
-        paasta_print('  Validation Message: %s' % exceptions.best_match(errors).message)
+        paasta_print('  Validation Message: %s' % error_message)
     else:
         paasta_print('%s: %s' % (SCHEMA_VALID, basename))
         return True
@@ -136,11 +187,10 @@ def validate_all_schemas(service_path):
     for file_name in glob(path):
         if os.path.islink(file_name):
             continue
-        basename = os.path.basename(file_name)
-        for file_type in ['chronos', 'marathon', 'adhoc']:
-            if basename.startswith(file_type):
-                if not validate_schema(file_name, file_type):
-                    returncode = False
+        file_type = get_file_type(file_name)
+        if file_type is not None:
+            if not validate_schema(file_name, file_type):
+                returncode = False
     return returncode
 
 
@@ -162,6 +212,24 @@ def add_subparser(subparsers):
         required=False,
         help="Path to root of yelpsoa-configs checkout",
     )
+    validate_parser.add_argument(
+        '--all-services',
+        dest='all_services',
+        action='store_true',
+        help="Validate every service in the yelpsoa-configs checkout, in parallel",
+    )
+    validate_parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="With --all-services, number of processes validating services (default: %(default)s)",
+    )
+    validate_parser.add_argument(
+        '--json',
+        dest='json_report',
+        action='store_true',
+        help="With --all-services, print a JSON report of every check instead of just the failures",
+    )
     validate_parser.set_defaults(command=paasta_validate)
 
 
@@ -209,6 +277,23 @@ def path_to_soa_dir_service(service_path):
     return soa_dir, service
 
 
+def check_chronos_parents(service, instance, parents, valid_services):
+    """Returns what is wrong with the parents of a chronos job
+
+    :param valid_services: the full names of all the chronos jobs in the job's cluster
+    """
+    chronos_spacer = paasta_tools.chronos_tools.INTERNAL_SPACER
+    check_msgs = []
+    for parent in parents:
+        if not check_parent_format(parent):
+            continue
+        if "%s%s%s" % (service, chronos_spacer, instance) == parent:
+            check_msgs.append("Job %s cannot depend on itself" % parent)
+        elif parent not in valid_services:
+            check_msgs.append("Parent job %s could not be found" % parent)
+    return check_msgs
+
+
 def validate_chronos(service_path):
     """Check that any chronos configurations are valid"""
     soa_dir, service = path_to_soa_dir_service(service_path)
@@ -234,15 +319,10 @@ def validate_chronos(service_path):
             parents = cjc.get_parents() or []
             checks_passed, check_msgs = cjc.validate()
 
-            for parent in parents:
-                if not check_parent_format(parent):
-                    continue
-                if "%s%s%s" % (service, chronos_spacer, instance) == parent:
-                    checks_passed = False
-                    check_msgs.append("Job %s cannot depend on itself" % parent)
-                elif parent not in valid_services:
-                    checks_passed = False
-                    check_msgs.append("Parent job %s could not be found" % parent)
+            parent_msgs = check_chronos_parents(service, instance, parents, valid_services)
+            if parent_msgs:
+                checks_passed = False
+                check_msgs.extend(parent_msgs)
 
             # Remove duplicate check_msgs
             unique_check_msgs = list(set(check_msgs))
@@ -274,13 +354,165 @@ def paasta_validate_soa_configs(service_path):
     return returncode
 
 
+def load_chronos_jobs(service, file_path, cluster, config_file_object, soa_dir):
+    """Validates the chronos jobs of an already parsed chronos-<cluster>.yaml, like
+    load_chronos_job_config without deployments would load them
+
+    :returns: a list of ChronosJobs, whose parents are still to be checked
+    """
+    general_config = service_configuration_lib.read_service_configuration(service, soa_dir=soa_dir)
+    chronos_jobs = []
+    for instance, job_config in config_file_object.items():
+        if not isinstance(job_config, dict):
+            continue  # the schema check has already reported it
+        cjc = ChronosJobConfig(
+            service=service,
+            cluster=cluster,
+            instance=instance,
+            config_dict=deep_merge_dictionaries(overrides=job_config, defaults=general_config),
+            branch_dict={},
+            soa_dir=soa_dir,
+        )
+        _, check_msgs = cjc.validate()
+        chronos_jobs.append(ChronosJob(service, file_path, cluster, instance, cjc.get_parents() or [], check_msgs))
+    return chronos_jobs
+
+
+def validate_service_configs(soa_dir, service):
+    """Validates the schemas of a service's config files and its chronos jobs,
+    parsing each file only once. Whether the parents of the chronos jobs exist
+    depends on every other service, so that is left to check_all_chronos_parents.
+
+    :returns: a tuple of a list of ValidationResults and a list of ChronosJobs
+    """
+    results = []
+    chronos_jobs = []
+    for file_path in sorted(glob(os.path.join(soa_dir, service, '*.yaml'))):
+        file_type = get_file_type(file_path)
+        if file_type is None:
+            continue
+        try:
+            config_file_object = parse_config_file(file_path, get_file_contents(file_path))
+        except IOError:
+            results.append(ValidationResult(service, file_path, None, None, False, ["Failed to read file"]))
+            continue
+        except yaml.YAMLError as e:
+            results.append(ValidationResult(service, file_path, None, None, False, ["Failed to parse file: %s" % e]))
+            continue
+
+        # Like validate_all_schemas, only check the schema of the files that aren't symlinks
+        if not os.path.islink(file_path):
+            validator = get_validator(file_type)
+            if validator is None:
+                error_message = "Failed to find schema to validate against"
+            else:
+                error_message = get_schema_error(config_file_object, validator)
+            results.append(ValidationResult(
+                service, file_path, None, None, error_message is None, [error_message] if error_message else [],
+            ))
+
+        cluster_match = CHRONOS_FILE_RE.match(os.path.basename(file_path))
+        if cluster_match is None or not isinstance(config_file_object, dict):
+            continue
+        if service.startswith(TMP_JOB_IDENTIFIER):
+            results.append(ValidationResult(service, file_path, None, None, False, [
+                "Services using scheduled tasks cannot be named %s, as it clashes with the "
+                "identifier used for temporary jobs" % TMP_JOB_IDENTIFIER,
+            ]))
+            continue
+        chronos_jobs.extend(load_chronos_jobs(
+            service, file_path, cluster_match.group(1), config_file_object, soa_dir,
+        ))
+    return results, chronos_jobs
+
+
+def check_all_chronos_parents(chronos_jobs):
+    """Checks the parents of all the chronos jobs of a yelpsoa-configs checkout at once
+
+    :returns: a list of ValidationResults, one per chronos job
+    """
+    chronos_spacer = paasta_tools.chronos_tools.INTERNAL_SPACER
+    valid_services = defaultdict(set)
+    for job in chronos_jobs:
+        valid_services[job.cluster].add("%s%s%s" % (job.service, chronos_spacer, job.instance))
+
+    results = []
+    for job in chronos_jobs:
+        check_msgs = job.messages + check_chronos_parents(
+            job.service, job.instance, job.parents, valid_services[job.cluster],
+        )
+        results.append(ValidationResult(
+            job.service, job.path, job.cluster, job.instance, not check_msgs, sorted(set(check_msgs)),
+        ))
+    return results
+
+
+def validate_all_service_configs(soa_dir, workers=DEFAULT_WORKERS):
+    """Validates every service in soa_dir. Parsing and validating is CPU bound,
+    so services are spread over worker processes, each of which compiles the
+    schemas once.
+
+    :returns: a tuple of the list of services and the list of ValidationResults
+    """
+    services = sorted(
+        name for name in os.listdir(soa_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(soa_dir, name))
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        service_validations = list(executor.map(
+            partial(validate_service_configs, soa_dir),
+            services,
+            chunksize=max(1, len(services) // (workers * 4)),
+        ))
+    results = [result for service_results, _ in service_validations for result in service_results]
+    results.extend(check_all_chronos_parents([
+        job for _, service_chronos_jobs in service_validations for job in service_chronos_jobs
+    ]))
+    return services, results
+
+
+def paasta_validate_all_services(soa_dir, workers, json_report):
+    """Validate every service in the soa_dir and print the failures, or a JSON report of every check
+
+    :returns: 0 if everything is valid, 1 otherwise
+    """
+    start = time.time()
+    services, results = validate_all_service_configs(soa_dir, workers)
+    failures = [result for result in results if not result.valid]
+
+    if json_report:
+        paasta_print(json.dumps(
+            {
+                'valid': not failures,
+                'services': len(services),
+                'results': [result._asdict() for result in results],
+            },
+            indent=2,
+        ))
+    else:
+        for result in failures:
+            if result.instance is None:
+                paasta_print('%s: %s' % (SCHEMA_INVALID, result.path))
+                for message in result.messages:
+                    paasta_print('  Validation Message: %s' % message)
+            else:
+                paasta_print(invalid_chronos_instance(result.cluster, result.instance, "\n  ".join(result.messages)))
+        paasta_print("Validated %d services in %.1fs: %d of %d checks failed" % (
+            len(services), time.time() - start, len(failures), len(results),
+        ))
+    return 1 if failures else 0
+
+
 def paasta_validate(args):
     """Generate a service_path from the provided args and call paasta_validate_soa_configs
 
     :param args: argparse.Namespace obj created from sys.args by cli
     """
-    service = args.service
     soa_dir = args.yelpsoa_config_root
+    if args.all_services:
+        return paasta_validate_all_services(soa_dir, args.workers, args.json_report)
+
+    service = args.service
     service_path = get_service_path(service, soa_dir)
 
     if not paasta_validate_soa_configs(service_path):
@@ -0,0 +1,206 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A host-local cache of which PaaSTA service, instance and mesos task each
+docker container belongs to.
+
+It is warmed from the running mesos containers, kept up to date by following
+docker's container events, and keeps containers that exited for a grace
+period, so that looking a container up doesn't need to ask the docker daemon
+anything. That matters most when the host is short on memory.
+
+The mesos task id is only in a container's environment, so each container is
+inspected once, when the cache hears of it starting.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from collections import namedtuple
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from docker import Client
+from docker.errors import APIError
+
+from paasta_tools.utils import get_running_mesos_docker_containers
+
+log = logging.getLogger(__name__)
+
+SHORT_ID_LENGTH = 12
+DEFAULT_EXITED_GRACE_PERIOD = 600
+EVENTS_RETRY_INTERVAL = 5
+
+ContainerMetadata = namedtuple('ContainerMetadata', ['container_id', 'service', 'instance', 'task_id'])
+
+
+def get_container_env_as_dict(docker_inspect: Dict[str, Any]) -> Dict[str, str]:
+    env_vars = {}
+    config = docker_inspect.get('Config')
+    if config is not None:
+        env = config.get('Env', [])
+        for i in env:
+            name, _, value = i.partition('=')
+            env_vars[name] = value
+    return env_vars
+
+
+def metadata_from_labels(container_id: str, labels: Dict[str, str]) -> ContainerMetadata:
+    """For containers that are gone before they could be inspected: their labels
+    have the service and instance, but not the task id"""
+    return ContainerMetadata(
+        container_id=container_id,
+        service=labels.get('paasta_service'),
+        instance=labels.get('paasta_instance'),
+        task_id=None,
+    )
+
+
+def metadata_from_inspect(docker_inspect: Dict[str, Any]) -> ContainerMetadata:
+    env_vars = get_container_env_as_dict(docker_inspect)
+    return ContainerMetadata(
+        container_id=docker_inspect['Id'],
+        service=env_vars.get('PAASTA_SERVICE'),
+        instance=env_vars.get('PAASTA_INSTANCE'),
+        # Marathon sets MESOS_TASK_ID whereas Chronos sets mesos_task_id
+        task_id=env_vars.get('MESOS_TASK_ID') or env_vars.get('mesos_task_id'),
+    )
+
+
+class ContainerMetadataCache(object):
+    """Looks up the metadata of the containers on this host by container id or id prefix.
+
+    Call start() to warm the cache and follow docker events in a background
+    thread, after which get() only asks the docker daemon about containers it
+    has never heard of. inspect_count counts those.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        exited_grace_period: float=DEFAULT_EXITED_GRACE_PERIOD,
+        clock: Callable[[], float]=time.time,
+    ) -> None:
+        self.client = client
+        self.exited_grace_period = exited_grace_period
+        self.clock = clock
+        self.inspect_count = 0
+        self._containers: Dict[str, ContainerMetadata] = {}
+        self._exited_at: Dict[str, float] = {}
+        self._exited: Deque[Tuple[float, str]] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, metadata: ContainerMetadata) -> None:
+        key = metadata.container_id[:SHORT_ID_LENGTH]
+        with self._lock:
+            self._containers[key] = metadata
+            self._exited_at.pop(key, None)
+
+    def mark_exited(self, container_id: str) -> None:
+        """Keeps the container around for the grace period, as the events about
+        what happened to it can arrive after it exited"""
+        key = container_id[:SHORT_ID_LENGTH]
+        now = self.clock()
+        with self._lock:
+            if key in self._containers and key not in self._exited_at:
+                self._exited_at[key] = now
+                self._exited.append((now, key))
+            self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        while self._exited and self._exited[0][0] + self.exited_grace_period < now:
+            exited_at, key = self._exited.popleft()
+            # Unless it started again since
+            if self._exited_at.get(key) == exited_at:
+                del self._exited_at[key]
+                del self._containers[key]
+
+    def add_started(self, container_id: str, labels: Dict[str, str]) -> None:
+        """Adds a container that just started, or was already running"""
+        try:
+            metadata = metadata_from_inspect(self.client.inspect_container(resource_id=container_id))
+        except APIError:
+            metadata = metadata_from_labels(container_id, labels)
+        self.add(metadata)
+
+    def warm(self) -> None:
+        for container in get_running_mesos_docker_containers():
+            self.add_started(container['Id'], container.get('Labels') or {})
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        status = event.get('status')
+        container_id = event.get('id')
+        if not container_id:
+            return
+        if status == 'start':
+            attributes = event.get('Actor', {}).get('Attributes') or {}
+            self.add_started(container_id, attributes)
+        elif status in ('die', 'destroy'):
+            self.mark_exited(container_id)
+
+    def follow_events(self, since: Optional[int]=None) -> None:
+        """Keeps the cache up to date with docker's container events, forever
+
+        :param since: when the cache was last warmed, if it already was
+        """
+        while True:
+            try:
+                if since is None:
+                    # Ask for the events since before warming, so that no container is missed in between
+                    since = int(self.clock())
+                    self.warm()
+                for event in self.client.events(since=since, filters={'type': 'container'}, decode=True):
+                    self.handle_event(event)
+            except Exception:
+                log.exception("Failed to follow docker events, retrying in %ds" % EVENTS_RETRY_INTERVAL)
+            since = None
+            time.sleep(EVENTS_RETRY_INTERVAL)
+
+    def start(self) -> None:
+        """Warms the cache, and keeps it up to date in a background thread"""
+        since = int(self.clock())
+        self.warm()
+        thread = threading.Thread(target=self.follow_events, args=(since,), name='docker-events')
+        thread.daemon = True
+        thread.start()
+
+    def get(self, container_id: str) -> Optional[ContainerMetadata]:
+        """Returns the metadata of the container with the given id or id prefix,
+        asking the docker daemon only if it isn't cached, or None if there's no such container"""
+        key = container_id[:SHORT_ID_LENGTH]
+        with self._lock:
+            self._expire(self.clock())
+            metadata = self._containers.get(key)
+            if metadata is None and len(container_id) < SHORT_ID_LENGTH:
+                metadata = next(
+                    (value for prefix, value in self._containers.items() if prefix.startswith(container_id)),
+                    None,
+                )
+        if metadata is not None:
+            return metadata
+
+        self.inspect_count += 1
+        try:
+            docker_inspect = self.client.inspect_container(resource_id=container_id)
+        except APIError:
+            return None
+        metadata = metadata_from_inspect(docker_inspect)
+        self.add(metadata)
+        if not docker_inspect.get('State', {}).get('Running', True):
+            self.mark_exited(metadata.container_id)
+        return metadata
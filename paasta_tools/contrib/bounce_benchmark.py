@@ -0,0 +1,319 @@
+#!/usr/bin/env python3.6
+"""Times setup_marathon_job bouncing a synthetic fleet against in-memory
+stand-ins for marathon, the mesos master, hacheck and haproxy, and reports
+how many API calls a bounce makes.
+
+Every service instance starts with an old app whose tasks are up, spread
+over all the hosts, and is bounced to a new app. Each round deploys every
+instance that is still bouncing, like one setup_marathon_job run, then lets
+the fake cluster catch up: marathon launches the tasks it was asked for (on
+hosts that aren't draining), and tasks drained in an earlier round become
+safe to kill. Nothing depends on the wall clock or on randomness, so the
+rounds, the decisions and the call counts are the same on every run.
+
+Usage: bounce_benchmark.py [--services N] [--instances N] [--tasks N] [--hosts N] [--draining-hosts N]
+                           [--drain-delay ROUNDS] [--check-haproxy] [--bounce-method METHOD ...]
+"""
+import argparse
+import copy
+import csv
+import datetime
+import time
+from collections import Counter
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest import mock
+
+from marathon.models import MarathonApp
+from marathon.models import MarathonTask
+
+from paasta_tools import bounce_lib
+from paasta_tools import drain_lib
+from paasta_tools import setup_marathon_job
+from paasta_tools import utils
+from paasta_tools.marathon_tools import get_marathon_apps_with_clients
+from paasta_tools.marathon_tools import MarathonClients
+from paasta_tools.marathon_tools import MarathonServiceConfig
+from paasta_tools.utils import NullLogWriter
+from paasta_tools.utils import paasta_print
+from paasta_tools.utils import SystemPaastaConfig
+
+STARTED_AT = datetime.datetime(2017, 1, 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--services', type=int, default=50, help="number of services")
+    parser.add_argument('--instances', type=int, default=4, help="number of instances per service")
+    parser.add_argument('--tasks', type=int, default=5, help="number of tasks per instance")
+    parser.add_argument('--hosts', type=int, default=100, help="number of mesos agents")
+    parser.add_argument('--draining-hosts', type=int, default=5, help="number of those agents that are draining")
+    parser.add_argument(
+        '--drain-delay', type=int, default=1,
+        help="how many rounds a drained task takes to become safe to kill",
+    )
+    parser.add_argument(
+        '--check-haproxy', action='store_true', default=False,
+        help="only count new tasks as happy once they are up in haproxy",
+    )
+    parser.add_argument(
+        '--bounce-method', dest='bounce_methods', action='append',
+        help="bounce method to time, can be given several times (default: all of them but down)",
+    )
+    parser.add_argument('--max-rounds', type=int, default=50, help="give up on bounces that take longer")
+    return parser.parse_args()
+
+
+class FakeCluster(object):
+    """What the stand-ins share: the marathon apps, the hacheck spool, the
+    backends haproxy knows about, and how many calls each endpoint got"""
+
+    def __init__(self, hosts, draining_hosts):
+        self.hosts = ['10.0.%d.%d' % divmod(number, 256) for number in range(hosts)]
+        self.draining_hosts = self.hosts[:draining_hosts]
+        self.round = 0
+        self.calls = Counter()
+        self.slept = 0.0
+        self.apps = OrderedDict()
+        self.spool = {}
+        self.backends = OrderedDict()
+        self._launched = 0
+
+    def sleep(self, seconds):
+        self.slept += seconds
+
+    def launch_tasks(self):
+        """Starts the tasks marathon is missing, round robin over the hosts that aren't draining"""
+        hosts = self.hosts[len(self.draining_hosts):] or self.hosts
+        for app in self.apps.values():
+            while len(app.tasks) < app.instances:
+                self.launch_task(app, hosts[self._launched % len(hosts)])
+
+    def launch_task(self, app, host):
+        port = 31000 + self._launched
+        task = MarathonTask(
+            app_id=app.id,
+            id='%s.%d' % (app.id.lstrip('/'), self._launched),
+            host=host,
+            ports=[port],
+            started_at=STARTED_AT,
+            health_check_results=[],
+            state='TASK_RUNNING',
+        )
+        self._launched += 1
+        app.tasks.append(task)
+        service, instance = app.id.lstrip('/').split('.')[:2]
+        self.backends[(host, port)] = '%s.%s' % (service, instance)
+
+    def remove_tasks(self, app, task_ids):
+        for task in [task for task in app.tasks if task.id in task_ids]:
+            app.tasks.remove(task)
+            self.spool.pop(task.id, None)
+            self.backends.pop((task.host, task.ports[0]), None)
+
+    def tick(self):
+        self.round += 1
+        self.launch_tasks()
+
+
+class FakeMarathonClient(object):
+    """Answers the marathon endpoints that a bounce uses from a FakeCluster"""
+
+    servers = ['http://fake-marathon:8080']
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    def list_apps(self, embed_tasks=False, **kwargs):
+        self.cluster.calls['GET /v2/apps'] += 1
+        apps = []
+        for app in self.cluster.apps.values():
+            listed = copy.copy(app)
+            listed.tasks = list(app.tasks) if embed_tasks else []
+            apps.append(listed)
+        return apps
+
+    def create_app(self, app_id, app):
+        self.cluster.calls['POST /v2/apps'] += 1
+        app.id = '/%s' % app_id
+        app.tasks = []
+        self.cluster.apps[app.id] = app
+        return app
+
+    def scale_app(self, app_id, instances=None, delta=None, force=False):
+        self.cluster.calls['PUT /v2/apps/{app_id}'] += 1
+        self.cluster.apps['/%s' % app_id.lstrip('/')].instances = instances
+
+    def delete_app(self, app_id, force=False):
+        self.cluster.calls['DELETE /v2/apps/{app_id}'] += 1
+        app = self.cluster.apps.pop('/%s' % app_id.lstrip('/'))
+        self.cluster.remove_tasks(app, {task.id for task in app.tasks})
+
+    def kill_given_tasks(self, task_ids, scale=False, force=None):
+        self.cluster.calls['POST /v2/tasks/delete'] += 1
+        task_ids = set(task_ids)
+        for app in self.cluster.apps.values():
+            killed = len([task for task in app.tasks if task.id in task_ids])
+            self.cluster.remove_tasks(app, task_ids)
+            if scale:
+                app.instances -= killed
+        return True
+
+
+class FakeMesosMaster(object):
+    """Answers the maintenance and reservation calls that a bounce makes"""
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    def get_draining_hosts(self, max_age=None):
+        self.cluster.calls['GET /master/maintenance/status'] += 1
+        return list(self.cluster.draining_hosts)
+
+    def reserve_all_resources(self, hostnames):
+        self.cluster.calls['POST /master/reserve'] += 1
+
+
+class FakeHaproxy(object):
+    """Serves the synapse haproxy CSV of every backend in a FakeCluster"""
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    def retrieve_haproxy_csv(self, synapse_host, synapse_port, synapse_haproxy_url_format):
+        self.cluster.calls['GET haproxy csv'] += 1
+        lines = ['# pxname,svname,status,']
+        for (host, port), service in self.cluster.backends.items():
+            lines.append('%s,host%s_%s:%d,UP,' % (service, host.replace('.', '-'), host, port))
+        return csv.DictReader(lines)
+
+
+@drain_lib.register_drain_method('benchmark_hacheck')
+class FakeHacheckDrainMethod(drain_lib.HacheckDrainMethod):
+    """The hacheck drain method, with the spool kept in a FakeCluster and
+    the drain delay counted in rounds instead of seconds"""
+
+    def __init__(self, service, instance, nerve_ns, cluster, delay=1, **kwargs):
+        super(FakeHacheckDrainMethod, self).__init__(service, instance, nerve_ns, delay=delay)
+        self.cluster = cluster
+
+    def post_spool(self, task, status):
+        self.cluster.calls['POST hacheck spool'] += 1
+        if status == 'down':
+            self.cluster.spool.setdefault(task.id, self.cluster.round)
+        else:
+            self.cluster.spool.pop(task.id, None)
+
+    def get_spool(self, task):
+        self.cluster.calls['GET hacheck spool'] += 1
+        if task.id not in self.cluster.spool:
+            return {'state': 'up'}
+        return {'state': 'down', 'since': self.cluster.spool[task.id]}
+
+    def is_safe_to_kill(self, task):
+        info = self.get_spool(task)
+        return info['state'] != 'up' and info['since'] + self.delay <= self.cluster.round
+
+
+def make_fleet(cluster, services, instances, tasks):
+    """Creates the old app of every service instance, and returns
+    (service, instance, job_config, config) for the new app of each"""
+    fleet = []
+    for service_number in range(services):
+        for instance_number in range(instances):
+            service, instance = 'service%d' % service_number, 'instance%d' % instance_number
+            old_app = MarathonApp(id='/%s.%s.gitold.config0' % (service, instance), instances=tasks, tasks=[])
+            cluster.apps[old_app.id] = old_app
+            job_config = MarathonServiceConfig(
+                service=service,
+                cluster='benchmark',
+                instance=instance,
+                config_dict={},
+                branch_dict=None,
+            )
+            config = {
+                'id': '%s.%s.gitnew.config1' % (service, instance),
+                'instances': tasks,
+                'cmd': 'true',
+                'cpus': 0.1,
+                'mem': 100,
+                'health_checks': [],
+            }
+            fleet.append((service, instance, job_config, config))
+    # Spread the old tasks over every host, including the draining ones
+    for number, app in enumerate(list(cluster.apps.values()) * tasks):
+        cluster.launch_task(app, cluster.hosts[number % len(cluster.hosts)])
+    return fleet
+
+
+def run_bounces(args, bounce_method):
+    cluster = FakeCluster(args.hosts, args.draining_hosts)
+    client = FakeMarathonClient(cluster)
+    clients = MarathonClients(current=[client], previous=[client])
+    mesos = FakeMesosMaster(cluster)
+    haproxy = FakeHaproxy(cluster)
+    system_paasta_config = SystemPaastaConfig({'cluster': 'benchmark'}, '/fake/dir')
+    fleet = make_fleet(cluster, args.services, args.instances, args.tasks)
+    pending = list(fleet)
+    seconds = 0.0
+
+    with mock.patch.object(
+        setup_marathon_job, 'load_system_paasta_config', return_value=system_paasta_config,
+    ), mock.patch.object(
+        setup_marathon_job, 'get_draining_hosts', mesos.get_draining_hosts,
+    ), mock.patch.object(
+        setup_marathon_job, 'reserve_all_resources', mesos.reserve_all_resources,
+    ), mock.patch(
+        'paasta_tools.smartstack_tools.retrieve_haproxy_csv', haproxy.retrieve_haproxy_csv,
+    ), mock.patch.object(
+        bounce_lib, 'time', SimpleNamespace(time=time.time, sleep=cluster.sleep),
+    ), mock.patch.object(
+        utils, '_log_writer', NullLogWriter(),
+    ):
+        while pending and cluster.round < args.max_rounds:
+            start = time.time()
+            marathon_apps_with_clients = get_marathon_apps_with_clients([client], embed_tasks=True)
+            still_pending = []
+            for service, instance, job_config, config in pending:
+                status, output, bounce_again_in_seconds = setup_marathon_job.deploy_service(
+                    service=service,
+                    instance=instance,
+                    marathon_jobid=config['id'],
+                    config=config,
+                    clients=clients,
+                    marathon_apps_with_clients=marathon_apps_with_clients,
+                    bounce_method=bounce_method,
+                    drain_method_name='benchmark_hacheck',
+                    drain_method_params={'cluster': cluster, 'delay': args.drain_delay},
+                    nerve_ns=instance,
+                    bounce_health_params={'check_haproxy': args.check_haproxy},
+                    soa_dir='/fake/soa/dir',
+                    job_config=job_config,
+                )
+                if status != 0 or bounce_again_in_seconds is not None:
+                    still_pending.append((service, instance, job_config, config))
+            seconds += time.time() - start
+            pending = still_pending
+            cluster.tick()
+
+    return cluster, seconds, len(fleet) - len(pending)
+
+
+def main():
+    args = parse_args()
+    bounce_methods = args.bounce_methods or ['brutal', 'upthendown', 'crossover', 'downthenup']
+    total = args.services * args.instances
+    paasta_print("Bouncing %d instances of %d tasks on %d hosts (%d draining)" % (
+        total, args.tasks, args.hosts, args.draining_hosts,
+    ))
+    for bounce_method in bounce_methods:
+        cluster, seconds, finished = run_bounces(args, bounce_method)
+        paasta_print("%-11s %6.3fs over %d rounds, %d/%d bounces finished, %.0fs of sleeps skipped" % (
+            bounce_method, seconds, cluster.round, finished, total, cluster.slept,
+        ))
+        for endpoint, count in sorted(cluster.calls.items()):
+            paasta_print("    %-32s %8.2f calls per bounce" % (endpoint, count / total))
+
+
+if __name__ == '__main__':
+    main()
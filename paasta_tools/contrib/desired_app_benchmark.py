@@ -0,0 +1,94 @@
+#!/usr/bin/env python3.6
+"""Times computing the desired marathon app of every instance in a synthetic
+cluster, with and without a DesiredAppCache, when only a few instances changed.
+
+Usage: desired_app_benchmark.py [--services N] [--instances N] [--changed N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from paasta_tools.marathon_tools import DesiredAppCache
+from paasta_tools.marathon_tools import MarathonServiceConfig
+from paasta_tools.utils import paasta_print
+from paasta_tools.utils import SystemPaastaConfig
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--services', type=int, default=200, help="number of services")
+    parser.add_argument('--instances', type=int, default=10, help="number of instances per service")
+    parser.add_argument('--changed', type=int, default=20, help="number of instances changed between passes")
+    return parser.parse_args()
+
+
+def make_soa_dir(soa_dir, services):
+    for service_number in range(services):
+        service_dir = os.path.join(soa_dir, 'service%d' % service_number)
+        os.mkdir(service_dir)
+        with open(os.path.join(service_dir, 'service.yaml'), 'w') as f:
+            f.write('docker_registry: registry.example.com\n')
+
+
+def make_job_configs(soa_dir, services, instances, changed, generation):
+    job_configs = []
+    for service_number in range(services):
+        for instance_number in range(instances):
+            index = service_number * instances + instance_number
+            docker_image = 'services-service%d:paasta-%d' % (
+                service_number, generation if index < changed else 0,
+            )
+            job_configs.append(MarathonServiceConfig(
+                service='service%d' % service_number,
+                cluster='benchmark',
+                instance='instance%d' % instance_number,
+                config_dict={
+                    'instances': 3,
+                    'cpus': 0.5,
+                    'mem': 512,
+                    'env': {'FOO': 'bar'},
+                    'deploy_blacklist': [['region', 'uswest2-prod']],
+                },
+                branch_dict={'docker_image': docker_image, 'desired_state': 'start', 'force_bounce': None},
+                soa_dir=soa_dir,
+            ))
+    return job_configs
+
+
+def time_pass(job_configs, system_paasta_config, desired_app_cache=None):
+    start = time.time()
+    for job_config in job_configs:
+        job_config.format_marathon_app_dict(
+            system_paasta_config=system_paasta_config,
+            desired_app_cache=desired_app_cache,
+        )
+    return time.time() - start
+
+
+def main():
+    args = parse_args()
+    system_paasta_config = SystemPaastaConfig(
+        {'volumes': [], 'expected_slave_attributes': [{'region': 'uswest1-prod'}]},
+        '/fake/dir',
+    )
+    total = args.services * args.instances
+    with tempfile.TemporaryDirectory() as soa_dir:
+        make_soa_dir(soa_dir, args.services)
+        desired_app_cache = DesiredAppCache()
+        first = make_job_configs(soa_dir, args.services, args.instances, args.changed, generation=1)
+        second = make_job_configs(soa_dir, args.services, args.instances, args.changed, generation=2)
+
+        uncached = time_pass(second, system_paasta_config)
+        cold = time_pass(first, system_paasta_config, desired_app_cache)
+        warm = time_pass(second, system_paasta_config, desired_app_cache)
+
+    paasta_print("uncached:         %6.3fs for %d instances" % (uncached, total))
+    paasta_print("cold cache:       %6.3fs for %d instances" % (cold, total))
+    paasta_print("warm cache:       %6.3fs for %d instances, %d changed (%d recomputed)" % (
+        warm, total, args.changed, desired_app_cache.misses - total,
+    ))
+
+
+if __name__ == '__main__':
+    main()
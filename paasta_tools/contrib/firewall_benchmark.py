@@ -0,0 +1,170 @@
+#!/usr/bin/env python3.6
+"""Times preparing the firewall for many containers starting at once, the way
+docker_wrapper does, against an in-memory stand-in for iptables.
+
+Each launch runs in its own thread and takes the real firewall flock (without
+its SIGALRM timeout, which only works in the main thread). Reading a service's
+soa-configs and synapse files to compute its rules, and every iptables call,
+take a configurable time. Most services already have a chain, as kept up to
+date by firewall_update; the first containers of --new-services services
+don't.
+
+Usage: firewall_benchmark.py [--launches N] [--services N] [--new-services N] [--rules-ms MS] [--iptables-ms MS]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from paasta_tools import firewall
+from paasta_tools import iptables
+from paasta_tools.utils import flock
+from paasta_tools.utils import paasta_print
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--launches', type=int, default=50, help="number of containers starting at once")
+    parser.add_argument('--services', type=int, default=10, help="number of services the containers belong to")
+    parser.add_argument('--new-services', type=int, default=2, help="number of those services without a chain yet")
+    parser.add_argument(
+        '--rules-ms', type=float, default=100,
+        help="milliseconds it takes to compute a service's rules from soa-configs and synapse files",
+    )
+    parser.add_argument('--iptables-ms', type=float, default=10, help="milliseconds each iptables call takes")
+    return parser.parse_args()
+
+
+class FakeIptables(object):
+    """The filter table, with the iptables functions that firewall ends up calling"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.chains = {'INPUT': [], 'FORWARD': [], 'OUTPUT': []}
+        self.lock = threading.Lock()
+
+    def call(self, fn):
+        time.sleep(self.delay)
+        with self.lock:
+            return fn()
+
+    def all_chains(self):
+        return self.call(lambda: set(self.chains))
+
+    def list_chain(self, chain_name):
+        def list_chain():
+            if chain_name not in self.chains:
+                raise iptables.ChainDoesNotExist(chain_name)
+            return tuple(self.chains[chain_name])
+        return self.call(list_chain)
+
+    def create_chain(self, chain_name):
+        self.call(lambda: self.chains.setdefault(chain_name, []))
+
+    def insert_rule(self, chain_name, rule):
+        self.call(lambda: self.chains[chain_name].insert(0, rule))
+
+    def delete_rules(self, chain_name, rules):
+        def delete_rules():
+            self.chains[chain_name] = [rule for rule in self.chains[chain_name] if rule not in rules]
+        self.call(delete_rules)
+
+    def reorder_chain(self, chain_name):
+        def reorder_chain():
+            self.chains[chain_name] = [
+                rule for _, rule in sorted(enumerate(self.chains[chain_name]), key=iptables._rule_sort_key)
+            ]
+        self.call(reorder_chain)
+
+    def patch(self):
+        stack = contextlib.ExitStack()
+        for name in ('all_chains', 'list_chain', 'create_chain', 'insert_rule', 'delete_rules', 'reorder_chain'):
+            stack.enter_context(mock.patch.object(iptables, name, getattr(self, name)))
+        return stack
+
+
+def make_get_rules(delay):
+    def get_rules(service_group, soa_dir, synapse_service_dir):
+        time.sleep(delay)
+        return (firewall._yocalhost_rule(1234, 'proxy_port ' + service_group.service),)
+    return get_rules
+
+
+def legacy_prepare_new_container(soa_dir, synapse_service_dir, service, instance, mac):
+    """How docker_wrapper used to prepare the firewall: everything under the firewall flock"""
+    with firewall.firewall_flock():
+        firewall.ensure_shared_chains()
+        service_group = firewall.ServiceGroup(service, instance)
+        service_group.update_rules(soa_dir, synapse_service_dir)
+        iptables.insert_rule('PAASTA', firewall.dispatch_rule(service_group.chain_name, mac))
+
+
+def run_launches(args, prepare_new_container, flock_path):
+    fake_iptables = FakeIptables(args.iptables_ms / 1000.0)
+    services = ['service%d' % number for number in range(args.services)]
+
+    @contextlib.contextmanager
+    def firewall_flock():
+        with io.FileIO(flock_path, 'w') as f, flock(f):
+            yield
+
+    with fake_iptables.patch(), mock.patch.object(
+        firewall, 'firewall_flock', firewall_flock,
+    ), mock.patch.object(
+        firewall, '_dns_servers', return_value=['169.254.255.254'],
+    ), mock.patch.object(
+        firewall.ServiceGroup, 'get_rules', make_get_rules(args.rules_ms / 1000.0),
+    ):
+        # What firewall_update leaves behind for the services already running here
+        firewall.ensure_shared_chains()
+        firewall.ensure_dispatch_chains({})
+        for service in services[args.new_services:]:
+            firewall.ServiceGroup(service, 'main').update_rules('/fake/soa/dir', '/fake/synapse/dir')
+
+        latencies = [None] * args.launches
+        start_barrier = threading.Barrier(args.launches)
+
+        def launch(number):
+            start_barrier.wait()
+            start = time.time()
+            prepare_new_container(
+                '/fake/soa/dir', '/fake/synapse/dir', services[number % len(services)], 'main',
+                '02:52:00:00:%02x:%02x' % (number // 256, number % 256),
+            )
+            latencies[number] = time.time() - start
+
+        threads = [threading.Thread(target=launch, args=(number,)) for number in range(args.launches)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(fake_iptables.chains['PAASTA']) == args.launches
+    return sorted(latencies)
+
+
+def format_latencies(latencies):
+    return "median %6.3fs   p90 %6.3fs   max %6.3fs" % (
+        latencies[len(latencies) // 2],
+        latencies[int(len(latencies) * 0.9)],
+        latencies[-1],
+    )
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        flock_path = os.path.join(tmpdir, 'firewall.flock')
+        legacy = run_launches(args, legacy_prepare_new_container, flock_path)
+        current = run_launches(args, firewall.prepare_new_container, flock_path)
+    paasta_print("Container start latency for %d concurrent launches:" % args.launches)
+    paasta_print("everything under the flock:  %s" % format_latencies(legacy))
+    paasta_print("prepare_new_container:       %s" % format_latencies(current))
+
+
+if __name__ == '__main__':
+    main()
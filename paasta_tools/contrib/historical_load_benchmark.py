@@ -0,0 +1,91 @@
+#!/usr/bin/env python3.6
+"""Times one autoscaling decision's worth of historical load handling (decode
+the history, append a datapoint, forecast, encode it again) on a full history,
+against the per-record struct loop and full-history filter it replaced.
+
+Usage: historical_load_benchmark.py [--records N] [--rounds N]
+"""
+import argparse
+import random
+import struct
+import time
+
+from paasta_tools.autoscaling import autoscaling_service_lib
+from paasta_tools.autoscaling import forecasting
+from paasta_tools.utils import paasta_print
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--records', type=int, default=autoscaling_service_lib.MAX_HISTORICAL_LOAD_RECORDS,
+        help="number of datapoints in the history",
+    )
+    parser.add_argument('--rounds', type=int, default=20, help="number of decisions to time")
+    return parser.parse_args()
+
+
+def make_historical_load(records):
+    start = time.time() - 60 * records
+    return [(start + 60 * i + random.random(), 0.6 + random.gauss(0, 0.05)) for i in range(records)]
+
+
+def legacy_serialize(historical_load):
+    historical_load = historical_load[-autoscaling_service_lib.MAX_HISTORICAL_LOAD_RECORDS:]
+    return b''.join([struct.pack('dd', *x) for x in historical_load])
+
+
+def legacy_deserialize(historical_load_bytes):
+    return [
+        struct.unpack('dd', historical_load_bytes[pos:pos + 16]) for pos in range(0, len(historical_load_bytes), 16)
+    ]
+
+
+def legacy_forecast(historical_load):
+    window_end, _ = historical_load[-1]
+    window = [(t, l) for (t, l) in historical_load if window_end - 1800 <= t <= window_end]
+    return sum(l for _, l in window) / len(window)
+
+
+def new_forecast(historical_load):
+    return forecasting.moving_average_forecast_policy(historical_load, moving_average_window_seconds=1800)
+
+
+def time_decisions(serialized, rounds, deserialize, serialize, forecast):
+    start = time.time()
+    for _ in range(rounds):
+        historical_load = deserialize(serialized)
+        historical_load.append((time.time(), 0.6))
+        forecast(historical_load)
+        serialized = serialize(historical_load)
+    return (time.time() - start) / rounds, serialized
+
+
+def main():
+    args = parse_args()
+    historical_load = make_historical_load(args.records)
+
+    legacy, _ = time_decisions(
+        legacy_serialize(historical_load), args.rounds, legacy_deserialize, legacy_serialize, legacy_forecast,
+    )
+    raw, raw_bytes = time_decisions(
+        autoscaling_service_lib.serialize_historical_load(historical_load), args.rounds,
+        autoscaling_service_lib.deserialize_historical_load, autoscaling_service_lib.serialize_historical_load,
+        new_forecast,
+    )
+    compressed, compressed_bytes = time_decisions(
+        autoscaling_service_lib.serialize_historical_load(historical_load, compress=True), args.rounds,
+        autoscaling_service_lib.deserialize_historical_load,
+        lambda historical_load: autoscaling_service_lib.serialize_historical_load(historical_load, compress=True),
+        new_forecast,
+    )
+
+    paasta_print("legacy:     %7.1fms per decision" % (legacy * 1000))
+    paasta_print("raw:        %7.1fms per decision, %d bytes in zookeeper" % (raw * 1000, len(raw_bytes)))
+    paasta_print("compressed: %7.1fms per decision, %d bytes in zookeeper" % (
+        compressed * 1000, len(compressed_bytes),
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3.6
+"""Compares how many lines per second the file log writers can write.
+
+Usage: log_writer_benchmark.py [--lines N] [--services N] [--flock]
+"""
+import argparse
+import tempfile
+import time
+
+from paasta_tools.utils import BufferedFileLogWriter
+from paasta_tools.utils import FileLogWriter
+from paasta_tools.utils import paasta_print
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=20000, help="number of lines to log per writer")
+    parser.add_argument('--services', type=int, default=10, help="number of distinct log files to spread lines over")
+    parser.add_argument('--flock', action='store_true', default=False, help="flock each write")
+    return parser.parse_args()
+
+
+def time_writer(writer, lines, services):
+    start = time.time()
+    for i in range(lines):
+        writer.log(
+            service='service%d' % (i % services),
+            line='benchmark line %d' % i,
+            component='deploy',
+            cluster='fake_cluster',
+            instance='main',
+        )
+    if hasattr(writer, 'close'):
+        writer.close()
+    return time.time() - start
+
+
+def main():
+    args = parse_args()
+    for writer_class in (FileLogWriter, BufferedFileLogWriter):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            writer = writer_class(path_format=tmpdir + '/{service}.log', flock=args.flock)
+            elapsed = time_writer(writer, args.lines, args.services)
+        paasta_print("%-25s %10.0f lines/sec (%d lines in %.2fs)" % (
+            writer_class.__name__, args.lines / elapsed, args.lines, elapsed,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3.6
+"""Times the native scheduler matching a synthetic stream of offers, and
+reports how many offers per second it gets through.
+
+The service has LIKE and MAX_PER constraints and already has live tasks in its
+task store, and it wants more tasks than the offers can hold, so that every
+offer is matched until it runs out of room or fails a constraint, like in a
+large cluster where a service is scaling up. Offers come in batches, with wide
+port ranges, from agents that are offered again and again.
+
+Usage: native_scheduler_offer_benchmark.py [--offers N] [--batch-size N] [--hosts N] [--existing-tasks N]
+                                           [--port-range-size N] [--max-per-host N] [--task-store-latency MS]
+"""
+import argparse
+import contextlib
+import os
+import time
+from unittest import mock
+
+from addict import Dict
+
+from paasta_tools import utils
+from paasta_tools.frameworks.native_scheduler import NativeScheduler
+from paasta_tools.frameworks.native_scheduler import TASK_RUNNING
+from paasta_tools.frameworks.native_service_config import NativeServiceConfig
+from paasta_tools.frameworks.task_store import DictTaskStore
+from paasta_tools.utils import NullLogWriter
+from paasta_tools.utils import paasta_print
+from paasta_tools.utils import SystemPaastaConfig
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--offers', type=int, default=2000, help="number of offers to match")
+    parser.add_argument('--batch-size', type=int, default=50, help="number of offers per resourceOffers call")
+    parser.add_argument('--hosts', type=int, default=500, help="number of mesos agents making offers")
+    parser.add_argument('--existing-tasks', type=int, default=2000, help="number of live tasks already running")
+    parser.add_argument('--port-range-size', type=int, default=30000, help="number of ports in each offer")
+    parser.add_argument('--max-per-host', type=int, default=20, help="MAX_PER hostname constraint value")
+    parser.add_argument(
+        '--task-store-latency', type=float, default=0,
+        help="milliseconds each read of all the tasks takes, e.g. from zookeeper",
+    )
+    return parser.parse_args()
+
+
+class FakeDriver(object):
+    def __init__(self):
+        self.launched = 0
+        self.declined = 0
+
+    def launchTasks(self, offer_ids, tasks):
+        self.launched += len(tasks)
+
+    def declineOffer(self, offer_id, filters=None):
+        self.declined += 1
+
+    def reconcileTasks(self, tasks):
+        pass
+
+
+class SlowDictTaskStore(DictTaskStore):
+    latency = 0.0
+
+    def get_all_tasks(self):
+        time.sleep(self.latency)
+        return super(SlowDictTaskStore, self).get_all_tasks()
+
+
+def make_offer(number, hosts, port_range_size):
+    host = 'host%d' % (number % hosts)
+    return Dict(
+        id=Dict(value='offer%d' % number),
+        agent_id=Dict(value=host),
+        resources=[
+            Dict(name='cpus', scalar=Dict(value=16)),
+            Dict(name='mem', scalar=Dict(value=65536)),
+            Dict(name='ports', ranges=Dict(range=[Dict(begin=31000, end=31000 + port_range_size - 1)])),
+        ],
+        attributes=[
+            Dict(name='pool', text=Dict(value='default')),
+            Dict(name='hostname', text=Dict(value=host)),
+        ],
+    )
+
+
+def make_scheduler(args, system_paasta_config):
+    service_config = NativeServiceConfig(
+        service='benchmark',
+        instance='main',
+        cluster='benchmark',
+        config_dict={
+            'cpus': 0.1,
+            'mem': 50,
+            # more than the offers can hold, so every offer gets matched
+            'instances': args.existing_tasks + args.offers * 200,
+            'cmd': 'sleep 50',
+            'drain_method': 'test',
+            'constraints': [
+                ['pool', 'LIKE', 'def.*'],
+                ['hostname', 'MAX_PER', str(args.max_per_host)],
+            ],
+        },
+        branch_dict={
+            'docker_image': 'busybox',
+            'desired_state': 'start',
+            'force_bounce': '0',
+        },
+        soa_dir='/fake/soa/dir',
+    )
+    SlowDictTaskStore.latency = args.task_store_latency / 1000.0
+    scheduler = NativeScheduler(
+        service_name='benchmark',
+        instance_name='main',
+        cluster='benchmark',
+        system_paasta_config=system_paasta_config,
+        service_config=service_config,
+        reconcile_start_time=0,
+        reconcile_backoff=0,
+        staging_timeout=60,
+        task_store_type=SlowDictTaskStore,
+    )
+    scheduler.registered(FakeDriver(), {'value': 'benchmark'}, None)
+    base_task_name = service_config.base_task(system_paasta_config)['name']
+    for number in range(args.existing_tasks):
+        scheduler.task_store.add_task_if_doesnt_exist(
+            '%s.existing%d' % (base_task_name, number),
+            mesos_task_state=TASK_RUNNING,
+        )
+    # Like a scheduler restarting with tasks already in zookeeper
+    scheduler.count_live_tasks()
+    return scheduler
+
+
+def main():
+    args = parse_args()
+    system_paasta_config = SystemPaastaConfig(
+        {'docker_registry': 'fake', 'volumes': [], 'dockercfg_location': '/fake/dockercfg'},
+        '/fake/dir',
+    )
+    offers = [make_offer(number, args.hosts, args.port_range_size) for number in range(args.offers)]
+    driver = FakeDriver()
+
+    # Constraint failures are printed; keep them off the terminal, but still pay for formatting them
+    with mock.patch.object(
+        utils, 'load_system_paasta_config', return_value=system_paasta_config,
+    ), mock.patch.object(
+        utils, '_log_writer', NullLogWriter(),
+    ), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        scheduler = make_scheduler(args, system_paasta_config)
+        start = time.time()
+        for batch_start in range(0, len(offers), args.batch_size):
+            scheduler.launch_tasks_for_offers(driver, offers[batch_start:batch_start + args.batch_size])
+        seconds = time.time() - start
+
+    paasta_print("Matched %d offers from %d agents in %.2fs: %.1f offers/s" % (
+        args.offers, args.hosts, seconds, args.offers / seconds,
+    ))
+    paasta_print("Launched %d tasks, declined %d offers" % (driver.launched, driver.declined))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3.6
+"""Times looking up the executor of every task of a synthetic mesos agent
+state, by walking the whole state for each task like MesosSlave used to,
+and with a SlaveStateIndex.
+
+Usage: slave_state_index_benchmark.py [--frameworks N] [--executors N] [--completed-tasks N] [--lookups N]
+"""
+import argparse
+import time
+
+from paasta_tools.mesos import util
+from paasta_tools.mesos.slave import SlaveStateIndex
+from paasta_tools.utils import paasta_print
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frameworks', type=int, default=4, help="number of frameworks")
+    parser.add_argument('--executors', type=int, default=50, help="number of running executors per framework")
+    parser.add_argument(
+        '--completed-tasks', type=int, default=5000,
+        help="number of completed executors (with one task each) per framework",
+    )
+    parser.add_argument('--lookups', type=int, default=200, help="number of tasks to look up")
+    return parser.parse_args()
+
+
+def make_state(frameworks, executors, completed_tasks):
+    state = {'frameworks': [], 'completed_frameworks': []}
+    for framework_number in range(frameworks):
+        framework_id = 'framework%d' % framework_number
+        state['frameworks'].append({
+            'id': framework_id,
+            'executors': [
+                {
+                    'id': '%s.task%d' % (framework_id, number),
+                    'directory': '/var/lib/mesos/%s/task%d' % (framework_id, number),
+                    'tasks': [{'id': '%s.task%d' % (framework_id, number)}],
+                    'completed_tasks': [],
+                    'queued_tasks': [],
+                }
+                for number in range(executors)
+            ],
+            'completed_executors': [
+                {
+                    'id': '%s.done%d' % (framework_id, number),
+                    'directory': '/var/lib/mesos/%s/done%d' % (framework_id, number),
+                    'tasks': [],
+                    'completed_tasks': [{'id': '%s.done%d' % (framework_id, number)}],
+                    'queued_tasks': [],
+                }
+                for number in range(completed_tasks)
+            ],
+        })
+    return state
+
+
+def linear_task_executor(state, task_id):
+    """How MesosSlave.task_executor used to find an executor"""
+    for fw in util.merge(state, "frameworks", "completed_frameworks"):
+        for exc in util.merge(fw, "executors", "completed_executors"):
+            if task_id in list(map(
+                    lambda x: x["id"],
+                    util.merge(
+                        exc, "completed_tasks", "tasks", "queued_tasks",
+                    ),
+            )):
+                return exc
+
+
+def main():
+    args = parse_args()
+    state = make_state(args.frameworks, args.executors, args.completed_tasks)
+    # The running tasks of the last framework, which a linear walk finds last
+    task_ids = [
+        'framework%d.task%d' % (args.frameworks - 1, number % args.executors)
+        for number in range(args.lookups)
+    ]
+
+    start = time.time()
+    linear = [linear_task_executor(state, task_id) for task_id in task_ids]
+    linear_time = time.time() - start
+
+    start = time.time()
+    index = SlaveStateIndex(state)
+    build_time = time.time() - start
+    indexed = [index.task_executor(task_id) for task_id in task_ids]
+    indexed_time = time.time() - start
+
+    assert linear == indexed
+    total_tasks = args.frameworks * (args.executors + args.completed_tasks)
+    paasta_print("%d lookups in an agent state of %d tasks:" % (args.lookups, total_tasks))
+    paasta_print("linear walk:   %8.4fs" % linear_time)
+    paasta_print("state index:   %8.4fs (%.4fs of which building it)" % (indexed_time, build_time))
+
+
+if __name__ == '__main__':
+    main()
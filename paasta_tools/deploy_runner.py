@@ -0,0 +1,211 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Usage: deploy_marathon_services [options]
+       paasta_deploy_chronos_jobs [options]
+
+Deploys every marathon service instance (or chronos job) of this cluster,
+in random order, from a single process with a bounded pool of worker threads.
+
+This replaces running setup_marathon_job (or setup_chronos_job) once per
+instance under xargs: the system paasta config, the marathon or chronos
+clients and the list of marathon apps are loaded once and shared by all the
+workers, instead of once per instance.
+
+Prints how long each deploy took when run with --verbose, and a summary at
+the end. Exits 1 if any deploy failed.
+
+Command line options:
+
+- -d <SOA_DIR>, --soa-dir <SOA_DIR>: Specify a SOA config dir to read from
+- -w <WORKERS>, --workers <WORKERS>: How many instances to deploy at once
+- -v, --verbose: Verbose output
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from paasta_tools import chronos_tools
+from paasta_tools import marathon_tools
+from paasta_tools import setup_chronos_job
+from paasta_tools import setup_marathon_job
+from paasta_tools.utils import compose_job_id
+from paasta_tools.utils import DEFAULT_SOA_DIR
+from paasta_tools.utils import get_services_for_cluster
+from paasta_tools.utils import load_system_paasta_config
+from paasta_tools.utils import paasta_print
+
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 5
+
+DeployResult = namedtuple('DeployResult', ['service', 'instance', 'status', 'seconds'])
+
+
+def parse_args(description: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '-d', '--soa-dir', dest="soa_dir", metavar="SOA_DIR",
+        default=DEFAULT_SOA_DIR,
+        help="define a different soa config directory",
+    )
+    parser.add_argument(
+        '-w', '--workers', dest="workers", type=int, default=DEFAULT_WORKERS,
+        help="how many instances to deploy at once (default %(default)s)",
+    )
+    parser.add_argument(
+        '-v', '--verbose', action='store_true',
+        dest="verbose", default=False,
+    )
+    return parser.parse_args()
+
+
+def run_deploys(
+    deploy: Callable[[str, str], int],
+    service_instances: Sequence[Tuple[str, str]],
+    workers: int=DEFAULT_WORKERS,
+) -> List[DeployResult]:
+    """Calls deploy(service, instance) for every service instance, at most
+    workers at a time, and times each call.
+
+    An exception from deploy is logged and counts as a failed deploy, so that
+    one broken instance doesn't stop the others from being deployed.
+
+    :returns: A DeployResult per service instance, in the order given
+    """
+    def timed_deploy(service_instance: Tuple[str, str]) -> DeployResult:
+        service, instance = service_instance
+        start = time.time()
+        try:
+            status = deploy(service, instance)
+        except Exception:
+            log.error(
+                "Unexpected error deploying %s:\n%s",
+                compose_job_id(service, instance), traceback.format_exc(),
+            )
+            status = 1
+        result = DeployResult(service, instance, status, time.time() - start)
+        log.info(
+            "Deployed %s in %.2fs (status %d)",
+            compose_job_id(service, instance), result.seconds, result.status,
+        )
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(timed_deploy, service_instances))
+
+
+def format_summary(results: Sequence[DeployResult], seconds: float, slowest: int=5) -> str:
+    failed = [result for result in results if result.status]
+    lines = [
+        "Deployed %d service instances in %.2fs (%.2fs of deploy time), %d failed." % (
+            len(results), seconds, sum(result.seconds for result in results), len(failed),
+        ),
+    ]
+    for result in failed:
+        lines.append("Failed: %s" % compose_job_id(result.service, result.instance))
+    for result in sorted(results, key=lambda result: result.seconds, reverse=True)[:slowest]:
+        lines.append("Slowest: %s took %.2fs" % (compose_job_id(result.service, result.instance), result.seconds))
+    return '\n'.join(lines)
+
+
+def deploy_marathon_services(
+    service_instances: Sequence[Tuple[str, str]],
+    soa_dir: str=DEFAULT_SOA_DIR,
+    workers: int=DEFAULT_WORKERS,
+) -> List[DeployResult]:
+    """Deploys the given marathon service instances with setup_marathon_job.
+
+    All the deploys see the marathon apps as they were at the start of the
+    run, just like when passing several instances to setup_marathon_job.
+    """
+    system_paasta_config = load_system_paasta_config()
+    clients = marathon_tools.get_marathon_clients(marathon_tools.get_marathon_servers(system_paasta_config))
+    marathon_apps_with_clients = marathon_tools.get_marathon_apps_with_clients(
+        clients.get_all_clients(), embed_tasks=True,
+    )
+
+    def deploy(service: str, instance: str) -> int:
+        status, _ = setup_marathon_job.deploy_marathon_service(
+            service, instance, clients, soa_dir, marathon_apps_with_clients,
+            system_paasta_config=system_paasta_config,
+        )
+        return status
+
+    return run_deploys(deploy, service_instances, workers)
+
+
+def deploy_chronos_jobs(
+    service_instances: Sequence[Tuple[str, str]],
+    soa_dir: str=DEFAULT_SOA_DIR,
+    workers: int=DEFAULT_WORKERS,
+) -> List[DeployResult]:
+    """Deploys the given chronos jobs with setup_chronos_job.
+
+    The chronos client caches the job list for a few seconds, so the workers
+    share it instead of each listing every job twice.
+    """
+    client = chronos_tools.get_chronos_client(chronos_tools.load_chronos_config(), cached=True)
+    cluster = load_system_paasta_config().get_cluster()
+
+    def deploy(service: str, instance: str) -> int:
+        return setup_chronos_job.deploy_chronos_job(
+            service=service,
+            instance=instance,
+            client=client,
+            cluster=cluster,
+            soa_dir=soa_dir,
+        )
+
+    return run_deploys(deploy, service_instances, workers)
+
+
+def run_and_summarize(
+    deploy_all: Callable[..., List[DeployResult]],
+    service_instances: List[Tuple[str, str]],
+    args: argparse.Namespace,
+) -> None:
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.WARNING)
+    # Spread the instances that are slow to deploy over the run, like `shuf` did
+    random.shuffle(service_instances)
+    start = time.time()
+    results = deploy_all(service_instances, soa_dir=args.soa_dir, workers=args.workers)
+    paasta_print(format_summary(results, time.time() - start))
+    sys.exit(1 if any(result.status for result in results) else 0)
+
+
+def deploy_marathon_services_main() -> None:
+    args = parse_args('Deploys all the marathon service instances of this cluster.')
+    cluster = load_system_paasta_config().get_cluster()
+    service_instances = get_services_for_cluster(cluster=cluster, instance_type='marathon', soa_dir=args.soa_dir)
+    run_and_summarize(deploy_marathon_services, service_instances, args)
+
+
+def deploy_chronos_jobs_main() -> None:
+    args = parse_args('Deploys all the chronos jobs of this cluster.')
+    service_instances = chronos_tools.get_chronos_jobs_for_cluster(soa_dir=args.soa_dir)
+    run_and_summarize(deploy_chronos_jobs, service_instances, args)
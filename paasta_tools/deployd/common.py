@@ -11,6 +11,7 @@ from typing import Optional
 from typing import Tuple
 
 from paasta_tools.marathon_tools import DEFAULT_SOA_DIR
+from paasta_tools.marathon_tools import DesiredAppCache
 from paasta_tools.marathon_tools import get_all_marathon_apps
 from paasta_tools.marathon_tools import get_marathon_clients
 from paasta_tools.marathon_tools import get_marathon_servers
@@ -23,6 +24,9 @@ from paasta_tools.utils import NoConfigurationForServiceError
 from paasta_tools.utils import NoDeploymentsAvailable
 from paasta_tools.utils import NoDockerImageError
 
+# deployd is long running, so keep the formatted apps around between checks
+DESIRED_APP_CACHE = DesiredAppCache()
+
 BounceTimers = namedtuple('BounceTimers', ['processed_by_worker', 'setup_marathon', 'bounce_length'])
 BaseServiceInstance = namedtuple(
     'ServiceInstance', [
@@ -172,6 +176,7 @@ def get_service_instances_needing_update(
         marathon_apps.update({app.id: app for app in get_all_marathon_apps(marathon_client)})
 
     marathon_app_ids = marathon_apps.keys()
+    system_paasta_config = load_system_paasta_config()
     service_instances = []
     for service, instance in instances:
         try:
@@ -181,7 +186,10 @@ def get_service_instances_needing_update(
                 cluster=cluster,
                 soa_dir=DEFAULT_SOA_DIR,
             )
-            config_app = config.format_marathon_app_dict()
+            config_app = config.format_marathon_app_dict(
+                system_paasta_config=system_paasta_config,
+                desired_app_cache=DESIRED_APP_CACHE,
+            )
             app_id = '/{}'.format(config_app['id'])
         except (NoDockerImageError, InvalidJobNameError, NoDeploymentsAvailable) as e:
             print("DEBUG: Skipping %s.%s because: '%s'" % (service, instance, str(e)))
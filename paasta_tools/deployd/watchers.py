@@ -23,6 +23,7 @@ from paasta_tools.marathon_tools import DEFAULT_SOA_DIR
 from paasta_tools.marathon_tools import deformat_job_id
 from paasta_tools.marathon_tools import get_marathon_apps_with_clients
 from paasta_tools.mesos_maintenance import get_draining_hosts
+from paasta_tools.mesos_maintenance import MAINTENANCE_STATE_TTL
 from paasta_tools.utils import get_services_for_cluster
 from paasta_tools.utils import list_all_instances_for_service
 from paasta_tools.utils import load_system_paasta_config
@@ -158,7 +159,7 @@ class MaintenanceWatcher(PaastaWatcher):
 
     def get_new_draining_hosts(self):
         try:
-            draining_hosts = get_draining_hosts()
+            draining_hosts = get_draining_hosts(max_age=MAINTENANCE_STATE_TTL)
         except RequestException as e:
             self.log.error("Unable to get list of draining hosts from mesos: {}".format(e))
             draining_hosts = list(self.draining)
@@ -21,7 +21,6 @@ import socket
 import sys
 
 from paasta_tools.firewall import DEFAULT_SYNAPSE_SERVICE_DIR
-from paasta_tools.firewall import firewall_flock
 from paasta_tools.firewall import prepare_new_container
 from paasta_tools.mac_address import reserve_unique_mac_address
 from paasta_tools.utils import DEFAULT_SOA_DIR
@@ -288,15 +287,13 @@ def add_firewall(argv, service, instance):
     else:
         argv = add_argument(argv, '--mac-address={}'.format(mac_address))
         try:
-
-            with firewall_flock():
-                prepare_new_container(
-                    DEFAULT_SOA_DIR,
-                    DEFAULT_SYNAPSE_SERVICE_DIR,
-                    service,
-                    instance,
-                    mac_address,
-                )
+            prepare_new_container(
+                DEFAULT_SOA_DIR,
+                DEFAULT_SYNAPSE_SERVICE_DIR,
+                service,
+                instance,
+                mac_address,
+            )
         except Exception as e:
             output = 'Unable to add firewall rules: {}'.format(e)
 
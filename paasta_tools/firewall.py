@@ -92,7 +92,11 @@ class ServiceGroup(collections.namedtuple(
         return tuple(rules)
 
     def update_rules(self, soa_dir, synapse_service_dir):
-        iptables.ensure_chain(self.chain_name, self.get_rules(soa_dir, synapse_service_dir))
+        self.apply_rules(self.get_rules(soa_dir, synapse_service_dir))
+
+    def apply_rules(self, rules):
+        """Make the service chain have exactly the rules given, e.g. by get_rules"""
+        iptables.ensure_chain(self.chain_name, rules)
         iptables.reorder_chain(self.chain_name)
 
     @property
@@ -374,6 +378,9 @@ def _dns_servers():
                 yield parts[1]
 
 
+SHARED_CHAINS = frozenset(('PAASTA-DNS', 'PAASTA-INTERNET', 'PAASTA-COMMON'))
+
+
 def ensure_shared_chains():
     _ensure_dns_chain()
     _ensure_internet_chain()
@@ -469,16 +476,31 @@ def _ensure_internet_chain():
     )
 
 
-def ensure_service_chains(service_groups, soa_dir, synapse_service_dir):
+def get_service_chains_rules(service_groups, soa_dir, synapse_service_dir):
+    """Compute the rules of each service chain.
+
+    This reads soa-configs and synapse files, so do it before taking the
+    firewall flock, rather than while holding it.
+
+    Returns dictionary {ServiceGroup => rules}.
+    """
+    return {
+        service: service.get_rules(soa_dir, synapse_service_dir)
+        for service in service_groups
+    }
+
+
+def ensure_service_chains(service_groups, service_chains_rules):
     """Ensure service chains exist and have the right rules.
 
-    service_groups is a dict {ServiceGroup: set([mac_address..])}
+    service_groups is a dict {ServiceGroup: set([mac_address..])}, and
+    service_chains_rules what get_service_chains_rules returns for them.
 
     Returns dictionary {[service chain] => [list of mac addresses]}.
     """
     chains = {}
     for service, macs in service_groups.items():
-        service.update_rules(soa_dir, synapse_service_dir)
+        service.apply_rules(service_chains_rules[service])
         chains[service.chain_name] = macs
     return chains
 
@@ -530,20 +552,48 @@ def garbage_collect_old_service_chains(desired_chains):
 
 
 def general_update(soa_dir, synapse_service_dir):
-    """Update iptables to match the current PaaSTA state."""
-    ensure_shared_chains()
-    service_chains = ensure_service_chains(active_service_groups(), soa_dir, synapse_service_dir)
-    ensure_dispatch_chains(service_chains)
-    garbage_collect_old_service_chains(service_chains)
+    """Update iptables to match the current PaaSTA state.
+
+    The rules are computed first, and the firewall flock is only held while
+    iptables is updated, so that containers starting meanwhile don't wait for
+    soa-configs to be read.
+    """
+    service_groups = active_service_groups()
+    service_chains_rules = get_service_chains_rules(service_groups, soa_dir, synapse_service_dir)
+    with firewall_flock():
+        ensure_shared_chains()
+        service_chains = ensure_service_chains(service_groups, service_chains_rules)
+        ensure_dispatch_chains(service_chains)
+        garbage_collect_old_service_chains(service_chains)
 
 
 def prepare_new_container(soa_dir, synapse_service_dir, service, instance, mac):
     """Update iptables to include rules for a new (not yet running) MAC address
+
+    The service's rules are computed before taking the firewall flock, so
+    containers starting at the same time don't wait on each other reading
+    soa-configs. Under the flock, the service chain is only rewritten when it
+    is missing or its rules changed, e.g. after a redeploy changed the
+    service's dependencies; otherwise only the dispatch rule for the new MAC
+    address is inserted.
     """
-    ensure_shared_chains()  # probably already set, but just to be safe
     service_group = ServiceGroup(service, instance)
-    service_group.update_rules(soa_dir, synapse_service_dir)
-    iptables.insert_rule('PAASTA', dispatch_rule(service_group.chain_name, mac))
+    rules = service_group.get_rules(soa_dir, synapse_service_dir)
+
+    with firewall_flock():
+        # Chains may have been created, or garbage collected, since the rules were computed
+        chains = iptables.all_chains()
+        if not SHARED_CHAINS <= chains:
+            ensure_shared_chains()
+        if (
+            service_group.chain_name not in chains or
+            set(iptables.list_chain(service_group.chain_name)) != set(rules)
+        ):
+            service_group.apply_rules(rules)
+        if 'PAASTA' not in chains:
+            ensure_dispatch_chains({service_group.chain_name: {mac}})
+        else:
+            iptables.insert_rule('PAASTA', dispatch_rule(service_group.chain_name, mac))
 
 
 @contextmanager
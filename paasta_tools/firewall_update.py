@@ -82,8 +82,7 @@ def run_daemon(args):
 
 
 def run_cron(args):
-    with firewall.firewall_flock():
-        firewall.general_update(args.soa_dir, args.synapse_service_dir)
+    firewall.general_update(args.soa_dir, args.synapse_service_dir)
 
 
 def process_inotify_event(event, services_by_dependencies, soa_dir, synapse_service_dir):
@@ -105,9 +104,10 @@ def process_inotify_event(event, services_by_dependencies, soa_dir, synapse_serv
         if service_group in services_to_update
     }
 
+    service_chains_rules = firewall.get_service_chains_rules(service_groups, soa_dir, synapse_service_dir)
     try:
         with firewall.firewall_flock():
-            firewall.ensure_service_chains(service_groups, soa_dir, synapse_service_dir)
+            firewall.ensure_service_chains(service_groups, service_chains_rules)
 
         for service_to_update in services_to_update:
             log.debug('Updated {}'.format(service_to_update))
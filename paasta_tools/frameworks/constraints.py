@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 # Without this, the import of mesos.interface breaks because paasta_tools.mesos exists
 import re
+from functools import lru_cache
 from typing import Any
 from typing import Callable
 from typing import Dict
+from typing import Pattern
 
 from paasta_tools.utils import paasta_print
 
@@ -12,6 +14,13 @@ ConstraintState = Dict[str, Dict[str, Any]]
 ConstraintOp = Callable[[str, str, str, ConstraintState], bool]
 
 
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str) -> Pattern:
+    """LIKE and UNLIKE patterns come from service configs, so there are few
+    of them and each is compiled once"""
+    return re.compile(pattern)
+
+
 def max_per(constraint_value, offer_value, attribute, state: ConstraintState):
     if not constraint_value:
         constraint_value = 1
@@ -27,8 +36,8 @@ def max_per(constraint_value, offer_value, attribute, state: ConstraintState):
 #   state:            {'MAX_PER' => {'pool' => {'default' => 6}}}
 CONS_OPS: Dict[str, ConstraintOp] = {
     'EQUALS': lambda cv, ov, *_: cv == ov,
-    'LIKE': lambda cv, ov, *_: bool(re.match(cv, ov)),
-    'UNLIKE': lambda cv, ov, *_: not(re.match(cv, ov)),
+    'LIKE': lambda cv, ov, *_: bool(compile_pattern(cv).match(ov)),
+    'UNLIKE': lambda cv, ov, *_: not(compile_pattern(cv).match(ov)),
     'MAX_PER': max_per,
     'UNIQUE': max_per,
 }
@@ -43,6 +52,19 @@ def nested_inc(op, _, attr_val, attr_name, state, step=1):
     return state
 
 
+def copy_on_write_inc(op, _, attr_val, attr_name, state, step=1):
+    """Like nested_inc, but returns a new state instead of changing state.
+    Only the dicts on the path to the counter are copied, the rest is shared
+    with state."""
+    oph = dict(state.get(op, {}))
+    nameh = dict(oph.get(attr_name, {}))
+    nameh[attr_val] = nameh.get(attr_val, 0) + step
+    oph[attr_name] = nameh
+    new_state = dict(state)
+    new_state[op] = oph
+    return new_state
+
+
 # lambda args same as CONS_OPS + update step
 UPDATE_OPS = {
     'EQUALS': lambda *_: None,
@@ -52,22 +74,34 @@ UPDATE_OPS = {
     'UNIQUE': lambda *args: nested_inc('MAX_PER', *args),
 }
 
+# lambda args same as UPDATE_OPS, returns the updated state
+COPY_ON_WRITE_UPDATE_OPS = {
+    'EQUALS': lambda cv, ov, attr, state, step: state,
+    'LIKE': lambda cv, ov, attr, state, step: state,
+    'UNLIKE': lambda cv, ov, attr, state, step: state,
+    'MAX_PER': lambda *args: copy_on_write_inc('MAX_PER', *args),
+    'UNIQUE': lambda *args: copy_on_write_inc('MAX_PER', *args),
+}
+
+
+def offer_attributes(offer):
+    """Returns a dict of the offer's attribute names to their values"""
+    return {oa.name: oa.text.value for oa in offer.attributes}
+
 
 def check_offer_constraints(offer, constraints, state):
     """Returns True if all constraints are satisfied by offer's attributes,
     returns False otherwise. Prints a error message and re-raises if an error
     was thrown."""
+    attributes = offer_attributes(offer)
     for (attr, op, val) in constraints:
         try:
-            offer_attr = next(
-                (x for x in offer.attributes if x.name == attr), None,
-            )
-            if offer_attr is None:
+            if attr not in attributes:
                 paasta_print("Attribute not found for a constraint: %s" % attr)
                 return False
-            elif not(CONS_OPS[op](val, offer_attr.text.value, offer_attr.name, state)):
+            elif not(CONS_OPS[op](val, attributes[attr], attr, state)):
                 paasta_print("Constraint not satisfied: [%s %s %s] for %s with %s" % (
-                    attr, op, val, offer_attr.text.value, state,
+                    attr, op, val, attributes[attr], state,
                 ))
                 return False
         except Exception as err:
@@ -86,3 +120,14 @@ def update_constraint_state(offer, constraints, state, step=1):
         for oa in offer.attributes:
             if attr == oa.name:
                 UPDATE_OPS[op](val, oa.text.value, attr, state, step)
+
+
+def updated_constraint_state(offer, constraints, state, step=1):
+    """Returns the state that update_constraint_state would leave, without
+    changing state. The returned state shares everything it didn't change with
+    state, so neither should be changed in place while the other is in use."""
+    for (attr, op, val) in constraints:
+        for oa in offer.attributes:
+            if attr == oa.name:
+                state = COPY_ON_WRITE_UPDATE_OPS[op](val, oa.text.value, attr, state, step)
+    return state
@@ -8,6 +8,7 @@ import threading
 import time
 import uuid
 from typing import Collection
+from typing import Counter
 from typing import Dict
 from typing import List
 from typing import Mapping
@@ -24,6 +25,7 @@ from paasta_tools import mesos_tools
 from paasta_tools.frameworks.constraints import check_offer_constraints
 from paasta_tools.frameworks.constraints import ConstraintState  # noqa; imported for typing
 from paasta_tools.frameworks.constraints import update_constraint_state
+from paasta_tools.frameworks.constraints import updated_constraint_state
 from paasta_tools.frameworks.native_service_config import load_paasta_native_job_config
 from paasta_tools.frameworks.native_service_config import NativeServiceConfig  # noqa; imported for typing
 from paasta_tools.frameworks.native_service_config import TaskInfo  # noqa; imported for typing
@@ -59,6 +61,21 @@ class ConstraintFailAllTasksError(Exception):
     pass
 
 
+def take_random_port(port_ranges: List[List[int]]) -> int:
+    """Picks a port uniformly at random from a list of inclusive [begin, end]
+    port ranges, and removes it from them without expanding the ranges."""
+    index = random.randrange(sum(end - begin + 1 for begin, end in port_ranges))
+    for position, (begin, end) in enumerate(port_ranges):
+        if index <= end - begin:
+            port = begin + index
+            port_ranges[position:position + 1] = [
+                rg for rg in ([begin, port - 1], [port + 1, end]) if rg[0] <= rg[1]
+            ]
+            return port
+        index -= end - begin + 1
+    raise ValueError("No ports left in %s" % port_ranges)
+
+
 class NativeScheduler(Scheduler):
     task_store: TaskStore
 
@@ -91,6 +108,13 @@ class NativeScheduler(Scheduler):
         self.service_config_overrides = service_config_overrides or {}
         self.constraint_state: ConstraintState = {}
         self.constraint_state_lock = threading.Lock()
+        # task id -> version of the live tasks in the task store, and how many live tasks each version has.
+        # Kept up to date by track_task_state, so that offers don't have to read every task.
+        # Both the driver thread and the periodic thread update them, under live_task_lock. When both
+        # locks are needed, constraint_state_lock is taken first.
+        self.live_task_versions: Dict[str, str] = {}
+        self.live_task_counts: Counter = Counter()
+        self.live_task_lock = threading.Lock()
         self.frozen = False
 
         # don't accept resources until we reconcile.
@@ -147,6 +171,7 @@ class NativeScheduler(Scheduler):
             framework_id=self.framework_id,
             system_paasta_config=self.system_paasta_config,
         )
+        self.count_live_tasks()
 
         self.reconcile_start_time = time.time()
         driver.reconcileTasks([])
@@ -196,6 +221,7 @@ class NativeScheduler(Scheduler):
                                 offer=offer,
                                 resources=task['resources'],
                             )
+                            self.track_task_state(task['task_id']['value'], TASK_STAGING)
                         launched_tasks.extend(tasks)
                         self.constraint_state = new_state
                     else:
@@ -222,19 +248,6 @@ class NativeScheduler(Scheduler):
 
         return True
 
-    def need_more_tasks(self, name, existingTasks, scheduledTasks):
-        """Returns whether we need to start more tasks."""
-        num_have = 0
-        for task, parameters in existingTasks.items():
-            if self.is_task_new(name, task) and (parameters.mesos_task_state in LIVE_TASK_STATES):
-                num_have += 1
-
-        for task in scheduledTasks:
-            if task['name'] == name:
-                num_have += 1
-
-        return num_have < self.service_config.get_desired_instances()
-
     def get_new_tasks(self, name, tasks_with_params: Dict[str, MesosTaskParameters]):
         return {
             tid: params for tid, params in tasks_with_params.items() if (
@@ -267,7 +280,7 @@ class NativeScheduler(Scheduler):
         tasks: List[TaskInfo] = []
         offerCpus = 0.0
         offerMem = 0.0
-        offerPorts: List[int] = []
+        offerPorts: List[List[int]] = []
         for resource in offer.resources:
             if resource.name == "cpus":
                 offerCpus += resource.scalar.value
@@ -275,29 +288,34 @@ class NativeScheduler(Scheduler):
                 offerMem += resource.scalar.value
             elif resource.name == "ports":
                 for rg in resource.ranges.range:
-                    # I believe mesos protobuf ranges are inclusive, but range() is exclusive
-                    offerPorts += range(rg.begin, rg.end + 1)
+                    # mesos protobuf ranges are inclusive
+                    offerPorts.append([rg.begin, rg.end])
         remainingCpus = offerCpus
         remainingMem = offerMem
-        remainingPorts = set(offerPorts)
+        remainingPorts = offerPorts
 
         base_task = self.service_config.base_task(self.system_paasta_config)
         base_task['agent_id']['value'] = offer['agent_id']['value']
 
         task_mem = self.service_config.get_mem()
         task_cpus = self.service_config.get_cpus()
+        matches_pool = self.offer_matches_pool(offer)
+
+        with self.live_task_lock:
+            num_live = self.live_task_counts[base_task['name']]
+        num_needed = self.service_config.get_desired_instances() - num_live
 
-        # don't mutate existing state
-        new_constraint_state = copy.deepcopy(state)
+        # updated_constraint_state doesn't mutate existing state
+        new_constraint_state = state
         total = 0
         failed_constraints = 0
-        while self.need_more_tasks(base_task['name'], self.task_store.get_all_tasks(), tasks):
+        while len(tasks) < num_needed:
             total += 1
 
             if not(
                 remainingCpus >= task_cpus and
                 remainingMem >= task_mem and
-                self.offer_matches_pool(offer) and
+                matches_pool and
                 len(remainingPorts) >= 1
             ):
                 break
@@ -309,7 +327,7 @@ class NativeScheduler(Scheduler):
                 failed_constraints += 1
                 break
 
-            task_port = random.choice(list(remainingPorts))
+            task_port = take_random_port(remainingPorts)
 
             task = copy.deepcopy(base_task)
             task['task_id'] = {'value': '{}.{}'.format(task['name'], uuid.uuid4().hex)}
@@ -324,9 +342,8 @@ class NativeScheduler(Scheduler):
 
             remainingCpus -= task_cpus
             remainingMem -= task_mem
-            remainingPorts -= {task_port}
 
-            update_constraint_state(offer, self.constraints, new_constraint_state)
+            new_constraint_state = updated_constraint_state(offer, self.constraints, new_constraint_state)
 
         # raise constraint error but only if no other tasks fit/fail the offer
         if total > 0 and failed_constraints == total:
@@ -372,6 +389,7 @@ class NativeScheduler(Scheduler):
             task_id,
             mesos_task_state=update['state'],
         )
+        self.track_task_state(task_id, task_params.mesos_task_state)
 
         if task_params.mesos_task_state not in LIVE_TASK_STATES:
             with self.constraint_state_lock:
@@ -499,6 +517,30 @@ class NativeScheduler(Scheduler):
         self.log("Killing task %s" % task_id)
         driver.killTask({'value': task_id})
         self.task_store.update_task(task_id, mesos_task_state=TASK_KILLING)
+        self.track_task_state(task_id, TASK_KILLING)
+
+    def count_live_tasks(self) -> None:
+        """Counts the live tasks of each version from scratch, from the task store."""
+        all_tasks = self.task_store.get_all_tasks()
+        with self.live_task_lock:
+            self.live_task_versions = {}
+            self.live_task_counts = Counter()
+            for task_id, parameters in all_tasks.items():
+                self._track_task_state(task_id, parameters.mesos_task_state)
+
+    def track_task_state(self, task_id: str, mesos_task_state: Optional[str]) -> None:
+        """Updates the live task counts after task_id's state changed in the task store."""
+        with self.live_task_lock:
+            self._track_task_state(task_id, mesos_task_state)
+
+    def _track_task_state(self, task_id: str, mesos_task_state: Optional[str]) -> None:
+        if mesos_task_state in LIVE_TASK_STATES:
+            if task_id not in self.live_task_versions:
+                version = task_id.rsplit('.', 1)[0]
+                self.live_task_versions[task_id] = version
+                self.live_task_counts[version] += 1
+        elif task_id in self.live_task_versions:
+            self.live_task_counts[self.live_task_versions.pop(task_id)] -= 1
 
     def group_tasks_by_version(self, task_ids: Collection[str]) -> Mapping[str, Collection[str]]:
         d: Dict[str, List[str]] = {}
@@ -42,16 +42,23 @@ import json
 import logging
 import os
 import re
+import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from paasta_tools import remote_git
 from paasta_tools.cli.utils import get_instance_configs_for_service
 from paasta_tools.utils import atomic_file_write
 from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import get_git_url
+from paasta_tools.utils import list_all_instances_for_service
 
 log = logging.getLogger(__name__)
 TARGET_FILE = 'deployments.json'
+DEPLOY_TAG_PATTERN = re.compile(r'^refs/tags/paasta-(?P<deploy_group>.+)-(?P<tstamp>\d{8}T\d{6})-deploy$')
+# (?:paasta-){0,2} in get_desired_state is handled by get_desired_states trying
+# the branch name with zero, one and two paasta- prefixes stripped
+STATE_TAG_PATTERN = re.compile(r'^refs/tags/(?P<branch>.+)-(?P<force_bounce>[^-]+)-(?P<state>start|stop)$')
 
 
 def parse_args():
@@ -114,7 +121,50 @@ def get_latest_deployment_tag(refs, deploy_group):
     return most_recent_ref, most_recent_sha
 
 
-def get_deploy_group_mappings(soa_dir, service, old_mappings=None):
+def get_latest_deployment_tags(refs):
+    """Does the same as calling get_latest_deployment_tag for every deploy group
+    at once, in a single pass over the refs.
+
+    :param refs: A dictionary mapping git refs to shas
+    :returns: A dictionary mapping each deploy group to a tuple of the form
+              (timestamp, sha, ref) for its most recent deployment tag
+    """
+    latest_tags = {}
+    for ref_name, sha in refs.items():
+        match = DEPLOY_TAG_PATTERN.match(ref_name)
+        if match:
+            deploy_group, dtime = match.group('deploy_group', 'tstamp')
+            if deploy_group not in latest_tags or dtime > latest_tags[deploy_group][0]:
+                latest_tags[deploy_group] = (dtime, sha, ref_name)
+    return latest_tags
+
+
+def get_desired_states(refs):
+    """Does the same as calling get_desired_state for every branch at once, in a
+    single pass over the refs.
+
+    :param refs: A dictionary mapping git refs to shas
+    :returns: A dictionary mapping (branch, sha) to the (desired_state, force_bounce)
+              tuple of the start/stop tag for that branch with the latest force_bounce
+    """
+    desired_states = {}
+    for ref_name, sha in refs.items():
+        match = STATE_TAG_PATTERN.match(ref_name)
+        if not match:
+            continue
+        branch, force_bounce, state = match.group('branch', 'force_bounce', 'state')
+        branches = [branch]
+        for _ in range(2):
+            if branches[-1].startswith('paasta-'):
+                branches.append(branches[-1][len('paasta-'):])
+        for branch in branches:
+            current = desired_states.get((branch, sha))
+            if current is None or force_bounce >= current[1]:
+                desired_states[(branch, sha)] = (state, force_bounce)
+    return desired_states
+
+
+def get_deploy_group_mappings(soa_dir, service, old_mappings=None, remote_refs=None):
     """Gets mappings from service:deploy_group to services-service:paasta-hash,
     where hash is the current SHA at the HEAD of branch_name.
     This is done for all services in soa_dir.
@@ -122,6 +172,7 @@ def get_deploy_group_mappings(soa_dir, service, old_mappings=None):
     :param soa_dir: The SOA configuration directory to read from
     :param old_mappings_DEPRECATED: A dictionary like the return dictionary.
       Used for fallback if there is a problem with a new mapping.
+    :param remote_refs: The refs of the service's git repo, listed from it if not given
     :returns: A dictionary mapping service:deploy_group to a dictionary
       containing:
 
@@ -152,16 +203,18 @@ def get_deploy_group_mappings(soa_dir, service, old_mappings=None):
         log.info('Service %s has no valid deploy groups. Skipping.', service)
         return {}
 
-    git_url = get_git_url(
-        service=service,
-        soa_dir=soa_dir,
-    )
-    remote_refs = remote_git.list_remote_refs(git_url)
+    if remote_refs is None:
+        git_url = get_git_url(
+            service=service,
+            soa_dir=soa_dir,
+        )
+        remote_refs = remote_git.list_remote_refs(git_url)
+    latest_deployment_tags = get_latest_deployment_tags(remote_refs)
+    desired_states = get_desired_states(remote_refs)
 
     for control_branch, deploy_group in deploy_group_branch_mappings.items():
-        (deploy_ref_name, _) = get_latest_deployment_tag(remote_refs, deploy_group)
-        if deploy_ref_name in remote_refs:
-            commit_sha = remote_refs[deploy_ref_name]
+        if deploy_group in latest_deployment_tags:
+            _, commit_sha, _ = latest_deployment_tags[deploy_group]
             control_branch_alias = '%s:paasta-%s' % (service, control_branch)
             control_branch_alias_v2 = '%s:%s' % (service, control_branch)
             docker_image = build_docker_image_name(service, commit_sha)
@@ -171,11 +224,7 @@ def get_deploy_group_mappings(soa_dir, service, old_mappings=None):
             v2_mappings['deployments'].setdefault(deploy_group, {})['docker_image'] = docker_image
             v2_mappings['deployments'][deploy_group]['git_sha'] = commit_sha
 
-            desired_state, force_bounce = get_desired_state(
-                branch=control_branch,
-                remote_refs=remote_refs,
-                deploy_group=deploy_group,
-            )
+            desired_state, force_bounce = desired_states.get((control_branch, commit_sha), ('start', None))
             mapping['desired_state'] = desired_state
             mapping['force_bounce'] = force_bounce
             v2_mappings['controls'].setdefault(control_branch_alias_v2, {})['desired_state'] = desired_state
@@ -245,7 +294,7 @@ def get_deploy_group_mappings_from_deployments_dict(deployments_dict):
         return deploy_group_mappings
 
 
-def generate_deployments_for_service(service, soa_dir):
+def generate_deployments_for_service(service, soa_dir, remote_refs=None):
     try:
         with open(os.path.join(soa_dir, service, TARGET_FILE), 'r') as f:
             old_deployments_dict = json.load(f)
@@ -257,6 +306,7 @@ def generate_deployments_for_service(service, soa_dir):
         soa_dir=soa_dir,
         service=service,
         old_mappings=old_mappings,
+        remote_refs=remote_refs,
     )
 
     deployments_dict = get_deployments_dict_from_deploy_group_mappings(mappings, v2_mappings)
@@ -277,5 +327,65 @@ def main():
     generate_deployments_for_service(service=service, soa_dir=soa_dir)
 
 
+def generate_deployments_for_services(services, soa_dir, workers=4):
+    """Generates the deployments.json of many services in one process.
+
+    The refs of each git repo are listed once, even if several services share
+    it, with up to workers listings in flight at once.
+
+    :returns: The list of services whose deployments.json could not be generated
+    """
+    git_urls = {service: get_git_url(service=service, soa_dir=soa_dir) for service in services}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Submitted before any service, so no service waits on a listing queued behind it
+        remote_refs_futures = {
+            git_url: executor.submit(remote_git.list_remote_refs, git_url)
+            for git_url in sorted(set(git_urls.values()))
+        }
+
+        def generate(service):
+            try:
+                generate_deployments_for_service(
+                    service=service,
+                    soa_dir=soa_dir,
+                    remote_refs=remote_refs_futures[git_urls[service]].result(),
+                )
+            except Exception:
+                log.exception('Failed to generate deployments.json for %s', service)
+                return service
+
+        return [service for service in executor.map(generate, services) if service is not None]
+
+
+def generate_all_deployments_main():
+    parser = argparse.ArgumentParser(description='Creates the deployments.json of every paasta service.')
+    parser.add_argument(
+        '-d', '--soa-dir', dest="soa_dir", metavar="SOA_DIR",
+        default=DEFAULT_SOA_DIR,
+        help="define a different soa config directory",
+    )
+    parser.add_argument(
+        '-w', '--workers', dest="workers", type=int, default=4,
+        help="how many git repos to list refs from at once (default %(default)s)",
+    )
+    parser.add_argument(
+        '-v', '--verbose', action='store_true',
+        dest="verbose", default=False,
+    )
+    args = parser.parse_args()
+    soa_dir = os.path.abspath(args.soa_dir)
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.WARNING)
+
+    services = [
+        service for service in sorted(os.listdir(soa_dir))
+        if list_all_instances_for_service(service, soa_dir=soa_dir)
+    ]
+    failed = generate_deployments_for_services(services, soa_dir=soa_dir, workers=args.workers)
+    sys.exit(1 if failed else 0)
+
+
 if __name__ == "__main__":
     main()
@@ -71,7 +71,8 @@ def parse_args():
 
 
 def get_desired_marathon_configs(soa_dir):
-    cluster = load_system_paasta_config().get_cluster()
+    system_paasta_config = load_system_paasta_config()
+    cluster = system_paasta_config.get_cluster()
     instances = get_services_for_cluster(
         instance_type='marathon',
         cluster=cluster,
@@ -90,7 +91,7 @@ def get_desired_marathon_configs(soa_dir):
                 soa_dir=soa_dir,
             )
 
-            formatted_config = job_config.format_marathon_app_dict()
+            formatted_config = job_config.format_marathon_app_dict(system_paasta_config=system_paasta_config)
             formatted_marathon_configs[formatted_config['id'].lstrip('/')] = formatted_config
             job_configs[formatted_config['id'].lstrip('/')] = job_config
         except NoSlavesAvailableError as errormsg:
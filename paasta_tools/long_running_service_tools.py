@@ -1,5 +1,7 @@
 import logging
 import socket
+from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -13,6 +15,7 @@ from paasta_tools.utils import BranchDict
 from paasta_tools.utils import compose_job_id
 from paasta_tools.utils import decompose_job_id
 from paasta_tools.utils import DEFAULT_SOA_DIR
+from paasta_tools.utils import get_service_config_mtime
 from paasta_tools.utils import InstanceConfig
 from paasta_tools.utils import InstanceConfigDict
 from paasta_tools.utils import InvalidInstanceConfig
@@ -364,6 +367,53 @@ def load_service_namespace_config(service: str, namespace: str, soa_dir: str=DEF
     return service_namespace_config
 
 
+class ServiceConfigCache(object):
+    """Values read from a service's soa-configs, kept until a file in the
+    service's soa_dir directory changes, according to get_service_config_mtime.
+
+    Each service's mtime is only checked once between two calls to
+    check_for_changes, so a discovery run that looks at many tasks of the same
+    service stats its directory once. Services without a directory in soa_dir
+    are never cached.
+    """
+
+    def __init__(self) -> None:
+        self._values: Dict[Tuple[str, str, Tuple[str, ...]], Tuple[float, Any]] = {}
+        self._mtimes: Dict[Tuple[str, str], Optional[float]] = {}
+
+    def check_for_changes(self) -> None:
+        self._mtimes = {}
+
+    def get(self, service: str, soa_dir: str, key: Tuple[str, ...], load: Callable[[], Any]) -> Any:
+        """Returns the value cached for key of service in soa_dir, calling load if
+        there is none or the service's configs changed since it was cached"""
+        if (soa_dir, service) not in self._mtimes:
+            self._mtimes[(soa_dir, service)] = get_service_config_mtime(service, soa_dir)
+        mtime = self._mtimes[(soa_dir, service)]
+        if mtime is None:
+            return load()
+        cached = self._values.get((soa_dir, service, key))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        value = load()
+        self._values[(soa_dir, service, key)] = (mtime, value)
+        return value
+
+    def get_service_namespace_config(
+        self,
+        service: str,
+        namespace: str,
+        soa_dir: str,
+        load: Callable[[], ServiceNamespaceConfig],
+    ) -> ServiceNamespaceConfig:
+        """Returns a copy of the namespace config that the caller is free to modify"""
+        return ServiceNamespaceConfig(self.get(service, soa_dir, ('namespace', namespace), load))
+
+
+# Shared by the *_running_here_for_nerve discovery functions
+nerve_config_cache = ServiceConfigCache()
+
+
 class InvalidSmartstackMode(Exception):
     pass
 
@@ -53,6 +53,7 @@ from paasta_tools.long_running_service_tools import InvalidHealthcheckMode
 from paasta_tools.long_running_service_tools import load_service_namespace_config
 from paasta_tools.long_running_service_tools import LongRunningServiceConfig
 from paasta_tools.long_running_service_tools import LongRunningServiceConfigDict
+from paasta_tools.long_running_service_tools import nerve_config_cache
 from paasta_tools.long_running_service_tools import ServiceNamespaceConfig
 from paasta_tools.mesos.exceptions import NoSlavesAvailableError
 from paasta_tools.mesos_tools import filter_mesos_slaves_by_blacklist
@@ -581,7 +582,11 @@ class MarathonServiceConfig(LongRunningServiceConfig):
         routing_constraints: List[Constraint] = [[discover_level, "GROUP_BY", str(len(value_dict.keys()))]]
         return routing_constraints
 
-    def format_marathon_app_dict(self) -> FormattedMarathonAppDict:
+    def format_marathon_app_dict(
+        self,
+        system_paasta_config: Optional[SystemPaastaConfig]=None,
+        desired_app_cache: Optional['DesiredAppCache']=None,
+    ) -> FormattedMarathonAppDict:
         """Create the configuration that will be passed to the Marathon REST API.
 
         Currently compiles the following keys into one nice dict:
@@ -601,19 +606,32 @@ class MarathonServiceConfig(LongRunningServiceConfig):
 
         The last 7 keys are retrieved using the get_<key> functions defined above.
 
-        :param app_id: The app id
-        :param docker_url: The url to the docker image the app will actually execute
-        :param docker_volumes: The docker volumes to run the image with, via the
-                               marathon configuration file
-        :param service_namespace_config: The service instance's configuration dict
+        :param system_paasta_config: The system paasta config to use, loaded if not given.
+                                     Pass one in when formatting many instances.
+        :param desired_app_cache: A DesiredAppCache to reuse the dict from if none of
+                                  its inputs changed since this instance was last formatted
         :returns: A dict containing all of the keys listed above"""
 
-        system_paasta_config = load_system_paasta_config()
+        if system_paasta_config is None:
+            system_paasta_config = load_system_paasta_config()
         docker_url = self.get_docker_url()
         service_namespace_config = load_service_namespace_config(
             service=self.service,
             namespace=self.get_nerve_namespace(),
         )
+        if desired_app_cache is not None:
+            return desired_app_cache.get_marathon_app_dict(
+                self, system_paasta_config, docker_url, service_namespace_config,
+            )
+        return self.format_marathon_app_dict_from(system_paasta_config, docker_url, service_namespace_config)
+
+    def format_marathon_app_dict_from(
+        self,
+        system_paasta_config: SystemPaastaConfig,
+        docker_url: str,
+        service_namespace_config: ServiceNamespaceConfig,
+    ) -> FormattedMarathonAppDict:
+        """format_marathon_app_dict, with the system config, docker url and namespace config already loaded"""
         docker_volumes = self.get_volumes(system_volumes=system_paasta_config.get_volumes())
 
         net = get_mesos_network_for_net(self.get_net())
@@ -800,6 +818,75 @@ class MarathonServiceConfig(LongRunningServiceConfig):
         return self.config_dict.get('previous_marathon_shards', None)
 
 
+class DesiredAppCache(object):
+    """Remembers the formatted marathon app dict of each service instance.
+
+    format_marathon_app_dict is a pure function of the instance config, its
+    deployments.json entry, the system paasta config and the smartstack
+    namespace config, except for the instance count, which may come from
+    zookeeper. The cache keys each app dict on those inputs, so formatting
+    every instance in the cluster only recomputes (and rehashes) the ones
+    whose inputs changed. The instance count is always looked up again.
+    """
+
+    def __init__(self) -> None:
+        self._apps: Dict[Tuple[str, str, str], Tuple[str, FormattedMarathonAppDict]] = {}
+        self._system_paasta_config: Optional[SystemPaastaConfig] = None
+        self._system_paasta_config_fingerprint = ''
+        self.hits = 0
+        self.misses = 0
+
+    def get_system_paasta_config_fingerprint(self, system_paasta_config: SystemPaastaConfig) -> str:
+        # callers formatting many instances pass the same config object, so only serialize it once
+        if system_paasta_config is not self._system_paasta_config:
+            self._system_paasta_config = system_paasta_config
+            self._system_paasta_config_fingerprint = json.dumps(
+                system_paasta_config.config_dict, sort_keys=True, default=str,
+            )
+        return self._system_paasta_config_fingerprint
+
+    def get_inputs_key(
+        self,
+        job_config: MarathonServiceConfig,
+        system_paasta_config: SystemPaastaConfig,
+        docker_url: str,
+        service_namespace_config: ServiceNamespaceConfig,
+    ) -> str:
+        return json.dumps(
+            [
+                job_config.config_dict,
+                job_config.branch_dict,
+                docker_url,
+                service_namespace_config,
+                self.get_system_paasta_config_fingerprint(system_paasta_config),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+
+    def get_marathon_app_dict(
+        self,
+        job_config: MarathonServiceConfig,
+        system_paasta_config: SystemPaastaConfig,
+        docker_url: str,
+        service_namespace_config: ServiceNamespaceConfig,
+    ) -> FormattedMarathonAppDict:
+        cache_key = (job_config.service, job_config.instance, job_config.cluster)
+        inputs_key = self.get_inputs_key(job_config, system_paasta_config, docker_url, service_namespace_config)
+        cached = self._apps.get(cache_key)
+        if cached is not None and cached[0] == inputs_key:
+            self.hits += 1
+            complete_config = copy.deepcopy(cached[1])
+            complete_config['instances'] = job_config.get_desired_instances()
+            return complete_config
+        self.misses += 1
+        complete_config = job_config.format_marathon_app_dict_from(
+            system_paasta_config, docker_url, service_namespace_config,
+        )
+        self._apps[cache_key] = (inputs_key, copy.deepcopy(complete_config))
+        return complete_config
+
+
 class MarathonDeployStatus:
     """ An enum to represent Marathon app deploy status.
     Changing name of the keys will affect both the paasta CLI and API.
@@ -827,12 +914,28 @@ def get_marathon_app_deploy_status(client: MarathonClient, app_id: str) -> int:
     # Check the launch queue to see if an app is blocked
     is_overdue, backoff_seconds = get_app_queue_status(client, app_id)
 
+    return get_marathon_app_deploy_status_from_app_and_queue_status(
+        app=app,
+        is_overdue=is_overdue,
+        backoff_seconds=backoff_seconds,
+        is_deploying=len(app.deployments) > 0,
+    )
+
+
+def get_marathon_app_deploy_status_from_app_and_queue_status(
+    app: MarathonApp,
+    is_overdue: Optional[bool],
+    backoff_seconds: Optional[float],
+    is_deploying: bool,
+) -> int:
+    """Computes the deploy status of an app that is known to be running, from
+    data that has already been fetched from marathon."""
     # Based on conditions at https://mesosphere.github.io/marathon/docs/marathon-ui.html
     if is_overdue:
         deploy_status = MarathonDeployStatus.Waiting
     elif backoff_seconds:
         deploy_status = MarathonDeployStatus.Delayed
-    elif len(app.deployments) > 0:
+    elif is_deploying:
         deploy_status = MarathonDeployStatus.Deploying
     elif app.instances == 0 and app.tasks_running == 0:
         deploy_status = MarathonDeployStatus.Stopped
@@ -1056,20 +1159,28 @@ def parse_service_instance_from_executor_id(task_id: str) -> Tuple[str, str]:
     return srv_name, srv_instance
 
 
-def marathon_services_running_here() -> List[Tuple[str, str, int]]:
+def marathon_services_running_here(slave_state: Optional[Dict[str, Any]]=None) -> List[Tuple[str, str, int]]:
     """See what marathon services are being run by a mesos-slave on this host.
+    :param slave_state: An already fetched local slave state, if the caller has one.
     :returns: A list of triples of (service, instance, port)"""
 
     return mesos_services_running_here(
         framework_filter=lambda fw: fw['name'].startswith('marathon'),
         parse_service_instance_from_executor_id=parse_service_instance_from_executor_id,
+        slave_state=slave_state,
     )
 
 
 def get_marathon_services_running_here_for_nerve(
     cluster: str,
     soa_dir: str,
+    slave_state: Optional[Dict[str, Any]]=None,
 ) -> List[Tuple[str, ServiceNamespaceConfig]]:
+    """Registrations and namespace configs are read through nerve_config_cache,
+    so they are only parsed again once their service's soa-configs change.
+
+    :param slave_state: An already fetched local slave state, if the caller has one.
+    """
     if not cluster:
         try:
             cluster = load_system_paasta_config().get_cluster()
@@ -1080,17 +1191,22 @@ def get_marathon_services_running_here_for_nerve(
         except (PaastaNotConfiguredError):
             return []
     # When a cluster is defined in mesos, let's iterate through marathon services
-    marathon_services = marathon_services_running_here()
+    marathon_services = marathon_services_running_here(slave_state=slave_state)
+    nerve_config_cache.check_for_changes()
     nerve_list = []
     for name, instance, port in marathon_services:
         try:
-            registrations = read_all_registrations_for_service_instance(
-                name, instance, cluster, soa_dir,
+            registrations = nerve_config_cache.get(
+                name, soa_dir, ('marathon_registrations', cluster, instance),
+                lambda: read_all_registrations_for_service_instance(name, instance, cluster, soa_dir),
             )
             for registration in registrations:
                 reg_service, reg_namespace, _, __ = decompose_job_id(registration)
-                nerve_dict = load_service_namespace_config(
-                    service=reg_service, namespace=reg_namespace, soa_dir=soa_dir,
+                nerve_dict = nerve_config_cache.get_service_namespace_config(
+                    reg_service, reg_namespace, soa_dir,
+                    lambda: load_service_namespace_config(
+                        service=reg_service, namespace=reg_namespace, soa_dir=soa_dir,
+                    ),
                 )
                 if not nerve_dict.is_in_smartstack():
                     continue
@@ -1119,6 +1235,7 @@ def get_puppet_services_that_run_here() -> Dict[str, List[str]]:
 
 
 def get_puppet_services_running_here_for_nerve(soa_dir: str) -> List[Tuple[str, ServiceNamespaceConfig]]:
+    nerve_config_cache.check_for_changes()
     puppet_services = []
     for service, namespaces in sorted(get_puppet_services_that_run_here().items()):
         for namespace in namespaces:
@@ -1139,7 +1256,10 @@ def _namespaced_get_classic_service_information_for_nerve(
     namespace: str,
     soa_dir: str,
 ) -> Tuple[str, ServiceNamespaceConfig]:
-    nerve_dict = load_service_namespace_config(name, namespace, soa_dir)
+    nerve_dict = nerve_config_cache.get_service_namespace_config(
+        name, namespace, soa_dir,
+        lambda: load_service_namespace_config(name, namespace, soa_dir),
+    )
     port_file = os.path.join(soa_dir, name, 'port')
     # If the namespace defines a port, prefer that, otherwise use the
     # service wide port file.
@@ -1152,12 +1272,16 @@ def _namespaced_get_classic_service_information_for_nerve(
 
 
 def get_classic_services_running_here_for_nerve(soa_dir: str) -> List[Tuple[str, ServiceNamespaceConfig]]:
+    nerve_config_cache.check_for_changes()
     classic_services = []
     classic_services_here = service_configuration_lib.services_that_run_here()
     for service in sorted(classic_services_here):
-        namespaces = [x[0] for x in get_all_namespaces_for_service(
-            service, soa_dir, full_name=False,
-        )]
+        namespaces = nerve_config_cache.get(
+            service, soa_dir, ('namespaces',),
+            lambda: [x[0] for x in get_all_namespaces_for_service(
+                service, soa_dir, full_name=False,
+            )],
+        )
         for namespace in namespaces:
             classic_services.append(
                 _namespaced_get_classic_service_information_for_nerve(
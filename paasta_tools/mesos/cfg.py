@@ -26,6 +26,10 @@ DEFAULTS = {
     "max_workers": 5,
     "scheme": "http",
     "response_timeout": 5,
+    # Written by paasta_mesos_state_snapshot, read instead of asking the
+    # master when use_mesos_cache is set and it is at most this many seconds old
+    "state_snapshot_path": "/var/cache/paasta/mesos_master_state.json",
+    "state_snapshot_max_age": 60,
 }
 
 
@@ -15,6 +15,8 @@
 # limitations under the License.
 import itertools
 
+import requests.exceptions
+
 from . import exceptions
 from . import parallel
 from paasta_tools.utils import paasta_print
@@ -56,3 +58,34 @@ def get_files_for_tasks(task_list, file_list, max_workers):
                 ",".join(file_list),
             ),
         )
+
+
+def get_stats_for_tasks(task_list, max_workers):
+    """Returns the statistics of each task, by task id.
+
+    The tasks are grouped by agent, so that each agent's statistics are
+    fetched once, in parallel, instead of once per task. This also fills the
+    agents' statistics cache that task.stats reads from. Tasks whose agent
+    can't be reached are left out.
+    """
+    tasks_by_slave = {}
+    for task in task_list:
+        try:
+            slave = task.slave
+        except exceptions.SlaveDoesNotExist:
+            continue
+        tasks_by_slave.setdefault(slave.key(), (slave, []))[1].append(task)
+
+    def process(slave_tasks):
+        slave, tasks = slave_tasks
+        try:
+            stats_by_executor_id = slave.stats_by_executor_id
+        except (exceptions.SlaveDoesNotExist, requests.exceptions.RequestException):
+            raise exceptions.SkipResult
+        # Tasks that are not yet in a RUNNING state have no stats.
+        return [(task["id"], stats_by_executor_id.get(task["id"], {})) for task in tasks]
+
+    stats = {}
+    for result in parallel.stream(process, tasks_by_slave.values(), max_workers):
+        stats.update(result)
+    return stats
@@ -19,6 +19,7 @@ import json
 import logging
 import os
 import re
+import time
 from urllib.parse import urljoin
 from urllib.parse import urlparse
 
@@ -181,8 +182,28 @@ class MesosMaster(object):
         else:
             return cfg
 
+    @util.CachedProperty(ttl=15)
+    def state_snapshot(self):
+        """The master state written to disk by paasta_mesos_state_snapshot, if
+        use_mesos_cache is set and the snapshot is recent enough, or None"""
+        path = self.config.get("state_snapshot_path")
+        if not self.config.get("use_mesos_cache", False) or not path:
+            return None
+        try:
+            age = time.time() - os.stat(path).st_mtime
+            if age > self.config.get("state_snapshot_max_age", 0):
+                logger.debug("master state snapshot {} is {:.0f}s old".format(path, age))
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            logger.debug("failed to read master state snapshot {}: {}".format(path, e))
+            return None
+
     @util.CachedProperty(ttl=15)
     def state(self):
+        if self.state_snapshot is not None:
+            return self.state_snapshot
         return self.fetch("/master/state.json", cached=True).json()
 
     def state_summary(self):
@@ -266,6 +287,11 @@ class MesosMaster(object):
 
     @util.CachedProperty(ttl=15)
     def _frameworks(self):
+        if self.state_snapshot is not None:
+            return {
+                key: self.state_snapshot.get(key, [])
+                for key in ("frameworks", "completed_frameworks")
+            }
         return self.fetch("/master/frameworks", cached=True).json()
 
     def frameworks(self, active_only=False):
@@ -22,6 +22,8 @@ from . import util
 class File(object):
 
     chunk_size = 1024
+    # Agents read at most 16 pages per request
+    tail_length = 64 * 1024
 
     def __init__(self, host, task=None, path=None):
         self.host = host
@@ -154,6 +156,27 @@ class File(object):
 
         yield self._get_chunk(fsize - size, size % self.chunk_size)
 
+    def tail(self, nlines):
+        """Returns the last nlines lines of the file, without their terminators.
+
+        Unlike reading the file in reverse, this reads the last tail_length
+        bytes in a single request, so it returns fewer lines if the last
+        nlines are longer than that.
+        """
+        fsize = self.size
+        start = max(fsize - self.tail_length, 0)
+        if nlines <= 0 or fsize == start:
+            return []
+
+        lines = self._get_chunk(start, fsize - start).split("\n")
+        # The first line may have started before what was read.
+        if start > 0:
+            lines = lines[1:]
+        # Don't include the terminator of the last line.
+        if lines and lines[-1] == "":
+            lines.pop()
+        return lines[-nlines:]
+
     def read(self, size=None):
         return ''.join(self._read(size))
 
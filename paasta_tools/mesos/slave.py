@@ -30,6 +30,7 @@ class MesosSlave(object):
     def __init__(self, config, items):
         self.config = config
         self.__items = items
+        self._state_index = None
 
     def __getitem__(self, name):
         return self.__items[name]
@@ -71,17 +72,19 @@ class MesosSlave(object):
     def frameworks(self):
         return util.merge(self.state, "frameworks", "completed_frameworks")
 
+    @property
+    def state_index(self):
+        """A SlaveStateIndex of the current state, rebuilt when it's refetched"""
+        state = self.state
+        if self._state_index is None or self._state_index.state is not state:
+            self._state_index = SlaveStateIndex(state)
+        return self._state_index
+
     def task_executor(self, task_id):
-        for fw in self.frameworks:
-            for exc in util.merge(fw, "executors", "completed_executors"):
-                if task_id in list(map(
-                        lambda x: x["id"],
-                        util.merge(
-                            exc, "completed_tasks", "tasks", "queued_tasks",
-                        ),
-                )):
-                    return exc
-        raise exceptions.MissingExecutor("No executor has a task by that id")
+        return self.state_index.task_executor(task_id)
+
+    def task_framework(self, task_id):
+        return self.state_index.task_framework(task_id)
 
     def file_list(self, path):
         # The sandbox does not exist on the slave.
@@ -100,22 +103,58 @@ class MesosSlave(object):
     def stats(self):
         return self.fetch("/monitor/statistics.json").json()
 
+    @util.CachedProperty(ttl=1)
+    def stats_by_executor_id(self):
+        return {stats["executor_id"]: stats["statistics"] for stats in self.stats}
+
     def executor_stats(self, _id):
         return list(filter(lambda x: x["executor_id"]))
 
     def task_stats(self, _id):
-        stats = list(filter(
-            lambda x: x["executor_id"] == _id,
-            self.stats,
-        ))
-
         # Tasks that are not yet in a RUNNING state have no stats.
-        if len(stats) == 0:
-            return {}
-        else:
-            return stats[0]["statistics"]
+        return self.stats_by_executor_id.get(_id, {})
 
     @property
     @util.memoize
     def log(self):
         return mesos_file.File(self, path="/slave/log")
+
+
+class SlaveStateIndex(object):
+    """Looks up the executor and framework of a task in an agent's state.
+
+    The state is walked once, when the index is built. When a task id shows
+    up more than once, the first executor and framework that have it win,
+    in the order frameworks, completed_frameworks, then executors,
+    completed_executors, then completed_tasks, tasks, queued_tasks.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self._executors = {}
+        self._frameworks = {}
+        for fw in _merge_present(state, "frameworks", "completed_frameworks"):
+            for exc in _merge_present(fw, "executors", "completed_executors"):
+                for task in _merge_present(exc, "completed_tasks", "tasks", "queued_tasks"):
+                    self._executors.setdefault(task["id"], exc)
+                    self._frameworks.setdefault(task["id"], fw)
+
+    def __contains__(self, task_id):
+        return task_id in self._executors
+
+    def task_executor(self, task_id):
+        try:
+            return self._executors[task_id]
+        except KeyError:
+            raise exceptions.MissingExecutor("No executor has a task by that id")
+
+    def task_framework(self, task_id):
+        try:
+            return self._frameworks[task_id]
+        except KeyError:
+            raise exceptions.MissingExecutor("No executor has a task by that id")
+
+
+def _merge_present(obj, *keys):
+    """Like util.merge, for states that leave out empty lists"""
+    return util.merge(obj, *[key for key in keys if key in obj])
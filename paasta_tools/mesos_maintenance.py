@@ -16,6 +16,8 @@ import argparse
 import datetime
 import json
 import logging
+import threading
+import time
 from collections import namedtuple
 from socket import getfqdn
 from socket import gethostbyname
@@ -38,6 +40,8 @@ Hostname = namedtuple('Hostname', ['host', 'ip'])
 Credentials = namedtuple('Credentials', ['file', 'principal', 'secret'])
 Resource = namedtuple('Resource', ['name', 'amount'])
 MAINTENANCE_ROLE = 'maintenance'
+# How old the shared maintenance state can get before callers that pass max_age refetch it, in seconds
+MAINTENANCE_STATE_TTL = 10
 
 
 def base_api():
@@ -169,47 +173,159 @@ def get_hosts_with_state(state):
         return [machine['hostname'] for machine in status[state]]
 
 
-def get_draining_hosts():
+class MaintenanceState(object):
+    """A snapshot of the mesos maintenance status and schedule, with the hosts
+    indexed by state so that checking a host doesn't go through every machine.
+    """
+
+    def __init__(self, status, schedule, fetched_at=None):
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.draining_hosts = self._hostnames(status.get('draining_machines', []))
+        self.down_hosts = self._hostnames(status.get('down_machines', []))
+        self._draining = set(self.draining_hosts)
+        self._down = set(self.down_hosts)
+        # (start, end, hostnames) of each window, in nanoseconds
+        self.windows = []
+        self._earliest_start = {}
+        self._earliest_end = {}
+        for window in schedule.get('windows', []):
+            start = window['unavailability']['start']['nanoseconds']
+            # Windows without a duration never end
+            duration = window['unavailability'].get('duration')
+            end = start + duration['nanoseconds'] if duration else float('inf')
+            hostnames = [host['hostname'] for host in window['machine_ids']]
+            self.windows.append((start, end, hostnames))
+            for hostname in hostnames:
+                self._earliest_start[hostname] = min(start, self._earliest_start.get(hostname, start))
+                self._earliest_end[hostname] = min(end, self._earliest_end.get(hostname, end))
+
+    @staticmethod
+    def _hostnames(machines):
+        return [machine['id']['hostname'] if 'id' in machine else machine['hostname'] for machine in machines]
+
+    def is_host_draining(self, hostname):
+        return hostname in self._draining
+
+    def is_host_down(self, hostname):
+        return hostname in self._down
+
+    def is_host_past_maintenance_start(self, hostname, grace=0):
+        return self._earliest_start.get(hostname, float('inf')) < datetime_to_nanoseconds(now()) - grace
+
+    def is_host_past_maintenance_end(self, hostname, grace=0):
+        return self._earliest_end.get(hostname, float('inf')) < datetime_to_nanoseconds(now()) - grace
+
+    def get_hosts_past_maintenance_start(self, grace=0):
+        current_time = datetime_to_nanoseconds(now()) - grace
+        return [hostname for start, _, hostnames in self.windows if start < current_time for hostname in hostnames]
+
+    def get_hosts_past_maintenance_end(self, grace=0):
+        current_time = datetime_to_nanoseconds(now()) - grace
+        return [hostname for _, end, hostnames in self.windows if end < current_time for hostname in hostnames]
+
+    def get_hosts_forgotten_draining(self, grace=0):
+        return [hostname for hostname in self.draining_hosts if self.is_host_past_maintenance_start(hostname, grace)]
+
+    def get_hosts_forgotten_down(self, grace=0):
+        return [hostname for hostname in self.down_hosts if self.is_host_past_maintenance_end(hostname, grace)]
+
+
+def fetch_maintenance_state():
+    """Fetches the maintenance status and schedule from the mesos master
+
+    :returns: a MaintenanceState
+    """
+    try:
+        status = get_maintenance_status().json()
+    except HTTPError:
+        raise HTTPError("Error getting maintenance status.")
+    try:
+        schedule = get_maintenance_schedule().json()
+    except HTTPError:
+        raise HTTPError("Error getting maintenance schedule.")
+    return MaintenanceState(status or {}, schedule or {})
+
+
+_maintenance_state = None
+_maintenance_state_lock = threading.Lock()
+
+
+def get_maintenance_state(max_age=MAINTENANCE_STATE_TTL):
+    """Returns the MaintenanceState shared by everything in this process,
+    refetching it first if it is more than max_age seconds old.
+
+    Only one caller refetches it at a time; the others wait for and reuse its
+    result, so the master gets at most a status and a schedule request per
+    max_age however many threads ask.
+    """
+    global _maintenance_state
+    with _maintenance_state_lock:
+        if _maintenance_state is None or time.time() - _maintenance_state.fetched_at > max_age:
+            _maintenance_state = fetch_maintenance_state()
+        return _maintenance_state
+
+
+def get_draining_hosts(max_age=None):
     """Returns a list of hostnames that are marked as draining
 
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: a list of strings representing hostnames
     """
+    if max_age is not None:
+        return list(get_maintenance_state(max_age=max_age).draining_hosts)
     return get_hosts_with_state(state='draining_machines')
 
 
-def get_down_hosts():
+def get_down_hosts(max_age=None):
     """Returns a list of hostnames that are marked as down
 
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: a list of strings representing hostnames
     """
+    if max_age is not None:
+        return list(get_maintenance_state(max_age=max_age).down_hosts)
     return get_hosts_with_state(state='down_machines')
 
 
-def is_host_draining(hostname=getfqdn()):
+def is_host_draining(hostname=getfqdn(), max_age=None):
     """Checks if the specified hostname is marked as draining
 
     :param hostname: Hostname we want to check if draining (defaults to current host)
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: a boolean representing whether or not the specified hostname is draining
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).is_host_draining(hostname)
     return hostname in get_draining_hosts()
 
 
-def is_host_down(hostname=getfqdn()):
+def is_host_down(hostname=getfqdn(), max_age=None):
     """Checks if the specified hostname is marked as down
 
     :param hostname: Hostname we want to check if down (defaults to current host)
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: a boolean representing whether or not the specified hostname is down
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).is_host_down(hostname)
     return hostname in get_down_hosts()
 
 
-def get_hosts_forgotten_draining(grace=0):
+def get_hosts_forgotten_draining(grace=0, max_age=None):
     """Find hosts that are still marked as draining (rather than down) after the start
     of their maintenance window.
     :param grace: integer number of nanoseconds to allow a host to be left in the draining
     state after the start of its maintenance window before we consider it forgotten.
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: a list of hostnames of hosts forgotten draining
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).get_hosts_forgotten_draining(grace=grace)
     draining_hosts = get_draining_hosts()
     log.debug("draining_hosts: %s" % draining_hosts)
 
@@ -230,13 +346,17 @@ def are_hosts_forgotten_draining():
     return bool(get_hosts_forgotten_draining())
 
 
-def get_hosts_forgotten_down(grace=0):
+def get_hosts_forgotten_down(grace=0, max_age=None):
     """Find hosts that are still marked as down (rather than up) after the end
     of their maintenance window.
     :param grace: integer number of nanoseconds to allow a host to be left in the down
     state after the end of its maintenance window before we consider it forgotten.
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: a list of hostnames of hosts forgotten down
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).get_hosts_forgotten_down(grace=grace)
     down_hosts = get_down_hosts()
     log.debug("down_hosts: %s" % down_hosts)
 
@@ -678,37 +798,51 @@ def friendly_status():
     return ret
 
 
-def is_host_drained(hostname):
+def is_host_drained(hostname, max_age=None):
     """Checks if a host has drained successfully by confirming it is
     draining and currently running 0 tasks
     :param hostname: hostname to check
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: True or False
     """
-    return is_host_draining(hostname=hostname) and get_count_running_tasks_on_slave(hostname) == 0
+    return is_host_draining(hostname=hostname, max_age=max_age) and get_count_running_tasks_on_slave(hostname) == 0
 
 
-def is_host_past_maintenance_start(hostname):
+def is_host_past_maintenance_start(hostname, max_age=None):
     """Checks if a host has reached the start of its maintenance window
     :param hostname: hostname to check
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: True or False
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).is_host_past_maintenance_start(hostname)
     return hostname in get_hosts_past_maintenance_start()
 
 
-def is_host_past_maintenance_end(hostname):
+def is_host_past_maintenance_end(hostname, max_age=None):
     """Checks if a host has reached the end of its maintenance window
     :param hostname: hostname to check
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: True or False
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).is_host_past_maintenance_end(hostname)
     return hostname in get_hosts_past_maintenance_end()
 
 
-def get_hosts_past_maintenance_start(grace=0):
+def get_hosts_past_maintenance_start(grace=0, max_age=None):
     """Get a list of hosts that have reached the start of their maintenance window
     :param grace: integer number of nanoseconds to allow a host to be left in the draining
     state after the start of its maintenance window before we consider it past its maintenance start
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: List of hostnames
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).get_hosts_past_maintenance_start(grace=grace)
     schedules = get_maintenance_schedule().json()
     current_time = datetime_to_nanoseconds(now()) - grace
     ret = []
@@ -720,12 +854,16 @@ def get_hosts_past_maintenance_start(grace=0):
     return ret
 
 
-def get_hosts_past_maintenance_end(grace=0):
+def get_hosts_past_maintenance_end(grace=0, max_age=None):
     """Get a list of hosts that have reached the end of their maintenance window
     :param grace: integer number of nanoseconds to allow a host to be left in the down
     state after the end of its maintenance window before we consider it past its maintenance end
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
     :returns: List of hostnames
     """
+    if max_age is not None:
+        return get_maintenance_state(max_age=max_age).get_hosts_past_maintenance_end(grace=grace)
     schedules = get_maintenance_schedule().json()
     current_time = datetime_to_nanoseconds(now()) - grace
     ret = []
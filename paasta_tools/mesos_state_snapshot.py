@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Usage: paasta_mesos_state_snapshot [--path PATH] [--interval SECONDS]
+
+Fetches the mesos master state and writes it to a local file, which
+MesosMaster reads instead of asking the master when use_mesos_cache is set,
+as long as it is no older than the state_snapshot_max_age of the mesos-cli
+config. Run it from cron, or with --interval to keep the snapshot fresh.
+
+The snapshot is replaced atomically, so readers never see a partial one.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from paasta_tools.mesos_tools import get_mesos_config
+from paasta_tools.mesos_tools import get_mesos_master
+
+log = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Writes a snapshot of the mesos master state to local disk")
+    parser.add_argument(
+        '-p', '--path',
+        help="Where to write the snapshot (default: state_snapshot_path of the mesos-cli config)",
+    )
+    parser.add_argument(
+        '-i', '--interval', type=float,
+        help="Keep writing a snapshot every INTERVAL seconds, instead of writing one and exiting",
+    )
+    parser.add_argument('-v', '--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+def write_state_snapshot(path, state):
+    """Writes the state to path as compact json, atomically"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        'w', dir=directory, prefix='.%s.' % os.path.basename(path), delete=False,
+    ) as f:
+        try:
+            json.dump(state, f, separators=(',', ':'))
+            # Readers aren't necessarily the user writing it
+            os.fchmod(f.fileno(), 0o644)
+        except Exception:
+            os.unlink(f.name)
+            raise
+    os.rename(f.name, path)
+
+
+def take_state_snapshot(path):
+    start = time.time()
+    # Straight from the master, even if the mesos-cli config says to use a cache
+    state = get_mesos_master(use_mesos_cache=False).state
+    fetched = time.time()
+    write_state_snapshot(path, state)
+    log.info("Fetched the master state in %.2fs and wrote it to %s in %.2fs" % (
+        fetched - start, path, time.time() - fetched,
+    ))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    path = args.path or get_mesos_config()['state_snapshot_path']
+
+    if args.interval is None:
+        take_state_snapshot(path)
+        return
+
+    while True:
+        start = time.time()
+        try:
+            take_state_snapshot(path)
+        except Exception:
+            # Readers fall back to asking the master once the snapshot is too old
+            log.exception("Failed to take a snapshot of the master state")
+        time.sleep(max(0, args.interval - (time.time() - start)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,12 +11,15 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import concurrent.futures
 import datetime
+import functools
 import itertools
 import json
 import logging
 import re
 import socket
+import time
 from collections import namedtuple
 from urllib.parse import urlparse
 
@@ -26,6 +29,7 @@ from kazoo.client import KazooClient
 
 import paasta_tools.mesos.cluster as cluster
 import paasta_tools.mesos.exceptions as mesos_exceptions
+import paasta_tools.mesos.parallel as parallel
 from paasta_tools.mesos.cfg import load_mesos_config
 from paasta_tools.mesos.exceptions import SlaveDoesNotExist
 from paasta_tools.mesos.master import MesosMaster
@@ -47,6 +51,9 @@ SlaveTaskCount = namedtuple('SlaveTaskCount', ['count', 'chronos_count', 'slave'
 
 DEFAULT_MESOS_CLI_CONFIG_LOCATION = "/nail/etc/mesos-cli.json"
 
+STDSTREAMS_ERROR_MESSAGE = PaastaColors.red("      couldn't read stdout/stderr for %s (%s)")
+STDSTREAMS_TAIL_TIMEOUT_S = 60
+
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
@@ -242,10 +249,15 @@ def get_first_status_timestamp(task):
 
 
 @timeout()
-def get_mem_usage(task):
+def get_mem_usage(task, stats=None):
+    """:param stats: the task's statistics, if already fetched, instead of asking its agent"""
     try:
-        task_mem_limit = task.mem_limit
-        task_rss = task.rss
+        if stats is None:
+            task_mem_limit = task.mem_limit
+            task_rss = task.rss
+        else:
+            task_mem_limit = stats.get('mem_limit_bytes', 0)
+            task_rss = stats.get('mem_rss_bytes', 0)
         if task_mem_limit == 0:
             return "Undef"
         mem_percent = task_rss / task_mem_limit * 100
@@ -261,7 +273,7 @@ def get_mem_usage(task):
 
 
 @timeout()
-def get_cpu_usage(task):
+def get_cpu_usage(task, stats=None):
     """Calculates a metric of used_cpu/allocated_cpu
     To do this, we take the total number of cpu-seconds the task has consumed,
     (the sum of system and user time), OVER the total cpu time the task
@@ -270,17 +282,24 @@ def get_cpu_usage(task):
     The total time a task has been allocated is the total time the task has
     been running (https://github.com/mesosphere/mesos/blob/0b092b1b0/src/webui/master/static/js/controllers.js#L140)
     multiplied by the "shares" a task has.
+
+    :param stats: the task's statistics, if already fetched, instead of asking its agent
     """
     try:
+        if stats is None:
+            stats = task.stats
+            cpu_limit = task.cpu_limit
+        else:
+            cpu_limit = stats.get('cpus_limit', 0)
         start_time = round(task['statuses'][0]['timestamp'])
         current_time = int(datetime.datetime.now().strftime('%s'))
         duration_seconds = current_time - start_time
         # The CPU shares has an additional .1 allocated to it for executor overhead.
         # We subtract this to the true number
         # (https://github.com/apache/mesos/blob/dc7c4b6d0bcf778cc0cad57bb108564be734143a/src/slave/constants.hpp#L100)
-        cpu_shares = task.cpu_limit - .1
+        cpu_shares = cpu_limit - .1
         allocated_seconds = duration_seconds * cpu_shares
-        used_seconds = task.stats.get('cpus_system_time_secs', 0.0) + task.stats.get('cpus_user_time_secs', 0.0)
+        used_seconds = stats.get('cpus_system_time_secs', 0.0) + stats.get('cpus_user_time_secs', 0.0)
         if allocated_seconds == 0:
             return "Undef"
         percent = round(100 * (used_seconds / allocated_seconds), 1)
@@ -295,13 +314,26 @@ def get_cpu_usage(task):
         return "Timed Out"
 
 
-def format_running_mesos_task_row(task, get_short_task_id):
-    """Returns a pretty formatted string of a running mesos task attributes"""
+def format_running_mesos_task_row(task, get_short_task_id, stats_by_task_id=None):
+    """Returns a pretty formatted string of a running mesos task attributes
+
+    :param stats_by_task_id: the statistics of the tasks, as returned by
+                             cluster.get_stats_for_tasks, if already fetched.
+                             Tasks missing from it are on agents that couldn't
+                             be reached.
+    """
+    if stats_by_task_id is None:
+        mem_usage, cpu_usage = get_mem_usage(task), get_cpu_usage(task)
+    elif task['id'] in stats_by_task_id:
+        stats = stats_by_task_id[task['id']]
+        mem_usage, cpu_usage = get_mem_usage(task, stats), get_cpu_usage(task, stats)
+    else:
+        mem_usage, cpu_usage = "None", "None"
     return (
         get_short_task_id(task['id']),
         get_short_hostname_from_task(task),
-        get_mem_usage(task),
-        get_cpu_usage(task),
+        mem_usage,
+        cpu_usage,
         get_first_status_timestamp(task),
     )
 
@@ -316,22 +348,13 @@ def format_non_running_mesos_task_row(task, get_short_task_id):
     )
 
 
-@timeout()
-def format_stdstreams_tail_for_task(task, get_short_task_id, nlines=10):
-    """Returns the formatted "tail" of stdout/stderr, for a given a task.
-
-    :param get_short_task_id: A function which given a
-                              task_id returns a short task_id suitable for
-                              printing.
-    """
-    error_message = PaastaColors.red("      couldn't read stdout/stderr for %s (%s)")
+def _format_stdstreams_tail_for_task(task, get_short_task_id, nlines, max_workers):
     output = []
-    mesos_cli_config = get_mesos_config()
     try:
         fobjs = list(cluster.get_files_for_tasks(
             task_list=[task],
             file_list=['stdout', 'stderr'],
-            max_workers=mesos_cli_config["max_workers"],
+            max_workers=max_workers,
         ))
         fobjs.sort(key=lambda fobj: fobj.path, reverse=True)
         if not fobjs:
@@ -339,18 +362,8 @@ def format_stdstreams_tail_for_task(task, get_short_task_id, nlines=10):
             return output
         for fobj in fobjs:
             output.append(PaastaColors.blue("      %s tail for %s" % (fobj.path, get_short_task_id(task['id']))))
-            # read nlines, starting from EOF
-            # mesos.cli is smart and can efficiently read a file backwards
-            reversed_file = reversed(fobj)
-            tail = []
-            for _ in range(nlines):
-                line = next(reversed_file, None)
-                if line is None:
-                    break
-                tail.append(line)
-            # reverse the tail, so that EOF is at the bottom again
-            if tail:
-                output.extend(tail[::-1])
+            # read the last nlines with a single request for the end of the file
+            output.extend(fobj.tail(nlines))
             output.append(PaastaColors.blue("      %s EOF" % fobj.path))
     except (
         mesos_exceptions.MasterNotAvailableException,
@@ -358,12 +371,51 @@ def format_stdstreams_tail_for_task(task, get_short_task_id, nlines=10):
         mesos_exceptions.TaskNotFoundException,
         mesos_exceptions.FileNotFoundForTaskException,
     ) as e:
-        output.append(error_message % (get_short_task_id(task['id']), str(e)))
-    except TimeoutError:
-        output.append(error_message % (get_short_task_id(task['id']), 'timeout'))
+        output.append(STDSTREAMS_ERROR_MESSAGE % (get_short_task_id(task['id']), str(e)))
     return output
 
 
+@timeout()
+def format_stdstreams_tail_for_task(task, get_short_task_id, nlines=10):
+    """Returns the formatted "tail" of stdout/stderr, for a given a task.
+
+    :param get_short_task_id: A function which given a
+                              task_id returns a short task_id suitable for
+                              printing.
+    """
+    try:
+        return _format_stdstreams_tail_for_task(
+            task, get_short_task_id, nlines, max_workers=get_mesos_config()["max_workers"],
+        )
+    except TimeoutError:
+        return [STDSTREAMS_ERROR_MESSAGE % (get_short_task_id(task['id']), 'timeout')]
+
+
+def format_stdstreams_tails_for_tasks(tasks, get_short_task_id, nlines=10):
+    """Returns the formatted "tail" of stdout/stderr of each task, like
+    format_stdstreams_tail_for_task, reading the sandboxes of up to
+    max_workers tasks at once instead of one task after the other.
+
+    Tasks whose tail isn't read within STDSTREAMS_TAIL_TIMEOUT_S of the
+    start get a timeout message instead.
+    """
+    max_workers = get_mesos_config()["max_workers"]
+    outputs = []
+    with parallel.execute(max_workers) as executor:
+        jobs = [
+            executor.submit(_format_stdstreams_tail_for_task, task, get_short_task_id, nlines, max_workers)
+            for task in tasks
+        ]
+        deadline = time.time() + STDSTREAMS_TAIL_TIMEOUT_S
+        for task, job in zip(tasks, jobs):
+            try:
+                outputs.append(job.result(timeout=max(deadline - time.time(), 0)))
+            except concurrent.futures.TimeoutError:
+                job.cancel()
+                outputs.append([STDSTREAMS_ERROR_MESSAGE % (get_short_task_id(task['id']), 'timeout')])
+    return outputs
+
+
 def zip_tasks_verbose_output(table, stdstreams):
     """Zip a list of strings (table) with a list of lists (stdstreams)
     :param table: a formatted list of tasks
@@ -406,9 +458,7 @@ def format_task_list(tasks, list_title, table_header, get_short_task_id, format_
     if tail_lines == 0:
         output.extend(tasks_table)
     else:
-        stdstreams = []
-        for task in tasks:
-            stdstreams.append(format_stdstreams_tail_for_task(task, get_short_task_id, nlines=tail_lines))
+        stdstreams = format_stdstreams_tails_for_tasks(tasks, get_short_task_id, nlines=tail_lines)
         output.append(tasks_table[0])  # header
         output.extend(zip_tasks_verbose_output(tasks_table[1:], stdstreams))
 
@@ -427,6 +477,10 @@ def status_mesos_tasks_verbose(job_id, get_short_task_id, tail_lines=0):
     """
     output = []
     running_and_active_tasks = select_tasks_by_id(get_cached_list_of_running_tasks_from_frameworks(), job_id)
+    # Fetch the statistics of every agent at once, instead of one task at a time
+    stats_by_task_id = cluster.get_stats_for_tasks(
+        running_and_active_tasks, max_workers=get_mesos_config()["max_workers"],
+    )
     list_title = "Running Tasks:"
     table_header = [
         "Mesos Task ID",
@@ -440,7 +494,7 @@ def status_mesos_tasks_verbose(job_id, get_short_task_id, tail_lines=0):
         list_title=list_title,
         table_header=table_header,
         get_short_task_id=get_short_task_id,
-        format_task_row=format_running_mesos_task_row,
+        format_task_row=functools.partial(format_running_mesos_task_row, stats_by_task_id=stats_by_task_id),
         grey=False,
         tail_lines=tail_lines,
     ))
@@ -577,7 +631,14 @@ def get_mesos_slaves_grouped_by_attribute(slaves, attribute):
     }
 
 
-def get_slaves():
+def get_slaves(use_mesos_cache=False):
+    """Returns the slaves registered with the mesos master.
+
+    :param use_mesos_cache: read them from the master state snapshot (or the
+        cache host) rather than asking the master. Only for read-only checks,
+        the snapshot can be up to state_snapshot_max_age seconds old."""
+    if use_mesos_cache:
+        return get_mesos_master(use_mesos_cache=True).state['slaves']
     return get_mesos_master().fetch("/master/slaves").json()['slaves']
 
 
@@ -680,28 +741,21 @@ def get_mesos_network_for_net(net):
 def get_mesos_task_count_by_slave(mesos_state, slaves_list=None, pool=None):
     """Get counts of running tasks per mesos slave. Also include separate count of chronos tasks
 
+    If mesos_state is a full master state (it includes frameworks), the tasks are counted from it directly,
+    otherwise (e.g. for a state summary) the running tasks are fetched from the master.
+
     :param mesos_state: mesos state dict
     :param slaves_list: a list of slave dicts to count running tasks for.
     :param pool: pool of slaves to return (None means all)
     :returns: list of slave dicts {'task_count': SlaveTaskCount}
     """
-    all_mesos_tasks = get_all_running_tasks()  # empty string = all app ids
     slaves = {
         slave['id']: {'count': 0, 'slave': slave, 'chronos_count': 0} for slave in mesos_state.get('slaves', [])
     }
-    for task in all_mesos_tasks:
-        try:
-            if task.slave['id'] not in slaves:
-                log.debug("Slave {} not found for task".format(task.slave['id']))
-                continue
-            else:
-                slaves[task.slave['id']]['count'] += 1
-                log.debug("Task framework: {}".format(task.framework.name))
-                if task.framework.name == CHRONOS_FRAMEWORK_NAME:
-                    slaves[task.slave['id']]['chronos_count'] += 1
-        except SlaveDoesNotExist:
-            log.debug("Tried to get mesos slaves for task {}, but none existed.".format(task['id']))
-            continue
+    if 'frameworks' in mesos_state:
+        count_running_tasks_by_slave_from_state(mesos_state, slaves)
+    else:
+        count_running_tasks_by_slave(get_all_running_tasks(), slaves)  # empty string = all app ids
     if slaves_list:
         for slave in slaves_list:
             slave['task_counts'] = SlaveTaskCount(**slaves[slave['task_counts'].slave['id']])
@@ -723,6 +777,41 @@ def get_mesos_task_count_by_slave(mesos_state, slaves_list=None, pool=None):
     return slaves
 
 
+def count_running_tasks_by_slave_from_state(mesos_state, slaves):
+    """Adds the running tasks found in a full mesos master state to the per-slave counts in slaves,
+    without making any more requests to the master."""
+    for framework in itertools.chain(mesos_state.get('frameworks', []), mesos_state.get('completed_frameworks', [])):
+        is_chronos = framework.get('name') == CHRONOS_FRAMEWORK_NAME
+        for task in itertools.chain(framework.get('tasks', []), framework.get('completed_tasks', [])):
+            if not is_task_running(task):
+                continue
+            if task['slave_id'] not in slaves:
+                log.debug("Slave {} not found for task".format(task['slave_id']))
+                continue
+            slaves[task['slave_id']]['count'] += 1
+            if is_chronos:
+                slaves[task['slave_id']]['chronos_count'] += 1
+    for task in mesos_state.get('orphan_tasks', []):
+        if is_task_running(task) and task.get('slave_id') in slaves:
+            slaves[task['slave_id']]['count'] += 1
+
+
+def count_running_tasks_by_slave(all_mesos_tasks, slaves):
+    for task in all_mesos_tasks:
+        try:
+            if task.slave['id'] not in slaves:
+                log.debug("Slave {} not found for task".format(task.slave['id']))
+                continue
+            else:
+                slaves[task.slave['id']]['count'] += 1
+                log.debug("Task framework: {}".format(task.framework.name))
+                if task.framework.name == CHRONOS_FRAMEWORK_NAME:
+                    slaves[task.slave['id']]['chronos_count'] += 1
+        except SlaveDoesNotExist:
+            log.debug("Tried to get mesos slaves for task {}, but none existed.".format(task['id']))
+            continue
+
+
 def get_count_running_tasks_on_slave(hostname):
     """Return the number of tasks running on a paticular slave
     or 0 if the slave is not found.
@@ -795,16 +884,20 @@ class TooManyTasks(Exception):
     pass
 
 
-def mesos_services_running_here(framework_filter, parse_service_instance_from_executor_id, hostname=None):
+def mesos_services_running_here(
+    framework_filter, parse_service_instance_from_executor_id, hostname=None, slave_state=None,
+):
     """See what paasta_native services are being run by a mesos-slave on this host.
 
     :param framework_filter: a function that returns true if we should consider a given framework.
     :param parse_service_instance_from_executor_id: A function that returns a tuple of (service, instance) from the
                                                     executor ID.
     :param hostname: Hostname to fetch mesos slave state from. See get_local_slave_state.
+    :param slave_state: An already fetched slave state to use instead of fetching it from hostname.
 
     :returns: A list of triples of (service, instance, port)"""
-    slave_state = get_local_slave_state(hostname=hostname)
+    if slave_state is None:
+        slave_state = get_local_slave_state(hostname=hostname)
     frameworks = [fw for fw in slave_state.get('frameworks', []) if framework_filter(fw)]
     executors = [ex for fw in frameworks for ex in fw.get('executors', [])
                  if 'TASK_RUNNING' in [t['state'] for t in ex.get('tasks', [])]]
@@ -27,9 +27,9 @@ def main():
     args = parse_args()
     docker_client = get_docker_client()
 
-    running_mesos_task_ids = [task["id"] for task in mesos_tools.filter_running_tasks(
+    running_mesos_task_ids = {task["id"] for task in mesos_tools.filter_running_tasks(
         mesos_tools.get_running_tasks_from_frameworks(''),
-    )]
+    )}
     running_mesos_docker_containers = get_running_mesos_docker_containers()
 
     orphaned_containers = []
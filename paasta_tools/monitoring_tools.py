@@ -20,6 +20,7 @@ on the framework that is asking, and still allows you to set your team
 
 Everything in here is private, and you shouldn't worry about it.
 """
+import functools
 import json
 import logging
 import os
@@ -34,6 +35,39 @@ from paasta_tools.utils import PaastaNotConfiguredError
 
 log = logging.getLogger(__name__)
 
+# Only set while a function decorated with use_monitoring_config_cache runs
+_monitoring_config_cache = None
+
+
+def use_monitoring_config_cache(fun):
+    """Decorates a function, like the main() of a check that sends an event per
+    service instance, so that while it runs each service's service.yaml and
+    monitoring.yaml, the system paasta config and the sensu team data are only
+    read once.
+
+    Changes to those files aren't seen until the function returns, so don't
+    decorate anything that runs for longer than a check run.
+    """
+    @functools.wraps(fun)
+    def fun_with_cache(*args, **kwargs):
+        global _monitoring_config_cache
+        if _monitoring_config_cache is not None:
+            return fun(*args, **kwargs)
+        _monitoring_config_cache = {}
+        try:
+            return fun(*args, **kwargs)
+        finally:
+            _monitoring_config_cache = None
+    return fun_with_cache
+
+
+def _cached(key, load):
+    if _monitoring_config_cache is None:
+        return load()
+    if key not in _monitoring_config_cache:
+        _monitoring_config_cache[key] = load()
+    return _monitoring_config_cache[key]
+
 
 def monitoring_defaults(key):
     defaults = {
@@ -110,8 +144,13 @@ def __get_monitoring_config_value(
     soa_dir=DEFAULT_SOA_DIR,
     monitoring_defaults=monitoring_defaults,
 ):
-    general_config = service_configuration_lib.read_service_configuration(service, soa_dir=soa_dir)
-    monitor_config = read_monitoring_config(service, soa_dir=soa_dir)
+    general_config, monitor_config = _cached(
+        ('monitoring_config', service, soa_dir),
+        lambda: (
+            service_configuration_lib.read_service_configuration(service, soa_dir=soa_dir),
+            read_monitoring_config(service, soa_dir=soa_dir),
+        ),
+    )
     service_default = general_config.get(key, monitoring_defaults(key))
     service_default = general_config.get('monitoring', {key: service_default}).get(key, service_default)
     service_default = monitor_config.get(key, service_default)
@@ -149,7 +188,7 @@ def get_sensu_team_data(team):
     for example, a team may not specify a `nofitication_email`. It is up
     to the caller of this function to handle that case.
     """
-    global_team_data = _load_sensu_team_data()['team_data']
+    global_team_data = _cached(('sensu_team_data',), _load_sensu_team_data)['team_data']
     return global_team_data.get(team, {})
 
 
@@ -181,7 +220,7 @@ def send_event(service, check_name, overrides, status, output, soa_dir, ttl=None
         return
 
     runbook = overrides.get('runbook', 'http://y/paasta-troubleshooting')
-    system_paasta_config = load_system_paasta_config()
+    system_paasta_config = _cached(('system_paasta_config',), load_system_paasta_config)
     if cluster is None:
         try:
             cluster = system_paasta_config.get_cluster()
@@ -11,6 +11,7 @@ from paasta_tools.frameworks.native_scheduler import get_paasta_native_jobs_for_
 from paasta_tools.frameworks.native_scheduler import load_paasta_native_job_config
 from paasta_tools.frameworks.native_scheduler import NativeScheduler
 from paasta_tools.long_running_service_tools import load_service_namespace_config
+from paasta_tools.long_running_service_tools import nerve_config_cache
 from paasta_tools.utils import compose_job_id
 from paasta_tools.utils import decompose_job_id
 from paasta_tools.utils import DEFAULT_SOA_DIR
@@ -74,12 +75,13 @@ def parse_service_instance_from_executor_id(task_id):
     return srv_name, srv_instance
 
 
-def paasta_native_services_running_here(hostname=None, framework_id=None):
+def paasta_native_services_running_here(hostname=None, framework_id=None, slave_state=None):
     """See what paasta_native services are being run by a mesos-slave on this host.
     :returns: A list of triples of (service, instance, port)
 
     :param hostname: query the mesos slave on this hostname.
     :param framework_id: If specified, return info only for tasks belonging to this framework id.
+    :param slave_state: An already fetched slave state to use instead of fetching it from hostname.
     """
 
     def framework_filter(fw):
@@ -89,10 +91,16 @@ def paasta_native_services_running_here(hostname=None, framework_id=None):
         framework_filter=framework_filter,
         parse_service_instance_from_executor_id=parse_service_instance_from_executor_id,
         hostname=hostname,
+        slave_state=slave_state,
     )
 
 
-def get_paasta_native_services_running_here_for_nerve(cluster, soa_dir, hostname=None):
+def get_paasta_native_services_running_here_for_nerve(cluster, soa_dir, hostname=None, slave_state=None):
+    """Registrations and namespace configs are read through nerve_config_cache,
+    so they are only parsed again once their service's soa-configs change.
+
+    :param slave_state: An already fetched slave state to use instead of fetching it from hostname.
+    """
     if not cluster:
         try:
             cluster = load_system_paasta_config().get_cluster()
@@ -103,17 +111,22 @@ def get_paasta_native_services_running_here_for_nerve(cluster, soa_dir, hostname
         except (PaastaNotConfiguredError):
             return []
     # When a cluster is defined in mesos, let's iterate through paasta_native services
-    paasta_native_services = paasta_native_services_running_here(hostname=hostname)
+    paasta_native_services = paasta_native_services_running_here(hostname=hostname, slave_state=slave_state)
+    nerve_config_cache.check_for_changes()
     nerve_list = []
     for name, instance, port in paasta_native_services:
         try:
-            registrations = read_all_registrations_for_service_instance(
-                name, instance, cluster, soa_dir,
+            registrations = nerve_config_cache.get(
+                name, soa_dir, ('paasta_native_registrations', cluster, instance),
+                lambda: read_all_registrations_for_service_instance(name, instance, cluster, soa_dir),
             )
             for registration in registrations:
                 reg_service, reg_namespace, _, __ = decompose_job_id(registration)
-                nerve_dict = load_service_namespace_config(
-                    service=reg_service, namespace=reg_namespace, soa_dir=soa_dir,
+                nerve_dict = nerve_config_cache.get_service_namespace_config(
+                    reg_service, reg_namespace, soa_dir,
+                    lambda: load_service_namespace_config(
+                        service=reg_service, namespace=reg_namespace, soa_dir=soa_dir,
+                    ),
                 )
                 if not nerve_dict.is_in_smartstack():
                     continue
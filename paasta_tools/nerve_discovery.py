@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Discovery of everything nerve should register on this host, in one pass.
+
+get_services_running_here_for_nerve returns the same entries as calling the
+marathon, paasta_native, puppet and classic *_running_here_for_nerve
+functions one after the other, but fetches the local mesos slave state only
+once and hands it to the marathon and paasta_native discovery.
+
+get_nerve_changes returns only what was added or removed since its previous
+call in this process, so that nerve config regeneration can be skipped when
+nothing changed. The configs those functions read are cached in
+nerve_config_cache, so calling this often is cheap.
+"""
+from collections import namedtuple
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from paasta_tools import marathon_tools
+from paasta_tools import native_mesos_scheduler
+from paasta_tools.long_running_service_tools import ServiceNamespaceConfig
+from paasta_tools.mesos_tools import get_local_slave_state
+from paasta_tools.utils import load_system_paasta_config
+from paasta_tools.utils import PaastaNotConfiguredError
+
+NerveEntry = Tuple[str, ServiceNamespaceConfig]
+NerveChanges = namedtuple('NerveChanges', ['added', 'removed'])
+
+
+def get_services_running_here_for_nerve(
+    cluster: Optional[str],
+    soa_dir: str,
+    hostname: Optional[str]=None,
+) -> List[NerveEntry]:
+    """Returns the (registration, namespace config) of everything nerve should
+    register on this host, in the order of the four discovery functions"""
+    classic_services = (
+        marathon_tools.get_puppet_services_running_here_for_nerve(soa_dir) +
+        marathon_tools.get_classic_services_running_here_for_nerve(soa_dir)
+    )
+    if not cluster:
+        try:
+            cluster = load_system_paasta_config().get_cluster()
+        # Without a cluster nothing can be scheduled here by marathon or
+        # paasta_native, so there is no need to ask the mesos slave
+        except PaastaNotConfiguredError:
+            return classic_services
+    slave_state = get_local_slave_state(hostname=hostname)
+    return (
+        marathon_tools.get_marathon_services_running_here_for_nerve(cluster, soa_dir, slave_state=slave_state) +
+        native_mesos_scheduler.get_paasta_native_services_running_here_for_nerve(
+            cluster, soa_dir, hostname=hostname, slave_state=slave_state,
+        ) +
+        classic_services
+    )
+
+
+# The entries get_nerve_changes found last, by its arguments, then by (registration, port)
+_last_nerve_entries: Dict[Tuple[Optional[str], str, Optional[str]], Dict[Tuple[str, Any], ServiceNamespaceConfig]] = {}
+
+
+def get_nerve_changes(
+    cluster: Optional[str],
+    soa_dir: str,
+    hostname: Optional[str]=None,
+) -> NerveChanges:
+    """Returns the nerve entries added and removed since the previous call with
+    the same arguments in this process.
+
+    Entries are told apart by registration and port. One whose config changed
+    is in both: its old version in removed and its new one in added. The
+    first call returns every entry as added.
+    """
+    key = (cluster, soa_dir, hostname)
+    last_entries = _last_nerve_entries.get(key, {})
+    entries = {
+        (registration, nerve_dict.get('port')): nerve_dict
+        for registration, nerve_dict in get_services_running_here_for_nerve(cluster, soa_dir, hostname=hostname)
+    }
+    added = [
+        (registration, nerve_dict) for (registration, port), nerve_dict in entries.items()
+        if last_entries.get((registration, port)) != nerve_dict
+    ]
+    removed = [
+        (registration, nerve_dict) for (registration, port), nerve_dict in last_entries.items()
+        if entries.get((registration, port)) != nerve_dict
+    ]
+    _last_nerve_entries[key] = entries
+    return NerveChanges(added=added, removed=removed)
@@ -38,8 +38,8 @@ import sys
 from collections import namedtuple
 
 from clog.loggers import ScribeLogger
-from docker.errors import APIError
 
+from paasta_tools.container_metadata_cache import ContainerMetadataCache
 from paasta_tools.utils import _log
 from paasta_tools.utils import DEFAULT_LOGLEVEL
 from paasta_tools.utils import get_docker_client
@@ -72,17 +72,6 @@ def capture_oom_events_from_stdin():
             process_name = ''
 
 
-def get_container_env_as_dict(docker_inspect):
-    env_vars = {}
-    config = docker_inspect.get('Config')
-    if config is not None:
-        env = config.get('Env', [])
-        for i in env:
-            name, _, value = i.partition('=')
-            env_vars[name] = value
-    return env_vars
-
-
 def log_to_scribe(logger, log_line):
     """Send the event to 'tmp_paasta_oom_events'."""
     line = ('{"timestamp": %d, "hostname": "%s", "container_id": "%s", "cluster": "%s", '
@@ -110,20 +99,20 @@ def log_to_paasta(log_line):
 def main():
     scribe_logger = ScribeLogger(host='169.254.255.254', port=1463, retry_interval=5)
     cluster = load_system_paasta_config().get_cluster()
-    client = get_docker_client()
+    # Attribute the events without asking the docker daemon, which is slow to answer under memory pressure
+    container_metadata_cache = ContainerMetadataCache(get_docker_client())
+    container_metadata_cache.start()
     for timestamp, hostname, container_id, process_name in capture_oom_events_from_stdin():
-        try:
-            docker_inspect = client.inspect_container(resource_id=container_id)
-        except (APIError):
+        metadata = container_metadata_cache.get(container_id)
+        if metadata is None:
             continue
-        env_vars = get_container_env_as_dict(docker_inspect)
         log_line = LogLine(
             timestamp=timestamp,
             hostname=hostname,
             container_id=container_id,
             cluster=cluster,
-            service=env_vars.get('PAASTA_SERVICE', 'unknown'),
-            instance=env_vars.get('PAASTA_INSTANCE', 'unknown'),
+            service=metadata.service or 'unknown',
+            instance=metadata.instance or 'unknown',
             process_name=process_name,
         )
         log_to_scribe(scribe_logger, log_line)
@@ -25,6 +25,8 @@ from paasta_tools import utils
 from paasta_tools.marathon_tools import get_expected_instance_count_for_namespace
 from paasta_tools.marathon_tools import marathon_services_running_here
 from paasta_tools.marathon_tools import read_registration_for_service_instance
+from paasta_tools.mesos_tools import get_mesos_master
+from paasta_tools.mesos_tools import get_mesos_task_count_by_slave
 from paasta_tools.smartstack_tools import backend_is_up
 from paasta_tools.smartstack_tools import get_backends
 from paasta_tools.smartstack_tools import get_replication_for_services
@@ -96,6 +98,32 @@ def is_safe_to_kill(hostname):
         mesos_maintenance.is_host_past_maintenance_start(hostname)
 
 
+def get_hosts_safe_to_kill(hostnames, max_age=None):
+    """Batched is_safe_to_kill: checks many hosts with a single maintenance schedule, maintenance status
+    and mesos state request
+    :param hostnames: hostnames to check
+    :param max_age: If set, use the shared maintenance state if it is at most
+                    this many seconds old instead of asking the master
+    :returns: set of the hostnames that have drained or reached their maintenance window
+    """
+    hostnames = set(hostnames)
+    past_maintenance_start = hostnames.intersection(
+        mesos_maintenance.get_hosts_past_maintenance_start(max_age=max_age),
+    )
+    draining = hostnames.intersection(mesos_maintenance.get_draining_hosts(max_age=max_age)) - past_maintenance_start
+    drained = set()
+    if draining:
+        task_counts = get_mesos_task_count_by_slave(get_mesos_master().state)
+        drained = {
+            slave['task_counts'].slave['hostname'] for slave in task_counts
+            if slave['task_counts'].slave['hostname'] in draining and slave['task_counts'].count == 0
+        }
+        # is_host_drained treats hosts that mesos doesn't know about as running 0 tasks
+        known_hostnames = {slave['task_counts'].slave['hostname'] for slave in task_counts}
+        drained |= draining - known_hostnames
+    return past_maintenance_start | drained
+
+
 def is_hostname_local(hostname):
     return hostname == 'localhost' or \
         hostname == getfqdn() or hostname == gethostname()
@@ -59,7 +59,14 @@ def parse_args(argv):
         ),
     )
     parser.add_argument('-t', '--threshold', type=int, default=90)
-    parser.add_argument('--use-mesos-cache', action='store_true', default=False)
+    parser.add_argument(
+        '--use-mesos-cache', action='store_true', default=True,
+        help="Read the mesos state from the local snapshot or the cache host (the default)",
+    )
+    parser.add_argument(
+        '--no-use-mesos-cache', action='store_false', dest='use_mesos_cache',
+        help="Ask the mesos master for its state directly",
+    )
     parser.add_argument(
         '-a', '--autoscaling-info', action='store_true', default=False,
         dest="autoscaling_info",
@@ -208,24 +208,15 @@ def config_with_historical_stats(chronos_client, service, instance, job_config):
     return job_config
 
 
-def main():
-    args = parse_args()
-    soa_dir = args.soa_dir
-    if args.verbose:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
-        logging.basicConfig(level=logging.WARNING)
-
-    try:
-        service, instance, _, __ = decompose_job_id(args.service_instance, spacer=chronos_tools.INTERNAL_SPACER)
-    except InvalidJobNameError:
-        log.error("Invalid service instance '%s' specified. Format is service%sinstance."
-                  % (args.service_instance, SPACER))
-        sys.exit(1)
-
-    client = chronos_tools.get_chronos_client(chronos_tools.load_chronos_config())
-    cluster = load_system_paasta_config().get_cluster()
+def deploy_chronos_job(service, instance, client, cluster, soa_dir):
+    """Creates or updates the chronos job for a service instance and sends a
+    sensu event about how it went.
 
+    :returns: 0 if the job was deployed or deliberately skipped, non-zero otherwise.
+        Jobs that can't be deployed yet are skipped, as the sensu event already
+        tells their owners about it.
+    """
+    job_id = compose_job_id(service, instance)
     try:
         complete_job_config = chronos_tools.create_complete_config(
             service=service,
@@ -234,7 +225,7 @@ def main():
         )
     except (NoDeploymentsAvailable, NoDockerImageError):
         error_msg = "No deployment found for %s in cluster %s. Has Jenkins run for it?" % (
-            args.service_instance, cluster,
+            job_id, cluster,
         )
         send_event(
             service=service,
@@ -244,10 +235,10 @@ def main():
             output=error_msg,
         )
         log.error(error_msg)
-        sys.exit(0)
+        return 0
     except NoConfigurationForServiceError as e:
         error_msg = (
-            "Could not read chronos configuration file for %s in cluster %s\n" % (args.service_instance, cluster) +
+            "Could not read chronos configuration file for %s in cluster %s\n" % (job_id, cluster) +
             "Error was: %s" % str(e)
         )
         send_event(
@@ -258,10 +249,10 @@ def main():
             output=error_msg,
         )
         log.error(error_msg)
-        sys.exit(0)
+        return 0
     except NoSlavesAvailableError as e:
         error_msg = (
-            "There are no PaaSTA slaves that can run %s in cluster %s\n" % (args.service_instance, cluster) +
+            "There are no PaaSTA slaves that can run %s in cluster %s\n" % (job_id, cluster) +
             "Double check the cluster and the configured constratints/pool/whitelist.\n"
             "Error was: %s" % str(e)
         )
@@ -273,10 +264,10 @@ def main():
             output=error_msg,
         )
         log.error(error_msg)
-        sys.exit(0)
+        return 0
     except chronos_tools.InvalidParentError:
         log.warn("Skipping %s.%s: Parent job could not be found" % (service, instance))
-        sys.exit(0)
+        return 0
 
     modified_config = config_with_historical_stats(
         chronos_client=client,
@@ -301,6 +292,33 @@ def main():
         status=sensu_status,
         output=output,
     )
+    return status
+
+
+def main():
+    args = parse_args()
+    soa_dir = args.soa_dir
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.WARNING)
+
+    try:
+        service, instance, _, __ = decompose_job_id(args.service_instance, spacer=chronos_tools.INTERNAL_SPACER)
+    except InvalidJobNameError:
+        log.error("Invalid service instance '%s' specified. Format is service%sinstance."
+                  % (args.service_instance, SPACER))
+        sys.exit(1)
+
+    client = chronos_tools.get_chronos_client(chronos_tools.load_chronos_config())
+    cluster = load_system_paasta_config().get_cluster()
+    deploy_chronos_job(
+        service=service,
+        instance=instance,
+        client=client,
+        cluster=cluster,
+        soa_dir=soa_dir,
+    )
     # We exit 0 because the script finished ok and the event was sent to the right team.
     sys.exit(0)
 
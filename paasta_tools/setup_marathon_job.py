@@ -73,6 +73,7 @@ from paasta_tools.marathon_tools import kill_given_tasks
 from paasta_tools.marathon_tools import MarathonClient
 from paasta_tools.mesos.exceptions import NoSlavesAvailableError
 from paasta_tools.mesos_maintenance import get_draining_hosts
+from paasta_tools.mesos_maintenance import MAINTENANCE_STATE_TTL
 from paasta_tools.mesos_maintenance import reserve_all_resources
 from paasta_tools.utils import _log
 from paasta_tools.utils import compose_job_id
@@ -567,7 +568,7 @@ def deploy_service(
         return (1, errormsg, None)
 
     try:
-        draining_hosts = get_draining_hosts()
+        draining_hosts = get_draining_hosts(max_age=MAINTENANCE_STATE_TTL)
     except ReadTimeout as e:
         errormsg = "ReadTimeout encountered trying to get draining hosts: %s" % e
         return (1, errormsg, 60)
@@ -704,6 +705,7 @@ def setup_service(
     job_config: marathon_tools.MarathonServiceConfig,
     marathon_apps_with_clients: Collection[Tuple[MarathonApp, MarathonClient]],
     soa_dir: str,
+    system_paasta_config: Optional[SystemPaastaConfig]=None,
 ) -> Tuple[int, str, Optional[float]]:
     """Setup the service instance given and attempt to deploy it, if possible.
     Doesn't do anything if the service is already in Marathon and hasn't changed.
@@ -713,11 +715,12 @@ def setup_service(
     :param instance: The instance of the service to setup
     :param clients: A MarathonClients object
     :param job_config: The service instance's configuration dict
+    :param system_paasta_config: The system paasta config, loaded from disk if not given
     :returns: A tuple of (status, output, bounce_in_seconds) to be used with send_sensu_event"""
 
     log.info("Setting up instance %s for service %s", instance, service)
     try:
-        marathon_app_dict = job_config.format_marathon_app_dict()
+        marathon_app_dict = job_config.format_marathon_app_dict(system_paasta_config=system_paasta_config)
     except NoDockerImageError:
         error_msg = (
             "Docker image for {0}.{1} not in deployments.json. Exiting. Has Jenkins deployed it?\n"
@@ -788,7 +791,10 @@ def main() -> None:
             log.error("Invalid service instance specified. Format is service%sinstance." % SPACER)
             num_failed_deployments = num_failed_deployments + 1
         else:
-            if deploy_marathon_service(service, instance, clients, soa_dir, marathon_apps_with_clients)[0]:
+            if deploy_marathon_service(
+                service, instance, clients, soa_dir, marathon_apps_with_clients,
+                system_paasta_config=system_paasta_config,
+            )[0]:
                 num_failed_deployments = num_failed_deployments + 1
 
     requests_cache.uninstall_cache()
@@ -805,6 +811,7 @@ def deploy_marathon_service(
     clients: marathon_tools.MarathonClients,
     soa_dir: str,
     marathon_apps_with_clients: Collection[Tuple[MarathonApp, MarathonClient]],
+    system_paasta_config: Optional[SystemPaastaConfig]=None,
 ) -> Tuple[int, float]:
     """deploy the service instance given and proccess return code
     if there was an error we send a sensu alert.
@@ -814,6 +821,7 @@ def deploy_marathon_service(
     :param clients: A MarathonClients object
     :param soa_dir: Path to yelpsoa configs
     :param marathon_apps: A list of all marathon app objects
+    :param system_paasta_config: The system paasta config, loaded from disk if not given
     :returns: A tuple of (status, bounce_in_seconds) to be used by paasta-deployd
         bounce_in_seconds instructs how long until the deployd should try another bounce
         None means that it is in a steady state and doesn't need to bounce again
@@ -821,20 +829,23 @@ def deploy_marathon_service(
     short_id = marathon_tools.format_job_id(service, instance)
     try:
         with bounce_lib.bounce_lock_zookeeper(short_id):
+            if system_paasta_config is None:
+                system_paasta_config = load_system_paasta_config()
+            cluster = system_paasta_config.get_cluster()
             try:
                 service_instance_config = marathon_tools.load_marathon_service_config_no_cache(
                     service,
                     instance,
-                    load_system_paasta_config().get_cluster(),
+                    cluster,
                     soa_dir=soa_dir,
                 )
             except NoDeploymentsAvailable:
                 log.debug("No deployments found for %s.%s in cluster %s. Skipping." %
-                          (service, instance, load_system_paasta_config().get_cluster()))
+                          (service, instance, cluster))
                 return 0, None
             except NoConfigurationForServiceError:
                 error_msg = "Could not read marathon configuration file for %s.%s in cluster %s" % \
-                            (service, instance, load_system_paasta_config().get_cluster())
+                            (service, instance, cluster)
                 log.error(error_msg)
                 return 1, None
 
@@ -846,6 +857,7 @@ def deploy_marathon_service(
                     job_config=service_instance_config,
                     marathon_apps_with_clients=marathon_apps_with_clients,
                     soa_dir=soa_dir,
+                    system_paasta_config=system_paasta_config,
                 )
                 sensu_status = pysensu_yelp.Status.CRITICAL if status else pysensu_yelp.Status.OK
                 send_event(service, instance, soa_dir, sensu_status, output)
@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import atexit
 import contextlib
 import copy
 import datetime
@@ -942,6 +943,19 @@ def get_git_url(service: str, soa_dir: str=DEFAULT_SOA_DIR) -> str:
     return general_config.get('git_url', default_location)
 
 
+def get_service_config_mtime(service: str, soa_dir: str) -> Optional[float]:
+    """Returns the latest mtime of a service's soa_dir directory and the files in it,
+    or None if the service has no directory"""
+    service_dir = os.path.join(os.path.abspath(soa_dir), service)
+    try:
+        mtimes = [os.stat(service_dir).st_mtime]
+        with os.scandir(service_dir) as entries:
+            mtimes.extend(entry.stat().st_mtime for entry in entries if entry.is_file())
+    except FileNotFoundError:
+        return None
+    return max(mtimes)
+
+
 def get_service_docker_registry(
     service: str,
     soa_dir: str=DEFAULT_SOA_DIR,
@@ -1129,6 +1143,114 @@ class ScribeLogWriter(LogWriter):
         self.clog.log_line(log_name, formatted_line)
 
 
+@register_log_writer('async_scribe')
+class AsyncScribeLogWriter(ScribeLogWriter):
+    """A ScribeLogWriter that hands lines to a background sender instead of talking to scribe on the caller's thread.
+
+    Lines are still echoed to stdout/stderr immediately, but the scribe write goes onto a bounded queue. When the
+    queue is full, lines are dropped (counted in `dropped`) unless block_when_full is set, in which case the caller
+    waits for room (counted in `blocked`). The sender drains up to batch_size lines at a time and writes them
+    grouped by stream. Whatever is still queued at exit is flushed for up to flush_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        scribe_host: str='169.254.255.254',
+        scribe_port: int=1463,
+        scribe_disable: bool=False,
+        queue_size: int=10000,
+        batch_size: int=500,
+        block_when_full: bool=False,
+        flush_timeout: float=5.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(scribe_host=scribe_host, scribe_port=scribe_port, scribe_disable=scribe_disable, **kwargs)
+        self.batch_size = batch_size
+        self.block_when_full = block_when_full
+        self.flush_timeout = flush_timeout
+        self.sent = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.errors = 0
+        self._queue: queue.Queue[Tuple[str, str]] = queue.Queue(maxsize=queue_size)
+        self._sender = threading.Thread(target=self._send_forever, name='AsyncScribeLogWriter')
+        self._sender.daemon = True
+        self._sender.start()
+        atexit.register(self.flush)
+
+    def log(
+        self,
+        service: str,
+        line: str,
+        component: str,
+        level: str=DEFAULT_LOGLEVEL,
+        cluster: str=ANY_CLUSTER,
+        instance: str=ANY_INSTANCE,
+    ) -> None:
+        if level == 'event':
+            paasta_print("[service %s] %s" % (service, line), file=sys.stdout)
+        elif level == 'debug':
+            paasta_print("[service %s] %s" % (service, line), file=sys.stderr)
+        else:
+            raise NoSuchLogLevel
+        log_name = get_log_name_for_service(service)
+        # Format here so the timestamp reflects when the line was logged, not when it was sent
+        formatted_line = format_log_line(level, cluster, service, instance, component, line)
+        try:
+            self._queue.put_nowait((log_name, formatted_line))
+        except queue.Full:
+            if self.block_when_full:
+                self.blocked += 1
+                self._queue.put((log_name, formatted_line))
+            else:
+                self.dropped += 1
+
+    def _next_batch(self) -> List[Tuple[str, str]]:
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def send_batch(self, batch: List[Tuple[str, str]]) -> None:
+        lines_by_stream: Dict[str, List[str]] = OrderedDict()
+        for log_name, formatted_line in batch:
+            lines_by_stream.setdefault(log_name, []).append(formatted_line)
+        for log_name, lines in lines_by_stream.items():
+            for formatted_line in lines:
+                try:
+                    self.clog.log_line(log_name, formatted_line)
+                    self.sent += 1
+                except Exception as e:
+                    self.errors += 1
+                    paasta_print(
+                        "Could not log to scribe stream %s: %s: %s" % (log_name, type(e).__name__, str(e)),
+                        file=sys.stderr,
+                    )
+
+    def _send_forever(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self.send_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: Optional[float]=None) -> bool:
+        """Waits for the sender to drain the queue. Returns False if lines were still queued after timeout."""
+        if timeout is None:
+            timeout = self.flush_timeout
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if time.time() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
 @register_log_writer('null')
 class NullLogWriter(LogWriter):
     """A LogWriter class that doesn't do anything. Primarily useful for integration tests where we don't care about
@@ -1218,6 +1340,131 @@ class FileLogWriter(LogWriter):
             )
 
 
+@register_log_writer('buffered_file')
+class BufferedFileLogWriter(FileLogWriter):
+    """A FileLogWriter that batches lines per path instead of opening the file for every line.
+
+    Lines are buffered in memory and written out by a background thread every flush_interval
+    seconds, or on the caller's thread as soon as a path has buffered max_buffer_bytes. Each
+    flush is still a single write() to an O_APPEND file, so batches from several processes never
+    interleave. The most recently used max_open_files files are kept open between flushes, and
+    everything left in the buffers is flushed when the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        path_format: str,
+        mode: str='a+',
+        line_delimeter: str='\n',
+        flock: bool=False,
+        flush_interval: float=1.0,
+        max_buffer_bytes: int=64 * 1024,
+        max_open_files: int=64,
+    ) -> None:
+        super().__init__(path_format=path_format, mode=mode, line_delimeter=line_delimeter, flock=flock)
+        self.flush_interval = flush_interval
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_open_files = max_open_files
+        self._buffers: Dict[str, List[bytes]] = {}
+        self._buffer_sizes: Dict[str, int] = {}
+        self._buffers_lock = threading.Lock()
+        # path -> open file, least recently used first
+        self._open_files: OrderedDict = OrderedDict()
+        self._files_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='BufferedFileLogWriter')
+        self._flusher.daemon = True
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def log(
+        self,
+        service: str,
+        line: str,
+        component: str,
+        level: str=DEFAULT_LOGLEVEL,
+        cluster: str=ANY_CLUSTER,
+        instance: str=ANY_INSTANCE,
+    ) -> None:
+        path = self.format_path(service, component, level, cluster, instance)
+        to_write = "%s%s" % (format_log_line(level, cluster, service, instance, component, line), self.line_delimeter)
+        encoded = to_write.encode('UTF-8')
+
+        with self._buffers_lock:
+            self._buffers.setdefault(path, []).append(encoded)
+            self._buffer_sizes[path] = self._buffer_sizes.get(path, 0) + len(encoded)
+            full = self._buffer_sizes[path] >= self.max_buffer_bytes
+        if full:
+            self.flush_path(path)
+
+    def _take_buffer(self, path: str) -> bytes:
+        with self._buffers_lock:
+            lines = self._buffers.pop(path, [])
+            self._buffer_sizes.pop(path, None)
+        return b''.join(lines)
+
+    def _get_file(self, path: str) -> io.FileIO:
+        """Returns an open file for path, reopening it if it has been rotated away since we opened it.
+        Must be called with _files_lock held."""
+        f = self._open_files.pop(path, None)
+        if f is not None:
+            try:
+                rotated = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino
+            except OSError:
+                rotated = True
+            if rotated:
+                f.close()
+                f = None
+        if f is None:
+            f = io.FileIO(path, mode=self.mode, closefd=True)
+            while len(self._open_files) >= self.max_open_files:
+                _, lru_file = self._open_files.popitem(last=False)
+                lru_file.close()
+        self._open_files[path] = f
+        return f
+
+    def _close_file(self, path: str) -> None:
+        f = self._open_files.pop(path, None)
+        if f is not None:
+            f.close()
+
+    def flush_path(self, path: str) -> None:
+        with self._files_lock:
+            to_write = self._take_buffer(path)
+            if not to_write:
+                return
+            try:
+                f = self._get_file(path)
+                with self.maybe_flock(f):
+                    f.write(to_write)
+            except IOError as e:
+                self._close_file(path)
+                paasta_print(
+                    "Could not log to %s: %s: %s -- would have logged: %s" % (
+                        path, type(e).__name__, str(e), to_write.decode('UTF-8'),
+                    ),
+                    file=sys.stderr,
+                )
+
+    def flush(self) -> None:
+        with self._buffers_lock:
+            paths = list(self._buffers.keys())
+        for path in paths:
+            self.flush_path(path)
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self.flush()
+        with self._files_lock:
+            while self._open_files:
+                _, f = self._open_files.popitem()
+                f.close()
+
+
 @contextlib.contextmanager
 def flock(fd: _AnyIO) -> Iterator[None]:
     try:
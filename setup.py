@@ -72,9 +72,6 @@ setup(
         'paasta_tools/check_marathon_services_replication.py',
         'paasta_tools/check_oom_events.py',
         'paasta_tools/cleanup_marathon_jobs.py',
-        'paasta_tools/paasta_deploy_chronos_jobs',
-        'paasta_tools/deploy_marathon_services',
-        'paasta_tools/generate_all_deployments',
         'paasta_tools/generate_deployments_for_service.py',
         'paasta_tools/generate_services_file.py',
         'paasta_tools/generate_services_yaml.py',
@@ -104,6 +101,9 @@ setup(
             'paasta=paasta_tools.cli.cli:main',
             'paasta-api=paasta_tools.api.api:main',
             'paasta-deployd=paasta_tools.deployd.master:main',
+            'deploy_marathon_services=paasta_tools.deploy_runner:deploy_marathon_services_main',
+            'paasta_deploy_chronos_jobs=paasta_tools.deploy_runner:deploy_chronos_jobs_main',
+            'generate_all_deployments=paasta_tools.generate_deployments_for_service:generate_all_deployments_main',
             'paasta_autoscale_cluster=paasta_tools.autoscale_cluster:main',
             'paasta_cleanup_chronos_jobs=paasta_tools.cleanup_chronos_jobs:main',
             'paasta_check_chronos_jobs=paasta_tools.check_chronos_jobs:main',
@@ -115,6 +115,7 @@ setup(
             'paasta_firewall_update=paasta_tools.firewall_update:main',
             'paasta_firewall_logging=paasta_tools.firewall_logging:main',
             'paasta_oom_logger=paasta_tools.oom_logger:main',
+            'paasta_mesos_state_snapshot=paasta_tools.mesos_state_snapshot:main',
             'paasta_broadcast_log=paasta_tools.marathon_tools:broadcast_log_all_services_running_here_from_stdin',
         ],
         'paste.app_factory': [
@@ -18,13 +18,14 @@ from pytest import raises
 
 from paasta_tools import marathon_tools
 from paasta_tools.api import settings
+from paasta_tools.api.state_cache import ClusterStateCache
+from paasta_tools.api.state_cache import ClusterStateSnapshot
 from paasta_tools.api.views import instance
 from paasta_tools.api.views.exception import ApiFailure
 from paasta_tools.chronos_tools import ChronosJobConfig
 
 
 @mock.patch('paasta_tools.api.views.instance.marathon_job_status', autospec=True)
-@mock.patch('paasta_tools.api.views.instance.marathon_tools.get_matching_appids', autospec=True)
 @mock.patch('paasta_tools.api.views.instance.marathon_tools.load_marathon_service_config', autospec=True)
 @mock.patch('paasta_tools.api.views.instance.validate_service_instance', autospec=True)
 @mock.patch('paasta_tools.api.views.instance.get_actual_deployments', autospec=True)
@@ -32,7 +33,6 @@ def test_instances_status_marathon(
     mock_get_actual_deployments,
     mock_validate_service_instance,
     mock_load_marathon_service_config,
-    mock_get_matching_appids,
     mock_marathon_job_status,
 ):
     settings.cluster = 'fake_cluster'
@@ -44,16 +44,12 @@ def test_instances_status_marathon(
     }
     mock_validate_service_instance.return_value = 'marathon'
 
-    mock_marathon_config = marathon_tools.MarathonConfig(
-        {'url': 'fake_url', 'user': 'fake_user', 'password': 'fake_password'},
-    )
-    settings.marathon_client = marathon_tools.get_marathon_client(
-        mock_marathon_config.get_url(),
-        mock_marathon_config.get_username(),
-        mock_marathon_config.get_password(),
-    )
+    mock_state = mock.create_autospec(ClusterStateSnapshot)
+    mock_state.get_matching_appids.return_value = ['a', 'b']
+    mock_state.age.return_value = 1.5
+    settings.state_cache = mock.create_autospec(ClusterStateCache)
+    settings.state_cache.get_snapshot.return_value = mock_state
 
-    mock_get_matching_appids.return_value = ['a', 'b']
     mock_service_config = marathon_tools.MarathonServiceConfig(
         service='fake_service',
         cluster='fake_cluster',
@@ -70,6 +66,10 @@ def test_instances_status_marathon(
     response = instance.instance_status(request)
     assert response['marathon']['bounce_method'] == 'fake_bounce'
     assert response['marathon']['desired_state'] == 'start'
+    assert response['marathon']['app_count'] == 2
+    assert response['marathon']['cache_age_seconds'] == 1.5
+    mock_state.get_matching_appids.assert_called_once_with('fake_service', 'fake_instance')
+    mock_marathon_job_status.assert_called_once_with(mock.ANY, mock_state, mock_service_config, False)
 
 
 @mock.patch('paasta_tools.api.views.instance.chronos_tools.load_chronos_config', autospec=True)
@@ -147,34 +147,22 @@ def test_instances_status_adhoc(
     }
 
 
-@mock.patch('paasta_tools.api.views.instance.get_running_tasks_from_frameworks', autospec=True)
-@mock.patch('paasta_tools.api.views.instance.marathon_tools.is_app_id_running', autospec=True)
-def test_marathon_job_status_verbose(
-    mock_is_app_id_running,
-    mock_get_running_tasks_from_frameworks,
-):
-    mock_tasks = [
-        mock.Mock(slave={'hostname': 'host1'}),
-        mock.Mock(slave={'hostname': 'host1'}),
-        mock.Mock(slave={'hostname': 'host2'}),
-    ]
-    mock_get_running_tasks_from_frameworks.return_value = mock_tasks
-    mock_is_app_id_running.return_value = True
-
+def test_marathon_job_status_verbose():
     app = mock.create_autospec(marathon.models.app.MarathonApp)
     app.instances = 5
     app.tasks_running = 5
-    app.deployments = []
 
-    client = mock.create_autospec(marathon.MarathonClient)
-    client.get_app.return_value = app
+    mock_state = mock.create_autospec(ClusterStateSnapshot)
+    mock_state.get_slave_hostnames_for_app.return_value = {'host1', 'host2'}
+    mock_state.get_deploy_status.return_value = marathon_tools.MarathonDeployStatus.Running
+    mock_state.get_app.return_value = app
 
     job_config = mock.create_autospec(marathon_tools.MarathonServiceConfig)
     job_config.format_marathon_app_dict.return_value = {'id': 'mock_app_id'}
     job_config.get_instances.return_value = 5
 
     mstatus = {}
-    instance.marathon_job_status(mstatus, client, job_config, verbose=True)
+    instance.marathon_job_status(mstatus, mock_state, job_config, verbose=True)
     expected = {
         'deploy_status': 'Running',
         'running_instance_count': 5,
@@ -185,6 +173,32 @@ def test_marathon_job_status_verbose(
     slaves = mstatus.pop('slaves')
     assert len(slaves) == len(expected_slaves) and sorted(slaves) == sorted(expected_slaves)
     assert mstatus == expected
+    mock_state.get_slave_hostnames_for_app.assert_called_once_with('mock_app_id')
+
+
+def test_marathon_job_status_delayed():
+    app = mock.create_autospec(marathon.models.app.MarathonApp)
+    app.tasks_running = 0
+    app_queue = mock.Mock(delay=mock.Mock(overdue=False, time_left_seconds=30))
+
+    mock_state = mock.create_autospec(ClusterStateSnapshot)
+    mock_state.get_deploy_status.return_value = marathon_tools.MarathonDeployStatus.Delayed
+    mock_state.get_app.return_value = app
+    mock_state.get_app_queue.return_value = app_queue
+
+    job_config = mock.create_autospec(marathon_tools.MarathonServiceConfig)
+    job_config.format_marathon_app_dict.return_value = {'id': 'mock_app_id'}
+    job_config.get_instances.return_value = 5
+
+    mstatus = {}
+    instance.marathon_job_status(mstatus, mock_state, job_config, verbose=False)
+    assert mstatus == {
+        'deploy_status': 'Delayed',
+        'running_instance_count': 0,
+        'expected_instance_count': 5,
+        'app_id': 'mock_app_id',
+        'backoff_seconds': 30,
+    }
 
 
 @mock.patch('paasta_tools.api.views.instance.add_executor_info', autospec=True)
@@ -250,9 +264,8 @@ def test_instance_task(mock_get_task, mock_instance_status, mock_add_slave_info,
         ret = instance.instance_task(mock_request)
 
 
-@mock.patch('paasta_tools.api.views.instance.marathon_tools.get_app_queue', autospec=True)
 @mock.patch('paasta_tools.api.views.instance.marathon_tools.load_marathon_service_config', autospec=True)
-def test_instance_delay(mock_load_config, mock_get_app_queue):
+def test_instance_delay(mock_load_config):
     mock_unused_offers = mock.Mock()
     mock_unused_offers.last_unused_offers = [
         {
@@ -265,7 +278,10 @@ def test_instance_delay(mock_load_config, mock_get_app_queue):
             'reason': [],
         },
     ]
-    mock_get_app_queue.return_value = mock_unused_offers
+    mock_state = mock.create_autospec(ClusterStateSnapshot)
+    mock_state.get_app_queue.return_value = mock_unused_offers
+    settings.state_cache = mock.create_autospec(ClusterStateCache)
+    settings.state_cache.get_snapshot.return_value = mock_state
 
     mock_config = mock.Mock()
     mock_config.format_marathon_app_dict = lambda: {'id': 'foo'}
@@ -279,6 +295,7 @@ def test_instance_delay(mock_load_config, mock_get_app_queue):
     assert response['foo'] == 1
     assert response['bar'] == 2
     assert response['baz'] == 1
+    mock_state.get_app_queue.assert_called_once_with('foo')
 
 
 def test_add_executor_info():
@@ -0,0 +1,131 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import mock
+
+from paasta_tools import marathon_tools
+from paasta_tools.api import state_cache
+
+
+def make_snapshot(apps=(), queue=(), deployments=(), mesos_state=None, fetch_time=1000):
+    return state_cache.ClusterStateSnapshot(
+        apps=list(apps),
+        queue=list(queue),
+        deployments=list(deployments),
+        mesos_state=mesos_state or {},
+        fetch_time=fetch_time,
+    )
+
+
+def make_app(app_id, instances=3, tasks_running=3):
+    return mock.Mock(id=app_id, instances=instances, tasks_running=tasks_running)
+
+
+def test_snapshot_indexes_apps_queue_and_deployments():
+    app = make_app('/fake--service.main.git1.config1')
+    queue_item = mock.Mock(app=mock.Mock(id='/fake--service.main.git1.config1'))
+    deployment = mock.Mock(affected_apps=['/fake--service.main.git1.config1'])
+    snapshot = make_snapshot(apps=[app], queue=[queue_item], deployments=[deployment])
+
+    assert snapshot.get_app('fake--service.main.git1.config1') == app
+    assert snapshot.get_app('/fake--service.main.git1.config1') == app
+    assert snapshot.get_app('fake--service.main.git2.config2') is None
+    assert snapshot.get_app_queue('fake--service.main.git1.config1') == queue_item
+    assert snapshot.deployments_by_app_id['fake--service.main.git1.config1'] == [deployment]
+
+
+def test_snapshot_get_matching_appids():
+    snapshot = make_snapshot(apps=[
+        make_app('/fake--service.main.git1.config1'),
+        make_app('/fake--service.main.git2.config2'),
+        make_app('/fake--service.canary.git1.config1'),
+    ])
+    assert snapshot.get_matching_appids('fake_service', 'main') == [
+        '/fake--service.main.git1.config1',
+        '/fake--service.main.git2.config2',
+    ]
+
+
+def test_snapshot_get_deploy_status():
+    running = make_app('/running')
+    deploying = make_app('/deploying')
+    delayed = make_app('/delayed')
+    stopped = make_app('/stopped', instances=0, tasks_running=0)
+    snapshot = make_snapshot(
+        apps=[running, deploying, delayed, stopped],
+        queue=[mock.Mock(app=mock.Mock(id='/delayed'), delay=mock.Mock(overdue=False, time_left_seconds=10))],
+        deployments=[mock.Mock(affected_apps=['/deploying'])],
+    )
+
+    assert snapshot.get_deploy_status('running') == marathon_tools.MarathonDeployStatus.Running
+    assert snapshot.get_deploy_status('deploying') == marathon_tools.MarathonDeployStatus.Deploying
+    assert snapshot.get_deploy_status('delayed') == marathon_tools.MarathonDeployStatus.Delayed
+    assert snapshot.get_deploy_status('stopped') == marathon_tools.MarathonDeployStatus.Stopped
+    assert snapshot.get_deploy_status('missing') == marathon_tools.MarathonDeployStatus.NotRunning
+
+
+def test_snapshot_get_slave_hostnames_for_app():
+    mesos_state = {
+        'slaves': [
+            {'id': 'slave1', 'hostname': 'host1'},
+            {'id': 'slave2', 'hostname': 'host2'},
+        ],
+        'frameworks': [{
+            'tasks': [
+                {'id': 'fake--service.main.git1.config1.uuid1', 'state': 'TASK_RUNNING', 'slave_id': 'slave1'},
+                {'id': 'fake--service.main.git1.config1.uuid2', 'state': 'TASK_RUNNING', 'slave_id': 'slave1'},
+                {'id': 'fake--service.main.git1.config1.uuid3', 'state': 'TASK_RUNNING', 'slave_id': 'slave2'},
+                {'id': 'fake--service.main.git1.config1.uuid4', 'state': 'TASK_STAGING', 'slave_id': 'slave3'},
+                {'id': 'other.main.git1.config1.uuid1', 'state': 'TASK_RUNNING', 'slave_id': 'slave2'},
+            ],
+        }],
+    }
+    snapshot = make_snapshot(mesos_state=mesos_state)
+    assert snapshot.get_slave_hostnames_for_app('fake--service.main.git1.config1') == {'host1', 'host2'}
+    assert snapshot.get_slave_hostnames_for_app('other.main.git1.config1') == {'host2'}
+    assert snapshot.get_slave_hostnames_for_app('missing') == set()
+
+
+def test_cache_fetch_snapshot():
+    mock_client = mock.Mock()
+    mock_client.list_apps.return_value = [make_app('/fake--service.main.git1.config1')]
+    mock_client.list_queue.return_value = []
+    mock_client.list_deployments.return_value = []
+    mock_master = mock.Mock()
+    mock_master.fetch.return_value.json.return_value = {'slaves': []}
+
+    cache = state_cache.ClusterStateCache(marathon_client=mock_client, mesos_master=mock_master)
+    with mock.patch('paasta_tools.api.state_cache.time.time', autospec=True, return_value=1000):
+        snapshot = cache.refresh()
+
+    assert snapshot.fetch_time == 1000
+    assert snapshot.mesos_state == {'slaves': []}
+    assert snapshot.get_app('fake--service.main.git1.config1') is not None
+    mock_client.list_queue.assert_called_once_with(embed_last_unused_offers=True)
+    mock_master.fetch.assert_called_once_with('/master/state.json', cached=True)
+
+
+def test_cache_get_snapshot_reuses_fresh_snapshot():
+    cache = state_cache.ClusterStateCache(marathon_client=mock.Mock(), mesos_master=mock.Mock(), refresh_interval=5)
+    with mock.patch.object(cache, 'fetch_snapshot', autospec=True) as mock_fetch_snapshot:
+        mock_fetch_snapshot.side_effect = lambda: make_snapshot(fetch_time=1000)
+        with mock.patch('paasta_tools.api.state_cache.time.time', autospec=True) as mock_time:
+            mock_time.return_value = 1000
+            first = cache.get_snapshot()
+            mock_time.return_value = 1009
+            assert cache.get_snapshot() is first
+            assert mock_fetch_snapshot.call_count == 1
+
+            mock_time.return_value = 1011
+            assert cache.get_snapshot() is not first
+            assert mock_fetch_snapshot.call_count == 2
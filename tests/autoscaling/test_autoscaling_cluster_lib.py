@@ -112,6 +112,59 @@ def test_get_instances_from_ip():
     assert ret == mock_instances
 
 
+def test_autoscaling_index():
+    mock_slave_1 = {'id': 'id1', 'pid': 'slave(1)@10.1.1.1:5051', 'attributes': {'pool': 'default'}}
+    mock_slave_2 = {'id': 'id2', 'pid': 'slave(1)@10.2.2.2:5051', 'attributes': {}}
+    mock_slave_3 = {'id': 'id3', 'pid': 'slave(1)@10.3.3.3:5051', 'attributes': {'pool': 'other'}}
+    mock_mesos_state = {'slaves': [mock_slave_1, mock_slave_2, mock_slave_3]}
+    index = autoscaling_cluster_lib.AutoscalingIndex(mock_mesos_state)
+
+    assert index.slaves_by_id['id3'] == mock_slave_3
+    assert index.get_slave_by_ip('10.2.2.2') == mock_slave_2
+    assert index.get_slave_by_ip('10.9.9.9') is None
+    assert index.get_pool_slaves('default') == {'id1': mock_slave_1, 'id2': mock_slave_2}
+    assert index.get_pool_slaves('missing') == {}
+
+    index.add_instance_descriptions([
+        {'InstanceId': 'i-1', 'PrivateIpAddress': '10.1.1.1'},
+        {'InstanceId': 'i-2'},
+    ])
+    assert index.instances_by_id['i-1'] == {'InstanceId': 'i-1', 'PrivateIpAddress': '10.1.1.1'}
+    assert index.instances_by_id['i-2'] == {'InstanceId': 'i-2'}
+
+    # re-indexing the same state is a no-op, a new state replaces the slaves but keeps the instances
+    index.index_mesos_state(mock_mesos_state)
+    assert index.slaves_by_id['id1'] == mock_slave_1
+    index.index_mesos_state({'slaves': [mock_slave_3]})
+    assert index.get_pool_slaves('default') == {}
+    assert index.get_slave_by_ip('10.1.1.1') is None
+    assert 'i-1' in index.instances_by_id
+
+
+def test_get_mesos_utilization_error_with_index():
+    with mock.patch(
+        'paasta_tools.autoscaling.autoscaling_cluster_lib.get_resource_utilization_by_grouping',
+        autospec=True,
+    ) as mock_get_resource_utilization_by_grouping:
+        mock_mesos_state = {'slaves': []}
+        mock_get_resource_utilization_by_grouping.return_value = {
+            ('default', 'westeros-1'): {
+                'free': ResourceInfo(cpus=7.0, mem=2048.0, disk=30.0),
+                'total': ResourceInfo(cpus=10.0, mem=4096.0, disk=40.0),
+            },
+        }
+        index = autoscaling_cluster_lib.AutoscalingIndex()
+        for region in ('westeros-1', 'westeros-2'):
+            autoscaling_cluster_lib.get_mesos_utilization_error(
+                mesos_state=mock_mesos_state,
+                region=region,
+                pool='default',
+                target_utilization=0.8,
+                index=index,
+            )
+        assert mock_get_resource_utilization_by_grouping.call_count == 1
+
+
 def test_autoscale_local_cluster_with_cancelled():
     with mock.patch(
         'paasta_tools.autoscaling.autoscaling_cluster_lib.load_system_paasta_config', autospec=True,
@@ -266,8 +319,8 @@ def test_filter_scalers():
 def test_autoscale_cluster_resource():
     call = []
 
-    async def mock_scale_resource(current, target):
-        call.append((current, target))
+    async def mock_scale_resource(current, target, mesos_state=None):
+        call.append((current, target, mesos_state))
         await asyncio.sleep(0)
 
     mock_scaling_resource = {'id': 'sfr-blah', 'type': 'sfr', 'pool': 'default'}
@@ -281,7 +334,7 @@ def test_autoscale_cluster_resource():
     # test scale up
     _run(autoscaling_cluster_lib.autoscale_cluster_resource(mock_scaler, mock_state))
     assert mock_metrics_provider.called
-    assert (2, 6) in call
+    assert (2, 6, mock_state) in call
 
 
 def test_get_autoscaling_info_for_all_resources():
@@ -299,7 +352,7 @@ def test_get_autoscaling_info_for_all_resources():
 
     mock_autoscaling_info = mock.Mock()
 
-    def mock_autoscaling_info_for_resource_side_effect(resource, pool_settings, state, utilization_errors):
+    def mock_autoscaling_info_for_resource_side_effect(resource, pool_settings, state, utilization_errors, index):
         return {
             (mock_resource_1['region'], mock_resource_1['pool'],): None,
             (mock_resource_2['region'], mock_resource_2['pool'],): mock_autoscaling_info,
@@ -321,10 +374,12 @@ def test_get_autoscaling_info_for_all_resources():
             mock_resources, {}, mock_state,
         )
         calls = [
-            mock.call(mock_resource_1, {}, mock_state, utilization_errors),
-            mock.call(mock_resource_2, {}, mock_state, utilization_errors),
+            mock.call(mock_resource_1, {}, mock_state, utilization_errors, index=mock.ANY),
+            mock.call(mock_resource_2, {}, mock_state, utilization_errors, index=mock.ANY),
         ]
         mock_autoscaling_info_for_resource.assert_has_calls(calls, any_order=True)
+        indexes = {id(call[1]['index']) for call in mock_autoscaling_info_for_resource.call_args_list}
+        assert len(indexes) == 1
         assert ret == [mock_autoscaling_info]
 
 
@@ -363,6 +418,7 @@ def test_autoscaling_info_for_resources():
             config_folder=None,
             dry_run=True,
             utilization_error=0,
+            index=None,
         )
         assert ret == autoscaling_cluster_lib.AutoscalingInfo(
             resource_id='sfr-blah',
@@ -1026,7 +1082,7 @@ class TestClusterAutoscaler(unittest.TestCase):
             mock_set_capacity.return_value = True
             mock_master = mock.Mock()
             mock_mesos_state = mock.Mock()
-            mock_master.state_summary.return_value = mock_mesos_state
+            mock_master.state = mock_mesos_state
             mock_get_mesos_master.return_value = mock_master
             mock_downscale_aws_resource.side_effect = just_sleep
 
@@ -1057,6 +1113,16 @@ class TestClusterAutoscaler(unittest.TestCase):
                 target_capacity=0,
             )
 
+            # test scale down reuses the state the caller already has
+            mock_get_mesos_master.reset_mock()
+            mock_passed_state = mock.Mock()
+            _run(self.autoscaler.scale_resource(3.3, 0, mesos_state=mock_passed_state))
+            assert not mock_get_mesos_master.called
+            mock_get_mesos_task_count_by_slave.assert_called_with(
+                mock_passed_state,
+                pool='default',
+            )
+
     def test_downscale_aws_resource(self):
         with mock.patch(
             'paasta_tools.autoscaling.autoscaling_cluster_lib.get_mesos_task_count_by_slave', autospec=True,
@@ -1269,19 +1335,6 @@ class TestClusterAutoscaler(unittest.TestCase):
             ))
             assert mock_gracefully_terminate_slave.call_count == 3
 
-    def test_filter_instance_description_for_ip(self):
-        fake_description = [{'PrivateIpAddress': '10.1.1.1'}, {'PrivateIpAddress': '10.1.1.2'}]
-        actual = self.autoscaler.filter_instance_description_for_ip('10.1.1.1', fake_description)
-        assert actual == [fake_description[0]]
-
-    def test_filter_instance_status_for_instance_id(self):
-        fake_status = {'InstanceStatuses': [{'InstanceId': 'foo'}, {'InstanceId': 'bar'}]}
-        actual = self.autoscaler.filter_instance_status_for_instance_id(
-            instance_id='foo',
-            instance_statuses=fake_status,
-        )
-        assert actual == [fake_status['InstanceStatuses'][0]]
-
     def test_instance_status_for_instance_ids_batches_calls(self):
         instance_ids = [{'foo': i} for i in range(0, 100)]
         with mock.patch(
@@ -1395,15 +1448,15 @@ class TestClusterAutoscaler(unittest.TestCase):
         ) as mock_ec2_client, mock.patch(
             'paasta_tools.autoscaling.autoscaling_cluster_lib.asyncio.sleep', autospec=True,
         ) as mock_sleep, mock.patch(
-            'paasta_tools.autoscaling.autoscaling_cluster_lib.is_safe_to_kill', autospec=True,
-        ) as mock_is_safe_to_kill:
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.get_hosts_safe_to_kill', autospec=True,
+        ) as mock_get_hosts_safe_to_kill:
             mock_terminate_instances = mock.Mock()
             mock_ec2_client.return_value = mock.Mock(terminate_instances=mock_terminate_instances)
             mock_timer = mock.Mock()
             mock_timer.ready = lambda: False
             mock_sleep.side_effect = just_sleep
 
-            mock_is_safe_to_kill.return_value = True
+            mock_get_hosts_safe_to_kill.return_value = {'hostblah'}
             mock_slave_to_kill = mock.Mock(
                 hostname='hostblah',
                 instance_id='i-blah123',
@@ -1415,14 +1468,49 @@ class TestClusterAutoscaler(unittest.TestCase):
                 region='westeros-1', should_drain=True,
             ))
             mock_terminate_instances.assert_called_with(InstanceIds=['i-blah123'], DryRun=False)
-            mock_is_safe_to_kill.assert_called_with('hostblah')
+            mock_get_hosts_safe_to_kill.assert_called_with(
+                {'hostblah'}, max_age=autoscaling_cluster_lib.DRAIN_POLL_INTERVAL,
+            )
+            assert self.autoscaler.drain_poller.hostnames == set()
 
-            mock_is_safe_to_kill.side_effect = [False, False, True]
+            mock_get_hosts_safe_to_kill.side_effect = [set(), set(), {'hostblah'}]
             _run(self.autoscaler.wait_and_terminate(
                 slave=mock_slave_to_kill, drain_timeout=600, dry_run=False, timer=mock_timer,
                 region='westeros-1', should_drain=True,
             ))
-            assert mock_is_safe_to_kill.call_count == 4
+            assert mock_get_hosts_safe_to_kill.call_count == 4
+
+    def test_wait_and_terminate_shares_drain_polls(self):
+        with mock.patch(
+            'boto3.client', autospec=True,
+        ) as mock_ec2_client, mock.patch(
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.asyncio.sleep', autospec=True,
+        ) as mock_sleep, mock.patch(
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.get_hosts_safe_to_kill', autospec=True,
+        ) as mock_get_hosts_safe_to_kill:
+            mock_ec2_client.return_value = mock.Mock()
+            mock_timer = mock.Mock()
+            mock_timer.ready = lambda: False
+            mock_sleep.side_effect = just_sleep
+            mock_get_hosts_safe_to_kill.side_effect = [set(), {'host1'}, {'host2'}]
+            mock_slaves = [
+                mock.Mock(hostname='host%d' % i, instance_id='i-%d' % i, pid='slave(1)@10.1.1.%d:5051' % i)
+                for i in (1, 2)
+            ]
+
+            async def terminate_all():
+                await asyncio.gather(*[
+                    self.autoscaler.wait_and_terminate(
+                        slave=slave, drain_timeout=600, dry_run=False, timer=mock_timer,
+                        region='westeros-1', should_drain=True,
+                    )
+                    for slave in mock_slaves
+                ])
+            _run(terminate_all())
+            assert mock_get_hosts_safe_to_kill.call_args_list[0] == mock.call(
+                {'host1', 'host2'}, max_age=autoscaling_cluster_lib.DRAIN_POLL_INTERVAL,
+            )
+            assert mock_get_hosts_safe_to_kill.call_count == 3
 
     def test_get_instance_ips(self):
         with mock.patch(
@@ -1430,10 +1518,23 @@ class TestClusterAutoscaler(unittest.TestCase):
             autospec=True,
         ) as mock_describe_instances:
             mock_instance_ids = [{'InstanceId': 'i-blah1'}, {'InstanceId': 'i-blah2'}]
-            mock_instances = [{'PrivateIpAddress': '10.1.1.1'}, {'PrivateIpAddress': '10.2.2.2'}]
+            mock_instances = [
+                {'InstanceId': 'i-blah1', 'PrivateIpAddress': '10.1.1.1'},
+                {'InstanceId': 'i-blah2', 'PrivateIpAddress': '10.2.2.2'},
+            ]
             mock_describe_instances.return_value = mock_instances
             ret = self.autoscaler.get_instance_ips(mock_instance_ids, region='westeros-1')
-            mock_describe_instances.assert_called_with(self.autoscaler, ['i-blah1', 'i-blah2'], region='westeros-1')
+            mock_describe_instances.assert_called_with(
+                self.autoscaler,
+                instance_ids=['i-blah1', 'i-blah2'],
+                region='westeros-1',
+            )
+            assert ret == ['10.1.1.1', '10.2.2.2']
+
+            # instances described once are served from the shared index
+            mock_describe_instances.reset_mock()
+            ret = self.autoscaler.get_instance_ips(mock_instance_ids, region='westeros-1')
+            assert not mock_describe_instances.called
             assert ret == ['10.1.1.1', '10.2.2.2']
 
     def mock_pid_to_ip_side(self, pid):
@@ -1445,9 +1546,6 @@ class TestClusterAutoscaler(unittest.TestCase):
 
     def test_filter_aws_slaves(self):
         with mock.patch(
-            'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.get_instance_ips',
-            autospec=True,
-        ) as mock_get_instance_ips, mock.patch(
             'paasta_tools.autoscaling.autoscaling_cluster_lib.slave_pid_to_ip', autospec=True,
         ) as mock_pid_to_ip, mock.patch(
             'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.describe_instances',
@@ -1461,7 +1559,6 @@ class TestClusterAutoscaler(unittest.TestCase):
             'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.describe_instance_status',
             autospec=True,
         ) as mock_describe_instance_status:
-            mock_get_instance_ips.return_value = ['10.1.1.1', '10.3.3.3']
             mock_pid_to_ip.side_effect = self.mock_pid_to_ip_side
             mock_instances = [
                 {
@@ -1479,14 +1576,17 @@ class TestClusterAutoscaler(unittest.TestCase):
                     'InstanceType': 'm4.whatever',
                     'PrivateIpAddress': '10.1.1.3',
                 },
+                {
+                    'InstanceId': 'i-4',
+                    'InstanceType': 'm4.whatever',
+                },
             ]
             self.autoscaler.instances = mock_instances
             mock_describe_instances.return_value = mock_instances
             mock_instance_status = {
                 'InstanceStatuses': [
-                    {'InstanceId': 'i-1'},
                     {'InstanceId': 'i-2'},
-                    {'InstanceId': 'i-3'},
+                    {'InstanceId': 'i-1'},
                 ],
             }
             mock_describe_instance_status.return_value = mock_instance_status
@@ -1531,33 +1631,74 @@ class TestClusterAutoscaler(unittest.TestCase):
 
             ret = self.autoscaler.filter_aws_slaves(mock_sfr_sorted_slaves)
 
-            mock_get_instance_ips.assert_called_with(self.autoscaler, mock_instances, region='westeros-1')
             mock_pid_to_ip.assert_has_calls([mock_get_ip_call_1, mock_get_ip_call_2, mock_get_ip_call_3])
-            mock_describe_instances.assert_called_with(
+            mock_describe_instances.assert_called_once_with(
+                self.autoscaler,
+                instance_ids=['i-1', 'i-2', 'i-3', 'i-4'],
+                region='westeros-1',
+            )
+            mock_describe_instance_status.assert_called_once_with(
                 self.autoscaler,
-                instance_ids=[],
+                instance_ids=['i-1', 'i-2'],
                 region='westeros-1',
-                instance_filters=[{
-                    'Values': ['10.1.1.1', '10.3.3.3'],
-                    'Name': 'private-ip-address',
-                }],
             )
             mock_get_instance_type_weights.assert_called_with(self.autoscaler)
             mock_aws_slave_call_1 = mock.call(
                 slave=mock_slave_1,
-                instance_status=mock_instance_status['InstanceStatuses'][0],
+                instance_status=mock_instance_status['InstanceStatuses'][1],
                 instance_description=mock_instances[0],
                 instance_type_weights=mock_get_instance_type_weights.return_value,
             )
             mock_aws_slave_call_2 = mock.call(
                 slave=mock_slave_3,
-                instance_status=mock_instance_status['InstanceStatuses'][1],
+                instance_status=mock_instance_status['InstanceStatuses'][0],
                 instance_description=mock_instances[1],
                 instance_type_weights=mock_get_instance_type_weights.return_value,
             )
             mock_paasta_aws_slave.assert_has_calls([mock_aws_slave_call_1, mock_aws_slave_call_2])
             assert len(ret) == 2
 
+    def test_filter_aws_slaves_rejects_duplicate_ips(self):
+        with mock.patch(
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.describe_instances',
+            autospec=True,
+        ) as mock_describe_instances:
+            mock_instances = [
+                {'InstanceId': 'i-1', 'PrivateIpAddress': '10.1.1.1'},
+                {'InstanceId': 'i-2', 'PrivateIpAddress': '10.1.1.1'},
+            ]
+            self.autoscaler.instances = mock_instances
+            mock_describe_instances.return_value = mock_instances
+            with raises(AssertionError) as excinfo:
+                self.autoscaler.filter_aws_slaves([])
+            assert 'i-1,i-2' in str(excinfo.value)
+
+    def test_filter_aws_slaves_requires_instance_status(self):
+        with mock.patch(
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.describe_instances',
+            autospec=True,
+        ) as mock_describe_instances, mock.patch(
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.get_instance_type_weights',
+            autospec=True,
+        ), mock.patch(
+            'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.describe_instance_status',
+            autospec=True,
+        ) as mock_describe_instance_status:
+            mock_instances = [{'InstanceId': 'i-1', 'PrivateIpAddress': '10.1.1.1'}]
+            self.autoscaler.instances = mock_instances
+            mock_describe_instances.return_value = mock_instances
+            mock_describe_instance_status.return_value = {'InstanceStatuses': []}
+            mock_slave = {
+                'task_counts': SlaveTaskCount(
+                    slave={'pid': 'slave(1)@10.1.1.1:5051', 'id': '123', 'hostname': 'host123'},
+                    count=0,
+                    chronos_count=0,
+                ),
+            }
+            with raises(AssertionError) as excinfo:
+                self.autoscaler.filter_aws_slaves([mock_slave])
+            assert 'only one InstanceStatus per instance' in str(excinfo.value)
+
     def test_get_aws_slaves(self):
         with mock.patch(
             'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.get_instance_ips',
@@ -1624,22 +1765,6 @@ class TestClusterAutoscaler(unittest.TestCase):
         ret = self.autoscaler.get_pool_slaves(mock_mesos_state)
         assert ret == {'id1': mock_mesos_state['slaves'][0]}
 
-    def test_instace_descriptions_for_ips_splits_ips(self):
-        with mock.patch(
-            'paasta_tools.autoscaling.autoscaling_cluster_lib.ClusterAutoscaler.describe_instances',
-            autospec=True,
-        ) as mock_describe_instances:
-            ips = list(range(567))
-
-            def mock_describe_instance(self, instance_ids, region, instance_filters):
-                return instance_filters[0]['Values']
-            mock_describe_instances.side_effect = mock_describe_instance
-
-            ret = self.autoscaler.instance_descriptions_for_ips(ips)
-            assert len(ret) == 567
-            assert ret == ips
-            assert mock_describe_instances.call_count == 3
-
 
 class TestPaastaAwsSlave(unittest.TestCase):
 
@@ -11,6 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import math
+import struct
 from datetime import datetime
 from datetime import timedelta
 
@@ -225,13 +227,7 @@ def test_mesos_cpu_metrics_provider_no_previous_cpu_data():
         config_dict={},
         branch_dict={},
     )
-    fake_mesos_task = mock.MagicMock(
-        stats_callable=mock.MagicMock(return_value={
-            'cpus_limit': 1.1,
-            'cpus_system_time_secs': 240,
-            'cpus_user_time_secs': 240,
-        }),
-    )
+    fake_mesos_task = mock.MagicMock()
     fake_mesos_task.__getitem__.return_value = 'fake-service.fake-instance'
 
     fake_marathon_tasks = [mock.Mock(id='fake-service.fake-instance')]
@@ -242,11 +238,21 @@ def test_mesos_cpu_metrics_provider_no_previous_cpu_data():
     ) as mock_zk_client, mock.patch(
         'paasta_tools.utils.load_system_paasta_config', autospec=True,
         return_value=mock.Mock(get_zk_hosts=mock.Mock()),
-    ):
+    ), mock.patch(
+        'paasta_tools.autoscaling.autoscaling_service_lib.get_stats_for_tasks', autospec=True,
+        return_value={
+            'fake-service.fake-instance': {
+                'cpus_limit': 1.1,
+                'cpus_system_time_secs': 240,
+                'cpus_user_time_secs': 240,
+            },
+        },
+    ) as mock_get_stats_for_tasks:
         with raises(autoscaling_service_lib.MetricsProviderNoDataError):
             autoscaling_service_lib.mesos_cpu_metrics_provider(
                 fake_marathon_service_config, fake_marathon_tasks, (fake_mesos_task,),
             )
+        mock_get_stats_for_tasks.assert_called_once_with((fake_mesos_task,), max_workers=20)
         mock_zk_client.return_value.set.assert_has_calls(
             [
                 mock.call(
@@ -265,19 +271,9 @@ def test_mesos_cpu_metrics_provider():
         config_dict={},
         branch_dict={},
     )
-    fake_mesos_task = mock.MagicMock(
-        stats_callable=mock.MagicMock(return_value={
-            'cpus_limit': 1.1,
-            'cpus_system_time_secs': 240,
-            'cpus_user_time_secs': 240,
-        }),
-    )
-    fake_mesos_task_2 = mock.MagicMock(
-        stats_callable=lambda: None,
-    )
-    fake_mesos_task_3 = mock.MagicMock(
-        stats_callable=lambda: {},
-    )
+    fake_mesos_task = mock.MagicMock()
+    fake_mesos_task_2 = mock.MagicMock()
+    fake_mesos_task_3 = mock.MagicMock()
     fake_mesos_task.__getitem__.return_value = 'fake-service.fake-instance'
     fake_mesos_task_2.__getitem__.return_value = 'fake-service.fake-instance2'
     fake_mesos_task_3.__getitem__.return_value = 'fake-service.fake-instance3'
@@ -312,6 +308,17 @@ def test_mesos_cpu_metrics_provider():
     ) as mock_datetime, mock.patch(
         'paasta_tools.utils.load_system_paasta_config', autospec=True,
         return_value=mock.Mock(get_zk_hosts=mock.Mock()),
+    ), mock.patch(
+        'paasta_tools.autoscaling.autoscaling_service_lib.get_stats_for_tasks', autospec=True,
+        # The agent of fake_mesos_task_2 couldn't be reached, fake_mesos_task_3 isn't running yet
+        return_value={
+            'fake-service.fake-instance': {
+                'cpus_limit': 1.1,
+                'cpus_system_time_secs': 240,
+                'cpus_user_time_secs': 240,
+            },
+            'fake-service.fake-instance3': {},
+        },
     ):
         mock_datetime.now.return_value = current_time
         log_utilization_data = {}
@@ -1400,6 +1407,27 @@ def test_serialize_historical_load_trims_oldest_data():
     assert deserialized_long[-1] == (62999, 1)
 
 
+def test_serialize_and_deserialize_compressed_historical_load():
+    fake_data = [(1500000000.0 + 60 * i, 0.5 + (i % 7) / 100) for i in range(1000)]
+    serialized = autoscaling_service_lib.serialize_historical_load(fake_data, compress=True)
+    assert serialized.startswith(autoscaling_service_lib.COMPRESSED_HISTORICAL_LOAD_MAGIC)
+    assert len(serialized) < len(autoscaling_service_lib.serialize_historical_load(fake_data)) / 4
+    assert autoscaling_service_lib.deserialize_historical_load(serialized) == fake_data
+
+
+def test_deserialize_historical_load_compressed_empty():
+    serialized = autoscaling_service_lib.serialize_historical_load([], compress=True)
+    assert autoscaling_service_lib.deserialize_historical_load(serialized) == []
+
+
+def test_compressed_historical_load_magic_is_not_a_timestamp():
+    first_timestamp, _ = struct.unpack(
+        autoscaling_service_lib.HISTORICAL_LOAD_SERIALIZATION_FORMAT,
+        autoscaling_service_lib.COMPRESSED_HISTORICAL_LOAD_MAGIC + b'\x00' * 8,
+    )
+    assert math.isnan(first_timestamp)
+
+
 @mock.patch('paasta_tools.autoscaling.autoscaling_service_lib.save_historical_load', autospec=True)
 @mock.patch('paasta_tools.autoscaling.autoscaling_service_lib.fetch_historical_load', autospec=True, return_value=[])
 def test_proportional_decision_policy(mock_save_historical_load, mock_fetch_historical_load):
@@ -83,3 +83,13 @@ def test_linreg_forecast_policy():
         linreg_window_seconds=7,
         linreg_extrapolation_seconds=0,
     )
+
+
+def test_trailing_window_historical_load():
+    historical_load = [(1, 100), (2, 120), (2, 125), (3, 140), (4, 160)]
+
+    assert forecasting.trailing_window_historical_load(historical_load, 2) == [
+        (2, 120), (2, 125), (3, 140), (4, 160),
+    ]
+    assert forecasting.trailing_window_historical_load(historical_load, 0) == [(4, 160)]
+    assert forecasting.trailing_window_historical_load(historical_load, 10) == historical_load
@@ -20,6 +20,7 @@ from queue import Empty
 import isodate
 import mock
 import pytest
+import ujson
 from pytest import raises
 
 from paasta_tools.cli.cli import parse_args
@@ -84,6 +85,54 @@ def test_check_timestamp_in_range_true():
     assert logs.check_timestamp_in_range(timestamp, start_time, end_time) is True
 
 
+@pytest.mark.parametrize('timestamp', [
+    '2016-06-08T06:31:52.706609135Z',
+    '2016-06-08T06:31:52.7066',
+    '2016-06-08T06:31:52Z',
+    '2016-06-07T23:46:03+00:00',
+    '2016-06-07T23:46:03-07:00',
+])
+def test_parse_log_timestamp_matches_isodate(timestamp):
+    expected = isodate.parse_datetime(timestamp)
+    if expected.tzinfo is None:
+        expected = expected.replace(tzinfo=datetime.timezone.utc)
+    assert logs.parse_log_timestamp(timestamp) == expected
+    assert logs.parse_log_timestamp(timestamp).tzinfo is not None
+
+
+def test_get_log_line_sort_key():
+    line = format_log_line(
+        'debug', 'fake_cluster', 'fake_service', 'main', 'build', '"timestamp": "1999-01-01T00:00:00Z"',
+        timestamp='2016-06-08T06:31:52.706609Z',
+    )
+    expected = logs.parse_log_timestamp('2016-06-08T06:31:52.706609Z')
+    assert logs.get_log_line_sort_key(line) == expected
+    assert logs.get_log_line_sort_key(line.encode('utf-8')) == expected
+    assert logs.get_log_line_sort_key('not json').replace(tzinfo=None) == datetime.datetime.min
+    assert logs.get_log_line_sort_key('{"timestamp": "yesterday"}').replace(tzinfo=None) == datetime.datetime.min
+
+
+def test_make_raw_log_line_prefilter():
+    prefilter = logs.make_raw_log_line_prefilter(['build', 'deploy'], ['fake_cluster1'], ['main'])
+    line = format_log_line('debug', 'fake_cluster1', 'fake_service', 'main', 'deploy', 'fake_line')
+    assert prefilter(line) is True
+    assert prefilter(line.encode('utf-8')) is True
+    assert prefilter(format_log_line('debug', ANY_CLUSTER, 'fake_service', 'main', 'build', 'fake_line')) is True
+    assert prefilter(json.dumps({'cluster': ANY_CLUSTER, 'instance': 'main', 'component': 'build'})) is True
+    assert prefilter(ujson.dumps({'cluster': ANY_CLUSTER, 'instance': 'main', 'component': 'build'})) is True
+    assert prefilter(format_log_line('debug', 'fake_cluster2', 'fake_service', 'main', 'build', 'fake_line')) is False
+    assert prefilter(format_log_line('debug', 'fake_cluster1', 'fake_service', 'canary', 'build', 'x')) is False
+    assert prefilter(format_log_line('debug', 'fake_cluster1', 'fake_service', 'main', 'oom', 'x')) is False
+
+
+def test_make_raw_log_line_prefilter_ignores_values_that_may_be_escaped():
+    prefilter = logs.make_raw_log_line_prefilter(['build'], ['fake_cluster1'], ['main+canary'])
+    assert prefilter(format_log_line('debug', 'fake_cluster1', 'fake_service', 'other', 'build', 'x')) is True
+    assert logs.make_raw_log_line_prefilter(['build'], ['fake_cluster1'], None)(
+        format_log_line('debug', 'fake_cluster1', 'fake_service', 'other', 'build', 'x'),
+    ) is True
+
+
 def test_paasta_log_line_passes_filter_true():
     service = 'fake_service'
     levels = ['fake_level1', 'fake_level2']
@@ -735,6 +784,53 @@ def test_scribereader_print_logs_by_time():
         assert mock_scribereader.get_stream_reader.call_count == 14
 
 
+def test_scribereader_filter_scribe_logs():
+    lines = [
+        format_log_line(
+            'debug', 'fake_cluster1', 'fake_service', instance, 'stderr', 'fake_line',
+            timestamp='2016-06-08T06:31:5%d.000000Z' % second,
+        ).encode('utf-8')
+        for second, instance in [(1, 'main'), (2, 'canary'), (3, 'main')]
+    ]
+    filter_fn = mock.Mock(side_effect=logs.paasta_app_output_passes_filter)
+
+    with mock.patch('paasta_tools.cli.cmds.logs.scribereader', autospec=True):
+        stream = logs.ScribeLogReader(cluster_map={}).filter_scribe_logs(
+            scribe_reader_ctx=contextlib.contextmanager(lambda: iter([iter(lines)]))(),
+            scribe_env='env1',
+            stream_name='fake_stream',
+            levels=['debug'],
+            service='fake_service',
+            components=['stderr'],
+            clusters=['fake_cluster1'],
+            instances=['main'],
+            filter_fn=filter_fn,
+        )
+        assert list(stream) == [
+            (logs.parse_log_timestamp('2016-06-08T06:31:51Z'), lines[0]),
+            (logs.parse_log_timestamp('2016-06-08T06:31:53Z'), lines[2]),
+        ]
+    # The canary line never got decoded
+    assert filter_fn.call_count == 2
+
+
+def test_scribereader_print_merged_logs():
+    first = [(logs.parse_log_timestamp('2016-06-08T06:31:5%dZ' % second), 'first%d' % second) for second in (1, 4)]
+    second = [(logs.parse_log_timestamp('2016-06-08T06:31:5%dZ' % second), 'second%d' % second) for second in (2, 3)]
+
+    with mock.patch(
+        'paasta_tools.cli.cmds.logs.scribereader', autospec=True,
+    ), mock.patch(
+        'paasta_tools.cli.cmds.logs.print_log', autospec=True,
+    ) as mock_print_log:
+        logs.ScribeLogReader(cluster_map={}).print_merged_logs(
+            [iter(first), iter(second)], ['debug'], raw_mode=True,
+        )
+        assert mock_print_log.call_args_list == [
+            mock.call(line, ['debug'], True) for line in ('first1', 'second2', 'second3', 'first4')
+        ]
+
+
 def test_tail_paasta_logs_ctrl_c_in_queue_get():
     service = 'fake_service'
     levels = ['fake_level1', 'fake_level2']
@@ -153,8 +153,8 @@ def test_rerun_validations(test_case, capfd):
     ) as mock_load_system_paasta_config, patch(
         'paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True,
     ) as mock_read_chronos_jobs_for_service, patch(
-        'service_configuration_lib.read_services_configuration', autospec=True,
-    ) as mock_read_services_configuration:
+        'service_configuration_lib.list_services', autospec=True,
+    ) as mock_list_services:
         (
             rerun_args,
             mock_figure_out_service_name.return_value,
@@ -186,7 +186,7 @@ def test_rerun_validations(test_case, capfd):
             'dependent_instance2': {'parents': ['{}.{}'.format(_service_name, 'dependent_instance1')]},
         }
 
-        mock_read_services_configuration.return_value = [_service_name]
+        mock_list_services.return_value = [_service_name]
 
         args = MagicMock()
         args.service = rerun_args[0]
@@ -11,17 +11,22 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import os
 
 import mock
 from mock import patch
 
 import paasta_tools.chronos_tools
+from paasta_tools.cli.cmds.validate import check_all_chronos_parents
 from paasta_tools.cli.cmds.validate import check_service_path
+from paasta_tools.cli.cmds.validate import ChronosJob
 from paasta_tools.cli.cmds.validate import get_schema
 from paasta_tools.cli.cmds.validate import get_service_path
+from paasta_tools.cli.cmds.validate import get_validator
 from paasta_tools.cli.cmds.validate import invalid_chronos_instance
 from paasta_tools.cli.cmds.validate import paasta_validate
+from paasta_tools.cli.cmds.validate import paasta_validate_all_services
 from paasta_tools.cli.cmds.validate import paasta_validate_soa_configs
 from paasta_tools.cli.cmds.validate import SCHEMA_INVALID
 from paasta_tools.cli.cmds.validate import SCHEMA_VALID
@@ -29,6 +34,7 @@ from paasta_tools.cli.cmds.validate import UNKNOWN_SERVICE
 from paasta_tools.cli.cmds.validate import valid_chronos_instance
 from paasta_tools.cli.cmds.validate import validate_chronos
 from paasta_tools.cli.cmds.validate import validate_schema
+from paasta_tools.cli.cmds.validate import validate_service_configs
 
 
 @patch('paasta_tools.cli.cmds.validate.validate_all_schemas', autospec=True)
@@ -51,6 +57,7 @@ def test_paasta_validate_calls_everything(
     args = mock.MagicMock()
     args.service = None
     args.soa_dir = None
+    args.all_services = False
 
     paasta_validate(args)
 
@@ -72,6 +79,7 @@ def test_validate_unknown_service():
     args = mock.MagicMock()
     args.service = None
     args.yelpsoa_config_root = 'unused'
+    args.all_services = False
     paasta_validate(args) == 1
 
 
@@ -131,6 +139,21 @@ def test_get_schema_chronos_found():
     is_schema(schema)
 
 
+def test_get_validator_is_cached():
+    assert get_validator('marathon') is get_validator('marathon')
+    assert get_validator('marathon') is not get_validator('chronos')
+
+
+@patch('paasta_tools.cli.cmds.validate.get_schema', autospec=True)
+def test_get_validator_missing(mock_get_schema):
+    get_validator.cache_clear()
+    mock_get_schema.return_value = None
+    try:
+        assert get_validator('fake') is None
+    finally:
+        get_validator.cache_clear()
+
+
 def test_get_schema_missing():
     assert get_schema('fake_schema') is None
 
@@ -621,3 +644,112 @@ def test_check_service_path_good(
     mock_glob.return_value = True
     service_path = 'fake/path'
     assert check_service_path(service_path)
+
+
+def write_soa_configs(soa_dir, configs):
+    for service, files in configs.items():
+        soa_dir.mkdir(service)
+        for file_name, content in files.items():
+            soa_dir.join(service, file_name).write(content)
+
+
+def test_validate_service_configs(tmpdir):
+    write_soa_configs(tmpdir, {
+        'fake_service': {
+            'service.yaml': 'description: fake\n',
+            'marathon-penguin.yaml': 'main:\n  instances: many\n',
+            'chronos-penguin.yaml': 'job:\n  cmd: /bin/true\n  parents: [fake_service.other]\n',
+            'deploy.yaml': 'pipeline: []\n',
+        },
+    })
+
+    results, chronos_jobs = validate_service_configs(str(tmpdir), 'fake_service')
+
+    assert [(os.path.basename(result.path), result.valid) for result in results] == [
+        ('chronos-penguin.yaml', True),
+        ('marathon-penguin.yaml', False),
+    ]
+    assert results[1].messages == ["'many' is not of type 'integer'"]
+    assert [(job.service, job.cluster, job.instance, job.parents) for job in chronos_jobs] == [
+        ('fake_service', 'penguin', 'job', ['fake_service.other']),
+    ]
+
+
+def test_validate_service_configs_unparseable(tmpdir):
+    write_soa_configs(tmpdir, {'fake_service': {'chronos-penguin.yaml': 'job: [\n'}})
+
+    results, chronos_jobs = validate_service_configs(str(tmpdir), 'fake_service')
+
+    assert len(results) == 1
+    assert not results[0].valid
+    assert results[0].messages[0].startswith('Failed to parse file')
+    assert chronos_jobs == []
+
+
+@patch("paasta_tools.cli.cmds.validate.TMP_JOB_IDENTIFIER", 'tmp', autospec=None)
+def test_validate_service_configs_tmp_job(tmpdir):
+    write_soa_configs(tmpdir, {'tmp_service': {'chronos-penguin.yaml': 'job:\n  cmd: /bin/true\n'}})
+
+    results, chronos_jobs = validate_service_configs(str(tmpdir), 'tmp_service')
+
+    assert not results[-1].valid
+    assert "cannot be named tmp" in results[-1].messages[0]
+    assert chronos_jobs == []
+
+
+def test_check_all_chronos_parents():
+    chronos_jobs = [
+        ChronosJob('a', 'a/chronos-penguin.yaml', 'penguin', 'job', ['b.job'], []),
+        ChronosJob('a', 'a/chronos-penguin.yaml', 'penguin', 'self', ['a.self'], []),
+        ChronosJob('b', 'b/chronos-penguin.yaml', 'penguin', 'job', [], ['something is wrong']),
+        ChronosJob('b', 'b/chronos-walrus.yaml', 'walrus', 'job', ['a.job'], []),
+    ]
+
+    results = check_all_chronos_parents(chronos_jobs)
+
+    assert [(result.cluster, result.instance, result.valid, result.messages) for result in results] == [
+        ('penguin', 'job', True, []),
+        ('penguin', 'self', False, ['Job a.self cannot depend on itself']),
+        ('penguin', 'job', False, ['something is wrong']),
+        ('walrus', 'job', False, ['Parent job a.job could not be found']),
+    ]
+
+
+def test_paasta_validate_all_services(tmpdir, capfd):
+    write_soa_configs(tmpdir, {
+        'good_service': {'marathon-penguin.yaml': 'main:\n  instances: 2\n'},
+        'bad_service': {'marathon-penguin.yaml': 'main:\n  instances: many\n'},
+    })
+
+    assert paasta_validate_all_services(str(tmpdir), workers=2, json_report=False) == 1
+
+    output, _ = capfd.readouterr()
+    assert '%s: %s' % (SCHEMA_INVALID, tmpdir.join('bad_service', 'marathon-penguin.yaml')) in output
+    assert 'good_service' not in output
+    assert 'Validated 2 services' in output
+
+
+def test_paasta_validate_all_services_json(tmpdir, capfd):
+    write_soa_configs(tmpdir, {
+        'good_service': {'marathon-penguin.yaml': 'main:\n  instances: 2\n'},
+    })
+
+    assert paasta_validate_all_services(str(tmpdir), workers=1, json_report=True) == 0
+
+    output, _ = capfd.readouterr()
+    report = json.loads(output)
+    assert report['valid'] is True
+    assert report['services'] == 1
+    assert [(result['service'], result['valid']) for result in report['results']] == [('good_service', True)]
+
+
+@patch('paasta_tools.cli.cmds.validate.paasta_validate_all_services', autospec=True)
+def test_paasta_validate_all_services_option(mock_paasta_validate_all_services):
+    args = mock.MagicMock()
+    args.all_services = True
+    args.yelpsoa_config_root = 'fake_soa_dir'
+    args.workers = 3
+    args.json_report = False
+
+    assert paasta_validate(args) is mock_paasta_validate_all_services.return_value
+    mock_paasta_validate_all_services.assert_called_once_with('fake_soa_dir', 3, False)
@@ -2,6 +2,7 @@ import unittest
 
 import mock
 
+from paasta_tools.deployd import common
 from paasta_tools.deployd.common import BaseServiceInstance
 from paasta_tools.deployd.common import exponential_back_off
 from paasta_tools.deployd.common import get_marathon_clients_from_config
@@ -206,7 +207,9 @@ def test_get_service_instances_needing_update():
         'paasta_tools.deployd.common.get_all_marathon_apps', autospec=True,
     ) as mock_get_marathon_apps, mock.patch(
         'paasta_tools.deployd.common.load_marathon_service_config_no_cache', autospec=True,
-    ) as mock_load_marathon_service_config:
+    ) as mock_load_marathon_service_config, mock.patch(
+        'paasta_tools.deployd.common.load_system_paasta_config', autospec=True,
+    ) as mock_load_system_paasta_config:
         mock_marathon_apps = [
             mock.Mock(id='/universe.c137.c1.g1', instances=2),
             mock.Mock(id='/universe.c138.c1.g1', instances=2),
@@ -243,6 +246,10 @@ def test_get_service_instances_needing_update():
             ),
         ]
         mock_load_marathon_service_config.assert_has_calls(calls)
+        mock_configs[0].format_marathon_app_dict.assert_called_once_with(
+            system_paasta_config=mock_load_system_paasta_config.return_value,
+            desired_app_cache=common.DESIRED_APP_CACHE,
+        )
         assert ret == [('universe', 'c138')]
 
         mock_configs = [
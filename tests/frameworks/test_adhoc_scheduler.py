@@ -154,7 +154,7 @@ class TestAdhocScheduler(object):
             task_name = tasks[0]['name']
             assert len(scheduler.task_store.get_all_tasks()) == 1
             assert len(tasks) == 1
-            assert scheduler.need_more_tasks(task_name, scheduler.task_store.get_all_tasks(), []) is False
+            assert scheduler.live_task_counts[task_name] == 1
             assert scheduler.need_to_stop() is False
 
             no_tasks = scheduler.launch_tasks_for_offers(fake_driver, [make_fake_offer()])
@@ -226,7 +226,7 @@ class TestAdhocScheduler(object):
 
             assert len(scheduler.task_store.get_all_tasks()) == 5
             assert len(tasks) == 5
-            assert scheduler.need_more_tasks(task_name, scheduler.task_store.get_all_tasks(), []) is False
+            assert scheduler.live_task_counts[task_name] == 5
             assert scheduler.need_to_stop() is False
 
             no_tasks = scheduler.launch_tasks_for_offers(fake_driver, [make_fake_offer()])
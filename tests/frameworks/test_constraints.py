@@ -39,3 +39,27 @@ def test_update_constraint_state_increments_counters():
     state: constraints.ConstraintState = {}
     constraints.update_constraint_state(offer, cons, state)
     assert state['MAX_PER']['pool']['test'] == 1
+
+
+def test_updated_constraint_state_does_not_change_state():
+    attr = Mock(text=Mock(value='test'))
+    attr.configure_mock(name='pool')
+    offer = Mock(attributes=[attr])
+    cons = [['pool', 'MAX_PER', '5'], ['pool', 'EQUALS', 'test']]
+    state = {'MAX_PER': {'pool': {'test': 1, 'other': 2}, 'region': {'fake': 3}}}
+    new_state = constraints.updated_constraint_state(offer, cons, state)
+    assert new_state == {'MAX_PER': {'pool': {'test': 2, 'other': 2}, 'region': {'fake': 3}}}
+    assert state == {'MAX_PER': {'pool': {'test': 1, 'other': 2}, 'region': {'fake': 3}}}
+    # What didn't change is shared rather than copied
+    assert new_state['MAX_PER']['region'] is state['MAX_PER']['region']
+
+
+def test_check_offer_constraints_compiles_patterns_once():
+    attr = Mock(text=Mock(value='test'))
+    attr.configure_mock(name='pool')
+    offer = Mock(attributes=[attr])
+    cons = [['pool', 'LIKE', 'te.*compiled once$|test']]
+    constraints.compile_pattern.cache_clear()
+    for _ in range(3):
+        assert constraints.check_offer_constraints(offer, cons, {}) is True
+    assert constraints.compile_pattern.cache_info().misses == 1
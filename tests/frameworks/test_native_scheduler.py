@@ -1,3 +1,6 @@
+import sys
+import threading
+
 import mock
 import pytest
 from addict import Dict
@@ -6,6 +9,7 @@ from paasta_tools import utils
 from paasta_tools.frameworks import native_scheduler
 from paasta_tools.frameworks.native_scheduler import TASK_KILLED
 from paasta_tools.frameworks.native_scheduler import TASK_RUNNING
+from paasta_tools.frameworks.native_scheduler import TASK_STAGING
 from paasta_tools.frameworks.native_service_config import NativeServiceConfig
 from paasta_tools.frameworks.task_store import DictTaskStore
 
@@ -230,6 +234,164 @@ class TestNativeScheduler(object):
             'type': 'RANGES',
         } in tasks[0]['resources']
 
+    @mock.patch('paasta_tools.frameworks.native_scheduler._log', autospec=True)
+    def test_tasks_for_offer_uses_live_task_counts(self, mock_log, system_paasta_config):
+        service_config = NativeServiceConfig(
+            service="service_name",
+            instance="instance_name",
+            cluster="cluster",
+            config_dict={
+                "cpus": 0.1,
+                "mem": 50,
+                "instances": 5,
+                "cmd": 'sleep 50',
+                "drain_method": "test",
+                "constraints": [["pool", "MAX_PER", "10"]],
+            },
+            branch_dict={
+                'docker_image': 'busybox',
+                'desired_state': 'start',
+                'force_bounce': '0',
+            },
+            soa_dir='/nail/etc/services',
+        )
+        scheduler = native_scheduler.NativeScheduler(
+            service_name="service_name",
+            instance_name="instance_name",
+            cluster="cluster",
+            system_paasta_config=system_paasta_config,
+            service_config=service_config,
+            reconcile_start_time=0,
+            staging_timeout=1,
+            task_store_type=DictTaskStore,
+        )
+        scheduler.registered(
+            driver=mock.Mock(),
+            frameworkId={'value': 'foo'},
+            masterInfo=mock.Mock(),
+        )
+        state = {'MAX_PER': {'pool': {'default': 1}}}
+
+        with mock.patch(
+            'paasta_tools.utils.load_system_paasta_config', autospec=True,
+            return_value=system_paasta_config,
+        ), mock.patch.object(
+            scheduler.task_store, 'get_all_tasks', wraps=scheduler.task_store.get_all_tasks,
+        ) as mock_get_all_tasks:
+            scheduler.task_store.add_task_if_doesnt_exist(
+                '%s.existing' % service_config.base_task(system_paasta_config)['name'],
+                mesos_task_state=TASK_RUNNING,
+            )
+            scheduler.count_live_tasks()
+            tasks, new_state = scheduler.tasks_and_state_for_offer(
+                mock.Mock(), make_fake_offer(port_begin=12345, port_end=12348), state,
+            )
+
+        assert len(tasks) == 4
+        # only count_live_tasks read every task; the offer used the live task counts
+        assert mock_get_all_tasks.call_count == 1
+        assert sorted(task['container']['docker']['port_mappings'][0]['host_port'] for task in tasks) == [
+            12345, 12346, 12347, 12348,
+        ]
+        assert new_state == {'MAX_PER': {'pool': {'default': 5}}}
+        assert state == {'MAX_PER': {'pool': {'default': 1}}}
+
+    @mock.patch('paasta_tools.frameworks.native_scheduler._log', autospec=True)
+    def test_track_task_state(self, mock_log, system_paasta_config):
+        scheduler = native_scheduler.NativeScheduler(
+            service_name="service_name",
+            instance_name="instance_name",
+            cluster="cluster",
+            system_paasta_config=system_paasta_config,
+            service_config=NativeServiceConfig(
+                service="service_name",
+                instance="instance_name",
+                cluster="cluster",
+                config_dict={"cpus": 0.1, "mem": 50, "instances": 3, "cmd": 'sleep 50', "drain_method": "test"},
+                branch_dict={'docker_image': 'busybox', 'desired_state': 'start', 'force_bounce': '0'},
+                soa_dir='/nail/etc/services',
+            ),
+            staging_timeout=1,
+            task_store_type=DictTaskStore,
+        )
+        fake_driver = mock.Mock()
+        scheduler.registered(
+            driver=fake_driver,
+            frameworkId={'value': 'foo'},
+            masterInfo=mock.Mock(),
+        )
+        for task_id in ('old.1', 'new.1', 'new.2'):
+            scheduler.task_store.add_task_if_doesnt_exist(task_id, mesos_task_state=TASK_RUNNING)
+            scheduler.track_task_state(task_id, TASK_RUNNING)
+        assert scheduler.live_task_counts == {'old': 1, 'new': 2}
+
+        with mock.patch(
+            'paasta_tools.utils.load_system_paasta_config', autospec=True,
+            return_value=system_paasta_config,
+        ):
+            scheduler.statusUpdate(fake_driver, dict(task_id={'value': 'new.1'}, state=TASK_RUNNING))
+            assert scheduler.live_task_counts == {'old': 1, 'new': 2}
+            scheduler.statusUpdate(fake_driver, dict(task_id={'value': 'new.1'}, state=TASK_KILLED))
+            assert scheduler.live_task_counts == {'old': 1, 'new': 1}
+        scheduler.kill_task(fake_driver, 'old.1')
+        assert scheduler.live_task_counts == {'old': 0, 'new': 1}
+
+        scheduler.count_live_tasks()
+        assert scheduler.live_task_counts == {'new': 1}
+
+    def test_track_task_state_from_several_threads(self, system_paasta_config):
+        scheduler = native_scheduler.NativeScheduler(
+            service_name="service_name",
+            instance_name="instance_name",
+            cluster="cluster",
+            system_paasta_config=system_paasta_config,
+            service_config=NativeServiceConfig(
+                service="service_name",
+                instance="instance_name",
+                cluster="cluster",
+                config_dict={"cpus": 0.1, "mem": 50, "instances": 3, "cmd": 'sleep 50', "drain_method": "test"},
+                branch_dict={'docker_image': 'busybox', 'desired_state': 'start', 'force_bounce': '0'},
+                soa_dir='/nail/etc/services',
+            ),
+            staging_timeout=1,
+            task_store_type=DictTaskStore,
+        )
+
+        def launch_and_kill(thread_number):
+            for task_number in range(1000):
+                task_id = 'version.%d-%d' % (thread_number, task_number)
+                scheduler.track_task_state(task_id, TASK_STAGING)
+                scheduler.track_task_state(task_id, TASK_RUNNING)
+                scheduler.track_task_state(task_id, TASK_KILLED)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=launch_and_kill, args=(number,)) for number in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert scheduler.live_task_counts == {'version': 0}
+        assert scheduler.live_task_versions == {}
+
+    def test_take_random_port(self):
+        port_ranges = [[31000, 31001], [31005, 31005]]
+        with mock.patch(
+            'paasta_tools.frameworks.native_scheduler.random.randrange', autospec=True, return_value=1,
+        ):
+            assert native_scheduler.take_random_port(port_ranges) == 31001
+        assert port_ranges == [[31000, 31000], [31005, 31005]]
+
+        taken = {native_scheduler.take_random_port(port_ranges) for _ in range(2)}
+        assert taken == {31000, 31005}
+        assert port_ranges == []
+        with pytest.raises(ValueError):
+            native_scheduler.take_random_port(port_ranges)
+
     def test_offer_matches_pool(self):
         service_name = "service_name"
         instance_name = "instance_name"
@@ -1,9 +1,12 @@
 from mock import MagicMock
 from mock import Mock
+from mock import patch
 from pytest import raises
 
 from paasta_tools.mesos import cluster
 from paasta_tools.mesos import exceptions
+from paasta_tools.mesos.slave import MesosSlave
+from paasta_tools.mesos.task import Task
 
 
 def test_get_files_for_tasks_no_files():
@@ -38,3 +41,59 @@ def test_get_files_for_tasks_some():
     files = cluster.get_files_for_tasks([mock_task], ['myfile', 'myotherfile'], 1)
     files = list(files)
     assert files == [mock_file_2]
+
+
+def test_get_stats_for_tasks():
+    slaves = {
+        'slave%d' % number: MesosSlave(
+            {'scheme': 'http', 'response_timeout': 5},
+            {'pid': 'slave(1)@10.0.0.%d:5051' % number, 'hostname': 'host%d' % number},
+        )
+        for number in (1, 2, 3)
+    }
+    statistics = {
+        'host1': [
+            {'executor_id': 'task1', 'statistics': {'cpus_limit': 1.1}},
+            {'executor_id': 'other_task', 'statistics': {'cpus_limit': 2.1}},
+            {'executor_id': 'task2', 'statistics': {'cpus_limit': 3.1}},
+        ],
+        'host2': [
+            {'executor_id': 'task3', 'statistics': {'cpus_limit': 4.1}},
+        ],
+    }
+
+    def fake_slave(slave_id):
+        if slave_id == 'gone_slave':
+            raise exceptions.SlaveDoesNotExist
+        return slaves[slave_id]
+
+    def fake_fetch(slave, url):
+        if slave['hostname'] == 'host3':
+            raise exceptions.SlaveDoesNotExist
+        return Mock(json=Mock(return_value=statistics[slave['hostname']]))
+
+    mock_master = Mock(slave=Mock(side_effect=fake_slave))
+    tasks = [
+        Task(mock_master, {'id': task_id, 'slave_id': slave_id})
+        for task_id, slave_id in (
+            ('task1', 'slave1'),
+            ('task2', 'slave1'),
+            ('task3', 'slave2'),
+            ('staging_task', 'slave2'),
+            ('unreachable_task', 'slave3'),
+            ('orphan_task', 'gone_slave'),
+        )
+    ]
+    with patch.object(MesosSlave, 'fetch', autospec=True, side_effect=fake_fetch) as mock_fetch:
+        assert cluster.get_stats_for_tasks(tasks, 2) == {
+            'task1': {'cpus_limit': 1.1},
+            'task2': {'cpus_limit': 3.1},
+            'task3': {'cpus_limit': 4.1},
+            'staging_task': {},
+        }
+        assert mock_fetch.call_count == 3
+
+        # task.stats reads the statistics that were just fetched
+        assert tasks[1].stats == {'cpus_limit': 3.1}
+        assert tasks[1].cpu_limit == 3.1
+        assert mock_fetch.call_count == 3
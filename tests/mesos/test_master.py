@@ -1,3 +1,7 @@
+import json
+import os
+import time
+
 from mock import call
 from mock import Mock
 from mock import patch
@@ -116,3 +120,63 @@ def test_orphan_tasks():
     mock_task_1 = Mock()
     mesos_master.state = {'orphan_tasks': [mock_task_1]}
     assert mesos_master.orphan_tasks() == [mock_task_1]
+
+
+def write_snapshot(tmpdir, state, age):
+    snapshot = tmpdir.join('mesos_master_state.json')
+    snapshot.write(json.dumps(state))
+    mtime = time.time() - age
+    os.utime(str(snapshot), (mtime, mtime))
+    return str(snapshot)
+
+
+def snapshot_config(path, use_mesos_cache=True):
+    return {
+        'use_mesos_cache': use_mesos_cache,
+        'state_snapshot_path': path,
+        'state_snapshot_max_age': 60,
+    }
+
+
+@patch.object(master.MesosMaster, 'fetch', autospec=True)
+def test_state_reads_fresh_snapshot(mock_fetch, tmpdir):
+    state = {
+        'slaves': [],
+        'frameworks': [{'id': 'marathon'}],
+        'completed_frameworks': [{'id': 'chronos'}],
+    }
+    mesos_master = master.MesosMaster(snapshot_config(write_snapshot(tmpdir, state, age=30)))
+
+    assert mesos_master.state == state
+    assert mesos_master._frameworks == {
+        'frameworks': [{'id': 'marathon'}],
+        'completed_frameworks': [{'id': 'chronos'}],
+    }
+    assert not mock_fetch.called
+
+
+@patch.object(master.MesosMaster, 'fetch', autospec=True)
+def test_state_ignores_stale_snapshot(mock_fetch, tmpdir):
+    mock_fetch.return_value.json.return_value = {'slaves': ['fresh']}
+    mesos_master = master.MesosMaster(snapshot_config(write_snapshot(tmpdir, {'slaves': []}, age=90)))
+
+    assert mesos_master.state == {'slaves': ['fresh']}
+    mock_fetch.assert_called_once_with(mesos_master, "/master/state.json", cached=True)
+
+
+@patch.object(master.MesosMaster, 'fetch', autospec=True)
+def test_state_ignores_snapshot_without_use_mesos_cache(mock_fetch, tmpdir):
+    mock_fetch.return_value.json.return_value = {'slaves': ['fresh']}
+    path = write_snapshot(tmpdir, {'slaves': []}, age=0)
+    mesos_master = master.MesosMaster(snapshot_config(path, use_mesos_cache=False))
+
+    assert mesos_master.state == {'slaves': ['fresh']}
+
+
+@patch.object(master.MesosMaster, 'fetch', autospec=True)
+def test_state_without_snapshot(mock_fetch, tmpdir):
+    mock_fetch.return_value.json.return_value = {'slaves': ['fresh']}
+    mesos_master = master.MesosMaster(snapshot_config(str(tmpdir.join('missing.json'))))
+
+    assert mesos_master.state_snapshot is None
+    assert mesos_master.state == {'slaves': ['fresh']}
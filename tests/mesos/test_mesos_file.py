@@ -0,0 +1,45 @@
+from mock import Mock
+
+from paasta_tools.mesos.mesos_file import File
+
+
+def make_file(contents, tail_length=64 * 1024):
+    def fake_fetch(url, params):
+        if params['offset'] == -1:
+            return Mock(status_code=200, json=Mock(return_value={'offset': len(contents), 'data': ''}))
+        data = contents[params['offset']:params['offset'] + params['length']]
+        return Mock(status_code=200, json=Mock(return_value={'offset': params['offset'], 'data': data}))
+
+    mock_host = Mock(fetch=Mock(side_effect=fake_fetch))
+    fobj = File(mock_host, path='/fake/stdout')
+    fobj.tail_length = tail_length
+    return fobj
+
+
+def test_tail():
+    fobj = make_file('one\ntwo\nthree\n')
+    assert fobj.tail(2) == ['two', 'three']
+    assert fobj.tail(10) == ['one', 'two', 'three']
+    assert fobj.tail(0) == []
+    # The size is only fetched once, and the lines with a single read
+    assert fobj.host.fetch.call_count == 3
+
+
+def test_tail_without_terminator():
+    assert make_file('one\ntwo').tail(1) == ['two']
+
+
+def test_tail_of_empty_file():
+    fobj = make_file('')
+    assert fobj.tail(10) == []
+    assert fobj.host.fetch.call_count == 1
+
+
+def test_tail_skips_partial_first_line():
+    fobj = make_file('a long first line\nsecond\nthird\n', tail_length=16)
+    assert fobj.tail(10) == ['second', 'third']
+    assert reversed_lines(make_file('a long first line\nsecond\nthird\n'), 2) == fobj.tail(2)
+
+
+def reversed_lines(fobj, nlines):
+    return list(reversed([line for _, line in zip(range(nlines), reversed(fobj))]))
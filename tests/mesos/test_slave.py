@@ -0,0 +1,71 @@
+from mock import Mock
+from mock import patch
+from pytest import raises
+
+from paasta_tools.mesos import exceptions
+from paasta_tools.mesos.slave import MesosSlave
+from paasta_tools.mesos.slave import SlaveStateIndex
+
+
+def make_state(task_id):
+    return {
+        'frameworks': [
+            {
+                'id': 'marathon',
+                'executors': [
+                    {'id': 'executor1', 'tasks': [{'id': task_id}], 'completed_tasks': []},
+                ],
+                'completed_executors': [
+                    {'id': 'executor0', 'completed_tasks': [{'id': 'old_task'}, {'id': task_id}]},
+                ],
+            },
+        ],
+        'completed_frameworks': [
+            {
+                'id': 'chronos',
+                'executors': [],
+                'completed_executors': [{'id': 'executor2', 'queued_tasks': [{'id': 'job'}]}],
+            },
+        ],
+    }
+
+
+def test_slave_state_index():
+    state = make_state('task1')
+    index = SlaveStateIndex(state)
+    assert 'task1' in index
+    assert 'unknown' not in index
+    assert index.task_executor('task1')['id'] == 'executor1'
+    assert index.task_executor('old_task')['id'] == 'executor0'
+    assert index.task_executor('job')['id'] == 'executor2'
+    assert index.task_framework('job')['id'] == 'chronos'
+    assert index.task_framework('task1')['id'] == 'marathon'
+    with raises(exceptions.MissingExecutor):
+        index.task_executor('unknown')
+    with raises(exceptions.MissingExecutor):
+        index.task_framework('unknown')
+
+
+def test_slave_state_index_with_missing_keys():
+    index = SlaveStateIndex({'frameworks': [{'executors': [{'id': 'executor1', 'tasks': [{'id': 'task1'}]}]}]})
+    assert index.task_executor('task1')['id'] == 'executor1'
+    assert 'task2' not in SlaveStateIndex({})
+
+
+def test_mesos_slave_state_index_follows_state():
+    slave = MesosSlave({'scheme': 'http', 'response_timeout': 5}, {'pid': 'slave(1)@10.0.0.1:5051'})
+    with patch.object(MesosSlave, 'fetch', autospec=True) as mock_fetch:
+        mock_fetch.return_value = Mock(json=Mock(return_value=make_state('task1')))
+        index = slave.state_index
+        assert slave.task_executor('task1')['id'] == 'executor1'
+        assert slave.task_framework('task1')['id'] == 'marathon'
+        assert slave.state_index is index
+        assert mock_fetch.call_count == 1
+
+        # A refetched state gets a new index
+        mock_fetch.return_value = Mock(json=Mock(return_value=make_state('task2')))
+        with patch('paasta_tools.mesos.util.time.time', autospec=True, return_value=float('inf')):
+            assert slave.task_executor('task2')['id'] == 'executor1'
+        assert slave.state_index is not index
+        with raises(exceptions.MissingExecutor):
+            slave.state_index.task_executor('task1')
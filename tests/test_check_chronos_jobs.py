@@ -194,19 +194,16 @@ def test_sensu_event_for_last_run_state_invalid():
         check_chronos_jobs.sensu_event_for_last_run_state(100)
 
 
-@patch('paasta_tools.check_chronos_jobs.chronos_tools.filter_chronos_jobs', autospec=True)
-def test_respect_latest_run_after_rerun(mock_filter_chronos_jobs):
+def test_respect_latest_run_after_rerun():
     fake_job = {
-        'name': 'service1 test-job',
+        'name': 'service1 chronos_job',
         'lastSuccess': '2016-07-26T22:00:00+00:00',
         'lastError': '2016-07-26T22:01:00+00:00',
     }
-    mock_filter_chronos_jobs.side_effect = [[
-        fake_job,
-    ]]
 
     fake_configured_jobs = [('service1', 'chronos_job')]
     fake_client = Mock()
+    fake_client.list.return_value = [fake_job]
 
     assert check_chronos_jobs.build_service_job_mapping(fake_client, fake_configured_jobs) == {
         ('service1', 'chronos_job'): fake_job,
@@ -215,70 +212,72 @@ def test_respect_latest_run_after_rerun(mock_filter_chronos_jobs):
 
     # simulate a re-run where we now pass
     reran_job = {
-        'name': 'service1 test-job',
+        'name': 'service1 chronos_job',
         'lastSuccess': '2016-07-26T22:12:00+00:00',
     }
     reran_job = chronos_rerun.set_tmp_naming_scheme(reran_job)
-    mock_filter_chronos_jobs.side_effect = [[
-        fake_job,
-        reran_job,
-    ]]
     fake_client = Mock()
+    fake_client.list.return_value = [fake_job, reran_job]
     assert check_chronos_jobs.build_service_job_mapping(fake_client, fake_configured_jobs) == {
         ('service1', 'chronos_job'): reran_job,
     }
     fake_client.list.assert_called_once_with()
 
 
-@patch('paasta_tools.check_chronos_jobs.chronos_tools.filter_chronos_jobs', autospec=True)
-@patch('paasta_tools.check_chronos_jobs.chronos_tools.filter_enabled_jobs', autospec=True)
-def test_build_service_job_mapping(mock_filter_enabled_jobs, mock_filter_chronos_jobs):
+def test_build_service_job_mapping():
     services = ['service1', 'service2', 'service3']
     latest_time = '2016-07-26T22:03:00+00:00'
     fake_jobs = [
-        [
+        job for service in services for job in [
             {
-                'name': service + ' foo',
+                'name': service + ' main',
                 'lastSuccess': '2016-07-26T22:02:00+00:00',
             },
             {
-                'name': service + ' foo',
+                'name': service + ' main',
                 'lastError': latest_time,
+                'disabled': True,
             },
             {
-                'name': service + ' foo',
+                'name': service + ' main',
             },
-        ] for service in services
+        ]
     ]
-    fake_jobs.append([
+    fake_jobs += [
         {
-            'name': 'tmp-2017-06-13T123738942755 service4 foo',
+            'name': 'tmp-2017-06-13T123738942755 service4 main',
             'lastError': latest_time,
         },
         {
-            'name': 'service4 foo',
+            'name': 'service4 main',
             'lastSuccess': '2016-07-26T22:02:00+00:00',
         },
         {
-            'name': 'service4 foo',
+            'name': 'service4 other',
+            'lastSuccess': '2016-07-26T22:04:00+00:00',
+        },
+        {
+            'name': 'not a valid job name',
+            'lastSuccess': '2016-07-26T22:04:00+00:00',
         },
-    ])
-    mock_filter_chronos_jobs.side_effect = fake_jobs
-    mock_filter_enabled_jobs.side_effect = [[{}, {}, {}] for _ in range(0, 4)]
+    ]
 
     fake_configured_jobs = [
         ('service1', 'main'),
         ('service2', 'main'),
         ('service3', 'main'),
         ('service4', 'main'),
+        ('service5', 'main'),
     ]
     fake_client = Mock()
+    fake_client.list.return_value = fake_jobs
 
     expected = {
-        ('service1', 'main'): {'name': 'service1 foo', 'lastError': latest_time},
-        ('service2', 'main'): {'name': 'service2 foo', 'lastError': latest_time},
-        ('service3', 'main'): {'name': 'service3 foo', 'lastError': latest_time},
-        ('service4', 'main'): {'name': 'tmp-2017-06-13T123738942755 service4 foo', 'lastError': latest_time},
+        ('service1', 'main'): {'name': 'service1 main', 'lastError': latest_time, 'disabled': True},
+        ('service2', 'main'): {'name': 'service2 main', 'lastError': latest_time, 'disabled': True},
+        ('service3', 'main'): {'name': 'service3 main', 'lastError': latest_time, 'disabled': True},
+        ('service4', 'main'): {'name': 'tmp-2017-06-13T123738942755 service4 main', 'lastError': latest_time},
+        ('service5', 'main'): None,
     }
     assert check_chronos_jobs.build_service_job_mapping(fake_client, fake_configured_jobs) == expected
     fake_client.list.assert_called_once_with()
@@ -516,3 +515,72 @@ def test_message_for_stuck_job_timezone_is_none():
     ).format(fake_schedule) in output
     assert "paasta logs -s myservice -i myinstance -c mycluster" in output
     assert "and is configured to run every 24h." in output
+
+
+def test_job_needs_stats(mock_chronos_job_config):
+    overdue = (datetime.now(pytz.utc) - timedelta(hours=25)).isoformat()
+    on_time = (datetime.now(pytz.utc) - timedelta(hours=1)).isoformat()
+
+    assert check_chronos_jobs.job_needs_stats(
+        mock_chronos_job_config, {'name': 'myservice myinstance', 'lastSuccess': overdue},
+    )
+    assert not check_chronos_jobs.job_needs_stats(
+        mock_chronos_job_config, {'name': 'myservice myinstance', 'lastSuccess': on_time},
+    )
+    assert not check_chronos_jobs.job_needs_stats(
+        mock_chronos_job_config, {'name': 'myservice myinstance', 'lastSuccess': overdue, 'disabled': True},
+    )
+    assert not check_chronos_jobs.job_needs_stats(mock_chronos_job_config, {'name': 'myservice myinstance'})
+    assert not check_chronos_jobs.job_needs_stats(mock_chronos_job_config, None)
+
+
+def test_prefetched_job_stats(mock_chronos_client):
+    mock_chronos_client.job_stat.side_effect = lambda name: {'name': name}
+    job_stats = check_chronos_jobs.PrefetchedJobStats(mock_chronos_client, ['job1', 'job2'], workers=2)
+    assert mock_chronos_client.job_stat.call_count == 2
+
+    assert job_stats.job_stat('job1') == {'name': 'job1'}
+    assert job_stats.job_stat('job2') == {'name': 'job2'}
+    assert mock_chronos_client.job_stat.call_count == 2
+
+    assert job_stats.job_stat('job3') == {'name': 'job3'}
+    assert mock_chronos_client.job_stat.call_count == 3
+
+
+def test_check_chronos_jobs_only_fetches_stats_of_late_jobs(mock_chronos_job_config, mock_chronos_client):
+    mock_chronos_job_config.get_disabled.return_value = False
+    checks = [
+        (mock_chronos_job_config, {
+            'name': 'myservice late',
+            'lastSuccess': (datetime.now(pytz.utc) - timedelta(hours=25)).isoformat(),
+        }),
+        (mock_chronos_job_config, {
+            'name': 'myservice on_time',
+            'lastSuccess': (datetime.now(pytz.utc) - timedelta(hours=1)).isoformat(),
+        }),
+        (mock_chronos_job_config, None),
+    ]
+    mock_chronos_client.job_stat.return_value = {"histogram": {"99thPercentile": 60 * 30}}
+
+    results = check_chronos_jobs.check_chronos_jobs(mock_chronos_client, checks, workers=2)
+
+    mock_chronos_client.job_stat.assert_called_once_with('myservice late')
+    assert [status for _, _, status in results] == [
+        pysensu_yelp.Status.CRITICAL,
+        pysensu_yelp.Status.OK,
+        pysensu_yelp.Status.WARNING,
+    ]
+    assert all(config is mock_chronos_job_config for config, _, _ in results)
+
+
+@patch('paasta_tools.check_chronos_jobs.send_event', autospec=True)
+def test_send_events(mock_send_event):
+    config1, config2 = Mock(), Mock()
+    check_chronos_jobs.send_events(
+        [
+            (config1, 'output1', pysensu_yelp.Status.OK),
+            (config2, 'output2', None),
+        ],
+        workers=2,
+    )
+    mock_send_event.assert_called_once_with(config1, pysensu_yelp.Status.OK, 'output1')
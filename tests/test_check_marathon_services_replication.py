@@ -830,7 +830,7 @@ def test_main():
     ) as mock_get_marathon_client, mock.patch(
         'paasta_tools.check_marathon_services_replication.get_slaves',
         autospec=True,
-    ):
+    ) as mock_get_slaves:
         mock_client = mock.Mock()
         mock_client.list_tasks.return_value = []
         mock_get_marathon_client.return_value = mock_client
@@ -842,3 +842,4 @@ def test_main():
         mock_get_services_for_cluster.assert_called_once_with(
             cluster='fake_cluster', instance_type='marathon', soa_dir=soa_dir,
         )
+        mock_get_slaves.assert_called_once_with(use_mesos_cache=True)
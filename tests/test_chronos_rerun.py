@@ -129,7 +129,7 @@ def test_clone_job_dependent_jobs(
 @mock.patch('paasta_tools.chronos_rerun.remove_parents', autospec=True)
 @mock.patch('paasta_tools.chronos_tools.create_complete_config', autospec=True)
 @mock.patch('paasta_tools.chronos_tools.load_deployments_json', autospec=True)
-@mock.patch('service_configuration_lib.read_services_configuration', autospec=True)
+@mock.patch('service_configuration_lib.list_services', autospec=True)
 @mock.patch('paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True)
 @mock.patch('paasta_tools.chronos_tools.get_chronos_client', autospec=True)
 @mock.patch('paasta_tools.chronos_tools.load_chronos_config', autospec=True)
@@ -139,7 +139,7 @@ def test_chronos_rerun_main_with_independent_job(
     mock_load_chronos_config,
     mock_get_chronos_client,
     mock_read_chronos_jobs_for_service,
-    mock_read_services_configuration,
+    mock_list_services,
     mock_load_deployments_json,
     mock_create_complete_config,
     mock_remove_parents,
@@ -168,7 +168,7 @@ def test_chronos_rerun_main_with_independent_job(
     def gen_dependent_job(service, instance):
         return dict(parents='{}.{}'.format(service, instance), **generic_config_dict)
 
-    mock_read_services_configuration.return_value = [service]
+    mock_list_services.return_value = [service]
     mock_read_chronos_jobs_for_service.return_value = {
         'test_independent_instance_1': gen_scheduled_job(),
         'test_dependent_instance_1': gen_scheduled_job(),
@@ -19,7 +19,6 @@ from mock import Mock
 from pytest import raises
 
 from paasta_tools import chronos_tools
-from paasta_tools.chronos_tools import _get_related_jobs_and_configs
 from paasta_tools.chronos_tools import ChronosJobConfig
 from paasta_tools.chronos_tools import get_related_jobs_configs
 from paasta_tools.utils import NoConfigurationForServiceError
@@ -1969,16 +1968,19 @@ class TestChronosTools:
         mock_get_local_slave_state.assert_called_once_with(hostname=None)
         assert expected == actual
 
-    @mock.patch('service_configuration_lib.read_services_configuration', autospec=True)
+    @mock.patch('service_configuration_lib.list_services', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.load_deployments_json', autospec=True)
-    def test__get_related_jobs_and_configs_only_independent_jobs(
-        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_read_services_configuration,
+    def test_chronos_job_graph_only_independent_jobs(
+        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_list_services,
     ):
         mock_load_deployments_json.return_value.get_branch_dict.return_value = self.fake_branch_dict
         mock_read_chronos_jobs_for_service.return_value = self.fake_config_file
-        mock_read_services_configuration.return_value = [self.fake_service]
-        jobs, configs = _get_related_jobs_and_configs(cluster=self.fake_cluster, ttl=-1)  # ttl=-1 to disable cache
+        mock_list_services.return_value = [self.fake_service]
+        graph = chronos_tools.ChronosJobGraph(cluster=self.fake_cluster)
+        graph.update()
+        configs = graph.configs
+        jobs = {job: graph.get_related_jobs(job) for job in configs}
 
         expected_jobs = {
             (self.fake_service, self.fake_job_name): {(self.fake_service, self.fake_job_name)},
@@ -2002,20 +2004,23 @@ class TestChronosTools:
         assert jobs == expected_jobs
         assert configs == expected_configs
 
-    @mock.patch('service_configuration_lib.read_services_configuration', autospec=True)
+    @mock.patch('service_configuration_lib.list_services', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.load_deployments_json', autospec=True)
-    def test__get_related_jobs_and_configs_with_dependent_jobs(
-        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_read_services_configuration,
+    def test_chronos_job_graph_with_dependent_jobs(
+        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_list_services,
     ):
         mock_load_deployments_json.return_value.get_branch_dict.return_value = self.fake_branch_dict
         mock_read_chronos_jobs_for_service.return_value = {
             self.fake_job_name: self.fake_config_dict,
             self.fake_dependent_job_name: self.fake_dependent_job_config_dict,
         }
-        mock_read_services_configuration.return_value = [self.fake_service]
+        mock_list_services.return_value = [self.fake_service]
 
-        jobs, configs = _get_related_jobs_and_configs(cluster=self.fake_cluster, ttl=-1)  # ttl=-1 to disable cache
+        graph = chronos_tools.ChronosJobGraph(cluster=self.fake_cluster)
+        graph.update()
+        configs = graph.configs
+        jobs = {job: graph.get_related_jobs(job) for job in configs}
 
         related_jobs = {(self.fake_service, self.fake_job_name), (self.fake_service, self.fake_dependent_job_name)}
         expected_jobs = {
@@ -2041,15 +2046,15 @@ class TestChronosTools:
         assert jobs == expected_jobs
         assert configs == expected_configs
 
-    @mock.patch('service_configuration_lib.read_services_configuration', autospec=True)
+    @mock.patch('service_configuration_lib.list_services', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.load_deployments_json', autospec=True)
     def test_get_related_jobs_configs_only_independent_jobs(
-        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_read_services_configuration,
+        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_list_services,
     ):
         mock_load_deployments_json.return_value.get_branch_dict.return_value = self.fake_branch_dict
         mock_read_chronos_jobs_for_service.return_value = self.fake_config_file
-        mock_read_services_configuration.return_value = [self.fake_service]
+        mock_list_services.return_value = [self.fake_service]
         related_jobs_configs = get_related_jobs_configs(
             cluster=self.fake_cluster, service=self.fake_service, instance=self.fake_job_name, use_cache=False,
         )
@@ -2065,18 +2070,18 @@ class TestChronosTools:
 
         assert related_jobs_configs == expected_related_jobs_configs
 
-    @mock.patch('service_configuration_lib.read_services_configuration', autospec=True)
+    @mock.patch('service_configuration_lib.list_services', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True)
     @mock.patch('paasta_tools.chronos_tools.load_deployments_json', autospec=True)
     def test_get_related_jobs_configs_with_dependent_jobs(
-        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_read_services_configuration,
+        self, mock_load_deployments_json, mock_read_chronos_jobs_for_service, mock_list_services,
     ):
         mock_load_deployments_json.return_value.get_branch_dict.return_value = self.fake_branch_dict
         mock_read_chronos_jobs_for_service.return_value = {
             self.fake_job_name: self.fake_config_dict,
             self.fake_dependent_job_name: self.fake_dependent_job_config_dict,
         }
-        mock_read_services_configuration.return_value = [self.fake_service]
+        mock_list_services.return_value = [self.fake_service]
         related_jobs_configs = get_related_jobs_configs(
             cluster=self.fake_cluster, service=self.fake_service, instance=self.fake_job_name, use_cache=False,
         )
@@ -2098,3 +2103,113 @@ class TestChronosTools:
         )
 
         assert related_jobs_configs == expected_related_jobs_configs
+
+
+class TestChronosJobGraph:
+
+    def make_jobs(self, jobs):
+        """Mocks out reading the soa_dir for the given {service: {instance: parents}}"""
+        def fake_load_chronos_job_config(service, instance, cluster, soa_dir):
+            return ChronosJobConfig(
+                service=service,
+                cluster=cluster,
+                instance=instance,
+                config_dict={'parents': jobs[service][instance]},
+                branch_dict={},
+            )
+        return mock.patch(
+            'service_configuration_lib.list_services', autospec=True,
+            side_effect=lambda soa_dir: list(jobs),
+        ), mock.patch(
+            'paasta_tools.chronos_tools.read_chronos_jobs_for_service', autospec=True,
+            side_effect=lambda service, cluster, soa_dir, ttl: jobs[service],
+        ), mock.patch(
+            'paasta_tools.chronos_tools.load_chronos_job_config', autospec=True,
+            side_effect=fake_load_chronos_job_config,
+        )
+
+    def test_update_only_reloads_changed_services(self):
+        jobs = {
+            'a': {'main': None},
+            'b': {'main': ['a.main'], 'other': None},
+        }
+        mtimes = {'a': 1, 'b': 1}
+        list_services_patch, read_jobs_patch, load_config_patch = self.make_jobs(jobs)
+        with list_services_patch, read_jobs_patch as mock_read_jobs, load_config_patch, mock.patch(
+            'paasta_tools.chronos_tools.get_service_config_mtime', autospec=True,
+            side_effect=lambda service, soa_dir: mtimes[service],
+        ):
+            graph = chronos_tools.ChronosJobGraph(cluster='fake_cluster', soa_dir='/fake/soa/dir', update_interval=0)
+            graph.update()
+            assert graph.get_related_jobs(('a', 'main')) == {('a', 'main'), ('b', 'main')}
+            assert graph.get_related_jobs(('b', 'other')) == {('b', 'other')}
+
+            mock_read_jobs.reset_mock()
+            graph.update()
+            assert not mock_read_jobs.called
+
+            jobs['b'] = {'main': None, 'other': ['a.main']}
+            mtimes['b'] = 2
+            graph.update()
+            mock_read_jobs.assert_called_once_with('b', 'fake_cluster', soa_dir='/fake/soa/dir', ttl=-1)
+            assert graph.get_related_jobs(('a', 'main')) == {('a', 'main'), ('b', 'other')}
+            assert graph.get_related_jobs(('b', 'main')) == {('b', 'main')}
+
+            del jobs['b']
+            graph.update()
+            assert graph.get_related_jobs(('a', 'main')) == {('a', 'main')}
+            assert ('b', 'main') not in graph.configs
+            with raises(KeyError):
+                graph.get_related_jobs(('b', 'main'))
+
+    def test_update_checks_services_at_most_once_per_interval(self):
+        list_services_patch, read_jobs_patch, load_config_patch = self.make_jobs({'a': {'main': None}})
+        with list_services_patch as mock_list_services, read_jobs_patch, load_config_patch, mock.patch(
+            'paasta_tools.chronos_tools.get_service_config_mtime', autospec=True, return_value=1,
+        ) as mock_get_service_config_mtime, mock.patch(
+            'paasta_tools.chronos_tools.time.time', autospec=True, return_value=100,
+        ) as mock_time:
+            graph = chronos_tools.ChronosJobGraph(cluster='fake_cluster', soa_dir='/fake/soa/dir', update_interval=30)
+            graph.update()
+            assert mock_list_services.call_count == 1
+            assert mock_get_service_config_mtime.call_count == 1
+
+            mock_time.return_value = 129
+            graph.update()
+            assert mock_list_services.call_count == 1
+            assert mock_get_service_config_mtime.call_count == 1
+
+            graph.update(force=True)
+            assert mock_list_services.call_count == 2
+
+            mock_time.return_value = 160
+            graph.update()
+            assert mock_list_services.call_count == 3
+
+    def test_get_chronos_job_graph_reuses_graph(self):
+        list_services_patch, read_jobs_patch, load_config_patch = self.make_jobs({'a': {'main': None}})
+        with list_services_patch as mock_list_services, read_jobs_patch, load_config_patch, mock.patch(
+            'paasta_tools.chronos_tools.get_service_config_mtime', autospec=True, return_value=1,
+        ), mock.patch.dict(chronos_tools._chronos_job_graphs, clear=True):
+            graph = chronos_tools.get_chronos_job_graph('fake_cluster', soa_dir='/fake/soa/dir')
+            assert chronos_tools.get_chronos_job_graph('fake_cluster', soa_dir='/fake/soa/dir') is graph
+            assert mock_list_services.call_count == 1
+            assert chronos_tools.get_chronos_job_graph('fake_cluster', soa_dir='/fake/soa/dir', force=True) is graph
+            assert mock_list_services.call_count == 2
+
+    def test_topological_sort_and_cycles(self):
+        jobs = {
+            'a': {'first': None, 'second': ['a.first'], 'third': ['a.second', 'a.first']},
+            'b': {'loop1': ['b.loop2'], 'loop2': ['b.loop1']},
+        }
+        list_services_patch, read_jobs_patch, load_config_patch = self.make_jobs(jobs)
+        with list_services_patch, read_jobs_patch, load_config_patch, mock.patch(
+            'paasta_tools.chronos_tools.get_service_config_mtime', autospec=True, return_value=1,
+        ):
+            graph = chronos_tools.ChronosJobGraph(cluster='fake_cluster', soa_dir='/fake/soa/dir')
+            graph.update()
+            assert graph.topological_sort(('a', 'second')) == [('a', 'first'), ('a', 'second'), ('a', 'third')]
+            assert not graph.has_cycle(('a', 'third'))
+            assert graph.has_cycle(('b', 'loop1'))
+            with raises(ValueError):
+                graph.topological_sort(('b', 'loop2'))
@@ -26,6 +26,7 @@ class TestCleanupMarathonJobs:
     fake_cluster = 'fake_test_cluster'
     fake_system_config = utils.SystemPaastaConfig(
         {
+            "cluster": fake_cluster,
             "marathon_servers": [{
                 'url': 'http://mess_url',
                 'user': 'namnin',
@@ -44,9 +45,21 @@ class TestCleanupMarathonJobs:
         with mock.patch('paasta_tools.cleanup_marathon_jobs.cleanup_apps', autospec=True) as cleanup_patch:
             cleanup_marathon_jobs.main(('--soa-dir', soa_dir))
             cleanup_patch.assert_called_once_with(
-                soa_dir, kill_threshold=0.5, force=False,
+                soa_dir, kill_threshold=0.5, force=False, workers=5,
             )
 
+    def test_main_exits_1_when_a_delete_fails(self):
+        with mock.patch(
+            'paasta_tools.cleanup_marathon_jobs.cleanup_apps', autospec=True,
+            return_value=[
+                cleanup_marathon_jobs.CleanupResult('fake.app.one.two', 'deleted', 1.0),
+                cleanup_marathon_jobs.CleanupResult('fake.app.three.four', 'failed', 1.0),
+            ],
+        ):
+            with raises(SystemExit) as excinfo:
+                cleanup_marathon_jobs.main(('--workers', '2'))
+            assert excinfo.value.code == 1
+
     def test_cleanup_apps(self):
         soa_dir = 'not_really_a_dir'
         expected_apps = [('present', 'away'), ('on-app', 'off')]
@@ -76,6 +89,7 @@ class TestCleanupMarathonJobs:
                 app_id='not-here.oh.no.weirdo',
                 client=self.fake_marathon_client,
                 soa_dir=soa_dir,
+                cluster=self.fake_cluster,
             )
 
     def test_cleanup_apps_dont_kill_everything(self):
@@ -189,6 +203,55 @@ class TestCleanupMarathonJobs:
             )
             assert mock_send_sensu_event.call_count == 2
 
+    def test_delete_app_skips_apps_being_bounced(self):
+        app_id = 'example--service.main.git93340779.configddb38a65'
+        client = self.fake_marathon_client
+        with mock.patch(
+            'paasta_tools.bounce_lib.bounce_lock_zookeeper', autospec=True,
+            side_effect=cleanup_marathon_jobs.bounce_lib.LockHeldException,
+        ), mock.patch(
+            'paasta_tools.bounce_lib.delete_marathon_app', autospec=True,
+        ) as mock_delete_marathon_app, mock.patch(
+            'paasta_tools.cleanup_marathon_jobs._log', autospec=True,
+        ) as mock_log:
+            assert cleanup_marathon_jobs.delete_app(app_id, client, 'fake_soa_dir', cluster='fake_cluster') is False
+            assert mock_delete_marathon_app.call_count == 0
+            assert mock_log.call_count == 0
+
+    def test_delete_apps(self):
+        client = self.fake_marathon_client
+        app_ids = [
+            'fake--service.main.gitold.config1',
+            'fake--service.canary.gitold.config2',
+            'fake--service.main.gitolder.config3',
+            'other--service.main.gitold.config4',
+        ]
+        delete_order = []
+
+        def fake_delete_app(app_id, client, soa_dir, cluster):
+            delete_order.append(app_id)
+            if app_id == 'fake--service.canary.gitold.config2':
+                raise ValueError('oops')
+            return app_id != 'other--service.main.gitold.config4'
+
+        with mock.patch(
+            'paasta_tools.cleanup_marathon_jobs.delete_app', autospec=True, side_effect=fake_delete_app,
+        ):
+            results = cleanup_marathon_jobs.delete_apps(
+                [(app_id, client) for app_id in app_ids], 'fake_soa_dir', 'fake_cluster', workers=3,
+            )
+
+        assert [(result.app_id, result.status) for result in results] == [
+            ('fake--service.main.gitold.config1', 'deleted'),
+            ('fake--service.main.gitolder.config3', 'deleted'),
+            ('fake--service.canary.gitold.config2', 'failed'),
+            ('other--service.main.gitold.config4', 'skipped'),
+        ]
+        # The apps of an instance share a bounce lock, so they are deleted in turn
+        assert delete_order.index('fake--service.main.gitold.config1') < \
+            delete_order.index('fake--service.main.gitolder.config3')
+        assert all(result.seconds >= 0 for result in results)
+
     def test_delete_app_throws_exception(self):
         app_id = 'example--service.main.git93340779.configddb38a65'
         client = self.fake_marathon_client
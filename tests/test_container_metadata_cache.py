@@ -0,0 +1,207 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import mock
+import pytest
+from docker.errors import APIError
+
+from paasta_tools.container_metadata_cache import ContainerMetadata
+from paasta_tools.container_metadata_cache import ContainerMetadataCache
+from paasta_tools.container_metadata_cache import get_container_env_as_dict
+
+CONTAINER_ID = 'a687af92e281725daf5b4cda0b487f20d2055d2bb6814b76d0e39c18a52a4e79'
+OTHER_CONTAINER_ID = 'e3a1057fdd485f5dffe48f1584e6f30c2bf6d30af2f8d6e8e01fc6e2a2a0d3bb'
+TASK_ID = 'fake_service.fake_instance.gitdeadbeef.configdeadbeef.1234'
+
+
+@pytest.fixture
+def clock():
+    return mock.Mock(return_value=1000.0)
+
+
+@pytest.fixture
+def cache(clock):
+    return ContainerMetadataCache(mock.Mock(), exited_grace_period=60, clock=clock)
+
+
+def inspect_result(container_id, running=True):
+    return {
+        'Id': container_id,
+        'Config': {'Env': [
+            'PAASTA_SERVICE=fake_service', 'PAASTA_INSTANCE=fake_instance', 'MESOS_TASK_ID=%s' % TASK_ID,
+        ]},
+        'State': {'Running': running},
+    }
+
+
+def start_event(container_id):
+    return {
+        'status': 'start',
+        'id': container_id,
+        'Actor': {
+            'ID': container_id,
+            'Attributes': {
+                'paasta_service': 'fake_service',
+                'paasta_instance': 'fake_instance',
+                'MESOS_TASK_ID': TASK_ID,
+                'name': 'mesos-1234',
+            },
+        },
+    }
+
+
+def test_get_container_env_as_dict():
+    docker_inspect = {'Config': {'Env': ['PAASTA_SERVICE=fake_service', 'A=b=c']}}
+    assert get_container_env_as_dict(docker_inspect) == {'PAASTA_SERVICE': 'fake_service', 'A': 'b=c'}
+    assert get_container_env_as_dict({}) == {}
+
+
+@mock.patch('paasta_tools.container_metadata_cache.get_running_mesos_docker_containers', autospec=True)
+def test_warm(mock_get_running_mesos_docker_containers, cache):
+    mock_get_running_mesos_docker_containers.return_value = [
+        {'Id': CONTAINER_ID, 'Labels': {'paasta_service': 'fake_service', 'paasta_instance': 'fake_instance'}},
+        {'Id': OTHER_CONTAINER_ID, 'Labels': None},
+    ]
+    cache.client.inspect_container.side_effect = [
+        inspect_result(CONTAINER_ID),
+        # Exited after being listed
+        APIError('No such container', mock.Mock()),
+    ]
+    cache.warm()
+    assert cache.client.inspect_container.call_count == 2
+
+    assert cache.get('a687af92e281') == ContainerMetadata(CONTAINER_ID, 'fake_service', 'fake_instance', TASK_ID)
+    assert cache.get(OTHER_CONTAINER_ID) == ContainerMetadata(OTHER_CONTAINER_ID, None, None, None)
+    assert cache.get('a687af') == cache.get(CONTAINER_ID)
+    assert cache.client.inspect_container.call_count == 2
+    assert cache.inspect_count == 0
+
+
+def test_handle_event_start(cache):
+    cache.client.inspect_container.return_value = inspect_result(CONTAINER_ID)
+    cache.handle_event(start_event(CONTAINER_ID))
+    cache.client.inspect_container.assert_called_once_with(resource_id=CONTAINER_ID)
+
+    assert cache.get('a687af92e281') == ContainerMetadata(CONTAINER_ID, 'fake_service', 'fake_instance', TASK_ID)
+    assert cache.client.inspect_container.call_count == 1
+
+
+def test_handle_event_start_of_container_already_gone(cache):
+    cache.client.inspect_container.side_effect = APIError('No such container', mock.Mock())
+    cache.handle_event(start_event(CONTAINER_ID))
+
+    assert cache.get('a687af92e281') == ContainerMetadata(CONTAINER_ID, 'fake_service', 'fake_instance', None)
+    assert cache.client.inspect_container.call_count == 1
+
+
+def test_handle_event_die_keeps_container_for_grace_period(cache, clock):
+    cache.client.inspect_container.return_value = inspect_result(CONTAINER_ID)
+    cache.handle_event(start_event(CONTAINER_ID))
+    cache.handle_event({'status': 'die', 'id': CONTAINER_ID})
+    cache.handle_event({'status': 'destroy', 'id': CONTAINER_ID})
+    cache.client.inspect_container.reset_mock()
+
+    clock.return_value = 1060.0
+    assert cache.get('a687af92e281').service == 'fake_service'
+    assert not cache.client.inspect_container.called
+
+    clock.return_value = 1061.0
+    cache.client.inspect_container.side_effect = APIError('No such container', mock.Mock())
+    assert cache.get('a687af92e281') is None
+    cache.client.inspect_container.assert_called_once_with(resource_id='a687af92e281')
+
+
+def test_handle_event_restarted_container_is_kept(cache, clock):
+    cache.client.inspect_container.return_value = inspect_result(CONTAINER_ID)
+    cache.handle_event(start_event(CONTAINER_ID))
+    cache.handle_event({'status': 'die', 'id': CONTAINER_ID})
+    clock.return_value = 1030.0
+    cache.handle_event(start_event(CONTAINER_ID))
+
+    clock.return_value = 2000.0
+    assert cache.get('a687af92e281').task_id == TASK_ID
+    assert cache.client.inspect_container.call_count == 2
+
+
+def test_handle_event_ignores_unknown_events(cache):
+    cache.handle_event({'status': 'pull', 'id': 'busybox:latest'})
+    cache.handle_event({'status': 'die', 'id': CONTAINER_ID})
+    cache.handle_event({'Type': 'network', 'Action': 'connect'})
+    assert cache._containers == {}
+
+
+def test_get_falls_back_to_inspect_once(cache):
+    cache.client.inspect_container.return_value = {
+        'Id': CONTAINER_ID,
+        'Config': {'Env': [
+            'PAASTA_SERVICE=fake_service', 'PAASTA_INSTANCE=fake_instance', 'mesos_task_id=%s' % TASK_ID,
+        ]},
+        'State': {'Running': True},
+    }
+
+    assert cache.get('a687af92e281') == ContainerMetadata(CONTAINER_ID, 'fake_service', 'fake_instance', TASK_ID)
+    assert cache.get('a687af92e281') == ContainerMetadata(CONTAINER_ID, 'fake_service', 'fake_instance', TASK_ID)
+    assert cache.client.inspect_container.call_count == 1
+    assert cache.inspect_count == 1
+
+
+def test_get_inspected_exited_container_expires(cache, clock):
+    cache.client.inspect_container.return_value = {
+        'Id': CONTAINER_ID,
+        'Config': {'Env': ['PAASTA_SERVICE=fake_service']},
+        'State': {'Running': False},
+    }
+    assert cache.get('a687af92e281').service == 'fake_service'
+
+    clock.return_value = 1100.0
+    cache.get('a687af92e281')
+    assert cache.client.inspect_container.call_count == 2
+
+
+@mock.patch('paasta_tools.container_metadata_cache.time.sleep', autospec=True)
+@mock.patch('paasta_tools.container_metadata_cache.get_running_mesos_docker_containers', autospec=True)
+def test_follow_events(mock_get_running_mesos_docker_containers, mock_sleep, cache):
+    mock_get_running_mesos_docker_containers.return_value = []
+    cache.client.inspect_container.side_effect = lambda resource_id: inspect_result(resource_id)
+    cache.client.events.side_effect = [
+        iter([start_event(CONTAINER_ID)]),
+        APIError('Cannot connect', mock.Mock()),
+        iter([start_event(OTHER_CONTAINER_ID)]),
+    ]
+    mock_sleep.side_effect = [None, None, StopIteration]
+
+    with pytest.raises(StopIteration):
+        cache.follow_events(since=900)
+
+    assert cache.client.events.call_args_list == [
+        mock.call(since=900, filters={'type': 'container'}, decode=True),
+        mock.call(since=1000, filters={'type': 'container'}, decode=True),
+        mock.call(since=1000, filters={'type': 'container'}, decode=True),
+    ]
+    # Warmed again after each reconnection, as events may have been missed
+    assert mock_get_running_mesos_docker_containers.call_count == 2
+    assert cache.get(CONTAINER_ID).service == 'fake_service'
+    assert cache.get(OTHER_CONTAINER_ID).service == 'fake_service'
+    assert cache.inspect_count == 0
+
+
+@mock.patch('paasta_tools.container_metadata_cache.threading.Thread', autospec=True)
+@mock.patch('paasta_tools.container_metadata_cache.get_running_mesos_docker_containers', autospec=True)
+def test_start(mock_get_running_mesos_docker_containers, mock_thread, cache):
+    mock_get_running_mesos_docker_containers.return_value = [{'Id': CONTAINER_ID, 'Labels': {}}]
+    cache.client.inspect_container.return_value = inspect_result(CONTAINER_ID)
+    cache.start()
+
+    assert cache.get(CONTAINER_ID) is not None
+    mock_thread.assert_called_once_with(target=cache.follow_events, args=(1000,), name='docker-events')
+    assert mock_thread.return_value.start.called
@@ -0,0 +1,125 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import mock
+from pytest import raises
+
+from paasta_tools import deploy_runner
+from paasta_tools.deploy_runner import DeployResult
+
+
+def test_run_deploys():
+    def fake_deploy(service, instance):
+        if instance == 'broken':
+            raise ValueError('oops')
+        return 1 if instance == 'failing' else 0
+
+    results = deploy_runner.run_deploys(
+        fake_deploy,
+        [('fake_service', 'main'), ('fake_service', 'broken'), ('fake_service', 'failing')],
+        workers=2,
+    )
+    assert [(result.instance, result.status) for result in results] == [
+        ('main', 0),
+        ('broken', 1),
+        ('failing', 1),
+    ]
+    assert all(result.seconds >= 0 for result in results)
+
+
+def test_format_summary():
+    results = [
+        DeployResult('fake_service', 'main', 0, 1.0),
+        DeployResult('fake_service', 'canary', 1, 3.0),
+        DeployResult('other_service', 'main', 0, 2.0),
+    ]
+    assert deploy_runner.format_summary(results, 4.0, slowest=2) == (
+        "Deployed 3 service instances in 4.00s (6.00s of deploy time), 1 failed.\n"
+        "Failed: fake_service.canary\n"
+        "Slowest: fake_service.canary took 3.00s\n"
+        "Slowest: other_service.main took 2.00s"
+    )
+
+
+def test_deploy_marathon_services_shares_clients_and_apps():
+    with mock.patch(
+        'paasta_tools.deploy_runner.load_system_paasta_config', autospec=True,
+    ) as mock_load_system_paasta_config, mock.patch(
+        'paasta_tools.deploy_runner.marathon_tools.get_marathon_servers', autospec=True,
+    ), mock.patch(
+        'paasta_tools.deploy_runner.marathon_tools.get_marathon_clients', autospec=True,
+    ) as mock_get_marathon_clients, mock.patch(
+        'paasta_tools.deploy_runner.marathon_tools.get_marathon_apps_with_clients', autospec=True,
+    ) as mock_get_marathon_apps_with_clients, mock.patch(
+        'paasta_tools.deploy_runner.setup_marathon_job.deploy_marathon_service', autospec=True,
+        side_effect=[(0, None), (1, None)],
+    ) as mock_deploy_marathon_service:
+        results = deploy_runner.deploy_marathon_services(
+            [('fake_service', 'main'), ('fake_service', 'canary')],
+            soa_dir='/fake/soa/dir',
+            workers=1,
+        )
+
+        assert [result.status for result in results] == [0, 1]
+        mock_load_system_paasta_config.assert_called_once_with()
+        mock_get_marathon_apps_with_clients.assert_called_once_with(
+            mock_get_marathon_clients.return_value.get_all_clients.return_value, embed_tasks=True,
+        )
+        mock_deploy_marathon_service.assert_has_calls([
+            mock.call(
+                'fake_service', instance, mock_get_marathon_clients.return_value, '/fake/soa/dir',
+                mock_get_marathon_apps_with_clients.return_value,
+                system_paasta_config=mock_load_system_paasta_config.return_value,
+            )
+            for instance in ('main', 'canary')
+        ])
+
+
+def test_deploy_chronos_jobs():
+    with mock.patch(
+        'paasta_tools.deploy_runner.load_system_paasta_config', autospec=True,
+    ) as mock_load_system_paasta_config, mock.patch(
+        'paasta_tools.deploy_runner.chronos_tools.load_chronos_config', autospec=True,
+    ) as mock_load_chronos_config, mock.patch(
+        'paasta_tools.deploy_runner.chronos_tools.get_chronos_client', autospec=True,
+    ) as mock_get_chronos_client, mock.patch(
+        'paasta_tools.deploy_runner.setup_chronos_job.deploy_chronos_job', autospec=True,
+        return_value=0,
+    ) as mock_deploy_chronos_job:
+        results = deploy_runner.deploy_chronos_jobs([('fake_service', 'job')], soa_dir='/fake/soa/dir')
+
+        assert results[0].status == 0
+        mock_get_chronos_client.assert_called_once_with(mock_load_chronos_config.return_value, cached=True)
+        mock_deploy_chronos_job.assert_called_once_with(
+            service='fake_service',
+            instance='job',
+            client=mock_get_chronos_client.return_value,
+            cluster=mock_load_system_paasta_config.return_value.get_cluster.return_value,
+            soa_dir='/fake/soa/dir',
+        )
+
+
+def test_run_and_summarize_exits_1_on_failure():
+    fake_args = mock.Mock(verbose=False, soa_dir='/fake/soa/dir', workers=3)
+    mock_deploy_all = mock.Mock(return_value=[
+        DeployResult('fake_service', 'main', 0, 1.0),
+        DeployResult('fake_service', 'canary', 1, 1.0),
+    ])
+    with mock.patch(
+        'paasta_tools.deploy_runner.paasta_print', autospec=True,
+    ) as mock_paasta_print:
+        with raises(SystemExit) as excinfo:
+            deploy_runner.run_and_summarize(mock_deploy_all, [('fake_service', 'main')], fake_args)
+        assert excinfo.value.code == 1
+        mock_deploy_all.assert_called_once_with([('fake_service', 'main')], soa_dir='/fake/soa/dir', workers=3)
+        assert mock_paasta_print.call_count == 1
@@ -718,12 +718,10 @@ class TestMain(object):
             '--env=PAASTA_INSTANCE=myinstance',
         ]
 
-    @mock.patch.object(docker_wrapper, 'firewall_flock', autospec=True)
     @mock.patch.object(docker_wrapper, 'prepare_new_container', autospec=True)
     def test_mac_address(
         self,
         mock_prepare_new_container,
-        mock_firewall_flock,
         mock_mac_address,
         mock_execlp,
         mock_firewall_env_args,
@@ -742,8 +740,6 @@ class TestMain(object):
             *mock_firewall_env_args,
         )]
 
-        assert mock_firewall_flock.return_value.__enter__.called is True
-
         assert mock_prepare_new_container.mock_calls == [mock.call(
             docker_wrapper.DEFAULT_SOA_DIR,
             docker_wrapper.DEFAULT_SYNAPSE_SERVICE_DIR,
@@ -802,12 +798,10 @@ class TestMain(object):
             _, err = capsys.readouterr()
             assert err.startswith('Unable to add mac address: [Errno 2] No such file or directory')
 
-    @mock.patch.object(docker_wrapper, 'firewall_flock', autospec=True, side_effect=Exception("Oh noes"))
-    @mock.patch.object(docker_wrapper, 'prepare_new_container', autospec=True)
+    @mock.patch.object(docker_wrapper, 'prepare_new_container', autospec=True, side_effect=Exception("Oh noes"))
     def test_prepare_new_container_error(
         self,
         mock_prepare_new_container,
-        mock_firewall_flock,
         capsys,
         mock_mac_address,
         mock_execlp,
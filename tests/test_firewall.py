@@ -464,8 +464,11 @@ def test_ensure_service_chains(mock_reorder_chain, mock_active_service_groups, m
     with mock.patch.object(iptables, 'ensure_chain', autospec=True) as m:
         assert firewall.ensure_service_chains(
             mock_active_service_groups,
-            DEFAULT_SOA_DIR,
-            firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
+            firewall.get_service_chains_rules(
+                mock_active_service_groups,
+                DEFAULT_SOA_DIR,
+                firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
+            ),
         ) == {
             'PAASTA.cool_servi.397dba3c1f': {
                 'fe:a3:a3:da:2d:40',
@@ -538,11 +541,15 @@ def test_garbage_collect_old_service_chains():
     ]
 
 
+@mock.patch.object(firewall, 'firewall_flock', autospec=True)
 @mock.patch.object(firewall.ServiceGroup, 'get_rules', return_value=mock.sentinel.RULES)
 @mock.patch.object(iptables, 'reorder_chain', autospec=True)
 @mock.patch.object(iptables, 'ensure_chain', autospec=True)
 @mock.patch.object(iptables, 'insert_rule', autospec=True)
-def test_prepare_new_container(insert_rule_mock, ensure_chain_mock, reorder_chain_mock, get_rules_mock):
+@mock.patch.object(iptables, 'all_chains', autospec=True, return_value={'PAASTA'})
+def test_prepare_new_container(
+    all_chains_mock, insert_rule_mock, ensure_chain_mock, reorder_chain_mock, get_rules_mock, firewall_flock_mock,
+):
     firewall.prepare_new_container(
         DEFAULT_SOA_DIR,
         firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
@@ -568,6 +575,147 @@ def test_prepare_new_container(insert_rule_mock, ensure_chain_mock, reorder_chai
             ),
         ),
     ]
+    assert firewall_flock_mock.return_value.__enter__.called is True
+
+
+@mock.patch.object(firewall, 'firewall_flock', autospec=True)
+@mock.patch.object(
+    firewall.ServiceGroup, 'get_rules', autospec=True,
+    return_value=(EMPTY_RULE._replace(target='ACCEPT'), EMPTY_RULE._replace(target='DROP')),
+)
+@mock.patch.object(iptables, 'ensure_chain', autospec=True)
+@mock.patch.object(iptables, 'insert_rule', autospec=True)
+@mock.patch.object(
+    iptables, 'list_chain', autospec=True,
+    return_value=(EMPTY_RULE._replace(target='DROP'), EMPTY_RULE._replace(target='ACCEPT')),
+)
+@mock.patch.object(
+    iptables, 'all_chains', autospec=True,
+    return_value={'PAASTA', 'PAASTA-DNS', 'PAASTA-INTERNET', 'PAASTA-COMMON', 'PAASTA.myservice.7e8522249a'},
+)
+def test_prepare_new_container_only_inserts_dispatch_rule_when_chain_is_up_to_date(
+    all_chains_mock, list_chain_mock, insert_rule_mock, ensure_chain_mock, get_rules_mock, firewall_flock_mock,
+):
+    def check_not_locked(*args):
+        assert firewall_flock_mock.return_value.__enter__.called is False
+        return (EMPTY_RULE._replace(target='ACCEPT'), EMPTY_RULE._replace(target='DROP'))
+    get_rules_mock.side_effect = check_not_locked
+
+    firewall.prepare_new_container(
+        DEFAULT_SOA_DIR,
+        firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
+        'myservice',
+        'myinstance',
+        '00:00:00:00:00:00',
+    )
+    assert get_rules_mock.call_count == 1
+    assert list_chain_mock.mock_calls == [mock.call('PAASTA.myservice.7e8522249a')]
+    assert ensure_chain_mock.call_count == 0
+    assert insert_rule_mock.mock_calls == [
+        mock.call(
+            'PAASTA',
+            EMPTY_RULE._replace(
+                target='PAASTA.myservice.7e8522249a',
+                matches=(('mac', (('mac-source', ('00:00:00:00:00:00',)),)),),
+            ),
+        ),
+    ]
+
+
+@mock.patch.object(firewall, 'firewall_flock', autospec=True)
+@mock.patch.object(
+    firewall.ServiceGroup, 'get_rules', autospec=True,
+    return_value=(EMPTY_RULE._replace(target='ACCEPT'),),
+)
+@mock.patch.object(firewall.ServiceGroup, 'apply_rules', autospec=True)
+@mock.patch.object(iptables, 'insert_rule', autospec=True)
+@mock.patch.object(
+    iptables, 'list_chain', autospec=True,
+    return_value=(EMPTY_RULE._replace(target='DROP'),),
+)
+@mock.patch.object(
+    iptables, 'all_chains', autospec=True,
+    return_value={'PAASTA', 'PAASTA-DNS', 'PAASTA-INTERNET', 'PAASTA-COMMON', 'PAASTA.myservice.7e8522249a'},
+)
+def test_prepare_new_container_updates_service_chain_with_changed_rules(
+    all_chains_mock, list_chain_mock, insert_rule_mock, apply_rules_mock, get_rules_mock, firewall_flock_mock,
+):
+    # e.g. a redeploy changed the service's dependencies since firewall_update last ran
+    firewall.prepare_new_container(
+        DEFAULT_SOA_DIR,
+        firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
+        'myservice',
+        'myinstance',
+        '00:00:00:00:00:00',
+    )
+    assert apply_rules_mock.mock_calls == [mock.call(mock.ANY, (EMPTY_RULE._replace(target='ACCEPT'),))]
+    assert insert_rule_mock.mock_calls == [
+        mock.call(
+            'PAASTA',
+            EMPTY_RULE._replace(
+                target='PAASTA.myservice.7e8522249a',
+                matches=(('mac', (('mac-source', ('00:00:00:00:00:00',)),)),),
+            ),
+        ),
+    ]
+
+
+@mock.patch.object(firewall, 'firewall_flock', autospec=True)
+@mock.patch.object(firewall.ServiceGroup, 'get_rules', autospec=True, return_value=())
+@mock.patch.object(firewall, 'ensure_dispatch_chains', autospec=True)
+@mock.patch.object(iptables, 'insert_rule', autospec=True)
+@mock.patch.object(iptables, 'list_chain', autospec=True, return_value=())
+@mock.patch.object(
+    iptables, 'all_chains', autospec=True,
+    return_value={'PAASTA-DNS', 'PAASTA-INTERNET', 'PAASTA-COMMON', 'PAASTA.myservice.7e8522249a'},
+)
+def test_prepare_new_container_creates_dispatch_chain(
+    all_chains_mock, list_chain_mock, insert_rule_mock, ensure_dispatch_chains_mock, get_rules_mock,
+    firewall_flock_mock,
+):
+    firewall.prepare_new_container(
+        DEFAULT_SOA_DIR,
+        firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
+        'myservice',
+        'myinstance',
+        '00:00:00:00:00:00',
+    )
+    assert insert_rule_mock.call_count == 0
+    assert ensure_dispatch_chains_mock.mock_calls == [
+        mock.call({'PAASTA.myservice.7e8522249a': {'00:00:00:00:00:00'}}),
+    ]
+
+
+@mock.patch.object(firewall, 'garbage_collect_old_service_chains', autospec=True)
+@mock.patch.object(firewall, 'ensure_dispatch_chains', autospec=True)
+@mock.patch.object(firewall, 'ensure_service_chains', autospec=True)
+@mock.patch.object(firewall, 'ensure_shared_chains', autospec=True)
+@mock.patch.object(firewall, 'get_service_chains_rules', autospec=True)
+@mock.patch.object(firewall, 'active_service_groups', autospec=True)
+@mock.patch.object(firewall, 'firewall_flock', autospec=True)
+def test_general_update_computes_rules_before_taking_flock(
+    firewall_flock_mock,
+    active_service_groups_mock,
+    get_service_chains_rules_mock,
+    ensure_shared_chains_mock,
+    ensure_service_chains_mock,
+    ensure_dispatch_chains_mock,
+    garbage_collect_mock,
+):
+    def check_not_locked(*args):
+        assert firewall_flock_mock.return_value.__enter__.called is False
+        return mock.sentinel.RULES
+    get_service_chains_rules_mock.side_effect = check_not_locked
+
+    firewall.general_update(DEFAULT_SOA_DIR, firewall.DEFAULT_SYNAPSE_SERVICE_DIR)
+
+    get_service_chains_rules_mock.assert_called_once_with(
+        active_service_groups_mock.return_value, DEFAULT_SOA_DIR, firewall.DEFAULT_SYNAPSE_SERVICE_DIR,
+    )
+    ensure_service_chains_mock.assert_called_once_with(active_service_groups_mock.return_value, mock.sentinel.RULES)
+    ensure_dispatch_chains_mock.assert_called_once_with(ensure_service_chains_mock.return_value)
+    garbage_collect_mock.assert_called_once_with(ensure_service_chains_mock.return_value)
+    assert firewall_flock_mock.return_value.__enter__.called is True
 
 
 @pytest.mark.parametrize(
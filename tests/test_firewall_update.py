@@ -141,26 +141,40 @@ def test_run_daemon(process_inotify_mock, smartstack_deps_mock, mock_daemon_args
     assert process_inotify_mock.call_args[0][1] == {}
 
 
-@mock.patch.object(firewall, 'firewall_flock', autospec=True)
 @mock.patch.object(firewall, 'general_update', autospec=True)
-def test_run_cron(mock_general_update, mock_firewall_flock, mock_cron_args):
+def test_run_cron(mock_general_update, mock_cron_args):
     firewall_update.run_cron(mock_cron_args)
-    assert mock_general_update.called is True
-    assert mock_firewall_flock.return_value.__enter__.called is True
+    mock_general_update.assert_called_once_with(mock_cron_args.soa_dir, mock_cron_args.synapse_service_dir)
 
 
 @mock.patch.object(firewall, 'firewall_flock', autospec=True, side_effect=TimeoutError('Oh noes'))
-@mock.patch.object(firewall, 'general_update', autospec=True)
-def test_run_cron_flock_error(mock_general_update, mock_firewall_flock, mock_cron_args):
+@mock.patch.object(firewall, 'get_service_chains_rules', autospec=True)
+@mock.patch.object(firewall, 'active_service_groups', autospec=True)
+@mock.patch.object(firewall, 'ensure_service_chains', autospec=True)
+def test_run_cron_flock_error(
+    mock_ensure_service_chains,
+    mock_active_service_groups,
+    mock_get_service_chains_rules,
+    mock_firewall_flock,
+    mock_cron_args,
+):
     with pytest.raises(TimeoutError):
         firewall_update.run_cron(mock_cron_args)
+    assert mock_ensure_service_chains.call_count == 0
 
 
 @mock.patch.object(firewall_update, 'log', autospec=True)
+@mock.patch.object(firewall_update.firewall, 'get_service_chains_rules', autospec=True)
 @mock.patch.object(firewall_update.firewall, 'ensure_service_chains', autospec=True)
 @mock.patch.object(firewall_update.firewall, 'active_service_groups', autospec=True)
 @mock.patch.object(firewall, 'firewall_flock', autospec=True)
-def test_process_inotify_event(firewall_flock_mock, active_service_groups_mock, ensure_service_chains_mock, log_mock):
+def test_process_inotify_event(
+    firewall_flock_mock,
+    active_service_groups_mock,
+    ensure_service_chains_mock,
+    get_service_chains_rules_mock,
+    log_mock,
+):
     active_service_groups_mock.return_value = {
         firewall.ServiceGroup('myservice', 'myinstance'): {'00:00:00:00:00:00'},
         firewall.ServiceGroup('anotherservice', 'instance'): {'11:11:11:11:11:11'},
@@ -181,15 +195,15 @@ def test_process_inotify_event(firewall_flock_mock, active_service_groups_mock,
     assert log_mock.debug.call_count == 3
     log_mock.debug.assert_any_call("Updated ('myservice', 'myinstance')")
     log_mock.debug.assert_any_call("Updated ('anotherservice', 'instance')")
+    service_groups = {
+        firewall.ServiceGroup('myservice', 'myinstance'): {'00:00:00:00:00:00'},
+        firewall.ServiceGroup('anotherservice', 'instance'): {'11:11:11:11:11:11'},
+    }
+    assert get_service_chains_rules_mock.mock_calls == [
+        mock.call(service_groups, soa_dir, synapse_service_dir),
+    ]
     assert ensure_service_chains_mock.mock_calls == [
-        mock.call(
-            {
-                firewall.ServiceGroup('myservice', 'myinstance'): {'00:00:00:00:00:00'},
-                firewall.ServiceGroup('anotherservice', 'instance'): {'11:11:11:11:11:11'},
-            },
-            soa_dir,
-            synapse_service_dir,
-        ),
+        mock.call(service_groups, get_service_chains_rules_mock.return_value),
     ]
 
     assert firewall_flock_mock.return_value.__enter__.called is True
@@ -208,6 +222,7 @@ def test_process_inotify_event(firewall_flock_mock, active_service_groups_mock,
 
 
 @mock.patch.object(firewall_update, 'log', autospec=True)
+@mock.patch.object(firewall_update.firewall, 'get_service_chains_rules', autospec=True)
 @mock.patch.object(firewall_update.firewall, 'ensure_service_chains', autospec=True)
 @mock.patch.object(firewall_update.firewall, 'active_service_groups', autospec=True)
 @mock.patch.object(firewall, 'firewall_flock', autospec=True, side_effect=TimeoutError('Oh noes'))
@@ -215,6 +230,7 @@ def test_process_inotify_event_flock_error(
     firewall_flock_mock,
     active_service_groups_mock,
     ensure_service_chains_mock,
+    get_service_chains_rules_mock,
     log_mock,
 ):
     active_service_groups_mock.return_value = {
@@ -175,6 +175,7 @@ def test_main():
             soa_dir='ABSOLUTE',
             service='fake_service',
             old_mappings={'OLD_MAP': {'desired_state': 'start', 'docker_image': 'PINGS', 'force_bounce': None}},
+            remote_refs=None,
         ),
 
         join_patch.assert_any_call('ABSOLUTE', 'fake_service', generate_deployments_for_service.TARGET_FILE),
@@ -269,3 +270,104 @@ def test_get_desired_state_fails_gracefully_with_start():
     actual = generate_deployments_for_service.get_desired_state(branch, remote_refs, deploy_group)
 
     assert actual == expected_desired_state
+
+
+def test_get_latest_deployment_tags():
+    remote_refs = {
+        'refs/heads/master': 'a',
+        'refs/tags/paasta-cluster.instance-20160308T053933-deploy': 'b',
+        'refs/tags/paasta-cluster.instance-20160309T053933-deploy': 'c',
+        'refs/tags/paasta-cluster.instance-20160307T053933-deploy': 'd',
+        'refs/tags/paasta-prod-main-20160301T000000-deploy': 'e',
+        'refs/tags/paasta-cluster.instance-20160310T000000-start': 'f',
+    }
+    assert generate_deployments_for_service.get_latest_deployment_tags(remote_refs) == {
+        'cluster.instance': ('20160309T053933', 'c', 'refs/tags/paasta-cluster.instance-20160309T053933-deploy'),
+        'prod-main': ('20160301T000000', 'e', 'refs/tags/paasta-prod-main-20160301T000000-deploy'),
+    }
+    for deploy_group, (_, sha, ref) in generate_deployments_for_service.get_latest_deployment_tags(
+        remote_refs,
+    ).items():
+        assert generate_deployments_for_service.get_latest_deployment_tag(remote_refs, deploy_group) == (ref, sha)
+
+
+def test_get_desired_states_matches_get_desired_state():
+    remote_refs = {
+        'refs/tags/paasta-paasta-cluster.instance-20150721T183905-start': 'sha1',
+        'refs/tags/paasta-paasta-cluster.instance-20151106T233211-stop': 'sha2',
+        'refs/tags/paasta-cluster.instance-20160202T233805-start': 'sha3',
+        'refs/tags/paasta-cluster.instance-20160101T000000-stop': 'sha1',
+        'refs/tags/paasta-cluster2.someinstance-20160202T233805-start': 'sha4',
+        'refs/tags/paasta-cluster2.someinstance-20160205T182601-stop': 'sha4',
+        'refs/tags/cluster3.main-20160205T182601-stop': 'sha5',
+    }
+    desired_states = generate_deployments_for_service.get_desired_states(remote_refs)
+    assert desired_states[('cluster2.someinstance', 'sha4')] == ('stop', '20160205T182601')
+    assert desired_states[('cluster.instance', 'sha1')] == ('stop', '20160101T000000')
+    assert desired_states[('paasta-cluster.instance', 'sha1')] == ('stop', '20160101T000000')
+    assert desired_states[('cluster3.main', 'sha5')] == ('stop', '20160205T182601')
+
+    for branch in ('cluster.instance', 'paasta-cluster.instance', 'cluster2.someinstance', 'cluster3.main'):
+        for sha in ('sha1', 'sha2', 'sha3', 'sha4', 'sha5'):
+            deploy_tag = 'refs/tags/paasta-group-20170101T000000-deploy'
+            refs = dict(remote_refs, **{deploy_tag: sha})
+            assert desired_states.get((branch, sha), ('start', None)) == \
+                generate_deployments_for_service.get_desired_state(branch, refs, 'group')
+
+
+def test_get_deploy_group_mappings_with_remote_refs():
+    fake_service_configs = [
+        MarathonServiceConfig(
+            service='fake_service',
+            cluster='clusterA',
+            instance='main',
+            branch_dict={},
+            config_dict={'deploy_group': 'prod'},
+        ),
+    ]
+    with mock.patch(
+        'paasta_tools.generate_deployments_for_service.get_instance_configs_for_service',
+        return_value=fake_service_configs, autospec=True,
+    ), mock.patch(
+        'paasta_tools.remote_git.list_remote_refs', autospec=True,
+    ) as list_remote_refs_patch:
+        actual, _ = generate_deployments_for_service.get_deploy_group_mappings(
+            '/fake/soa/dir', 'fake_service',
+            remote_refs={'refs/tags/paasta-prod-20160308T053933-deploy': 'abc123'},
+        )
+        assert not list_remote_refs_patch.called
+        assert actual == {
+            'fake_service:paasta-clusterA.main': {
+                'docker_image': 'services-fake_service:paasta-abc123',
+                'desired_state': 'start',
+                'force_bounce': None,
+            },
+        }
+
+
+def test_generate_deployments_for_services():
+    git_urls = {
+        'service_a': 'git@git:services/a.git',
+        'service_b': 'git@git:services/shared.git',
+        'service_c': 'git@git:services/shared.git',
+    }
+    with mock.patch(
+        'paasta_tools.generate_deployments_for_service.get_git_url', autospec=True,
+        side_effect=lambda service, soa_dir: git_urls[service],
+    ), mock.patch(
+        'paasta_tools.remote_git.list_remote_refs', autospec=True,
+        side_effect=lambda git_url: {'url': git_url},
+    ) as list_remote_refs_patch, mock.patch(
+        'paasta_tools.generate_deployments_for_service.generate_deployments_for_service', autospec=True,
+        side_effect=[None, None, ValueError('oops')],
+    ) as generate_patch:
+        failed = generate_deployments_for_service.generate_deployments_for_services(
+            ['service_a', 'service_b', 'service_c'], soa_dir='/fake/soa/dir', workers=1,
+        )
+        assert failed == ['service_c']
+        assert list_remote_refs_patch.call_count == 2
+        generate_patch.assert_any_call(
+            service='service_c',
+            soa_dir='/fake/soa/dir',
+            remote_refs={'url': 'git@git:services/shared.git'},
+        )
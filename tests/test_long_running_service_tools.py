@@ -246,3 +246,51 @@ class TestServiceNamespaceConfig(object):
 
     def test_get_discover_default(self):
         assert long_running_service_tools.ServiceNamespaceConfig().get_discover() == 'region'
+
+
+class TestServiceConfigCache(object):
+
+    def test_get_reloads_once_the_service_changed(self):
+        cache = long_running_service_tools.ServiceConfigCache()
+        load = mock.Mock(return_value=['fake_service.main'])
+        with mock.patch(
+            'paasta_tools.long_running_service_tools.get_service_config_mtime', autospec=True, return_value=1000,
+        ) as mock_get_service_config_mtime:
+            assert cache.get('fake_service', '/fake/soa', ('registrations',), load) == ['fake_service.main']
+            assert cache.get('fake_service', '/fake/soa', ('registrations',), load) == ['fake_service.main']
+            assert load.call_count == 1
+            assert mock_get_service_config_mtime.call_count == 1
+
+            # mtimes are only checked again after check_for_changes
+            mock_get_service_config_mtime.return_value = 2000
+            cache.get('fake_service', '/fake/soa', ('registrations',), load)
+            assert load.call_count == 1
+            cache.check_for_changes()
+            cache.get('fake_service', '/fake/soa', ('registrations',), load)
+            assert load.call_count == 2
+
+            # the same service in another soa_dir is cached separately
+            cache.get('fake_service', '/other/soa', ('registrations',), load)
+            assert load.call_count == 3
+
+    def test_get_does_not_cache_services_without_a_directory(self):
+        cache = long_running_service_tools.ServiceConfigCache()
+        load = mock.Mock(return_value=['fake_service.main'])
+        with mock.patch(
+            'paasta_tools.long_running_service_tools.get_service_config_mtime', autospec=True, return_value=None,
+        ):
+            cache.get('fake_service', '/fake/soa', ('registrations',), load)
+            cache.get('fake_service', '/fake/soa', ('registrations',), load)
+        assert load.call_count == 2
+
+    def test_get_service_namespace_config_returns_a_copy(self):
+        cache = long_running_service_tools.ServiceConfigCache()
+        load = mock.Mock(return_value=long_running_service_tools.ServiceNamespaceConfig({'proxy_port': 1234}))
+        with mock.patch(
+            'paasta_tools.long_running_service_tools.get_service_config_mtime', autospec=True, return_value=1000,
+        ):
+            nerve_dict = cache.get_service_namespace_config('fake_service', 'main', '/fake/soa', load)
+            nerve_dict['port'] = 1111
+            assert cache.get_service_namespace_config('fake_service', 'main', '/fake/soa', load) == {'proxy_port': 1234}
+        assert isinstance(nerve_dict, long_running_service_tools.ServiceNamespaceConfig)
+        assert load.call_count == 1
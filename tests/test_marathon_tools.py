@@ -635,7 +635,7 @@ class TestMarathonTools:
         ) as read_ns_config_patch:
             actual = marathon_tools.get_marathon_services_running_here_for_nerve(cluster, soa_dir)
             assert expected == actual
-            mara_srvs_here_patch.assert_called_once_with()
+            mara_srvs_here_patch.assert_called_once_with(slave_state=None)
             get_namespace_patch.assert_any_call('no_test', 'left_behind', cluster, soa_dir)
             get_namespace_patch.assert_any_call('no_docstrings', 'forever_abandoned', cluster, soa_dir)
             assert get_namespace_patch.call_count == 2
@@ -681,7 +681,7 @@ class TestMarathonTools:
         ) as read_ns_config_patch:
             actual = marathon_tools.get_marathon_services_running_here_for_nerve(cluster, soa_dir)
             assert expected == actual
-            mara_srvs_here_patch.assert_called_once_with()
+            mara_srvs_here_patch.assert_called_once_with(slave_state=None)
             get_namespace_patch.assert_any_call('no_test', 'left_behind', cluster, soa_dir)
             get_namespace_patch.assert_any_call('no_docstrings', 'forever_abandoned', cluster, soa_dir)
             assert get_namespace_patch.call_count == 2
@@ -722,7 +722,7 @@ class TestMarathonTools:
         ) as read_ns_config_patch:
             actual = marathon_tools.get_marathon_services_running_here_for_nerve(cluster, soa_dir)
             assert expected == actual
-            mara_srvs_here_patch.assert_called_once_with()
+            mara_srvs_here_patch.assert_called_once_with(slave_state=None)
             get_namespace_patch.assert_any_call('no_test', 'left_behind', cluster, soa_dir)
             get_namespace_patch.assert_any_call('no_docstrings', 'forever_abandoned', cluster, soa_dir)
             assert get_namespace_patch.call_count == 2
@@ -730,6 +730,53 @@ class TestMarathonTools:
             read_ns_config_patch.assert_any_call('no_docstrings', 'dos', soa_dir)
             assert read_ns_config_patch.call_count == 2
 
+    def test_get_marathon_services_running_here_for_nerve_caches_configs(self, tmpdir):
+        cluster = 'edelweiss'
+        soa_dir = str(tmpdir)
+        tmpdir.mkdir('no_test').join('service.yaml').write('')
+        fake_marathon_services = [
+            ('no_test', 'left_behind', 1111),
+            ('no_test', 'left_behind', 2222),
+        ]
+        with mock.patch(
+            'paasta_tools.marathon_tools.nerve_config_cache',
+            long_running_service_tools.ServiceConfigCache(),
+            autospec=None,
+        ), mock.patch(
+            'paasta_tools.marathon_tools.marathon_services_running_here',
+            autospec=True,
+            return_value=fake_marathon_services,
+        ) as mara_srvs_here_patch, mock.patch(
+            'paasta_tools.marathon_tools.read_all_registrations_for_service_instance',
+            autospec=True,
+            return_value=['no_test.uno'],
+        ) as get_namespace_patch, mock.patch(
+            'paasta_tools.marathon_tools.load_service_namespace_config',
+            autospec=True,
+            return_value=long_running_service_tools.ServiceNamespaceConfig({'proxy_port': 6666}),
+        ) as read_ns_config_patch:
+            expected = [
+                ('no_test.uno', {'port': 1111, 'proxy_port': 6666}),
+                ('no_test.uno', {'port': 2222, 'proxy_port': 6666}),
+            ]
+            fake_slave_state = {'frameworks': []}
+            assert marathon_tools.get_marathon_services_running_here_for_nerve(
+                cluster, soa_dir, slave_state=fake_slave_state,
+            ) == expected
+            assert marathon_tools.get_marathon_services_running_here_for_nerve(cluster, soa_dir) == expected
+            assert mara_srvs_here_patch.mock_calls == [
+                mock.call(slave_state=fake_slave_state),
+                mock.call(slave_state=None),
+            ]
+            assert get_namespace_patch.call_count == 1
+            assert read_ns_config_patch.call_count == 1
+
+            # a change to the service's soa-configs is picked up by the next run
+            tmpdir.join('no_test', 'service.yaml').setmtime(tmpdir.join('no_test').mtime() + 10)
+            marathon_tools.get_marathon_services_running_here_for_nerve(cluster, soa_dir)
+            assert get_namespace_patch.call_count == 2
+            assert read_ns_config_patch.call_count == 2
+
     def test_get_marathon_services_running_here_for_nerve_when_get_cluster_raises_custom_exception(self):
         cluster = None
         soa_dir = 'the_sound_of_music'
@@ -2095,6 +2142,49 @@ def test_format_marathon_app_dict_no_smartstack():
         assert MarathonApp(**actual)
 
 
+def test_desired_app_cache():
+    fake_system_paasta_config = SystemPaastaConfig({'volumes': []}, '/fake/dir/')
+    desired_app_cache = marathon_tools.DesiredAppCache()
+
+    def make_job_config(docker_image):
+        return marathon_tools.MarathonServiceConfig(
+            service='service',
+            cluster='clustername',
+            instance='instance',
+            config_dict={'instances': 3},
+            branch_dict={'docker_image': docker_image},
+        )
+
+    with mock.patch(
+        'paasta_tools.marathon_tools.load_service_namespace_config', autospec=True,
+        return_value=long_running_service_tools.ServiceNamespaceConfig(),
+    ), mock.patch(
+        'paasta_tools.utils.get_service_docker_registry', autospec=True, return_value='fake_registry',
+    ), mock.patch(
+        'paasta_tools.marathon_tools.load_system_paasta_config', autospec=True,
+        return_value=fake_system_paasta_config,
+    ):
+        uncached = make_job_config('abcdef').format_marathon_app_dict()
+        first = make_job_config('abcdef').format_marathon_app_dict(desired_app_cache=desired_app_cache)
+        first['env']['MUTATED'] = 'true'
+        second = make_job_config('abcdef').format_marathon_app_dict(desired_app_cache=desired_app_cache)
+        assert uncached == second
+        assert (desired_app_cache.misses, desired_app_cache.hits) == (1, 1)
+
+        # the instance count isn't part of the key, it is always looked up again
+        with mock.patch.object(
+            marathon_tools.MarathonServiceConfig, 'get_desired_instances', autospec=True, return_value=5,
+        ):
+            assert make_job_config('abcdef').format_marathon_app_dict(
+                desired_app_cache=desired_app_cache,
+            )['instances'] == 5
+        assert desired_app_cache.hits == 2
+
+        changed = make_job_config('ghijkl').format_marathon_app_dict(desired_app_cache=desired_app_cache)
+        assert desired_app_cache.misses == 2
+        assert changed['id'] != second['id']
+
+
 def test_format_marathon_app_dict_with_smartstack():
     service = "service"
     instance = "instance"
@@ -31,6 +31,7 @@ from paasta_tools.mesos_maintenance import datetime_seconds_from_now
 from paasta_tools.mesos_maintenance import datetime_to_nanoseconds
 from paasta_tools.mesos_maintenance import down
 from paasta_tools.mesos_maintenance import drain
+from paasta_tools.mesos_maintenance import fetch_maintenance_state
 from paasta_tools.mesos_maintenance import friendly_status
 from paasta_tools.mesos_maintenance import get_down_hosts
 from paasta_tools.mesos_maintenance import get_draining_hosts
@@ -41,6 +42,7 @@ from paasta_tools.mesos_maintenance import get_hosts_past_maintenance_start
 from paasta_tools.mesos_maintenance import get_hosts_with_state
 from paasta_tools.mesos_maintenance import get_machine_ids
 from paasta_tools.mesos_maintenance import get_maintenance_schedule
+from paasta_tools.mesos_maintenance import get_maintenance_state
 from paasta_tools.mesos_maintenance import get_maintenance_status
 from paasta_tools.mesos_maintenance import Hostname
 from paasta_tools.mesos_maintenance import hostnames_to_components
@@ -50,6 +52,7 @@ from paasta_tools.mesos_maintenance import is_host_draining
 from paasta_tools.mesos_maintenance import is_host_past_maintenance_end
 from paasta_tools.mesos_maintenance import is_host_past_maintenance_start
 from paasta_tools.mesos_maintenance import load_credentials
+from paasta_tools.mesos_maintenance import MaintenanceState
 from paasta_tools.mesos_maintenance import parse_datetime
 from paasta_tools.mesos_maintenance import parse_timedelta
 from paasta_tools.mesos_maintenance import raw_status
@@ -757,7 +760,7 @@ def test_is_host_drained(
 
     assert not is_host_drained('host1')
     mock_get_count_running_tasks_on_slave.assert_called_with('host1')
-    mock_is_host_draining.assert_called_with(hostname='host1')
+    mock_is_host_draining.assert_called_with(hostname='host1', max_age=None)
 
     mock_is_host_draining.return_value = True
     assert is_host_drained('host2')
@@ -1065,3 +1068,134 @@ def test_are_hosts_forgotten_down(
 
     mock_get_hosts_forgotten_down.return_value = []
     assert not are_hosts_forgotten_down()
+
+
+fake_maintenance_status = {
+    'draining_machines': [
+        {'id': {'hostname': 'draining1', 'ip': '10.0.0.1'}},
+        {'id': {'hostname': 'draining2', 'ip': '10.0.0.2'}},
+    ],
+    'down_machines': [
+        {'hostname': 'down1', 'ip': '10.0.0.3'},
+        {'hostname': 'down2', 'ip': '10.0.0.4'},
+    ],
+}
+fake_maintenance_schedule = {
+    'windows': [
+        {
+            'machine_ids': [{'hostname': 'draining1'}, {'hostname': 'down1'}],
+            'unavailability': {'start': {'nanoseconds': 5}, 'duration': {'nanoseconds': 10}},
+        },
+        {
+            'machine_ids': [{'hostname': 'draining2'}, {'hostname': 'down2'}],
+            'unavailability': {'start': {'nanoseconds': 20}},
+        },
+    ],
+}
+
+
+@mock.patch('paasta_tools.mesos_maintenance.datetime_to_nanoseconds', autospec=True, return_value=18)
+def test_maintenance_state(
+    mock_datetime_to_nanoseconds,
+):
+    state = MaintenanceState(fake_maintenance_status, fake_maintenance_schedule)
+    assert state.draining_hosts == ['draining1', 'draining2']
+    assert state.down_hosts == ['down1', 'down2']
+    assert state.is_host_draining('draining1')
+    assert not state.is_host_draining('down1')
+    assert state.is_host_down('down2')
+    assert not state.is_host_down('draining2')
+
+    assert state.get_hosts_past_maintenance_start() == ['draining1', 'down1']
+    assert state.get_hosts_past_maintenance_end() == ['draining1', 'down1']
+    assert state.get_hosts_past_maintenance_end(grace=5) == []
+    assert state.is_host_past_maintenance_start('down1')
+    assert not state.is_host_past_maintenance_start('down2')
+    assert not state.is_host_past_maintenance_start('unscheduled')
+    assert state.is_host_past_maintenance_end('down1')
+    assert not state.is_host_past_maintenance_end('down1', grace=5)
+
+    assert state.get_hosts_forgotten_draining() == ['draining1']
+    assert state.get_hosts_forgotten_down() == ['down1']
+
+    mock_datetime_to_nanoseconds.return_value = 10 ** 18
+    # The second window has no duration, so it never ends
+    assert state.get_hosts_past_maintenance_end() == ['draining1', 'down1']
+    assert state.get_hosts_forgotten_draining() == ['draining1', 'draining2']
+
+
+def test_maintenance_state_empty():
+    state = MaintenanceState({}, {})
+    assert state.draining_hosts == []
+    assert state.down_hosts == []
+    assert state.get_hosts_past_maintenance_start() == []
+    assert state.get_hosts_forgotten_down() == []
+
+
+@mock.patch('paasta_tools.mesos_maintenance.get_maintenance_schedule', autospec=True)
+@mock.patch('paasta_tools.mesos_maintenance.get_maintenance_status', autospec=True)
+def test_fetch_maintenance_state(
+    mock_get_maintenance_status,
+    mock_get_maintenance_schedule,
+):
+    mock_get_maintenance_status.return_value.json.return_value = fake_maintenance_status
+    mock_get_maintenance_schedule.return_value.json.return_value = fake_maintenance_schedule
+    state = fetch_maintenance_state()
+    assert state.draining_hosts == ['draining1', 'draining2']
+    assert [hostnames for _, __, hostnames in state.windows] == [['draining1', 'down1'], ['draining2', 'down2']]
+
+    mock_get_maintenance_schedule.side_effect = HTTPError
+    with pytest.raises(HTTPError):
+        fetch_maintenance_state()
+
+
+@mock.patch('paasta_tools.mesos_maintenance._maintenance_state', None, autospec=None)
+@mock.patch('paasta_tools.mesos_maintenance.time.time', autospec=True)
+@mock.patch('paasta_tools.mesos_maintenance.fetch_maintenance_state', autospec=True)
+def test_get_maintenance_state_is_shared_until_too_old(
+    mock_fetch_maintenance_state,
+    mock_time,
+):
+    mock_fetch_maintenance_state.side_effect = lambda: MaintenanceState(
+        fake_maintenance_status, {}, fetched_at=mock_time.return_value,
+    )
+    mock_time.return_value = 100
+    first = get_maintenance_state(max_age=10)
+    mock_time.return_value = 110
+    assert get_maintenance_state(max_age=10) is first
+    assert get_draining_hosts(max_age=10) == ['draining1', 'draining2']
+    assert get_down_hosts(max_age=10) == ['down1', 'down2']
+    assert mock_fetch_maintenance_state.call_count == 1
+
+    mock_time.return_value = 111
+    assert get_maintenance_state(max_age=10) is not first
+    assert mock_fetch_maintenance_state.call_count == 2
+
+
+@mock.patch('paasta_tools.mesos_maintenance.get_count_running_tasks_on_slave', autospec=True, return_value=0)
+@mock.patch('paasta_tools.mesos_maintenance.get_maintenance_schedule', autospec=True)
+@mock.patch('paasta_tools.mesos_maintenance.get_maintenance_status', autospec=True)
+@mock.patch('paasta_tools.mesos_maintenance.datetime_to_nanoseconds', autospec=True, return_value=18)
+@mock.patch('paasta_tools.mesos_maintenance.get_maintenance_state', autospec=True)
+def test_host_state_functions_use_shared_state_with_max_age(
+    mock_get_maintenance_state,
+    mock_datetime_to_nanoseconds,
+    mock_get_maintenance_status,
+    mock_get_maintenance_schedule,
+    mock_get_count_running_tasks_on_slave,
+):
+    mock_get_maintenance_state.return_value = MaintenanceState(fake_maintenance_status, fake_maintenance_schedule)
+
+    assert is_host_draining('draining1', max_age=10)
+    assert not is_host_down('draining1', max_age=10)
+    assert is_host_drained('draining1', max_age=10)
+    assert is_host_past_maintenance_start('down1', max_age=10)
+    assert not is_host_past_maintenance_end('down2', max_age=10)
+    assert get_hosts_past_maintenance_start(max_age=10) == ['draining1', 'down1']
+    assert get_hosts_past_maintenance_end(grace=5, max_age=10) == []
+    assert get_hosts_forgotten_draining(max_age=10) == ['draining1']
+    assert get_hosts_forgotten_down(max_age=10) == ['down1']
+
+    assert mock_get_maintenance_state.mock_calls == [mock.call(max_age=10)] * 9
+    assert not mock_get_maintenance_status.called
+    assert not mock_get_maintenance_schedule.called
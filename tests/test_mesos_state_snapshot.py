@@ -0,0 +1,69 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import stat
+
+import mock
+import pytest
+
+from paasta_tools import mesos_state_snapshot
+
+
+def test_write_state_snapshot(tmpdir):
+    path = str(tmpdir.join('snapshots', 'mesos_master_state.json'))
+    mesos_state_snapshot.write_state_snapshot(path, {'slaves': [{'id': 'slave1'}]})
+
+    with open(path) as f:
+        assert f.read() == '{"slaves":[{"id":"slave1"}]}'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert os.listdir(str(tmpdir.join('snapshots'))) == ['mesos_master_state.json']
+
+
+def test_write_state_snapshot_keeps_previous_on_failure(tmpdir):
+    path = str(tmpdir.join('mesos_master_state.json'))
+    mesos_state_snapshot.write_state_snapshot(path, {'slaves': []})
+
+    with pytest.raises(TypeError):
+        mesos_state_snapshot.write_state_snapshot(path, {'slaves': [object()]})
+
+    with open(path) as f:
+        assert json.load(f) == {'slaves': []}
+    assert os.listdir(str(tmpdir)) == ['mesos_master_state.json']
+
+
+@mock.patch('paasta_tools.mesos_state_snapshot.get_mesos_master', autospec=True)
+@mock.patch('paasta_tools.mesos_state_snapshot.get_mesos_config', autospec=True)
+def test_main_once(mock_get_mesos_config, mock_get_mesos_master, tmpdir):
+    path = str(tmpdir.join('mesos_master_state.json'))
+    mock_get_mesos_config.return_value = {'state_snapshot_path': path}
+    mock_get_mesos_master.return_value.state = {'slaves': []}
+
+    mesos_state_snapshot.main([])
+
+    mock_get_mesos_master.assert_called_once_with(use_mesos_cache=False)
+    with open(path) as f:
+        assert json.load(f) == {'slaves': []}
+
+
+@mock.patch('paasta_tools.mesos_state_snapshot.time.sleep', autospec=True)
+@mock.patch('paasta_tools.mesos_state_snapshot.take_state_snapshot', autospec=True)
+def test_main_interval_survives_failures(mock_take_state_snapshot, mock_sleep):
+    mock_take_state_snapshot.side_effect = [Exception('master is down'), None, None]
+    mock_sleep.side_effect = [None, None, StopIteration]
+
+    with pytest.raises(StopIteration):
+        mesos_state_snapshot.main(['--path', '/fake/snapshot.json', '--interval', '10'])
+
+    assert mock_take_state_snapshot.call_args_list == [mock.call('/fake/snapshot.json')] * 3
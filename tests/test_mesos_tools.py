@@ -14,6 +14,7 @@
 import datetime
 import random
 import socket
+import time
 
 import docker
 import mock
@@ -67,8 +68,13 @@ def test_status_mesos_tasks_verbose(test_case):
     ) as format_running_mesos_task_row_patch, mock.patch(
         'paasta_tools.mesos_tools.format_non_running_mesos_task_row', autospec=True,
     ) as format_non_running_mesos_task_row_patch, mock.patch(
-        'paasta_tools.mesos_tools.format_stdstreams_tail_for_task', autospec=True,
-    ) as format_stdstreams_tail_for_task_patch:
+        'paasta_tools.mesos_tools.format_stdstreams_tails_for_tasks', autospec=True,
+    ) as format_stdstreams_tails_for_tasks_patch, mock.patch(
+        'paasta_tools.mesos_tools.get_mesos_config', autospec=True,
+        return_value={'max_workers': 4},
+    ), mock.patch(
+        'paasta_tools.mesos_tools.cluster.get_stats_for_tasks', autospec=True,
+    ) as get_stats_for_tasks_patch:
         get_cached_list_of_running_tasks_from_frameworks_patch.return_value = [{'id': job_id}]
 
         template_task_return = {
@@ -85,7 +91,7 @@ def test_status_mesos_tasks_verbose(test_case):
 
         format_running_mesos_task_row_patch.return_value = ['id', 'host', 'mem', 'cpu', 'time']
         format_non_running_mesos_task_row_patch.return_value = ['id', 'host', 'time', 'state']
-        format_stdstreams_tail_for_task_patch.return_value = ['tail']
+        format_stdstreams_tails_for_tasks_patch.side_effect = lambda tasks, *args, **kwargs: [['tail']] * len(tasks)
 
         actual = mesos_tools.status_mesos_tasks_verbose(
             job_id=job_id,
@@ -94,9 +100,14 @@ def test_status_mesos_tasks_verbose(test_case):
         )
         assert 'Running Tasks' in actual
         assert 'Non-Running Tasks' in actual
-        format_running_mesos_task_row_patch.assert_called_once_with({'id': job_id}, mock.sentinel.get_short_task_id)
+        get_stats_for_tasks_patch.assert_called_once_with([{'id': job_id}], max_workers=4)
+        format_running_mesos_task_row_patch.assert_called_once_with(
+            {'id': job_id}, mock.sentinel.get_short_task_id, stats_by_task_id=get_stats_for_tasks_patch.return_value,
+        )
         assert format_non_running_mesos_task_row_patch.call_count == 10  # maximum n of tasks we display
-        assert format_stdstreams_tail_for_task_patch.call_count == expected_format_tail_call_count
+        assert sum(
+            len(call[0][0]) for call in format_stdstreams_tails_for_tasks_patch.call_args_list
+        ) == expected_format_tail_call_count
 
 
 def test_get_cpu_usage_good():
@@ -174,6 +185,51 @@ def test_get_mem_usage_divide_by_zero():
     assert actual == "Undef"
 
 
+def test_get_usage_from_fetched_stats():
+    fake_task = mock.create_autospec(mesos.task.Task)
+    current_time = datetime.datetime.now()
+    fake_task.__getitem__.return_value = [{
+        'state': 'TASK_RUNNING',
+        'timestamp': int(current_time.strftime('%s')) - 100,
+    }]
+    stats = {
+        'mem_rss_bytes': 1024 * 1024 * 10,
+        'mem_limit_bytes': 1024 * 1024 * 100,
+        'cpus_limit': .35,
+        'cpus_system_time_secs': 2.5,
+    }
+    assert mesos_tools.get_mem_usage(fake_task, stats) == '10/100MB'
+    with mock.patch('paasta_tools.mesos_tools.datetime.datetime', autospec=True) as mock_datetime:
+        mock_datetime.now.return_value = current_time
+        assert mesos_tools.get_cpu_usage(fake_task, stats) == '10.0%'
+
+
+@mock.patch('paasta_tools.mesos_tools.get_first_status_timestamp', autospec=True, return_value='time')
+@mock.patch('paasta_tools.mesos_tools.get_short_hostname_from_task', autospec=True, return_value='host')
+@mock.patch('paasta_tools.mesos_tools.get_cpu_usage', autospec=True, return_value='cpu')
+@mock.patch('paasta_tools.mesos_tools.get_mem_usage', autospec=True, return_value='mem')
+def test_format_running_mesos_task_row_with_fetched_stats(
+    mock_get_mem_usage,
+    mock_get_cpu_usage,
+    mock_get_short_hostname_from_task,
+    mock_get_first_status_timestamp,
+):
+    task = {'id': 'task1'}
+    stats_by_task_id = {'task1': mock.sentinel.stats}
+    assert mesos_tools.format_running_mesos_task_row(task, str.upper, stats_by_task_id) == (
+        'TASK1', 'host', 'mem', 'cpu', 'time',
+    )
+    mock_get_mem_usage.assert_called_once_with(task, mock.sentinel.stats)
+    mock_get_cpu_usage.assert_called_once_with(task, mock.sentinel.stats)
+
+    # The agent of a task missing from the stats couldn't be reached
+    mock_get_mem_usage.reset_mock()
+    assert mesos_tools.format_running_mesos_task_row({'id': 'task2'}, str.upper, stats_by_task_id) == (
+        'TASK2', 'host', 'None', 'None', 'time',
+    )
+    assert not mock_get_mem_usage.called
+
+
 def test_get_zookeeper_config():
     zk_hosts = '1.1.1.1:1111,2.2.2.2:2222,3.3.3.3:3333'
     zk_path = 'fake_path'
@@ -282,6 +338,18 @@ def test_get_local_slave_state_connection_error(
         mesos_tools.get_local_slave_state()
 
 
+def test_get_slaves():
+    with mock.patch('paasta_tools.mesos_tools.get_mesos_master', autospec=True) as mock_get_master:
+        mock_get_master.return_value.fetch.return_value.json.return_value = {'slaves': ['fetched']}
+        mock_get_master.return_value.state = {'slaves': ['cached']}
+        assert mesos_tools.get_slaves() == ['fetched']
+        mock_get_master.assert_called_once_with()
+        mock_get_master.return_value.fetch.assert_called_once_with('/master/slaves')
+
+        assert mesos_tools.get_slaves(use_mesos_cache=True) == ['cached']
+        mock_get_master.assert_called_with(use_mesos_cache=True)
+
+
 def test_get_mesos_slaves_grouped_by_attribute():
     fake_value_1 = 'fake_value_1'
     fake_value_2 = 'fake_value_2'
@@ -540,11 +608,9 @@ def test_format_stdstreams_tail_for_task(
         returns a list of mesos.cli.mesos_file.File
         `File` is an iterator-like object.
         """
-        fake_iter = mock.MagicMock()
-        fake_iter.return_value = reversed(file_lines)
         fobj = mock.create_autospec(mesos.mesos_file.File)
         fobj.path = file_path
-        fobj.__reversed__ = fake_iter
+        fobj.tail.side_effect = lambda nlines: file_lines[-nlines:]
         return fobj
 
     def get_short_task_id(task_id):
@@ -592,6 +658,29 @@ def test_format_stdstreams_tail_for_task(
             assert result == expected
 
 
+def test_format_stdstreams_tails_for_tasks():
+    def fake_format_stdstreams_tail_for_task(task, get_short_task_id, nlines, max_workers):
+        if task['id'] == 'slow_task':
+            time.sleep(1)
+        return ['%s tail of %d lines' % (task['id'], nlines)]
+
+    tasks = [{'id': 'task1'}, {'id': 'slow_task'}, {'id': 'task2'}]
+    with mock.patch(
+        'paasta_tools.mesos_tools.get_mesos_config', autospec=True,
+        return_value={'max_workers': 3},
+    ), mock.patch(
+        'paasta_tools.mesos_tools._format_stdstreams_tail_for_task', autospec=True,
+        side_effect=fake_format_stdstreams_tail_for_task,
+    ), mock.patch(
+        'paasta_tools.mesos_tools.STDSTREAMS_TAIL_TIMEOUT_S', 0.1, autospec=None,
+    ):
+        assert mesos_tools.format_stdstreams_tails_for_tasks(tasks, lambda task_id: task_id, nlines=5) == [
+            ['task1 tail of 5 lines'],
+            [PaastaColors.red("      couldn't read stdout/stderr for slow_task (timeout)")],
+            ['task2 tail of 5 lines'],
+        ]
+
+
 def test_slave_pid_to_ip():
     ret = mesos_tools.slave_pid_to_ip('slave(1)@10.40.31.172:5051')
     assert ret == '10.40.31.172'
@@ -685,6 +774,39 @@ def test_get_mesos_task_count_by_slave():
         assert len(ret) == len(expected) and utils.sort_dicts(ret) == utils.sort_dicts(expected)
 
 
+def test_get_mesos_task_count_by_slave_from_full_state():
+    with mock.patch('paasta_tools.mesos_tools.get_all_running_tasks', autospec=True) as mock_get_all_running_tasks:
+        mock_slave_1 = {'id': 'slave1', 'attributes': {'pool': 'default'}, 'hostname': 'host1'}
+        mock_slave_2 = {'id': 'slave2', 'attributes': {'pool': 'default'}, 'hostname': 'host2'}
+        mock_mesos_state = {
+            'slaves': [mock_slave_1, mock_slave_2],
+            'frameworks': [
+                {
+                    'name': 'chronos',
+                    'tasks': [{'slave_id': 'slave1', 'state': 'TASK_RUNNING'}],
+                    'completed_tasks': [{'slave_id': 'slave1', 'state': 'TASK_FINISHED'}],
+                },
+                {
+                    'name': 'marathon',
+                    'tasks': [
+                        {'slave_id': 'slave1', 'state': 'TASK_RUNNING'},
+                        {'slave_id': 'slave2', 'state': 'TASK_RUNNING'},
+                        {'slave_id': 'slave2', 'state': 'TASK_STAGING'},
+                        {'slave_id': 'gone', 'state': 'TASK_RUNNING'},
+                    ],
+                },
+            ],
+            'orphan_tasks': [{'slave_id': 'slave2', 'state': 'TASK_RUNNING'}],
+        }
+        ret = mesos_tools.get_mesos_task_count_by_slave(mock_mesos_state, pool='default')
+        assert not mock_get_all_running_tasks.called
+        expected = [
+            {'task_counts': mesos_tools.SlaveTaskCount(count=2, chronos_count=1, slave=mock_slave_1)},
+            {'task_counts': mesos_tools.SlaveTaskCount(count=2, chronos_count=0, slave=mock_slave_2)},
+        ]
+        assert len(ret) == len(expected) and utils.sort_dicts(ret) == utils.sort_dicts(expected)
+
+
 def test_get_count_running_tasks_on_slave():
     with mock.patch(
         'paasta_tools.mesos_tools.get_mesos_master', autospec=True,
@@ -11,6 +11,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
+import socket
+
 import mock
 
 from paasta_tools import chronos_tools
@@ -251,6 +254,38 @@ class TestMonitoring_Tools:
             service_configuration_lib_patch.assert_called_once_with(self.service, soa_dir=self.soa_dir)
             read_monitoring_patch.assert_called_once_with(self.service, soa_dir=self.soa_dir)
 
+    def test_use_monitoring_config_cache(self):
+        @monitoring_tools.use_monitoring_config_cache
+        def check_run():
+            return [
+                monitoring_tools.get_team(self.overrides, self.service, self.soa_dir),
+                monitoring_tools.get_runbook(self.overrides, self.service, self.soa_dir),
+                monitoring_tools.get_sensu_team_data('monitor_test_team'),
+                monitoring_tools.get_sensu_team_data('other_team'),
+            ]
+
+        with mock.patch(
+            'service_configuration_lib.read_service_configuration', autospec=True,
+            return_value=self.fake_general_service_config,
+        ) as service_configuration_lib_patch, mock.patch(
+            'paasta_tools.monitoring_tools.read_monitoring_config',
+            autospec=True, return_value=self.fake_monitor_config,
+        ) as read_monitoring_patch, mock.patch(
+            'paasta_tools.monitoring_tools._load_sensu_team_data', autospec=True,
+            return_value={'team_data': {'monitor_test_team': {'notification_email': 'fake@email'}}},
+        ) as load_sensu_team_data_patch:
+            assert check_run() == [
+                'monitor_test_team', 'y/monitor_test_runbook', {'notification_email': 'fake@email'}, {},
+            ]
+            assert service_configuration_lib_patch.call_count == 1
+            assert read_monitoring_patch.call_count == 1
+            assert load_sensu_team_data_patch.call_count == 1
+
+            # Nothing is cached outside of the decorated function
+            monitoring_tools.get_team(self.overrides, self.service, self.soa_dir)
+            monitoring_tools.get_team(self.overrides, self.service, self.soa_dir)
+            assert service_configuration_lib_patch.call_count == 3
+
     def test_get_team_email_address_uses_override_if_specified(self):
         fake_email = 'fake_email'
         with mock.patch(
@@ -455,6 +490,46 @@ class TestMonitoring_Tools:
 
             assert pysensu_yelp_send_event_patch.call_count == 0
 
+    def test_send_event_to_fake_sensu_listener(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(5)
+
+        @monitoring_tools.use_monitoring_config_cache
+        def check_run():
+            for instance in ('main', 'canary'):
+                monitoring_tools.send_event(
+                    self.service, 'check_thing.%s' % instance, {}, 2, 'CRIT: %s' % instance, self.soa_dir,
+                )
+
+        with listener, mock.patch(
+            'service_configuration_lib.read_service_configuration', autospec=True,
+            return_value=self.fake_general_service_config,
+        ), mock.patch(
+            'paasta_tools.monitoring_tools.read_monitoring_config',
+            autospec=True, return_value=self.fake_monitor_config,
+        ) as read_monitoring_patch, mock.patch(
+            'paasta_tools.monitoring_tools.load_system_paasta_config', autospec=True,
+        ) as load_system_paasta_config_patch:
+            load_system_paasta_config_patch.return_value.get_cluster.return_value = 'fake_cluster'
+            load_system_paasta_config_patch.return_value.get_sensu_host.return_value = '127.0.0.1'
+            load_system_paasta_config_patch.return_value.get_sensu_port.return_value = listener.getsockname()[1]
+            check_run()
+            # The connections wait in the listen backlog until they are accepted
+            received = []
+            for _ in range(2):
+                connection, _ = listener.accept()
+                with connection, connection.makefile('rb') as f:
+                    received.append(json.loads(f.read().decode('utf-8')))
+
+            assert [(event['name'], event['output'], event['team']) for event in received] == [
+                ('check_thing.main', 'CRIT: main', 'monitor_test_team'),
+                ('check_thing.canary', 'CRIT: canary', 'monitor_test_team'),
+            ]
+            assert all(event['source'] == 'paasta-fake_cluster' for event in received)
+            assert load_system_paasta_config_patch.call_count == 1
+            assert read_monitoring_patch.call_count == 1
+
     def test_read_monitoring_config(self):
         fake_name = 'partial'
         fake_fname = 'acronyms'
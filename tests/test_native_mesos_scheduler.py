@@ -113,7 +113,7 @@ def test_get_paasta_native_services_running_here_for_nerve():
     ) as read_ns_config_patch:
         actual = native_mesos_scheduler.get_paasta_native_services_running_here_for_nerve(cluster, soa_dir)
         assert expected == actual
-        pnsrh_patch.assert_called_once_with(hostname=None)
+        pnsrh_patch.assert_called_once_with(hostname=None, slave_state=None)
         get_namespace_patch.assert_any_call('no_test', 'left_behind', cluster, soa_dir)
         get_namespace_patch.assert_any_call('no_docstrings', 'forever_abandoned', cluster, soa_dir)
         assert get_namespace_patch.call_count == 2
@@ -160,7 +160,7 @@ def test_get_paasta_native_services_running_here_for_nerve_multiple_namespaces()
     ) as read_ns_config_patch:
         actual = native_mesos_scheduler.get_paasta_native_services_running_here_for_nerve(cluster, soa_dir)
         assert expected == actual
-        pnsrh_patch.assert_called_once_with(hostname=None)
+        pnsrh_patch.assert_called_once_with(hostname=None, slave_state=None)
         get_namespace_patch.assert_any_call('no_test', 'left_behind', cluster, soa_dir)
         get_namespace_patch.assert_any_call('no_docstrings', 'forever_abandoned', cluster, soa_dir)
         assert get_namespace_patch.call_count == 2
@@ -202,7 +202,7 @@ def test_get_paasta_native_services_running_here_for_nerve_when_not_in_smartstac
     ) as read_ns_config_patch:
         actual = native_mesos_scheduler.get_paasta_native_services_running_here_for_nerve(cluster, soa_dir)
         assert expected == actual
-        pnsrh_patch.assert_called_once_with(hostname=None)
+        pnsrh_patch.assert_called_once_with(hostname=None, slave_state=None)
         get_namespace_patch.assert_any_call('no_test', 'left_behind', cluster, soa_dir)
         get_namespace_patch.assert_any_call('no_docstrings', 'forever_abandoned', cluster, soa_dir)
         assert get_namespace_patch.call_count == 2
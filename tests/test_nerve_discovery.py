@@ -0,0 +1,103 @@
+# Copyright 2015-2017 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import mock
+
+from paasta_tools import nerve_discovery
+from paasta_tools.long_running_service_tools import ServiceNamespaceConfig
+
+
+def test_get_services_running_here_for_nerve():
+    fake_slave_state = {'frameworks': []}
+    with mock.patch(
+        'paasta_tools.nerve_discovery.get_local_slave_state', autospec=True, return_value=fake_slave_state,
+    ) as mock_get_local_slave_state, mock.patch(
+        'paasta_tools.nerve_discovery.marathon_tools.get_marathon_services_running_here_for_nerve', autospec=True,
+        return_value=[('marathon.main', ServiceNamespaceConfig())],
+    ) as mock_marathon, mock.patch(
+        'paasta_tools.nerve_discovery.native_mesos_scheduler.get_paasta_native_services_running_here_for_nerve',
+        autospec=True,
+        return_value=[('native.main', ServiceNamespaceConfig())],
+    ) as mock_native, mock.patch(
+        'paasta_tools.nerve_discovery.marathon_tools.get_puppet_services_running_here_for_nerve', autospec=True,
+        return_value=[('puppet.main', ServiceNamespaceConfig())],
+    ), mock.patch(
+        'paasta_tools.nerve_discovery.marathon_tools.get_classic_services_running_here_for_nerve', autospec=True,
+        return_value=[('classic.main', ServiceNamespaceConfig())],
+    ):
+        entries = nerve_discovery.get_services_running_here_for_nerve('fake_cluster', '/fake/soa', hostname='host1')
+
+    assert [name for name, _ in entries] == ['marathon.main', 'native.main', 'puppet.main', 'classic.main']
+    mock_get_local_slave_state.assert_called_once_with(hostname='host1')
+    mock_marathon.assert_called_once_with('fake_cluster', '/fake/soa', slave_state=fake_slave_state)
+    mock_native.assert_called_once_with(
+        'fake_cluster', '/fake/soa', hostname='host1', slave_state=fake_slave_state,
+    )
+
+
+def test_get_services_running_here_for_nerve_without_cluster():
+    with mock.patch(
+        'paasta_tools.nerve_discovery.load_system_paasta_config', autospec=True,
+    ) as mock_load_system_paasta_config, mock.patch(
+        'paasta_tools.nerve_discovery.get_local_slave_state', autospec=True,
+    ) as mock_get_local_slave_state, mock.patch(
+        'paasta_tools.nerve_discovery.marathon_tools.get_marathon_services_running_here_for_nerve', autospec=True,
+        return_value=[],
+    ), mock.patch(
+        'paasta_tools.nerve_discovery.native_mesos_scheduler.get_paasta_native_services_running_here_for_nerve',
+        autospec=True,
+        return_value=[],
+    ), mock.patch(
+        'paasta_tools.nerve_discovery.marathon_tools.get_puppet_services_running_here_for_nerve', autospec=True,
+        return_value=[],
+    ), mock.patch(
+        'paasta_tools.nerve_discovery.marathon_tools.get_classic_services_running_here_for_nerve', autospec=True,
+        return_value=[('classic.main', ServiceNamespaceConfig())],
+    ):
+        mock_load_system_paasta_config.return_value.get_cluster.side_effect = nerve_discovery.PaastaNotConfiguredError
+        entries = nerve_discovery.get_services_running_here_for_nerve(None, '/fake/soa')
+
+    assert entries == [('classic.main', ServiceNamespaceConfig())]
+    assert mock_get_local_slave_state.call_count == 0
+
+
+def test_get_nerve_changes():
+    runs = [
+        [
+            ('a.main', ServiceNamespaceConfig({'proxy_port': 1, 'port': 1111})),
+            ('b.main', ServiceNamespaceConfig({'proxy_port': 2, 'port': 2222})),
+        ],
+        [
+            ('a.main', ServiceNamespaceConfig({'proxy_port': 1, 'port': 1111})),
+            ('b.main', ServiceNamespaceConfig({'proxy_port': 3, 'port': 2222})),
+            ('c.main', ServiceNamespaceConfig({'proxy_port': 4, 'port': 4444})),
+        ],
+        [
+            ('c.main', ServiceNamespaceConfig({'proxy_port': 4, 'port': 4444})),
+        ],
+    ]
+    with mock.patch(
+        'paasta_tools.nerve_discovery.get_services_running_here_for_nerve', autospec=True,
+        side_effect=runs,
+    ), mock.patch.dict(nerve_discovery._last_nerve_entries, clear=True):
+        changes = nerve_discovery.get_nerve_changes('fake_cluster', '/fake/soa')
+        assert changes.added == runs[0]
+        assert changes.removed == []
+
+        changes = nerve_discovery.get_nerve_changes('fake_cluster', '/fake/soa')
+        assert changes.added == [runs[1][1], runs[1][2]]
+        assert changes.removed == [runs[0][1]]
+
+        changes = nerve_discovery.get_nerve_changes('fake_cluster', '/fake/soa')
+        assert changes.added == []
+        assert changes.removed == [runs[1][0], runs[1][1]]
@@ -17,6 +17,7 @@ import pytest
 from mock import Mock
 from mock import patch
 
+from paasta_tools.container_metadata_cache import ContainerMetadata
 from paasta_tools.oom_logger import capture_oom_events_from_stdin
 from paasta_tools.oom_logger import log_to_scribe
 from paasta_tools.oom_logger import LogLine
@@ -82,8 +83,13 @@ def sys_stdin_without_process_name():
 
 
 @pytest.fixture
-def docker_inspect():
-    return {'Config': {'Env': ['PAASTA_SERVICE=fake_service', 'PAASTA_INSTANCE=fake_instance']}}
+def container_metadata():
+    return ContainerMetadata(
+        container_id='a687af92e281725daf5b4cda0b487f20d2055d2bb6814b76d0e39c18a52a4e79',
+        service='fake_service',
+        instance='fake_instance',
+        task_id='fake_service.fake_instance.gitdeadbeef.configdeadbeef.1234',
+    )
 
 
 @pytest.fixture
@@ -167,26 +173,55 @@ def test_log_to_scribe(log_line):
 @patch('paasta_tools.oom_logger.load_system_paasta_config', autospec=True)
 @patch('paasta_tools.oom_logger.log_to_scribe', autospec=True)
 @patch('paasta_tools.oom_logger.log_to_paasta', autospec=True)
+@patch('paasta_tools.oom_logger.ContainerMetadataCache', autospec=True)
 @patch('paasta_tools.oom_logger.get_docker_client', autospec=True)
 def test_main(
     mock_get_docker_client,
+    mock_container_metadata_cache,
     mock_log_to_paasta,
     mock_log_to_scribe,
     mock_load_system_paasta_config,
     mock_scribelogger,
     mock_sys_stdin,
     sys_stdin,
-    docker_inspect,
+    container_metadata,
     log_line,
 ):
 
-    mock_sys_stdin.readline.side_effect = sys_stdin
-    docker_client = Mock(inspect_container=Mock(return_value=docker_inspect))
-    mock_get_docker_client.return_value = docker_client
+    mock_sys_stdin.readline.side_effect = sys_stdin + ['']
+    mock_container_metadata_cache.return_value.get.return_value = container_metadata
     mock_load_system_paasta_config.return_value.get_cluster.return_value = 'fake_cluster'
     scribe_logger = Mock()
     mock_scribelogger.return_value = scribe_logger
 
     main()
+    mock_container_metadata_cache.assert_called_once_with(mock_get_docker_client.return_value)
+    assert mock_container_metadata_cache.return_value.start.called
+    mock_container_metadata_cache.return_value.get.assert_called_once_with('a687af92e281')
     mock_log_to_paasta.assert_called_once_with(log_line)
     mock_log_to_scribe.assert_called_once_with(scribe_logger, log_line)
+
+
+@patch('paasta_tools.oom_logger.sys.stdin', autospec=True)
+@patch('paasta_tools.oom_logger.ScribeLogger', autospec=True)
+@patch('paasta_tools.oom_logger.load_system_paasta_config', autospec=True)
+@patch('paasta_tools.oom_logger.log_to_scribe', autospec=True)
+@patch('paasta_tools.oom_logger.log_to_paasta', autospec=True)
+@patch('paasta_tools.oom_logger.ContainerMetadataCache', autospec=True)
+@patch('paasta_tools.oom_logger.get_docker_client', autospec=True)
+def test_main_unknown_container(
+    mock_get_docker_client,
+    mock_container_metadata_cache,
+    mock_log_to_paasta,
+    mock_log_to_scribe,
+    mock_load_system_paasta_config,
+    mock_scribelogger,
+    mock_sys_stdin,
+    sys_stdin,
+):
+    mock_sys_stdin.readline.side_effect = sys_stdin + ['']
+    mock_container_metadata_cache.return_value.get.return_value = None
+
+    main()
+    assert not mock_log_to_paasta.called
+    assert not mock_log_to_scribe.called
@@ -39,6 +39,32 @@ def test_is_safe_to_kill(
     assert paasta_maintenance.is_safe_to_kill('blah')
 
 
+@mock.patch('paasta_tools.paasta_maintenance.get_mesos_task_count_by_slave', autospec=True)
+@mock.patch('paasta_tools.paasta_maintenance.get_mesos_master', autospec=True)
+@mock.patch('paasta_tools.mesos_maintenance.get_draining_hosts', autospec=True)
+@mock.patch('paasta_tools.mesos_maintenance.get_hosts_past_maintenance_start', autospec=True)
+def test_get_hosts_safe_to_kill(
+    mock_get_hosts_past_maintenance_start,
+    mock_get_draining_hosts,
+    mock_get_mesos_master,
+    mock_get_mesos_task_count_by_slave,
+):
+    mock_get_hosts_past_maintenance_start.return_value = ['past', 'other']
+    mock_get_draining_hosts.return_value = ['past', 'drained', 'busy', 'unknown']
+    mock_get_mesos_task_count_by_slave.return_value = [
+        {'task_counts': mock.Mock(slave={'hostname': 'drained'}, count=0)},
+        {'task_counts': mock.Mock(slave={'hostname': 'busy'}, count=3)},
+        {'task_counts': mock.Mock(slave={'hostname': 'past'}, count=3)},
+    ]
+    ret = paasta_maintenance.get_hosts_safe_to_kill(['past', 'drained', 'busy', 'unknown', 'notdraining'])
+    assert ret == {'past', 'drained', 'unknown'}
+    mock_get_mesos_task_count_by_slave.assert_called_once_with(mock_get_mesos_master.return_value.state)
+
+    mock_get_mesos_task_count_by_slave.reset_mock()
+    assert paasta_maintenance.get_hosts_safe_to_kill(['past']) == {'past'}
+    assert not mock_get_mesos_task_count_by_slave.called
+
+
 @mock.patch('paasta_tools.paasta_maintenance.is_hostname_local', autospec=True)
 def test_is_safe_to_drain_rejects_non_localhosts(
     mock_is_hostname_local,
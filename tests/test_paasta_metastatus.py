@@ -122,3 +122,9 @@ def test_main_marathon_jsondecode_error():
         with raises(SystemExit) as excinfo:
             paasta_metastatus.main(())
         assert excinfo.value.code == 2
+
+
+def test_parse_args_uses_mesos_cache_by_default():
+    assert paasta_metastatus.parse_args([]).use_mesos_cache is True
+    assert paasta_metastatus.parse_args(['--use-mesos-cache']).use_mesos_cache is True
+    assert paasta_metastatus.parse_args(['--no-use-mesos-cache']).use_mesos_cache is False
@@ -15,14 +15,17 @@
 import copy
 
 import mock
+import pytest
 from pysensu_yelp import Status
 from pytest import raises
 
 from paasta_tools import chronos_tools
 from paasta_tools import setup_chronos_job
+from paasta_tools.mesos.exceptions import NoSlavesAvailableError
 from paasta_tools.utils import compose_job_id
 from paasta_tools.utils import NoConfigurationForServiceError
 from paasta_tools.utils import NoDeploymentsAvailable
+from paasta_tools.utils import NoDockerImageError
 
 
 class TestSetupChronosJob:
@@ -238,6 +241,40 @@ class TestSetupChronosJob:
                 output=expected_error_msg,
             )
 
+    @pytest.mark.parametrize('create_complete_config_side_effect,setup_job_status,expected', [
+        (None, 0, 0),
+        (None, 1, 1),
+        (NoDeploymentsAvailable, 0, 0),
+        (NoDockerImageError, 0, 0),
+        (NoConfigurationForServiceError('test bad configuration'), 0, 0),
+        (NoSlavesAvailableError('no slaves'), 0, 0),
+        (chronos_tools.InvalidParentError, 0, 0),
+    ])
+    def test_deploy_chronos_job_exit_codes(self, create_complete_config_side_effect, setup_job_status, expected):
+        with mock.patch(
+            'paasta_tools.chronos_tools.create_complete_config',
+            return_value={},
+            autospec=True,
+            side_effect=create_complete_config_side_effect,
+        ), mock.patch(
+            'paasta_tools.setup_chronos_job.config_with_historical_stats',
+            return_value={},
+            autospec=True,
+        ), mock.patch(
+            'paasta_tools.setup_chronos_job.setup_job',
+            return_value=(setup_job_status, 'output'),
+            autospec=True,
+        ), mock.patch(
+            'paasta_tools.setup_chronos_job.send_event', autospec=True,
+        ):
+            assert setup_chronos_job.deploy_chronos_job(
+                service=self.fake_service,
+                instance=self.fake_instance,
+                client=self.fake_client,
+                cluster=self.fake_cluster,
+                soa_dir=self.fake_args.soa_dir,
+            ) == expected
+
     def test_setup_job_new_app_with_no_previous_jobs(self):
         fake_existing_jobs = []
         with mock.patch(
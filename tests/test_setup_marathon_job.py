@@ -126,6 +126,7 @@ class TestSetupMarathonJob:
                 job_config=self.fake_marathon_service_config,
                 marathon_apps_with_clients=[],
                 soa_dir='no_more',
+                system_paasta_config=load_system_paasta_config_patch.return_value,
             )
             sys_exit_patch.assert_called_once_with(0)
 
@@ -182,6 +183,7 @@ class TestSetupMarathonJob:
                 job_config=self.fake_marathon_service_config,
                 marathon_apps_with_clients=[],
                 soa_dir='no_more',
+                system_paasta_config=load_system_paasta_config_patch.return_value,
             )
             sys_exit_patch.assert_called_once_with(0)
 
@@ -1211,7 +1213,7 @@ class TestSetupMarathonJob:
                 marathon_apps_with_clients=None,
                 soa_dir=None,
             )
-            format_marathon_app_dict_patch.assert_called_once_with()
+            format_marathon_app_dict_patch.assert_called_once_with(system_paasta_config=None)
             assert deploy_service_patch.call_count == 1
 
     def test_setup_service_srv_does_not_exist(self):
@@ -1292,7 +1294,7 @@ class TestSetupMarathonJob:
 
             get_bounce_patch.assert_called_once_with()
             get_bounce_margin_factor_patch.assert_called_once_with()
-            format_marathon_app_dict_patch.assert_called_once_with()
+            format_marathon_app_dict_patch.assert_called_once_with(system_paasta_config=None)
             get_drain_method_patch.assert_called_once_with(read_namespace_conf_patch.return_value)
             deploy_service_patch.assert_called_once_with(
                 service=fake_name,
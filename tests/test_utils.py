@@ -49,6 +49,15 @@ def test_get_git_url_default():
         mock_read_service_configuration.assert_called_once_with(service, soa_dir=utils.DEFAULT_SOA_DIR)
 
 
+def test_get_service_config_mtime(tmpdir):
+    service_dir = tmpdir.mkdir('fake_service')
+    service_dir.join('marathon-fake_cluster.yaml').write('')
+    os.utime(str(service_dir.join('marathon-fake_cluster.yaml')), (1000, 1000))
+    os.utime(str(service_dir), (500, 500))
+    assert utils.get_service_config_mtime('fake_service', str(tmpdir)) == 1000
+    assert utils.get_service_config_mtime('missing_service', str(tmpdir)) is None
+
+
 def test_format_log_line():
     input_line = 'foo'
     fake_cluster = 'fake_cluster'
@@ -137,6 +146,66 @@ def test_ScribeLogWriter_log_raise_on_unknown_level():
         utils.ScribeLogWriter().log('fake_service', 'fake_line', 'build', 'BOGUS_LEVEL')
 
 
+class TestAsyncScribeLogWriter:
+    def test_log_raise_on_unknown_level(self):
+        with raises(utils.NoSuchLogLevel):
+            utils.AsyncScribeLogWriter().log('fake_service', 'fake_line', 'build', 'BOGUS_LEVEL')
+
+    def test_log_sends_lines_in_background(self):
+        writer = utils.AsyncScribeLogWriter()
+        writer.clog = mock.Mock()
+        with mock.patch(
+            'paasta_tools.utils.format_log_line', side_effect=['line1', 'line2', 'line3'], autospec=True,
+        ), mock.patch('paasta_tools.utils.paasta_print', autospec=True):
+            writer.log('service1', 'fake_line', 'build')
+            writer.log('service2', 'fake_line', 'build', level='debug')
+            writer.log('service1', 'fake_line', 'build')
+        assert writer.flush(timeout=5)
+        assert writer.sent == 3
+        assert sorted(writer.clog.log_line.call_args_list) == sorted([
+            mock.call('stream_paasta_service1', 'line1'),
+            mock.call('stream_paasta_service2', 'line2'),
+            mock.call('stream_paasta_service1', 'line3'),
+        ])
+
+    def test_send_batch_groups_lines_by_stream(self):
+        with mock.patch('paasta_tools.utils.AsyncScribeLogWriter._send_forever', autospec=True):
+            writer = utils.AsyncScribeLogWriter()
+        writer.clog = mock.Mock()
+        writer.send_batch([('stream_a', 'line1'), ('stream_b', 'line2'), ('stream_a', 'line3')])
+        assert writer.clog.log_line.call_args_list == [
+            mock.call('stream_a', 'line1'),
+            mock.call('stream_a', 'line3'),
+            mock.call('stream_b', 'line2'),
+        ]
+
+    def test_send_batch_counts_errors(self):
+        with mock.patch('paasta_tools.utils.AsyncScribeLogWriter._send_forever', autospec=True):
+            writer = utils.AsyncScribeLogWriter()
+        writer.clog = mock.Mock()
+        writer.clog.log_line.side_effect = [IOError('scribe is down'), None]
+        with mock.patch('paasta_tools.utils.paasta_print', autospec=True) as mock_print:
+            writer.send_batch([('stream_a', 'line1'), ('stream_a', 'line2')])
+        assert writer.errors == 1
+        assert writer.sent == 1
+        mock_print.assert_called_once_with(
+            'Could not log to scribe stream stream_a: OSError: scribe is down',
+            file=sys.stderr,
+        )
+
+    def test_log_drops_lines_when_queue_is_full(self):
+        with mock.patch('paasta_tools.utils.AsyncScribeLogWriter._send_forever', autospec=True):
+            writer = utils.AsyncScribeLogWriter(queue_size=1)
+        with mock.patch(
+            'paasta_tools.utils.format_log_line', return_value='line', autospec=True,
+        ), mock.patch('paasta_tools.utils.paasta_print', autospec=True):
+            writer.log('service', 'fake_line', 'build')
+            writer.log('service', 'fake_line', 'build')
+        assert writer.dropped == 1
+        assert writer.blocked == 0
+        assert not writer.flush(timeout=0)
+
+
 def test_get_log_name_for_service():
     service = 'foo'
     expected = 'stream_paasta_%s' % service
@@ -1797,6 +1866,92 @@ class TestFileLogWriter:
         }
 
 
+class TestBufferedFileLogWriter:
+    def make_writer(self, tmpdir, **kwargs):
+        return utils.BufferedFileLogWriter(str(tmpdir.join("{service}.log")), flush_interval=3600, **kwargs)
+
+    def test_buffers_until_flush(self, tmpdir):
+        fw = self.make_writer(tmpdir)
+        with mock.patch("paasta_tools.utils.format_log_line", side_effect=["line1", "line2"], autospec=True):
+            fw.log("service", "line", "component")
+            fw.log("service", "line", "component")
+        assert not tmpdir.join("service.log").exists()
+
+        fw.flush()
+        assert tmpdir.join("service.log").read() == "line1\nline2\n"
+        fw.close()
+
+    def test_flushes_when_buffer_is_full(self, tmpdir):
+        fw = self.make_writer(tmpdir, max_buffer_bytes=10)
+        with mock.patch("paasta_tools.utils.format_log_line", side_effect=["line1", "line2"], autospec=True):
+            fw.log("service", "line", "component")
+            assert not tmpdir.join("service.log").exists()
+            fw.log("service", "line", "component")
+        assert tmpdir.join("service.log").read() == "line1\nline2\n"
+        fw.close()
+
+    def test_flush_makes_exactly_one_write_call_per_path(self, tmpdir):
+        fw = self.make_writer(tmpdir)
+        with mock.patch("paasta_tools.utils.format_log_line", return_value="line", autospec=True):
+            for _ in range(10):
+                fw.log("service1", "line", "component")
+                fw.log("service2", "line", "component")
+
+        mock_file = mock.Mock()
+        with mock.patch.object(fw, '_get_file', return_value=mock_file, autospec=True):
+            fw.flush()
+        assert mock_file.write.call_count == 2
+        mock_file.write.assert_called_with(b"line\n" * 10)
+        fw.close()
+
+    def test_keeps_at_most_max_open_files(self, tmpdir):
+        fw = self.make_writer(tmpdir, max_open_files=2)
+        with mock.patch("paasta_tools.utils.format_log_line", return_value="line", autospec=True):
+            for service in ("a", "b", "c", "a"):
+                fw.log(service, "line", "component")
+                fw.flush()
+        assert list(fw._open_files.keys()) == [str(tmpdir.join("c.log")), str(tmpdir.join("a.log"))]
+        assert tmpdir.join("a.log").read() == "line\nline\n"
+        fw.close()
+        assert not fw._open_files
+
+    def test_reopens_rotated_file(self, tmpdir):
+        fw = self.make_writer(tmpdir)
+        with mock.patch("paasta_tools.utils.format_log_line", return_value="line", autospec=True):
+            fw.log("service", "line", "component")
+            fw.flush()
+            tmpdir.join("service.log").rename(tmpdir.join("service.log.1"))
+            fw.log("service", "line", "component")
+            fw.flush()
+        assert tmpdir.join("service.log").read() == "line\n"
+        assert tmpdir.join("service.log.1").read() == "line\n"
+        fw.close()
+
+    def test_close_flushes_pending_lines(self, tmpdir):
+        fw = self.make_writer(tmpdir)
+        with mock.patch("paasta_tools.utils.format_log_line", return_value="line", autospec=True):
+            fw.log("service", "line", "component")
+        fw.close()
+        assert tmpdir.join("service.log").read() == "line\n"
+
+    def test_write_raises_IOError(self, tmpdir):
+        fw = self.make_writer(tmpdir)
+        with mock.patch(
+            "paasta_tools.utils.format_log_line", return_value="line", autospec=True,
+        ), mock.patch(
+            "paasta_tools.utils.paasta_print", autospec=True,
+        ) as mock_print:
+            fw.log("service", "line", "component")
+            with mock.patch("paasta_tools.utils.io.FileIO", side_effect=IOError("hurp durp"), autospec=True):
+                fw.flush()
+
+        mock_print.assert_called_once_with(
+            "Could not log to %s: OSError: hurp durp -- would have logged: line\n" % tmpdir.join("service.log"),
+            file=sys.stderr,
+        )
+        fw.close()
+
+
 def test_deep_merge_dictionaries():
     overrides = {
         'common_key': 'value',